@@ -1,4 +1,5 @@
-from gemmforge import DenseMatrix, GenerationError, GemmGenerator
+from gemmforge import DenseMatrix, GenerationError, GemmGenerator, ChainGenerator, GemmSpec
+from gemmforge import RooflinePredictor
 from gemmforge.vm import vm_factory
 from jinja2 import Environment, FileSystemLoader
 import os
@@ -21,6 +22,10 @@ parser.add_argument('-c',
                     '--config',
                     type=str,
                     help='path to configure file')
+parser.add_argument('-f',
+                    '--fused',
+                    action='store_true',
+                    help='generate a single kernel which keeps intermediate results on chip')
 args = parser.parse_args()
 
 
@@ -72,60 +77,87 @@ try:
     kernels = []
     launches = []
     headers = []
+    generators = []
 
     vm = vm_factory(backend=args.backend,
                     arch=args.arch,
                     fp_type=config['fp_type'])
 
-    gen = GemmGenerator(vm)
-    gen.set(trans_a=False,
-            trans_b=False,
-            mat_a=f_mr_t,
-            mat_b=d_k,
-            mat_c=tmp1,
-            alpha=1.0,
-            beta=0.0,
-            base_name='call_FirstGemm')
-    gen.generate()
-    flops_per_op = gen.get_flops()
-
-    kernels.append(gen.get_kernel())
-    launches.append(gen.get_launcher())
-    headers.append(gen.get_launcher_header())
-
-
-    gen = GemmGenerator(vm)
-    gen.set(trans_a=False,
-            trans_b=False,
-            mat_a=tmp1,
-            mat_b=a_plus,
-            mat_c=tmp2,
-            alpha=1.0,
-            beta=0.0,
-            base_name='call_SecondGemm')
-    gen.generate()
-    flops_per_op += gen.get_flops()
-
-    kernels.append(gen.get_kernel())
-    launches.append(gen.get_launcher())
-    headers.append(gen.get_launcher_header())
-
-
-    gen = GemmGenerator(vm)
-    gen.set(trans_a=False,
-            trans_b=False,
-            mat_a=r_div_m,
-            mat_b=tmp2,
-            mat_c=i_surf,
-            alpha=1.0,
-            beta=1.0,
-            base_name='call_ThirdGemm')
-    gen.generate()
-    flops_per_op += gen.get_flops()
-
-    kernels.append(gen.get_kernel())
-    launches.append(gen.get_launcher())
-    headers.append(gen.get_launcher_header())
+    if args.fused:
+        gen = ChainGenerator(vm)
+        gen.set([GemmSpec(False, False, f_mr_t, d_k, tmp1, alpha=1.0, beta=0.0),
+                 GemmSpec(False, False, tmp1, a_plus, tmp2, alpha=1.0, beta=0.0),
+                 GemmSpec(False, False, r_div_m, tmp2, i_surf, alpha=1.0, beta=1.0)],
+                base_name='call_Chain')
+        gen.generate()
+        flops_per_op = gen.get_flops()
+
+        generators.append(gen)
+        kernels.append(gen.get_kernel())
+        launches.append(gen.get_launcher())
+        headers.append(gen.get_launcher_header())
+    else:
+        gen = GemmGenerator(vm)
+        gen.set(trans_a=False,
+                trans_b=False,
+                mat_a=f_mr_t,
+                mat_b=d_k,
+                mat_c=tmp1,
+                alpha=1.0,
+                beta=0.0,
+                base_name='call_FirstGemm')
+        gen.generate()
+        flops_per_op = gen.get_flops()
+
+        generators.append(gen)
+        kernels.append(gen.get_kernel())
+        launches.append(gen.get_launcher())
+        headers.append(gen.get_launcher_header())
+
+
+        gen = GemmGenerator(vm)
+        gen.set(trans_a=False,
+                trans_b=False,
+                mat_a=tmp1,
+                mat_b=a_plus,
+                mat_c=tmp2,
+                alpha=1.0,
+                beta=0.0,
+                base_name='call_SecondGemm')
+        gen.generate()
+        flops_per_op += gen.get_flops()
+
+        generators.append(gen)
+        kernels.append(gen.get_kernel())
+        launches.append(gen.get_launcher())
+        headers.append(gen.get_launcher_header())
+
+
+        gen = GemmGenerator(vm)
+        gen.set(trans_a=False,
+                trans_b=False,
+                mat_a=r_div_m,
+                mat_b=tmp2,
+                mat_c=i_surf,
+                alpha=1.0,
+                beta=1.0,
+                base_name='call_ThirdGemm')
+        gen.generate()
+        flops_per_op += gen.get_flops()
+
+        generators.append(gen)
+        kernels.append(gen.get_kernel())
+        launches.append(gen.get_launcher())
+        headers.append(gen.get_launcher_header())
+
+    # Note: the bound is unknown if the arch. does not support the precision natively
+    roofline_time = None
+    if vm.get_hw_descr().get_peak_gflops(vm.fp_as_str()) is not None:
+        roofline_time = 0.0
+        for gen in generators:
+            estimate = RooflinePredictor(gen).predict()
+            roofline_time += estimate.get_time(config['num_elements'])
+            print(f'roofline: {estimate}')
 
     dir_name = './gen_code'
     if not os.path.exists(dir_name):
@@ -192,8 +224,13 @@ template.globals['get_call_size'] = get_call_size
 names = ['i_surf', 'r_div_m', 'f_mr_t', 'd_k', 'a_plus', 'tmp1', 'tmp2', 'tmp3']
 descriptions = [i_surf, r_div_m, f_mr_t, d_k, a_plus, tmp1, tmp2, tmp3]
 
-params = [['f_mr_t', 'd_k', 'tmp1'], ['tmp1', 'a_plus', 'tmp2'], ['r_div_m', 'tmp2', 'i_surf']]
-launcher_names = ['call_FirstGemm', 'call_SecondGemm', 'call_ThirdGemm']
+if args.fused:
+  # Note: temporaries are not kernel arguments. The rest follow in the order of their first appearance
+  params = [['f_mr_t', 'd_k', 'a_plus', 'r_div_m', 'i_surf']]
+  launcher_names = ['call_Chain']
+else:
+  params = [['f_mr_t', 'd_k', 'tmp1'], ['tmp1', 'a_plus', 'tmp2'], ['r_div_m', 'tmp2', 'i_surf']]
+  launcher_names = ['call_FirstGemm', 'call_SecondGemm', 'call_ThirdGemm']
 
 bench_src = template.render(batchSize=config['num_elements'],
                             names=names,
@@ -202,6 +239,7 @@ bench_src = template.render(batchSize=config['num_elements'],
                             call_site_params=params,
                             real_type=config['fp_type'],
                             flops_per_op=flops_per_op,
+                            roofline_time=None if roofline_time is None else roofline_time * 1e9,
                             num_repeats=config['num_repeats'])
 
 dir_name = './gen_code'
@@ -1,9 +1,21 @@
 from .matrix import DenseMatrix
 from .matrix import SparseMatrix
+from .matrix import BlockSparseMatrix
+from .matrix import load_sparse_matrix
 from gemmforge.vm import vm_factory
 from .gemm_generator import GemmGenerator
 from .gemm_generator import GemmKernelType
 from .csa_generator import CsaGenerator
+from .chain_generator import ChainGenerator
+from .epilogues import AddMatrix, ScaleByVector, CopyTo
+from .interpreter import Interpreter
+from .bank_conflicts import BankConflictAnalyzer
+from .resources import ResourceReport
+from .roofline import RooflinePredictor
+from .cache import KernelCache
+from .tuning import Autotuner, TuningDatabase
+from .session import GenerationSession
+from .batch import GemmSpec, CsaSpec, generate_batch
 from .interfaces import YatetoInterface
 from .exceptions import GenerationError
 from .support import *
@@ -4,6 +4,8 @@ from .exceptions import GenerationError, InternalError
 from .basic_types import DataFlowDirection
 from .basic_types import GeneralLexicon
 from .common import get_extra_offset_name
+from .cache import KernelCache
+from .resources import ResourceReport
 
 
 class AbstractGenerator(ABC):
@@ -20,12 +22,17 @@ class AbstractGenerator(ABC):
     self._num_ops_per_block = None
     self._num_active_threads = None
     self._num_compute_threads = None
+    self._num_regs_per_thread = None
+    self._shr_mem_per_block = None
     self._matrices = []
 
     self._kernel = None
     self._launcher = None
     self._header = None
 
+    self._cache = KernelCache.from_env()
+    self._cache_key = None
+
     @abstractmethod
     def generate(self):
       pass
@@ -58,6 +65,10 @@ class AbstractGenerator(ABC):
     def _generate_base_name(self):
       pass
 
+  def set_cache(self, cache):
+    """Sets a persistent kernel cache. Pass None to disable caching"""
+    self._cache = cache
+
   def _check_if_set(self):
     if not self._is_set:
       raise GenerationError(f'call to generate before set. Please, set params first')
@@ -84,6 +95,10 @@ class AbstractGenerator(ABC):
       return self._header
     raise InternalError("launcher header hasn't been generated")
 
+  def get_resource_report(self):
+    """Returns estimated resources of the generated kernel and its theoretical occupancy"""
+    return ResourceReport.from_generator(self)
+
   def get_element_size_guard(self, writer):
     team_index_str = self._lexic.batch_indexer_gemm()
     writer(f'unsigned {GeneralLexicon.BATCH_ID} = {team_index_str};')
@@ -95,6 +110,55 @@ class AbstractGenerator(ABC):
     writer(f'bool allowed = isFlagsProvided ? {flag_value} : true;')
     return 'allowed'
 
+  @abstractmethod
+  def _get_spec_material(self):
+    """Returns a list of strings which completely describes the requested operation"""
+    pass
+
+  def _get_cache_metadata(self):
+    return {'num_compute_threads': self._num_compute_threads,
+            'num_active_threads': self._num_active_threads,
+            'num_ops_per_block': self._num_ops_per_block,
+            'num_regs_per_thread': self._num_regs_per_thread,
+            'shr_mem_per_block': self._shr_mem_per_block}
+
+  def _set_cache_metadata(self, metadata):
+    self._num_compute_threads = metadata['num_compute_threads']
+    self._num_active_threads = metadata['num_active_threads']
+    self._num_ops_per_block = metadata['num_ops_per_block']
+
+    # Note: records of older versions do not contain resource estimates
+    self._num_regs_per_thread = metadata.get('num_regs_per_thread', None)
+    self._shr_mem_per_block = metadata.get('shr_mem_per_block', None)
+
+  def _load_from_cache(self):
+    """Returns True if the kernel was found in the cache and restored from it"""
+    if self._cache is None:
+      return False
+
+    # Note: the key must be computed before generation because
+    # some generators refine their parameters during generation (e.g., kernel type)
+    self._cache_key = self._cache.make_key(self)
+    record = self._cache.get(self._cache_key)
+    if record is None:
+      return False
+
+    self._kernel = record['kernel']
+    self._launcher = record['launcher']
+    self._header = record['header']
+    self._set_cache_metadata(record['metadata'])
+    return True
+
+  def _store_in_cache(self):
+    if self._cache is None:
+      return
+
+    record = {'kernel': self._kernel,
+              'launcher': self._launcher,
+              'header': self._header,
+              'metadata': self._get_cache_metadata()}
+    self._cache.put(self._cache_key, record)
+
   @abstractmethod
   def _get_func_params(self):
     params = [self._build_param(matrix) for matrix in self._matrices]
@@ -0,0 +1,356 @@
+from .exceptions import GenerationError
+from .symbol_table import SymbolType
+from .common import get_mask_runs
+import numpy as np
+import math
+
+
+def count_wavefronts(hw_descr, addresses, access_size):
+  """Models how shr. mem. serves requests of vector units.
+
+  A request is split into phases each of which moves at most `num_banks * bank_width` bytes
+  (e.g., a half of a warp for 8-byte accesses). A phase takes as many wavefronts as
+  the max. number of distinct words which it accesses within a single bank. Accesses to
+  the same word get broadcast.
+
+  Args:
+    hw_descr: a description of hardware (see HwDecription)
+    addresses: byte addresses of a shape (num_requests, vec_unit_length). Inactive lanes are -1
+    access_size: the number of bytes accessed by each lane
+
+  Returns:
+    numbers of wavefronts with and without bank conflicts, and the max. number of wavefronts per phase
+  """
+  num_banks, bank_width = hw_descr.shr_mem_num_banks, hw_descr.shr_mem_bank_width
+  addresses = np.asarray(addresses, dtype=np.int64)
+  lanes_per_phase = math.gcd(addresses.shape[1], max(1, num_banks * bank_width // access_size))
+  phases = addresses.reshape(-1, lanes_per_phase)
+
+  words_per_lane = max(1, math.ceil(access_size / bank_width))
+  words = phases[:, :, None] // bank_width + np.arange(words_per_lane)[None, None, :]
+  words = np.where(phases[:, :, None] >= 0, words, -1).reshape(-1, lanes_per_phase * words_per_lane)
+
+  words = np.sort(words, axis=1)
+  is_distinct = words >= 0
+  is_distinct[:, 1:] &= words[:, 1:] != words[:, :-1]
+  phase_ids = np.broadcast_to(np.arange(words.shape[0])[:, None], words.shape)
+
+  counts = np.zeros((words.shape[0], num_banks), dtype=np.int64)
+  np.add.at(counts, (phase_ids[is_distinct], words[is_distinct] % num_banks), 1)
+  degrees = counts.max(axis=1, initial=0)
+  return int(degrees.sum()), int(np.count_nonzero(degrees)), int(degrees.max(initial=0))
+
+
+def split_into_vector_units(addresses, vec_unit_length):
+  """Converts addresses of a shape (num_steps, num_threads) to requests of vector units,
+  i.e., to an array of a shape (num_requests, vec_unit_length). Inactive lanes are -1"""
+  addresses = np.asarray(addresses, dtype=np.int64)
+  num_steps, num_threads = addresses.shape
+  num_lanes = math.ceil(num_threads / vec_unit_length) * vec_unit_length
+  requests = np.full((num_steps, num_lanes), -1, dtype=np.int64)
+  requests[:, :num_threads] = addresses
+  return requests.reshape(-1, vec_unit_length)
+
+
+def get_hop_indices(num_items, num_threads, num_lanes):
+  """Returns indices of items copied by threads which hop over `num_items` with a stride
+  `num_threads` as an array of a shape (num_hops, num_lanes). Inactive lanes are -1"""
+  num_hops = math.ceil(num_items / num_threads)
+  lanes = np.arange(num_lanes)[None, :]
+  items = lanes + np.arange(num_hops)[:, None] * num_threads
+  return np.where((lanes < num_threads) & (items < num_items), items, -1)
+
+
+class BankConflictReport:
+  """Bank conflicts of accesses of a single instruction to a single shr. mem. symbol
+  made by all vector units of a block
+
+  Attributes:
+    instruction: a name of the class of an instruction
+    symbol: a name of a shr. mem. symbol
+    is_write: True if the instruction writes to the symbol
+    num_requests: number of requests of vector units
+    num_wavefronts: number of wavefronts (i.e., passes through shr. mem. banks)
+    min_num_wavefronts: number of wavefronts without bank conflicts
+    max_degree: the max. number of wavefronts of a single phase of a request
+  """
+  def __init__(self, instruction, symbol, is_write, num_requests,
+               num_wavefronts, min_num_wavefronts, max_degree):
+    self.instruction = instruction
+    self.symbol = symbol
+    self.is_write = is_write
+    self.num_requests = num_requests
+    self.num_wavefronts = num_wavefronts
+    self.min_num_wavefronts = min_num_wavefronts
+    self.max_degree = max_degree
+
+  def get_degree(self):
+    """Returns the average conflict degree, i.e., 1.0 if accesses are free of bank conflicts"""
+    return self.num_wavefronts / self.min_num_wavefronts if self.min_num_wavefronts else 1.0
+
+  def __str__(self):
+    access = 'write' if self.is_write else 'read'
+    return (f'{self.instruction}: {access} {self.symbol}, degree = {self.get_degree():.2f}, '
+            f'max. degree = {self.max_degree}, requests = {self.num_requests}, '
+            f'wavefronts = {self.num_wavefronts}/{self.min_num_wavefronts}')
+
+
+class BankConflictAnalyzer:
+  """Enumerates shr. mem. addresses which each vector unit of a block touches per loader,
+  gemm and store instruction of a generated kernel and counts wavefronts caused by bank
+  conflicts (see `count_wavefronts`).
+
+  Threads of a block are linearized as `threadIdx.x + threadIdx.y * blockDim.x`. Thus,
+  a vector unit can hold threads of several operations (see `pack_batch_elements`).
+  Loaders are assumed to take their vectorized paths. Instructions which do not access
+  shr. mem. are skipped.
+
+  Note, instructions are available only if a kernel has not been restored from the cache"""
+
+  def __init__(self, generator):
+    if not hasattr(generator, 'get_instructions'):
+      raise GenerationError(f'bank conflicts: {type(generator).__name__} is not supported')
+
+    self._instructions = generator.get_instructions()
+    if not self._instructions:
+      raise GenerationError('bank conflicts: no instructions are given. Either the kernel '
+                            'has not been generated or it has been restored from the cache')
+
+    self._vm = generator._vm
+    self._hw_descr = self._vm.get_hw_descr()
+    self._num_threads = generator._num_active_threads
+    self._num_ops_per_block = generator._num_ops_per_block
+    self._offsets = {}
+    self._size_per_mult = 0
+
+  def analyze(self):
+    """Returns a list of BankConflictReport's in the order of instructions"""
+    self._offsets = {}
+    self._size_per_mult = 0
+    reports = []
+    for instruction in self._instructions:
+      for symbol, addresses, is_write, width in self._get_accesses(instruction):
+        if symbol.stype != SymbolType.SharedMem:
+          continue
+        report = self._make_report(instruction, symbol, addresses, is_write, width)
+        if report.num_requests:
+          reports.append(report)
+    return reports
+
+  def _make_report(self, instruction, symbol, addresses, is_write, width):
+    """Places per-operation addresses of a shape (num_steps, num_threads) to shr. mem.
+    of a block and splits them into requests of vector units"""
+    element_size = self._vm.bytes_per_real()
+    addresses = np.asarray(addresses, dtype=np.int64).reshape(-1, self._num_threads)
+    num_steps = addresses.shape[0]
+    ops = np.arange(self._num_ops_per_block)[None, :, None]
+    offset = self._offsets.get(symbol.name, 0)
+    block_addresses = np.where(addresses[:, None, :] >= 0,
+                               (addresses[:, None, :] + offset + ops * self._size_per_mult) * element_size,
+                               -1).reshape(num_steps, self._num_ops_per_block * self._num_threads)
+    requests = split_into_vector_units(block_addresses, self._hw_descr.vec_unit_length)
+    requests = requests[np.any(requests >= 0, axis=1)]
+    wavefronts = count_wavefronts(self._hw_descr, requests, width * element_size)
+    return BankConflictReport(type(instruction).__name__, symbol.name, is_write, len(requests), *wavefronts)
+
+  def _get_accesses(self, instruction):
+    """Returns a list of (symbol, addresses, is_write, width) where `addresses` are element
+    offsets from the beginning of `symbol` of a shape (num_steps, num_threads) and
+    `width` is the number of elements accessed by each thread at once"""
+    for cls in type(instruction).__mro__:
+      handler = getattr(self, f'_get_accesses_{cls.__name__}', None)
+      if handler is not None:
+        return handler(instruction)
+    return []
+
+  def _get_lanes(self):
+    return np.arange(self._num_threads)[None, :]
+
+  def _mask_lanes(self, addresses, num_active):
+    """Disables threads which are not smaller than `num_active`"""
+    addresses = np.broadcast_to(addresses, addresses.shape[:-1] + (self._num_threads,))
+    return np.where(self._get_lanes() < num_active, addresses, -1)
+
+  def _broadcast(self, indices, num_active):
+    """Returns addresses of reads of `indices` by all active threads (one step per index)"""
+    indices = np.asarray(indices, dtype=np.int64).reshape(-1, 1)
+    return self._mask_lanes(indices, num_active)
+
+  # allocations
+  def _get_accesses_ShrMemAlloc(self, instruction):
+    self._size_per_mult = instruction._dest.obj.get_size_per_mult()
+    return []
+
+  def _get_accesses_ShrMemRegion(self, instruction):
+    self._offsets[instruction._dest.name] = instruction._shr_mem_offset
+    return []
+
+  def _get_accesses_GetSubMatrixPtr(self, instruction):
+    if instruction._src.name in self._offsets:
+      self._offsets[instruction._dest.name] = self._offsets[instruction._src.name] + instruction._offset
+    return []
+
+  # loaders
+  def _get_accesses_AbstractShrMemLoader(self, instruction):
+    self._offsets[instruction._dest.name] = instruction._shr_mem_offset
+    return []
+
+  def _get_accesses_ExtendedPatchLoader(self, instruction):
+    self._get_accesses_AbstractShrMemLoader(instruction)
+    volume = instruction._shm_volume
+    width = instruction._get_vector_width(contiguous_lengths=[])
+    num_vectors = volume // width if width > 1 else 0
+
+    accesses = []
+    if num_vectors:
+      vectors = get_hop_indices(num_vectors, instruction._num_threads, self._num_threads)
+      accesses.append((instruction._dest, np.where(vectors >= 0, vectors * width, -1), True, width))
+    num_vectorized = num_vectors * width
+    items = get_hop_indices(volume - num_vectorized, instruction._num_threads, self._num_threads)
+    accesses.append((instruction._dest, np.where(items >= 0, items + num_vectorized, -1), True, 1))
+    return accesses
+
+  def _get_accesses_ExactPatchLoader(self, instruction):
+    self._get_accesses_AbstractShrMemLoader(instruction)
+    width = instruction._get_patch_vector_width()
+    lead_dim = instruction._dest.data_view.lead_dim
+    steps = []
+    for col_begin, col_end in instruction._col_runs:
+      for col in range(col_begin, col_end):
+        for row_begin, row_end in instruction._row_runs:
+          vectors = get_hop_indices((row_end - row_begin) // width, instruction._num_threads, self._num_threads)
+          steps.append(np.where(vectors >= 0, vectors * width + row_begin + col * lead_dim, -1))
+    return [(instruction._dest, np.concatenate(steps + [np.zeros((0, self._num_threads), dtype=np.int64)]),
+             True, width)]
+
+  def _get_accesses_ExtendedTransposePatchLoader(self, instruction):
+    self._get_accesses_AbstractShrMemLoader(instruction)
+    addresses = instruction._get_shr_mem_addresses(instruction._dest.data_view.lead_dim)
+    return [(instruction._dest, self._mask_lanes(addresses, instruction._num_threads), True, 1)]
+
+  def _get_accesses_ExactTransposePatchLoader(self, instruction):
+    return self._get_accesses_ExtendedTransposePatchLoader(instruction)
+
+  def _get_accesses_BlockPatchLoader(self, instruction):
+    self._get_accesses_AbstractShrMemLoader(instruction)
+    items = get_hop_indices(instruction._shm_volume, instruction._num_threads, self._num_threads)
+    return [(instruction._dest, items, True, 1)]
+
+  # dense gemms
+  def _get_accesses_ShrMemBasedDenseGemm(self, instruction):
+    op1, op2 = instruction._op1, instruction._op2
+    trans_a = instruction._trans_a
+    num_rows = op1.data_view.columns if trans_a else op1.data_view.rows
+    num_k = op1.data_view.rows if trans_a else op1.data_view.columns
+    ks = np.concatenate([np.arange(begin, end) for begin, end in get_mask_runs(instruction._k_mask, num_k)]
+                        + [np.zeros(0, dtype=np.int64)])[:, None]
+    cols = np.arange(instruction._dest.obj.size)[None, :]
+
+    lanes = self._get_lanes()
+    if trans_a:
+      addresses1 = ks + lanes * op1.data_view.lead_dim
+    else:
+      addresses1 = lanes + ks * op1.data_view.lead_dim
+
+    if instruction._trans_b:
+      index2 = cols + op2.data_view.lead_dim * ks
+    else:
+      index2 = ks + op2.data_view.lead_dim * cols
+    return [(op1, self._mask_lanes(addresses1, num_rows), False, 1),
+            (op2, self._broadcast(index2, num_rows), False, 1)]
+
+  def _get_accesses_RegisterOnlyDenseGemm(self, instruction):
+    return self._get_accesses_ShrMemBasedDenseGemm(instruction)
+
+  def _get_accesses_RegisterBlockedDenseGemm(self, instruction):
+    op1, op2 = instruction._op1, instruction._op2
+    num_rows = op1.data_view.rows
+    num_cols = op2.data_view.rows if instruction._trans_b else op2.data_view.columns
+    tile_rows, tile_cols = instruction._micro_tile
+    num_row_groups, num_col_groups = instruction._num_row_groups, instruction._num_col_groups
+    ks = np.concatenate([np.arange(begin, end)
+                         for begin, end in get_mask_runs(instruction._k_mask, op1.data_view.columns)]
+                        + [np.zeros(0, dtype=np.int64)])
+
+    # Note: out-of-range rows and columns of a tile are clamped as in the generated code
+    lanes = self._get_lanes()
+    rows = np.minimum(lanes % num_row_groups + np.arange(tile_rows)[:, None] * num_row_groups, num_rows - 1)
+    cols = np.minimum(lanes // num_row_groups + np.arange(tile_cols)[:, None] * num_col_groups, num_cols - 1)
+
+    addresses1 = rows[None, :, :] + ks[:, None, None] * op1.data_view.lead_dim
+    if instruction._trans_b:
+      addresses2 = cols[None, :, :] + op2.data_view.lead_dim * ks[:, None, None]
+    else:
+      addresses2 = ks[:, None, None] + op2.data_view.lead_dim * cols[None, :, :]
+
+    num_groups = num_row_groups * num_col_groups
+    return [(op1, self._mask_lanes(addresses1, num_groups), False, 1),
+            (op2, self._mask_lanes(addresses2, num_groups), False, 1)]
+
+  # sparse gemms
+  @classmethod
+  def _get_non_zeros(cls, matrix):
+    coordinates = np.asarray(matrix.get_coordinate_array(), dtype=np.int64).reshape(-1, 2)
+    return coordinates[:, 0][:, None], coordinates[:, 1][:, None]
+
+  def _get_sparse_accesses(self, symbol, matrix, num_active):
+    """Returns reads of values of a sparse matrix unless they are known at compile-time.
+    All threads read the same value at once"""
+    if matrix.get_values() is not None:
+      return []
+    return [(symbol, self._broadcast(np.arange(matrix.get_el_count()), num_active), False, 1)]
+
+  def _get_accesses_ShrMemBasedDenseSparseGemm(self, instruction):
+    op1 = instruction._op1
+    rows, _ = self._get_non_zeros(instruction._mat_b)
+    addresses = self._get_lanes() + rows * op1.data_view.lead_dim
+    return ([(op1, self._mask_lanes(addresses, op1.data_view.rows), False, 1)]
+            + self._get_sparse_accesses(instruction._op2, instruction._mat_b, op1.data_view.rows))
+
+  def _get_accesses_ShrMemBasedSparseDenseGemm(self, instruction):
+    op2 = instruction._op2
+    _, cols = self._get_non_zeros(instruction._mat_a)
+    addresses = self._get_lanes() * op2.data_view.lead_dim + cols
+    return ([(op2, self._mask_lanes(addresses, op2.data_view.columns), False, 1)]
+            + self._get_sparse_accesses(instruction._op1, instruction._mat_a, op2.data_view.columns))
+
+  # stores
+  def _get_accesses_StoreRegToShrMem(self, instruction):
+    dest = instruction._dest
+    cols = np.arange(dest.data_view.columns)[:, None]
+    addresses = self._mask_lanes(self._get_lanes() + dest.data_view.lead_dim * cols, instruction._num_threads)
+    accesses = [(dest, addresses, True, 1)]
+    if not isinstance(instruction._beta, float) or instruction._beta != 0.0:
+      accesses.insert(0, (dest, addresses, False, 1))
+    return accesses
+
+  def _get_accesses_StoreRegToShrMemColumn(self, instruction):
+    dest = instruction._dest
+    rows = np.arange(dest.obj.get_actual_num_rows())[:, None]
+    addresses = self._mask_lanes(self._get_lanes() * dest.obj.num_rows + rows, instruction._num_threads)
+    accesses = [(dest, addresses, True, 1)]
+    if not isinstance(instruction._beta, float) or instruction._beta != 0.0:
+      accesses.insert(0, (dest, addresses, False, 1))
+    return accesses
+
+  def _get_accesses_StoreShrMemToGlb(self, instruction):
+    lead_dim = instruction._dest.data_view.lead_dim
+    steps = []
+    for col in range(instruction._dest.data_view.columns):
+      items = get_hop_indices(lead_dim, instruction._num_threads, self._num_threads)
+      steps.append(np.where(items >= 0, items + col * lead_dim, -1))
+    return [(instruction._src, np.concatenate(steps + [np.zeros((0, self._num_threads), dtype=np.int64)]),
+             False, 1)]
+
+  def _get_accesses_CopyAddScale(self, instruction):
+    src, dest = instruction._src, instruction._dest
+    num_rows = src.data_view.rows
+    cols = np.arange(src.data_view.columns)[:, None]
+    src_addresses = self._mask_lanes(self._get_lanes() + cols * src.data_view.lead_dim, num_rows)
+    dest_addresses = self._mask_lanes(self._get_lanes() + cols * dest.data_view.lead_dim, num_rows)
+
+    accesses = [(src, src_addresses, False, 1)]
+    if not isinstance(instruction._beta, float) or instruction._beta != 0.0:
+      accesses.append((dest, dest_addresses, False, 1))
+    accesses.append((dest, dest_addresses, True, 1))
+    return accesses
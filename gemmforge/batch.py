@@ -0,0 +1,107 @@
+from .cache import make_spec_key
+from .csa_generator import CsaGenerator
+from .exceptions import GenerationError
+from .gemm_generator import GemmGenerator
+from .instructions.builders.kernels import GemmKernelType
+from concurrent.futures import ProcessPoolExecutor
+
+
+class GemmSpec:
+  """Describes a GEMM operation: C = alpha * A * B + beta * C.
+  Extra keyword arguments are forwarded to GemmGenerator"""
+  def __init__(self, trans_a, trans_b, mat_a, mat_b, mat_c, alpha, beta,
+               base_name=None, kernel_type=GemmKernelType.AUTO, epilogues=None, num_elements=None,
+               **options):
+    self.trans_a = trans_a
+    self.trans_b = trans_b
+    self.mat_a = mat_a
+    self.mat_b = mat_b
+    self.mat_c = mat_c
+    self.alpha = alpha
+    self.beta = beta
+    self.base_name = base_name
+    self.kernel_type = kernel_type
+    self.epilogues = epilogues
+    self.num_elements = num_elements
+    self.options = options
+
+  def make_generator(self, vm):
+    generator = GemmGenerator(vm, self.kernel_type, **self.options)
+    generator.set(self.trans_a, self.trans_b,
+                  self.mat_a, self.mat_b, self.mat_c,
+                  self.alpha, self.beta,
+                  base_name=self.base_name,
+                  epilogues=self.epilogues,
+                  num_elements=self.num_elements)
+    return generator
+
+
+class CsaSpec:
+  """Describes a copy-scale-add operation: B = alpha * A + beta * B"""
+  def __init__(self, mat_a, mat_b, alpha, beta, base_name=None):
+    self.mat_a = mat_a
+    self.mat_b = mat_b
+    self.alpha = alpha
+    self.beta = beta
+    self.base_name = base_name
+
+  def make_generator(self, vm):
+    generator = CsaGenerator(vm)
+    generator.set(self.mat_a, self.mat_b, self.alpha, self.beta, base_name=self.base_name)
+    return generator
+
+
+class BatchResult:
+  def __init__(self, base_name, kernel, launcher, header, resource_report):
+    self.base_name = base_name
+    self.kernel = kernel
+    self.launcher = launcher
+    self.header = header
+    self.resource_report = resource_report
+
+
+def _generate_single(vm, spec):
+  generator = spec.make_generator(vm)
+  generator.generate()
+  return BatchResult(base_name=generator.get_base_name(),
+                     kernel=generator.get_kernel(),
+                     launcher=generator.get_launcher(),
+                     header=generator.get_launcher_header(),
+                     resource_report=generator.get_resource_report())
+
+
+def generate_batch(vm, specs, max_workers=None):
+  """Generates kernels for a list of GemmSpec/CsaSpec objects using a pool of processes.
+
+  Structurally identical specs are generated only once. The i-th result corresponds
+  to the i-th spec; duplicates refer to the same result object. Pass `max_workers=1`
+  to generate kernels in the calling process.
+
+  Returns:
+    a list of BatchResult objects
+  """
+  unique_specs = []
+  spec_indices = []
+  key_to_index = {}
+  base_names = set()
+  for spec in specs:
+    key = make_spec_key(spec.make_generator(vm))
+    if key not in key_to_index:
+      if spec.base_name is not None:
+        if spec.base_name in base_names:
+          raise GenerationError(f'batch: base name {spec.base_name} is already used by another kernel')
+        base_names.add(spec.base_name)
+
+      key_to_index[key] = len(unique_specs)
+      unique_specs.append(spec)
+    spec_indices.append(key_to_index[key])
+
+  if max_workers == 1 or len(unique_specs) <= 1:
+    unique_results = [_generate_single(vm, spec) for spec in unique_specs]
+  else:
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+      unique_results = list(executor.map(_generate_single,
+                                         [vm] * len(unique_specs),
+                                         unique_specs))
+
+  return [unique_results[index] for index in spec_indices]
@@ -0,0 +1,186 @@
+from .matrix import SparseMatrix
+import hashlib
+import json
+import os
+import tempfile
+
+try:
+  import fcntl
+except ImportError:  # e.g., Windows
+  fcntl = None
+
+
+def _read_version():
+  current_dir = os.path.dirname(os.path.abspath(__file__))
+  with open(os.path.join(current_dir, 'VERSION')) as version_file:
+    return version_file.read().strip()
+
+
+def describe_matrix(matrix):
+  """Returns a string which uniquely describes a matrix from the generation point of view"""
+  description = str(matrix)
+  if isinstance(matrix, SparseMatrix):
+    description += f'pattern = {matrix.get_fingerprint()}\n'
+  return description
+
+
+def make_spec_key(generator):
+  """Computes a key from the complete specification of a generator excluding its base name.
+  Note, `set` must have been called on the generator before"""
+  vm = generator._vm
+  hw_descr = vm.get_hw_descr()
+  material = [f'arch: {hw_descr.model}',
+              f'backend: {hw_descr.backend}',
+              f'fp_type: {vm.fp_as_str()}',
+              f'generator: {type(generator).__name__}']
+  material.extend(generator._get_spec_material())
+  return hashlib.sha256('\n'.join(material).encode()).hexdigest()
+
+
+class KernelCache:
+  """Persistent content-addressed storage of generated kernels.
+
+  Each entry is kept in a separate json-file named after its key. Entries are written
+  to a temporary file first and then atomically moved in place. Thus, concurrent writers
+  (e.g., parallel CMake generation steps) never observe partially written entries.
+  The cache is bounded by `max_size` (in bytes). The least recently used entries
+  are evicted once the bound is exceeded.
+  """
+  ENV_PATH = 'GEMMFORGE_CACHE_DIR'
+  ENV_MAX_SIZE = 'GEMMFORGE_CACHE_MAX_SIZE'
+  DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+  SUFFIX = '.json'
+  LOCK_NAME = '.lock'
+
+  def __init__(self, path, max_size=DEFAULT_MAX_SIZE):
+    self._path = os.path.abspath(path)
+    self._max_size = max_size
+    self._version = _read_version()
+
+  @classmethod
+  def from_env(cls):
+    """Returns a cache object if `GEMMFORGE_CACHE_DIR` env. variable is set. Otherwise, None"""
+    path = os.environ.get(cls.ENV_PATH, None)
+    if not path:
+      return None
+    max_size = os.environ.get(cls.ENV_MAX_SIZE, None)
+    max_size = int(max_size) if max_size else cls.DEFAULT_MAX_SIZE
+    return cls(path, max_size)
+
+  @property
+  def path(self):
+    return self._path
+
+  def make_key(self, generator):
+    """Computes a key from the complete specification of a generator.
+    Note, `set` must have been called on the generator before"""
+    material = [f'version: {self._version}',
+                f'base_name: {generator.get_base_name()}',
+                make_spec_key(generator)]
+    return hashlib.sha256('\n'.join(material).encode()).hexdigest()
+
+  def get(self, key):
+    """Returns a stored record or None if there is no such entry"""
+    file_path = self._get_file_path(key)
+    try:
+      with open(file_path, 'r') as file:
+        record = json.load(file)
+    except (OSError, ValueError):
+      return None
+
+    try:
+      # mark as recently used
+      os.utime(file_path, None)
+    except OSError:
+      pass
+    return record
+
+  def put(self, key, record):
+    os.makedirs(self._path, exist_ok=True)
+    file_descr, tmp_path = tempfile.mkstemp(dir=self._path, suffix='.tmp')
+    try:
+      with os.fdopen(file_descr, 'w') as file:
+        json.dump(record, file)
+      os.replace(tmp_path, self._get_file_path(key))
+    except OSError:
+      if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+      raise
+    self._evict()
+
+  def clear(self):
+    with self._lock():
+      for file_path, _, _ in self._list_entries():
+        self._remove(file_path)
+
+  def get_size(self):
+    return sum(size for _, _, size in self._list_entries())
+
+  def __contains__(self, key):
+    return os.path.exists(self._get_file_path(key))
+
+  def _get_file_path(self, key):
+    return os.path.join(self._path, f'{key}{KernelCache.SUFFIX}')
+
+  def _list_entries(self):
+    entries = []
+    try:
+      names = os.listdir(self._path)
+    except OSError:
+      return entries
+
+    for name in names:
+      if not name.endswith(KernelCache.SUFFIX):
+        continue
+      file_path = os.path.join(self._path, name)
+      try:
+        stat = os.stat(file_path)
+      except OSError:
+        # removed by a concurrent process
+        continue
+      entries.append((file_path, stat.st_mtime, stat.st_size))
+    return entries
+
+  def _evict(self):
+    entries = self._list_entries()
+    total_size = sum(size for _, _, size in entries)
+    if total_size <= self._max_size:
+      return
+
+    with self._lock():
+      entries = sorted(self._list_entries(), key=lambda entry: entry[1])
+      total_size = sum(size for _, _, size in entries)
+      for file_path, _, size in entries:
+        if total_size <= self._max_size:
+          break
+        self._remove(file_path)
+        total_size -= size
+
+  def _remove(self, file_path):
+    try:
+      os.remove(file_path)
+    except OSError:
+      pass
+
+  def _lock(self):
+    return _FileLock(os.path.join(self._path, KernelCache.LOCK_NAME))
+
+
+class _FileLock:
+  """Inter-process lock. Falls back to a no-op if `fcntl` is not available"""
+  def __init__(self, path):
+    self._path = path
+    self._file = None
+
+  def __enter__(self):
+    if fcntl is not None:
+      os.makedirs(os.path.dirname(self._path), exist_ok=True)
+      self._file = open(self._path, 'w')
+      fcntl.flock(self._file, fcntl.LOCK_EX)
+    return self
+
+  def __exit__(self, type, value, traceback):
+    if self._file is not None:
+      fcntl.flock(self._file, fcntl.LOCK_UN)
+      self._file.close()
+      self._file = None
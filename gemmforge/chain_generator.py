@@ -0,0 +1,503 @@
+from . import constructs
+from io import StringIO
+from .exceptions import GenerationError
+from .abstract_gemmlike_generator import GemmLikeGenerator
+from .abstract_generator import AbstractGenerator as Generator
+from .basic_types import GeneralLexicon, DataFlowDirection
+from .symbol_table import InverseSymbolTable, Symbol, SymbolType, DataView
+from .batch import GemmSpec, CsaSpec
+from .instructions import SyncThreads, ShrMemRegion, StoreRegToGlb, StoreRegToShrMem, CopyAddScale
+from .instructions.builders import GetElementPtrBuilder, RegistersAllocBuilder, ShrMemAllocBuilder
+from .instructions.builders import ShrMemBasedDenseGemmBuilder
+from .instructions.builders.kernels import GemmKernelType
+from .vm import VM
+from .thread_policies import TheadPolicyFactory
+from .matrix import SparseMatrix
+from .cache import describe_matrix
+import math
+import hashlib
+
+
+def assign_shr_mem_offsets(buffers):
+  """Places buffers with known lifetimes in shr. mem. Buffers which are not alive at the same
+  time may share memory. Each buffer gets the lowest offset which does not collide with
+  the buffers placed before (first-fit)
+
+  Args:
+    buffers: a list of (first_op, last_op, size) tuples ordered by `first_op`
+
+  Returns:
+    a list of offsets and the total size of shr. mem.
+  """
+  placed = []
+  offsets = []
+  total_size = 0
+  for first_op, last_op, size in buffers:
+    alive = sorted((begin, end) for begin, end, other_first, other_last in placed
+                   if other_first <= last_op and first_op <= other_last)
+    offset = 0
+    for begin, end in alive:
+      if offset + size <= begin:
+        break
+      offset = max(offset, end)
+
+    placed.append((offset, offset + size, first_op, last_op))
+    offsets.append(offset)
+    total_size = max(total_size, offset + size)
+  return offsets, total_size
+
+
+class ChainGenerator(GemmLikeGenerator):
+  """ Fuses a chain of GEMM and copy-add-scale operations into a single GPU kernel.
+
+  Operations are given as GemmSpec/CsaSpec objects and get executed in the given order.
+  Dependencies between operations follow from matrix objects shared by them.
+  Intermediate results (temporaries) never reach glb. memory. A temporary stays in registers
+  if it is produced by a single GEMM with alpha = 1 and read only row-wise, i.e., as non-transposed A
+  or as a term of a copy-add-scale. Otherwise, it gets a region of shr. memory which can be reused
+  after the last read of the temporary.
+
+  Kernel arguments are the remaining matrices in the order of their first appearance.
+  Only dense matrices and compile-time scalars are supported
+  """
+
+  def __init__(self, vm: VM):
+    super(ChainGenerator, self).__init__(vm)
+    self._ops = []
+    self._temporaries = []
+    self._register_temporaries = []
+    self._locations = {}
+
+    self._shr_mem_obj = None
+    self._op_instructions = []
+
+  def set(self, ops, temporaries=None, base_name=None):
+    """
+    Args:
+      ops: a list of GemmSpec and CsaSpec objects
+      temporaries: matrices which hold intermediate results. By default, a matrix becomes a temporary
+        if it is completely written (beta = 0) before it is read and it is not written after its last read
+      base_name: a name of the kernel launcher
+    """
+    self._instructions = []
+    self._symbol_table = InverseSymbolTable()
+    self._locations = {}
+
+    self._ops = list(ops)
+    if not self._ops:
+      raise GenerationError('chain: at least one operation is required')
+
+    for op in self._ops:
+      if not isinstance(op, (GemmSpec, CsaSpec)):
+        raise GenerationError(f'chain: expected either GemmSpec or CsaSpec, given: {type(op).__name__}')
+
+    self._temporaries = self._find_temporaries() if temporaries is None else list(temporaries)
+    self._register_temporaries = [temporary for temporary in self._temporaries
+                                  if self._can_stay_in_registers(temporary)]
+
+    self._matrices = []
+    for matrix in self._get_all_matrices():
+      if matrix in self._temporaries:
+        continue
+      matrix.set_name(f'M{len(self._matrices)}')
+      is_written = any(matrix is self._get_result(op) for op in self._ops)
+      matrix.set_data_flow_direction(DataFlowDirection.SINK if is_written else DataFlowDirection.SOURCE)
+      self._matrices.append(matrix)
+
+    for index, temporary in enumerate(self._temporaries):
+      temporary.set_name(f'tmp{index}')
+
+    self._base_name = base_name if base_name is not None else self._generate_base_name()
+    self._is_set = True
+
+  def generate(self):
+    self._check_if_set()
+    if self._load_from_cache():
+      return
+
+    self._check()
+    self._deduce_num_threads()
+    self._populate_global_scope()
+    self._emit_instructions()
+
+    self._analyze()
+    self._generate_kernel()
+    self._generate_header()
+    self._generate_launcher()
+    self._store_in_cache()
+
+  def get_flops(self):
+    flops_per_op = 0
+    for op in self._ops:
+      if isinstance(op, GemmSpec):
+        m, k = self._get_op1_dims(op)
+        n = op.mat_c.get_actual_num_cols()
+        flops_per_op += 2 * (k - 1) * m * n
+      else:
+        flops_per_op += op.mat_a.get_actual_volume()
+
+      if op.beta:
+        flops_per_op += self._get_result(op).get_actual_volume()
+    return flops_per_op
+
+  def get_temporaries(self):
+    """Returns a list of (matrix, symbol type) pairs where the symbol type tells
+    whether a temporary lives in registers or in shr. mem."""
+    return [(temporary, SymbolType.Register if temporary in self._register_temporaries else SymbolType.SharedMem)
+            for temporary in self._temporaries]
+
+  def get_instructions(self):
+    """Returns the instruction stream of a kernel in the order of the generated code.
+    See GemmGenerator.get_instructions"""
+    instructions = list(self._instructions)
+    for outer_instructions, inner_instructions in self._op_instructions:
+      instructions.extend(outer_instructions + inner_instructions)
+    return instructions
+
+  @classmethod
+  def _get_result(cls, op):
+    return op.mat_c if isinstance(op, GemmSpec) else op.mat_b
+
+  @classmethod
+  def _get_sources(cls, op):
+    sources = [op.mat_a, op.mat_b] if isinstance(op, GemmSpec) else [op.mat_a]
+    if op.beta != 0.0:
+      sources.append(cls._get_result(op))
+    return sources
+
+  @classmethod
+  def _get_op1_dims(cls, op):
+    if op.trans_a:
+      return op.mat_a.get_actual_num_cols(), op.mat_a.get_actual_num_rows()
+    else:
+      return op.mat_a.get_actual_num_rows(), op.mat_a.get_actual_num_cols()
+
+  @classmethod
+  def _get_op2_dims(cls, op):
+    if op.trans_b:
+      return op.mat_b.get_actual_num_cols(), op.mat_b.get_actual_num_rows()
+    else:
+      return op.mat_b.get_actual_num_rows(), op.mat_b.get_actual_num_cols()
+
+  def _get_all_matrices(self):
+    matrices = []
+    for op in self._ops:
+      for matrix in self._get_sources(op) + [self._get_result(op)]:
+        if not any(matrix is known for known in matrices):
+          matrices.append(matrix)
+    return matrices
+
+  def _get_lifetime(self, matrix):
+    accesses = [index for index, op in enumerate(self._ops)
+                if matrix is self._get_result(op) or any(matrix is source for source in self._get_sources(op))]
+    return accesses[0], accesses[-1]
+
+  def _is_written_first(self, matrix):
+    first_op, _ = self._get_lifetime(matrix)
+    op = self._ops[first_op]
+    return matrix is self._get_result(op) and not any(matrix is source for source in self._get_sources(op))
+
+  def _find_temporaries(self):
+    temporaries = []
+    for matrix in self._get_all_matrices():
+      first_op, last_op = self._get_lifetime(matrix)
+      # Note: a matrix, written by the last operation which accesses it, is a result of the chain
+      is_read_last = first_op != last_op and matrix is not self._get_result(self._ops[last_op])
+      if self._is_written_first(matrix) and is_read_last:
+        temporaries.append(matrix)
+    return temporaries
+
+  def _can_stay_in_registers(self, temporary):
+    """Checks whether each thread only needs the row of a temporary which it has computed"""
+    writers = [op for op in self._ops if temporary is self._get_result(op)]
+    if len(writers) != 1 or not isinstance(writers[0], GemmSpec) or writers[0].alpha != 1.0:
+      return False
+
+    for op in self._ops:
+      if not any(temporary is source for source in self._get_sources(op)):
+        continue
+      if op is writers[0]:
+        return False
+      if isinstance(op, GemmSpec):
+        if op.trans_a or op.mat_a is not temporary or op.mat_b is temporary:
+          return False
+      elif op.mat_a is not temporary:
+        return False
+    return True
+
+  def _check(self):
+    for index, op in enumerate(self._ops):
+      if not isinstance(op.alpha, float) or not isinstance(op.beta, float):
+        raise GenerationError(f'chain: op. {index} must have compile-time (float) alpha and beta')
+
+      for matrix in self._get_sources(op) + [self._get_result(op)]:
+        if isinstance(matrix, SparseMatrix):
+          raise GenerationError(f'chain: op. {index} has a sparse operand. Only dense matrices are supported')
+
+      if isinstance(op, GemmSpec):
+        if op.kernel_type != GemmKernelType.AUTO or op.options or op.epilogues or op.num_elements is not None:
+          raise GenerationError(f'chain: op. {index} requests generation options '
+                                'which are not supported by fused kernels')
+
+        m, k = self._get_op1_dims(op)
+        k_b, n = self._get_op2_dims(op)
+        if k != k_b or m != op.mat_c.get_actual_num_rows() or n != op.mat_c.get_actual_num_cols():
+          raise GenerationError(f'chain: operands of op. {index} (GEMM) do not match: '
+                                f'A is {m}x{k}, B is {k_b}x{n}, C is '
+                                f'{op.mat_c.get_actual_num_rows()}x{op.mat_c.get_actual_num_cols()}')
+      else:
+        if (op.mat_a.get_actual_num_rows() > op.mat_b.get_actual_num_rows() or
+            op.mat_a.get_actual_num_cols() > op.mat_b.get_actual_num_cols()):
+          raise GenerationError(f'chain: mat. A of op. {index} (copy-add-scale) does not fit into mat. B')
+
+    for temporary in self._temporaries:
+      if not any(temporary is matrix for matrix in self._get_all_matrices()):
+        raise GenerationError(f'chain: temporary {temporary.name} is not used by any operation')
+      if not self._is_written_first(temporary):
+        raise GenerationError(f'chain: temporary {temporary.name} is read before it gets completely written')
+
+  def _deduce_num_threads(self):
+    num_rows = []
+    for op in self._ops:
+      if isinstance(op, GemmSpec):
+        num_rows.append(op.mat_c.get_actual_num_rows())
+      else:
+        num_rows.append(op.mat_a.get_actual_num_rows())
+
+    vec_unit_length = self._hw_descr.vec_unit_length
+    self._num_compute_threads = max(num_rows)
+    self._num_active_threads = math.ceil(self._num_compute_threads / vec_unit_length) * vec_unit_length
+
+  def _populate_global_scope(self):
+    for matrix in self._matrices:
+      self._symbol_table.add_symbol(Symbol(obj=matrix,
+                                           name=matrix.name,
+                                           stype=SymbolType.Batch))
+    self._symbol_table.add_scope()
+
+  def _emit_instructions(self):
+    builder = GetElementPtrBuilder(self._vm, self._symbol_table)
+    for symbol in self._symbol_table.from_global.values():
+      builder.build(symbol)
+      self._instructions.extend(builder.get_instructions())
+      self._locations[symbol.obj] = self._symbol_table[symbol.obj]
+
+    builder = ShrMemAllocBuilder(self._vm, self._symbol_table)
+    builder.build(size=None)
+    shr_mem_alloc = builder.get_instructions()
+    self._instructions.extend(shr_mem_alloc)
+    self._shr_mem_obj = builder.get_resultant_obj()
+    shr_mem = self._symbol_table[self._shr_mem_obj]
+
+    # Note: temporaries in shr. mem. must be visible to all operations
+    shr_mem_buffers = []
+    for temporary in self._temporaries:
+      if temporary in self._register_temporaries:
+        continue
+      region = Symbol(name=temporary.name, stype=SymbolType.SharedMem, obj=temporary)
+      region.data_view = DataView(rows=temporary.get_actual_num_rows(),
+                                  columns=temporary.get_actual_num_cols(),
+                                  lead_dim=temporary.get_actual_num_rows(),
+                                  is_transposed=False)
+      self._symbol_table.add_symbol(region)
+      self._locations[temporary] = region
+
+      region_alloc = ShrMemRegion(self._vm, region, shr_mem, temporary.get_actual_volume())
+      self._instructions.append(region_alloc)
+      shr_mem_buffers.append((*self._get_lifetime(temporary), region_alloc))
+
+    self._op_instructions = []
+    reg_builder = RegistersAllocBuilder(self._vm, self._symbol_table)
+    for index, op in enumerate(self._ops):
+      # Note: a barrier separates accesses of consecutive operations
+      # to glb. and shr. mem. (e.g., reuse of shr. mem. regions)
+      outer_instructions = [SyncThreads(self._vm, self._num_active_threads)] if index else []
+      inner_instructions = []
+      result = self._get_result(op)
+
+      if isinstance(op, GemmSpec):
+        reg_builder.build(result.get_actual_num_cols(), 0.0)
+        outer_instructions.extend(reg_builder.get_instructions())
+        reg_array_obj = reg_builder.get_resultant_obj()
+        accumulator = self._symbol_table[reg_array_obj]
+
+        builder = ShrMemBasedDenseGemmBuilder(self._vm,
+                                              self._symbol_table,
+                                              reg_array_obj,
+                                              self._shr_mem_obj,
+                                              self._num_active_threads)
+        builder.build(trans_a=op.trans_a,
+                      trans_b=op.trans_b,
+                      op1=self._locations[op.mat_a],
+                      op2=self._locations[op.mat_b],
+                      dest=accumulator)
+        self._symbol_table.pop_scope()
+
+        inner_instructions.extend(builder.get_instructions())
+        for load in builder.get_srh_mem_loads():
+          shr_mem_buffers.append((index, index, load))
+
+        if result in self._register_temporaries:
+          accumulator.data_view = DataView(rows=result.get_actual_num_rows(),
+                                           columns=result.get_actual_num_cols(),
+                                           lead_dim=result.get_actual_num_rows(),
+                                           is_transposed=False)
+          self._locations[result] = accumulator
+        elif result in self._temporaries:
+          inner_instructions.append(StoreRegToShrMem(self._vm,
+                                                     self._locations[result],
+                                                     accumulator,
+                                                     op.alpha,
+                                                     op.beta,
+                                                     result.get_actual_num_rows()))
+        else:
+          inner_instructions.append(StoreRegToGlb(self._vm,
+                                                  self._locations[result],
+                                                  accumulator,
+                                                  op.alpha,
+                                                  op.beta,
+                                                  result.get_actual_num_rows()))
+      else:
+        inner_instructions.append(CopyAddScale(self._vm,
+                                               self._locations[op.mat_a],
+                                               self._locations[result],
+                                               op.alpha,
+                                               op.beta))
+
+      self._op_instructions.append((outer_instructions, inner_instructions))
+
+    shr_mem_buffers.sort(key=lambda buffer: buffer[0])
+    offsets, shr_mem_size = assign_shr_mem_offsets([(first_op, last_op, instr.compute_shared_mem_size())
+                                                    for first_op, last_op, instr in shr_mem_buffers])
+    for (_, _, instr), offset in zip(shr_mem_buffers, offsets):
+      instr.set_shr_mem_offset(offset)
+    self._shr_mem_obj.set_size_per_mult(shr_mem_size)
+    if not shr_mem_size:
+      self._instructions = [instr for instr in self._instructions if instr not in shr_mem_alloc]
+
+  def _analyze(self):
+    shr_mem_per_op = self._shr_mem_obj.get_size_per_mult()
+    gemms = [op for op in self._ops if isinstance(op, GemmSpec)]
+    if gemms:
+      # Note: the widest accumulator determines register pressure
+      widest = max(gemms, key=lambda op: op.mat_c.get_actual_num_cols())
+      thread_policy = TheadPolicyFactory.get_gemm_policy(vm=self._vm,
+                                                         shr_mem_per_op=shr_mem_per_op,
+                                                         num_threads=self._num_active_threads,
+                                                         op1=widest.mat_a,
+                                                         op2=widest.mat_b,
+                                                         res=widest.mat_c)
+    else:
+      thread_policy = TheadPolicyFactory.get_csa_policy(vm=self._vm,
+                                                        num_threads=self._num_active_threads,
+                                                        op1=self._ops[0].mat_a,
+                                                        op2=self._ops[0].mat_b)
+
+    self._num_ops_per_block = thread_policy.get_num_ops_per_block()
+    self._shr_mem_obj.set_mults_per_block(self._num_ops_per_block)
+    self._num_regs_per_thread = math.ceil(thread_policy.get_num_regs_per_thread())
+    self._shr_mem_per_block = self._shr_mem_obj.get_total_size() * self._vm.bytes_per_real()
+
+  def _generate_kernel(self):
+    src = StringIO()
+    with constructs.Cpp(src) as file:
+
+      max_num_threads_per_block = self._num_active_threads * self._num_ops_per_block
+      kernel_bounds = [max_num_threads_per_block]
+
+      with self._lexic.kernel_definition(file,
+                                         kernel_bounds,
+                                         self._base_name,
+                                         self._get_func_params(),
+                                         self._precision,
+                                         self._shr_mem_obj.get_total_size()):
+        with file.If(f'{self.get_element_size_guard(file)}'):
+          with file.If(f'{self.get_flag_guard(file)}'):
+
+            self._gen_instructions(file, self._instructions)
+
+            for outer_instructions, inner_instructions in self._op_instructions:
+              self._gen_instructions(file, outer_instructions)
+              with file.Scope():
+                self._gen_instructions(file, inner_instructions)
+
+      self._kernel = src.getvalue()
+
+  def _gen_instructions(self, file, instructions):
+    for instr in instructions:
+      if instr.is_ready():
+        instr.gen_code(file)
+      else:
+        raise GenerationError("chain_generator: requested instr is not ready: " + str(instr))
+
+  def _generate_launcher(self):
+    src = StringIO()
+    with constructs.Cpp(src) as file:
+      with file.Function(self._base_name, self._get_launcher_params()):
+        file(f'{self._lexic.kernel_range_object()} {self._get_block_dim_spec()};')
+        file(f'{self._lexic.kernel_range_object()} {self._get_grid_dim_spec()};')
+
+        self._lexic.get_stream_via_pointer(file, 'stream', GeneralLexicon.STREAM_PTR_STR)
+        file.Expression(self._lexic.get_launch_code(self._base_name,
+                                                    'grid',
+                                                    'block',
+                                                    'stream',
+                                                    self._get_func_args()))
+        err = self._lexic.check_error()
+        if err is not None:
+          file.Expression(err)
+
+      self._launcher = src.getvalue()
+
+  def _generate_header(self):
+    src = StringIO()
+    with constructs.Cpp(src) as file:
+      file.FunctionDeclaration(self._base_name, self._get_launcher_params(with_defaults=True))
+      content = src.getvalue()
+    self._header = content
+
+  def _generate_base_name(self):
+    result = hashlib.md5('\n'.join(self._get_spec_material()).encode())
+    md5encoding = result.hexdigest()
+    prefix = 's' if self._precision == 'float' else 'd'
+    return f'{prefix}chain_{len(self._ops)}ops_{md5encoding[:Generator.ENCODING_LENGTH]}'
+
+  def _get_spec_material(self):
+    matrices = self._get_all_matrices()
+
+    def index_of(matrix):
+      return [known is matrix for known in matrices].index(True)
+
+    material = []
+    for index, matrix in enumerate(matrices):
+      kind = 'temporary' if matrix in self._temporaries else 'argument'
+      material.append(f'matrix {index} ({kind}): {describe_matrix(matrix)}')
+
+    for op in self._ops:
+      if isinstance(op, GemmSpec):
+        material.append(f'gemm: trans_a: {op.trans_a}, trans_b: {op.trans_b}, '
+                        f'A: {index_of(op.mat_a)}, B: {index_of(op.mat_b)}, C: {index_of(op.mat_c)}, '
+                        f'alpha: {op.alpha!r}, beta: {op.beta!r}')
+      else:
+        material.append(f'csa: A: {index_of(op.mat_a)}, B: {index_of(op.mat_b)}, '
+                        f'alpha: {op.alpha!r}, beta: {op.beta!r}')
+    return material
+
+  def _get_func_params(self):
+    return super(ChainGenerator, self)._get_func_params()
+
+  def _get_launcher_params(self, with_defaults=False):
+    return super(ChainGenerator, self)._get_launcher_params(with_defaults)
+
+  def _get_func_args(self):
+    return super(ChainGenerator, self)._get_func_args()
+
+  def _get_block_dim_spec(self):
+    super(ChainGenerator, self)._get_block_dim_spec()
+    return f'block({self._num_active_threads}, {self._num_ops_per_block}, 1)'
+
+  def _get_grid_dim_spec(self):
+    super(ChainGenerator, self)._get_grid_dim_spec()
+    num_blocks = "({0} + {1} - 1) / {1}".format(GeneralLexicon.NUM_ELEMENTS,
+                                                self._num_ops_per_block)
+    return f'grid({num_blocks}, 1, 1)'
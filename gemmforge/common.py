@@ -3,3 +3,28 @@ from .basic_types import GeneralLexicon
 
 def get_extra_offset_name(base_name: str):
   return f'{base_name}{GeneralLexicon.EXTRA_OFFSET}'
+
+
+def get_mask_runs(mask, size):
+  """Returns a list of [begin, end) ranges of consecutive entries of `mask` which are True.
+  A mask given as None covers all `size` entries"""
+  if mask is None:
+    return [(0, size)]
+
+  runs = []
+  for index, is_set in enumerate(mask):
+    if not is_set:
+      continue
+    if runs and runs[-1][1] == index:
+      runs[-1] = (runs[-1][0], index + 1)
+    else:
+      runs.append((index, index + 1))
+  return runs
+
+
+def combine_masks(*masks):
+  """Returns an element-wise conjunction of masks. None stands for a mask of all True"""
+  masks = [mask for mask in masks if mask is not None]
+  if not masks:
+    return None
+  return [all(entries) for entries in zip(*masks)]
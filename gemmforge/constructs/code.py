@@ -139,6 +139,9 @@ class Cpp:
   def If(self, expression):
     return Block(self, 'if ({})'.format(expression))
 
+  def Else(self):
+    return Block(self, 'else')
+
   def For(self, argument):
     return Block(self, 'for ({})'.format(argument))
 
@@ -8,6 +8,7 @@ from .symbol_table import SymbolType, Symbol
 from .instructions.builders import GetElementPtrBuilder
 from gemmforge.vm import VM
 from .thread_policies import TheadPolicyFactory
+from .cache import describe_matrix
 import math
 import hashlib
 
@@ -40,6 +41,8 @@ class CsaGenerator(GemmLikeGenerator):
 
   def generate(self):
     self._check_if_set()
+    if self._load_from_cache():
+      return
 
     self._check()
     self._deduce_num_threads()
@@ -49,6 +52,13 @@ class CsaGenerator(GemmLikeGenerator):
     self._generate_kernel()
     self._generate_header()
     self._generate_launcher()
+    self._store_in_cache()
+
+  def get_flops(self):
+    flops_per_op = self._mat_a.get_actual_volume()
+    if self._beta:
+      flops_per_op += self._mat_b.get_actual_volume()
+    return flops_per_op
 
   def _check(self):
     try:
@@ -94,6 +104,8 @@ class CsaGenerator(GemmLikeGenerator):
                                                       op2=self._mat_b)
 
     self._num_ops_per_block = thread_policy.get_num_ops_per_block()
+    self._num_regs_per_thread = thread_policy.get_num_regs_per_thread()
+    self._shr_mem_per_block = 0
 
   def _generate_kernel(self):
     builder = GetElementPtrBuilder(self._vm, self._symbol_table)
@@ -215,6 +227,12 @@ class CsaGenerator(GemmLikeGenerator):
                                             addressing,
                                             md5encoding[:Generator.ENCODING_LENGTH])
 
+  def _get_spec_material(self):
+    return [f'alpha: {self._alpha!r}',
+            f'beta: {self._beta!r}',
+            f'A: {describe_matrix(self._mat_a)}',
+            f'B: {describe_matrix(self._mat_b)}']
+
   def _get_func_params(self):
     return f'{self._precision} scale, {super(CsaGenerator, self)._get_func_params()}'
 
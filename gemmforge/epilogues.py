@@ -0,0 +1,178 @@
+from .basic_types import DataFlowDirection
+from .exceptions import GenerationError
+from .cache import describe_matrix
+from abc import ABC, abstractmethod
+
+
+class Epilogue(ABC):
+  """An element-wise operation fused into the store of a gemm result.
+
+  Epilogues of a gemm form a chain which starts with `value = alpha * (A x B)[i, j]`.
+  Each epilogue either updates `value` or stores it to its own matrix. Afterwards,
+  C gets `value + beta * C`. Each epilogue adds a batched matrix to the arguments
+  of a kernel which is passed after C"""
+
+  # Note: matrices of epilogues are named after this prefix and their position in a chain
+  NAME_PREFIX = 'E'
+  DIRECTION = DataFlowDirection.SOURCE
+
+  def __init__(self, matrix):
+    self._matrix = matrix
+
+  def get_matrix(self):
+    return self._matrix
+
+  def check(self, mat_c):
+    """Raises GenerationError if the matrix of an epilogue does not fit to C"""
+    expected = self._get_expected_shape(mat_c)
+    actual = (self._matrix.get_actual_num_rows(), self._matrix.get_actual_num_cols())
+    if actual != expected:
+      raise GenerationError(f'{type(self).__name__}: expected a {expected[0]}x{expected[1]} matrix, '
+                            f'given {actual[0]}x{actual[1]}')
+
+  def _get_expected_shape(self, mat_c):
+    return (mat_c.get_actual_num_rows(), mat_c.get_actual_num_cols())
+
+  def get_flops(self, mat_c):
+    """Returns the number of flops per operation"""
+    return 0
+
+  def is_matrix_read(self):
+    """Returns whether the generated code loads elements of the matrix of an epilogue"""
+    return True
+
+  @abstractmethod
+  def gen_code(self, writer, value, symbol, row, col, real_suffix):
+    """Emits statements which update or store a local variable `value`.
+
+    Args:
+      value: the name of the local variable
+      symbol: a glb. mem. symbol of the matrix of the epilogue
+      row: an expression of the row index of the current element of the result
+      col: an expression of the column index of the current element of the result
+      real_suffix: a suffix of real literals
+    """
+    pass
+
+  @abstractmethod
+  def evaluate(self, value, rows, cols, load, store):
+    """Applies an epilogue to an array of values (see Interpreter). Mirrors `gen_code`.
+
+    Args:
+      value: an array of values
+      rows: row indices of values
+      cols: column indices of values
+      load: a function (rows, cols) which returns values of the matrix of the epilogue
+      store: a function (rows, cols, values) which writes to the matrix of the epilogue
+
+    Returns:
+      an array of updated values
+    """
+    pass
+
+  @classmethod
+  def _gen_address(cls, symbol, row, col):
+    return f'{symbol.name}[{row} + {symbol.obj.num_rows} * {col}]'
+
+  @abstractmethod
+  def __str__(self):
+    pass
+
+
+class AddMatrix(Epilogue):
+  """value += scale * D. Fuses the copy-add-scale operation (see CsaGenerator)"""
+
+  def __init__(self, matrix, scale=1.0):
+    super(AddMatrix, self).__init__(matrix)
+    self._scale = scale
+
+  def get_flops(self, mat_c):
+    flops_per_element = 1 if self._scale == 1.0 else 2
+    return flops_per_element * mat_c.get_actual_volume()
+
+  def gen_code(self, writer, value, symbol, row, col, real_suffix):
+    term = self._gen_address(symbol, row, col)
+    if self._scale != 1.0:
+      term = f'{self._scale}{real_suffix} * {term}'
+    writer(f'{value} += {term};')
+
+  def evaluate(self, value, rows, cols, load, store):
+    term = load(rows, cols)
+    if self._scale != 1.0:
+      term = self._scale * term
+    return value + term
+
+  def __str__(self):
+    return f'add_matrix: scale = {self._scale!r}\n{describe_matrix(self._matrix)}'
+
+
+class ScaleByVector(Epilogue):
+  """value *= v[i] if `per_row` is True, otherwise value *= v[j].
+  A vector is an Mx1 or 1xN batched matrix, respectively"""
+
+  def __init__(self, vector, per_row=True):
+    super(ScaleByVector, self).__init__(vector)
+    self._per_row = per_row
+
+  def _get_expected_shape(self, mat_c):
+    if self._per_row:
+      return (mat_c.get_actual_num_rows(), 1)
+    else:
+      return (1, mat_c.get_actual_num_cols())
+
+  def get_flops(self, mat_c):
+    return mat_c.get_actual_volume()
+
+  def gen_code(self, writer, value, symbol, row, col, real_suffix):
+    if self._per_row:
+      writer(f'{value} *= {self._gen_address(symbol, row, 0)};')
+    else:
+      writer(f'{value} *= {self._gen_address(symbol, 0, col)};')
+
+  def evaluate(self, value, rows, cols, load, store):
+    if self._per_row:
+      return value * load(rows, 0 * cols)
+    else:
+      return value * load(0 * rows, cols)
+
+  def __str__(self):
+    return f'scale_by_vector: per_row = {self._per_row}\n{describe_matrix(self._matrix)}'
+
+
+class CopyTo(Epilogue):
+  """E = value + beta * E, i.e., scatters the current value to one more output"""
+  DIRECTION = DataFlowDirection.SINK
+
+  def __init__(self, matrix, beta=0.0):
+    super(CopyTo, self).__init__(matrix)
+    self._beta = beta
+
+  def get_flops(self, mat_c):
+    if self._beta == 0.0:
+      return 0
+    flops_per_element = 1 if self._beta == 1.0 else 2
+    return flops_per_element * mat_c.get_actual_volume()
+
+  def is_matrix_read(self):
+    return self._beta != 0.0
+
+  def gen_code(self, writer, value, symbol, row, col, real_suffix):
+    address = self._gen_address(symbol, row, col)
+    if self._beta == 0.0:
+      writer(f'{address} = {value};')
+    elif self._beta == 1.0:
+      writer(f'{address} += {value};')
+    else:
+      writer(f'{address} = {value} + {self._beta}{real_suffix} * {address};')
+
+  def evaluate(self, value, rows, cols, load, store):
+    if self._beta == 0.0:
+      store(rows, cols, value)
+    elif self._beta == 1.0:
+      store(rows, cols, load(rows, cols) + value)
+    else:
+      store(rows, cols, value + self._beta * load(rows, cols))
+    return value
+
+  def __str__(self):
+    return f'copy_to: beta = {self._beta!r}\n{describe_matrix(self._matrix)}'
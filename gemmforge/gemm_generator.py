@@ -10,30 +10,52 @@ from .instructions.builders.kernels import GemmKernelType
 from .vm import VM
 from .thread_policies import TheadPolicyFactory
 from .matrix import SparseMatrix
+from .cache import describe_matrix
+from .tuning.database import TuningDatabase
 import math
 import hashlib
 
 
 class GemmGenerator(GemmLikeGenerator):
   """ Generates GEMM GPU kernels: C = alpha * A * B + beta * C
+
+  Element-wise operations on the result can be fused into a kernel with
+  epilogues (see gemmforge.epilogues)
   """
 
-  def __init__(self, vm: VM, kernel_type=GemmKernelType.AUTO):
+  def __init__(self, vm: VM, kernel_type=GemmKernelType.AUTO, micro_tile=None,
+               pack_batch_elements=False, num_k_stages=1, num_ops_per_block=None,
+               loader_strategy=None, unroll_threshold=None):
     super(GemmGenerator, self).__init__(vm)
     self._kernel_type = kernel_type
+    self._requested_micro_tile = micro_tile
+    self._micro_tile = None
+    self._pack_batch_elements = pack_batch_elements
+    self._num_k_stages = num_k_stages
+    self._requested_num_ops_per_block = num_ops_per_block
+    self._loader_strategy = loader_strategy
+    self._unroll_threshold = unroll_threshold
+    self._tuning_db = TuningDatabase.from_env()
+    self._tuning_record = None
     self._trans_a = None
     self._trans_b = None
     self._mat_a = None
     self._mat_b = None
     self._mat_c = None
+    self._epilogues = []
+    self._num_elements = None
 
     self._reg_array_obj = None
     self._shr_mem_obj = None
     self._shr_mem_loads = []
 
-  def set(self, trans_a, trans_b, mat_a, mat_b, mat_c, alpha, beta, base_name=None):
+  def set(self, trans_a, trans_b, mat_a, mat_b, mat_c, alpha, beta, base_name=None, epilogues=None,
+          num_elements=None):
+    """Note, `num_elements` is an optional hint about the expected batch size (numElements).
+    It is used to choose the number of operations per block"""
     self._instructions = []
     self._symbol_table = InverseSymbolTable()
+    self._micro_tile = None
 
     self._mat_a = mat_a
     self._trans_a = trans_a
@@ -52,14 +74,35 @@ class GemmGenerator(GemmLikeGenerator):
     self._mat_c.set_data_flow_direction(DataFlowDirection.SINK)
     self._matrices = [self._mat_a, self._mat_b, self._mat_c]
 
+    self._epilogues = list(epilogues) if epilogues else []
+    for index, epilogue in enumerate(self._epilogues):
+      matrix = epilogue.get_matrix()
+      matrix.set_name(f'{epilogue.NAME_PREFIX}{index}')
+      matrix.set_data_flow_direction(epilogue.DIRECTION)
+      self._matrices.append(matrix)
+
     self._alpha = alpha
     self._beta = beta
+    self._num_elements = num_elements
+
+    self._apply_tuning_record()
 
     self._base_name = base_name if base_name is not None else self._generate_base_name()
     self._is_set = True
 
+  def set_tuning_database(self, database):
+    """Sets a database of autotuning results. Pass None to disable lookups.
+    Note, the database gets consulted in `set`"""
+    self._tuning_db = database
+
+  def get_tuning_record(self):
+    """Returns a tuning record which has been applied to the generator or None"""
+    return self._tuning_record
+
   def generate(self):
     self._check_if_set()
+    if self._load_from_cache():
+      return
 
     self._check()
     self._populate_global_scope()
@@ -69,6 +112,60 @@ class GemmGenerator(GemmLikeGenerator):
     self._generate_kernel()
     self._generate_header()
     self._generate_launcher()
+    self._store_in_cache()
+
+  def _apply_tuning_record(self):
+    """Takes generation options from the tuning database. Options which have been
+    explicitly requested by the user always take precedence"""
+    if self._tuning_record is not None:
+      # Note: restore defaults overwritten by a record of the previously set operation
+      self._kernel_type = GemmKernelType.AUTO
+      self._requested_num_ops_per_block = None
+      self._loader_strategy = None
+      self._unroll_threshold = None
+      self._tuning_record = None
+
+    if self._tuning_db is None:
+      return
+
+    is_default = self._kernel_type == GemmKernelType.AUTO
+    is_default &= self._requested_micro_tile is None
+    is_default &= not self._pack_batch_elements
+    is_default &= self._num_k_stages == 1
+    is_default &= self._requested_num_ops_per_block is None
+    is_default &= self._loader_strategy is None
+    is_default &= self._unroll_threshold is None
+    if not is_default:
+      return
+
+    record = self._tuning_db.lookup(self)
+    if record is None:
+      return
+
+    options = record.options
+    self._kernel_type = GemmKernelType.to_str(options['kernel_type'])
+    self._requested_num_ops_per_block = options.get('num_ops_per_block', None)
+    self._loader_strategy = options.get('loader_strategy', None)
+    self._unroll_threshold = options.get('unroll_threshold', None)
+    self._tuning_record = record
+
+  def get_instructions(self):
+    """Returns the instruction stream of a kernel (see Interpreter). The stream is empty
+    if the kernel has not been generated or has been restored from the cache"""
+    return self._instructions
+
+  def get_cost_estimates(self):
+    """Returns predicted costs of dense kernel types which are used for auto-selection.
+    See GemmCostModel for details"""
+    self._check_if_set()
+    return GemmKernelsFactory.make_cost_model(vm=self._vm,
+                                              trans_a=self._trans_a,
+                                              trans_b=self._trans_b,
+                                              mat_a=self._mat_a,
+                                              mat_b=self._mat_b,
+                                              mat_c=self._mat_c,
+                                              beta=self._beta,
+                                              pack_batch_elements=self._pack_batch_elements).get_estimates()
 
   def get_flops(self):
     flops_per_element = 2 * self._mat_c.get_actual_num_cols() - 1
@@ -88,6 +185,9 @@ class GemmGenerator(GemmLikeGenerator):
     if self._beta:
       flops_per_op += self._mat_c.get_actual_volume()
 
+    for epilogue in self._epilogues:
+      flops_per_op += epilogue.get_flops(self._mat_c)
+
     return flops_per_op
 
   def _generate_kernel(self):
@@ -187,8 +287,19 @@ class GemmGenerator(GemmLikeGenerator):
       if isinstance(self._mat_a, SparseMatrix) and isinstance(self._mat_b, SparseMatrix):
         raise GenerationError("Gemmforge does not support AxB where both A and B are sparse")
 
+      if self._num_k_stages != 1:
+        is_sparse = isinstance(self._mat_a, SparseMatrix) or isinstance(self._mat_b, SparseMatrix)
+        is_staged_type = self._kernel_type in [GemmKernelType.AUTO, GemmKernelType.SHR_MEM_BASED]
+        if is_sparse or not is_staged_type:
+          raise GenerationError(f'k-stages are supported only by dense shr. mem. based kernels, '
+                                f'given: {self._kernel_type.value}, num_k_stages={self._num_k_stages}')
+
+      for epilogue in self._epilogues:
+        epilogue.check(self._mat_c)
+
     except GenerationError as error:
       matrices = {'A': self._mat_a, 'B': self._mat_b, 'C': self._mat_c}
+      matrices.update({matrix.name: matrix for matrix in self._matrices[3:]})
       for name in matrices:
         print(f'matrix {name}:')
         print(matrices[name])
@@ -214,7 +325,12 @@ class GemmGenerator(GemmLikeGenerator):
               'mat_c': self._mat_c,
               'alpha': self._alpha,
               'beta': self._beta,
-              'hw_descr': self._hw_descr}
+              'hw_descr': self._hw_descr,
+              'micro_tile': self._requested_micro_tile,
+              'pack_batch_elements': self._pack_batch_elements,
+              'num_k_stages': self._num_k_stages,
+              'loader_options': self._get_loader_options(),
+              'epilogues': self._epilogues}
 
     kernel_factory = GemmKernelsFactory(**params)
     self._kernel_type = kernel_factory.gemm_kernel_type()
@@ -227,6 +343,7 @@ class GemmGenerator(GemmLikeGenerator):
     self._reg_array_obj = gemm_kernel_builder.get_reg_array_obj()
     self._shr_mem_obj = gemm_kernel_builder.get_shr_mem_obj()
     self._shr_mem_loads = gemm_kernel_builder.get_shr_mem_loads()
+    self._micro_tile = gemm_kernel_builder.get_micro_tile()
 
   def _analyze(self):
     # compute total required shr. mem
@@ -243,10 +360,32 @@ class GemmGenerator(GemmLikeGenerator):
                                                        num_threads=self._num_active_threads,
                                                        op1=self._mat_a,
                                                        op2=self._mat_b,
-                                                       res=self._mat_c)
+                                                       res=self._mat_c,
+                                                       micro_tile=self._micro_tile,
+                                                       num_elements=self._num_elements)
 
-    self._num_ops_per_block = thread_policy.get_num_ops_per_block()
+    if self._requested_num_ops_per_block is None:
+      num_ops_per_block = thread_policy.get_num_ops_per_block()
+    else:
+      num_ops_per_block = self._requested_num_ops_per_block
+    self._num_ops_per_block = thread_policy.align_num_ops_per_block(num_ops_per_block,
+                                                                    shr_mem_counter)
+    if self._requested_num_ops_per_block is not None:
+      self._check_num_ops_per_block(shr_mem_counter)
     self._shr_mem_obj.set_mults_per_block(self._num_ops_per_block)
+    self._num_regs_per_thread = math.ceil(thread_policy.get_num_regs_per_thread())
+    self._shr_mem_per_block = self._shr_mem_obj.get_total_size() * self._vm.bytes_per_real()
+
+  def _check_num_ops_per_block(self, shr_mem_per_op):
+    num_threads = self._num_active_threads * self._num_ops_per_block
+    if num_threads > self._hw_descr.max_num_threads:
+      raise GenerationError(f'{self._num_ops_per_block} ops. per block require {num_threads} threads '
+                            f'which exceeds {self._hw_descr.max_num_threads}')
+
+    shr_mem_bytes = shr_mem_per_op * self._num_ops_per_block * self._vm.bytes_per_real()
+    if shr_mem_bytes > self._hw_descr.max_local_mem_size_per_block:
+      raise GenerationError(f'{self._num_ops_per_block} ops. per block require {shr_mem_bytes} bytes '
+                            f'of shr. mem. which exceeds {self._hw_descr.max_local_mem_size_per_block}')
 
   def _generate_base_name(self):
     if self._trans_a:
@@ -267,12 +406,30 @@ class GemmGenerator(GemmLikeGenerator):
     traspose = f'{"T" if self._trans_a else "NT"}_{"T" if self._trans_b else "NT"}'
     constants = f'{self._alpha}_{self._beta}'
 
-    result = hashlib.md5(('{}_{}{}{}_{}'.format(
+    kernel_params = self._kernel_type.value.__str__()
+    if self._requested_micro_tile is not None:
+      kernel_params += f'_tile{self._requested_micro_tile[0]}x{self._requested_micro_tile[1]}'
+    if self._pack_batch_elements:
+      kernel_params += '_packed'
+    if self._num_k_stages != 1:
+      kernel_params += f'_kstages{self._num_k_stages}'
+    if self._requested_num_ops_per_block is not None:
+      kernel_params += f'_ops{self._requested_num_ops_per_block}'
+    if self._loader_strategy is not None:
+      kernel_params += f'_ldr{self._loader_strategy}'
+    if self._unroll_threshold is not None:
+      kernel_params += f'_unroll{self._unroll_threshold}'
+    if self._num_elements is not None:
+      kernel_params += f'_elements{self._num_elements}'
+
+    epilogues = ''.join([str(epilogue) for epilogue in self._epilogues])
+    result = hashlib.md5(('{}_{}{}{}_{}{}'.format(
       constants,
-      self._mat_a.__str__(),
-      self._mat_b.__str__(),
-      self._mat_c.__str__(),
-      self._kernel_type.value.__str__()).encode()))
+      describe_matrix(self._mat_a),
+      describe_matrix(self._mat_b),
+      describe_matrix(self._mat_c),
+      kernel_params,
+      epilogues).encode()))
     md5encoding = result.hexdigest()
     prefix = 's' if self._precision == "float" else "d"
 
@@ -290,6 +447,43 @@ class GemmGenerator(GemmLikeGenerator):
                                                     addresses,
                                                     md5encoding[:Generator.ENCODING_LENGTH])
 
+  def _get_loader_options(self):
+    options = {}
+    if self._loader_strategy is not None:
+      options['strategy'] = self._loader_strategy
+    if self._unroll_threshold is not None:
+      options['unroll_threshold'] = self._unroll_threshold
+    return options
+
+  def _get_problem_material(self):
+    """Returns a list of strings which describes the operation regardless of generation options"""
+    return [f'trans_a: {self._trans_a}',
+            f'trans_b: {self._trans_b}',
+            f'alpha: {self._alpha!r}',
+            f'beta: {self._beta!r}',
+            f'A: {describe_matrix(self._mat_a)}',
+            f'B: {describe_matrix(self._mat_b)}',
+            f'C: {describe_matrix(self._mat_c)}'] + [f'epilogue: {epilogue}' for epilogue in self._epilogues]
+
+  def _get_spec_material(self):
+    return self._get_problem_material() + [f'kernel_type: {self._kernel_type.value}',
+                                           f'micro_tile: {self._requested_micro_tile}',
+                                           f'pack_batch_elements: {self._pack_batch_elements}',
+                                           f'num_k_stages: {self._num_k_stages}',
+                                           f'num_ops_per_block: {self._requested_num_ops_per_block}',
+                                           f'loader_strategy: {self._loader_strategy}',
+                                           f'unroll_threshold: {self._unroll_threshold}',
+                                           f'num_elements: {self._num_elements}']
+
+  def _get_cache_metadata(self):
+    metadata = super(GemmGenerator, self)._get_cache_metadata()
+    metadata['kernel_type'] = self._kernel_type.value
+    return metadata
+
+  def _set_cache_metadata(self, metadata):
+    super(GemmGenerator, self)._set_cache_metadata(metadata)
+    self._kernel_type = GemmKernelType(metadata['kernel_type'])
+
   def _get_func_params(self):
     base_params = super(GemmGenerator, self)._get_func_params()
     if isinstance(self._alpha, float):
@@ -1,7 +1,10 @@
-from .ptr_manip import GetElementPtr
-from .allocate import RegisterAlloc, ShrMemAlloc
-from .store import StoreRegToGlb, StoreShrMemToGlb
-from .dense_gemms import ShrMemBasedDenseGemm, RegisterOnlyDenseGemm
-from .sync_threads import SyncThreads
+from .ptr_manip import GetElementPtr, GetSubMatrixPtr
+from .allocate import RegisterAlloc, ShrMemAlloc, ShrMemRegion
+from .store import StoreRegToGlb, StoreShrMemToGlb, StoreRegBlockToGlb, StoreRegToShrMem
+from .csa import CopyAddScale
+from .dense_gemms import ShrMemBasedDenseGemm, RegisterOnlyDenseGemm, RegisterBlockedDenseGemm
+from .sync_threads import SyncThreads, WaitAsyncCopies
 from .dense_sparse_gemms import ShrMemBasedDenseSparseGemm, RegisterOnlyDenseSparseGemm
+from .dense_sparse_gemms import ShrMemBasedDenseSparseLoopedGemm, ShrMemBasedDenseBlockSparseGemm
 from .sparse_dense_gemms import ShrMemBasedSparseDenseGemm, RegisterOnlySparseDenseGemm
+from .sparse_dense_gemms import ShrMemBasedSparseDenseLoopedGemm, ShrMemBasedBlockSparseDenseGemm
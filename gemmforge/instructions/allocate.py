@@ -56,7 +56,7 @@ class ShrMemAlloc(AbstractInstruction):
     shr_mem_decl = lexic.declare_shared_memory_inline(name=common_shrmem,
                                                       precision=self._vm.fp_as_str(),
                                                       size=common_shrmem_size,
-                                                      alignment=8)
+                                                      alignment=16)
 
     if shr_mem_decl:
       writer(f'{shr_mem_decl};')
@@ -73,3 +73,32 @@ class ShrMemAlloc(AbstractInstruction):
 
   def __str__(self):
     return f'{self._dest.name} = alloc_shr [{self._dest.obj.get_total_size_as_str()}];'
+
+
+class ShrMemRegion(AbstractInstruction):
+  """Declares a pointer to a region of shr. mem. which holds an intermediate result
+  (e.g., of a chain of operations). The offset of the region is set during the analysis"""
+  def __init__(self,
+               vm: VM,
+               dest: Symbol,
+               shr_mem: Symbol,
+               size: int):
+    super(ShrMemRegion, self).__init__(vm)
+    self._dest = dest
+    self._shr_mem = shr_mem
+    self._size = size
+    self._shr_mem_offset = None
+    self._is_ready = False
+
+  def compute_shared_mem_size(self):
+    return self._size
+
+  def set_shr_mem_offset(self, offset: int):
+    self._shr_mem_offset = offset
+    self._is_ready = True
+
+  def gen_code(self, writer):
+    writer(f'{self._vm.fp_as_str()} * {self._dest.name} = &{self._shr_mem.name}[{self._shr_mem_offset}];')
+
+  def __str__(self):
+    return f'{self._dest.name} = getelementptr {self._shr_mem.name}, {self._shr_mem_offset};'
@@ -2,16 +2,38 @@ from typing import Tuple, List, Union
 from gemmforge.instructions.builders.abstract_builder import AbstractBuilder
 from gemmforge.instructions.loaders.abstract_loader import NoLoadShrMemLoader
 from gemmforge.symbol_table import SymbolType, Symbol
-from gemmforge.instructions import SyncThreads
+from gemmforge.instructions import SyncThreads, WaitAsyncCopies
 from gemmforge.instructions import ShrMemBasedDenseGemm
 from gemmforge.instructions import RegisterOnlyDenseGemm
+from gemmforge.instructions import RegisterBlockedDenseGemm
 from gemmforge.instructions import RegisterOnlySparseDenseGemm
-from gemmforge.instructions import ShrMemBasedSparseDenseGemm
+from gemmforge.instructions import ShrMemBasedSparseDenseGemm, ShrMemBasedSparseDenseLoopedGemm
+from gemmforge.instructions import ShrMemBasedBlockSparseDenseGemm
 from gemmforge.instructions import RegisterOnlyDenseSparseGemm
-from gemmforge.instructions import ShrMemBasedDenseSparseGemm
-from gemmforge.instructions.loaders import shm_mem_loader_factory
+from gemmforge.instructions import ShrMemBasedDenseSparseGemm, ShrMemBasedDenseSparseLoopedGemm
+from gemmforge.instructions import ShrMemBasedDenseBlockSparseGemm
+from gemmforge.instructions import GetSubMatrixPtr
+from gemmforge.instructions.loaders import shm_mem_loader_factory, BlockPatchLoader
+from gemmforge.instructions.loaders.abstract_loader import AbstractShrMemLoader
 from gemmforge.basic_types import GeneralLexicon
-from gemmforge.matrix import SparseMatrix
+from gemmforge.common import combine_masks
+from gemmforge.matrix import SparseMatrix, DenseMatrix
+from gemmforge.symbol_table import DataView
+import math
+
+
+def make_sync_threads(vm, instructions, num_threads):
+  """Returns instructions which make all shr. mem. writes, issued after the last barrier,
+  visible to all threads. Async. copies must be waited for before the barrier"""
+  sync_instrs = []
+  for instr in reversed(instructions):
+    if isinstance(instr, SyncThreads):
+      break
+    if isinstance(instr, AbstractShrMemLoader) and instr.is_async():
+      sync_instrs.append(WaitAsyncCopies(vm))
+      break
+  sync_instrs.append(SyncThreads(vm, num_threads))
+  return sync_instrs
 
 
 class ShrMemBasedDenseGemmBuilder(AbstractBuilder):
@@ -23,11 +45,15 @@ class ShrMemBasedDenseGemmBuilder(AbstractBuilder):
                symbol_table,
                register_array,
                shr_mem,
-               num_threads: int):
+               num_threads: int,
+               num_k_stages: int = 1,
+               loader_options=None):
     super(ShrMemBasedDenseGemmBuilder, self).__init__(vm, symbol_table)
     self._dest_regs = register_array
     self._shr_mem = shr_mem
     self._num_threads = num_threads
+    self._num_k_stages = num_k_stages
+    self._loader_options = loader_options if loader_options else {}
 
     self._counter = 0
     self._load_instrs = []
@@ -47,32 +73,140 @@ class ShrMemBasedDenseGemmBuilder(AbstractBuilder):
             dest: Symbol):
     self._reset()
 
+    # Note: k-iterations over zero columns of `op1` or zero rows of `op2` can be skipped
+    k_mask = ShrMemBasedDenseGemmBuilder._get_k_mask(trans_a, trans_b, op1.obj, op2.obj)
+
     # Note: of trans_a==True than an operand is given as KxM instead of (MxK).
     # In this case, a loader will load an operand from glb. mem. to shr. mem
     # transposing it on the fly. In, short, the loader guaranties to deliver
-    # an operand as (MxK) to shr. mem.
+    # an operand as (MxK) to shr. mem. Operands which already reside in shr. mem.
+    # or registers (e.g., intermediate results of a chain) are used in place
     self._symbol_table.add_scope()
-    if trans_a:
+    if trans_a and op1.stype == SymbolType.Global:
       self._op1 = self._make_loader_and_symbol(operand=op1, do_transpose=True)
+      trans_a = False
     else:
       self._op1 = op1
 
+    num_k_stages = min(self._num_k_stages, self._op1.data_view.columns)
+    if num_k_stages > 1 and not trans_a and op2.stype == SymbolType.Global:
+      self._build_pipeline(trans_b, op2, dest, num_k_stages, k_mask)
+      return
+
     # Note: we will handle transposition of the second operand during
     # the matrix multiplication
-    self._op2 = self._make_loader_and_symbol(operand=op2, do_transpose=False)
+    if op2.stype == SymbolType.Global:
+      self._op2 = self._make_loader_and_symbol(operand=op2,
+                                               do_transpose=False,
+                                               **self._get_op2_masks(trans_b, k_mask))
+    else:
+      self._op2 = op2
 
-    self._insert_sync_threads()
+    if self._load_instrs:
+      self._insert_sync_threads()
 
     gemm_params = {'vm': self._vm,
-                   'trans_a': False,
+                   'trans_a': trans_a,
                    'trans_b': trans_b,
                    'op1': self._op1,
                    'op2': self._op2,
                    'dest': dest,
-                   'num_threads': self._num_threads}
+                   'num_threads': self._num_threads,
+                   'k_mask': k_mask}
     self._instructions.append(ShrMemBasedDenseGemm(**gemm_params))
 
-  def _make_loader_and_symbol(self, operand, do_transpose):
+  @classmethod
+  def _get_k_mask(cls, trans_a, trans_b, mat_a, mat_b):
+    # Note: operands held in registers (e.g., intermediate results of a chain) have no masks
+    mask_a, mask_b = None, None
+    if isinstance(mat_a, DenseMatrix):
+      mask_a = mat_a.get_actual_row_mask() if trans_a else mat_a.get_actual_col_mask()
+    if isinstance(mat_b, DenseMatrix):
+      mask_b = mat_b.get_actual_col_mask() if trans_b else mat_b.get_actual_row_mask()
+    return combine_masks(mask_a, mask_b)
+
+  @classmethod
+  def _get_op2_masks(cls, trans_b, k_mask):
+    return {'col_mask': k_mask} if trans_b else {'row_mask': k_mask}
+
+  def _build_pipeline(self, trans_b, op2, dest, num_k_stages, k_mask=None):
+    """Splits the k-dimension into stages. Slices of `op2` are double-buffered in shr. mem.
+    Thus, loads of the next slice can overlap with computations on the current one:
+
+      load(0 -> buf0); sync
+      for stage in stages:
+        load(stage + 1 -> buf[(stage + 1) % 2])
+        compute(stage, buf[stage % 2]); sync
+    """
+    k_size = self._op1.data_view.columns
+    stage_size = math.ceil(k_size / num_k_stages)
+    k_ranges = [(start, min(start + stage_size, k_size)) for start in range(0, k_size, stage_size)]
+
+    buffers = [None, None]
+    op2_stages = [None] * len(k_ranges)
+
+    def slice_mask(k_range):
+      return None if k_mask is None else k_mask[k_range[0]:k_range[1]]
+
+    def load_stage(stage):
+      op2_slice = self._make_k_slice(op2, k_ranges[stage], is_row_slice=not trans_b)
+      self._symbol_table.add_scope()
+      op2_stages[stage] = self._make_loader_and_symbol(operand=op2_slice,
+                                                       do_transpose=False,
+                                                       exact=not trans_b,
+                                                       leader=buffers[stage % 2],
+                                                       **self._get_op2_masks(trans_b,
+                                                                             slice_mask(k_ranges[stage])))
+      if buffers[stage % 2] is None:
+        buffers[stage % 2] = self._load_instrs[-1]
+
+    load_stage(0)
+    self._insert_sync_threads()
+    for stage, k_range in enumerate(k_ranges):
+      if stage + 1 < len(k_ranges):
+        load_stage(stage + 1)
+
+      gemm_params = {'vm': self._vm,
+                     'trans_a': False,
+                     'trans_b': trans_b,
+                     'op1': self._make_k_slice(self._op1, k_range, is_row_slice=False),
+                     'op2': op2_stages[stage],
+                     'dest': dest,
+                     'num_threads': self._num_threads,
+                     'k_mask': slice_mask(k_range)}
+      self._instructions.append(ShrMemBasedDenseGemm(**gemm_params))
+
+      if stage + 1 < len(k_ranges):
+        self._insert_sync_threads()
+
+  def _make_k_slice(self, operand, k_range, is_row_slice):
+    start, end = k_range
+    data_view = operand.data_view
+    if is_row_slice:
+      offset = start
+      slice_view = DataView(rows=end - start,
+                            columns=data_view.columns,
+                            lead_dim=data_view.lead_dim,
+                            is_transposed=data_view.is_transposed)
+    else:
+      offset = start * data_view.lead_dim
+      slice_view = DataView(rows=data_view.rows,
+                            columns=end - start,
+                            lead_dim=data_view.lead_dim,
+                            is_transposed=data_view.is_transposed)
+
+    if start == 0 and end == (data_view.rows if is_row_slice else data_view.columns):
+      return operand
+
+    slice_symbol = Symbol(name=f'{operand.name}_k{start}',
+                          stype=operand.stype,
+                          obj=operand.obj)
+    slice_symbol.data_view = slice_view
+    self._instructions.append(GetSubMatrixPtr(self._vm, operand, slice_symbol, offset))
+    return slice_symbol
+
+  def _make_loader_and_symbol(self, operand, do_transpose, exact=False, leader=None,
+                              row_mask=None, col_mask=None):
     shr_mem_region = Symbol(name=self._name_shr_reg(),
                             stype=SymbolType.SharedMem,
                             obj=operand.obj)
@@ -83,17 +217,25 @@ class ShrMemBasedDenseGemmBuilder(AbstractBuilder):
                                      src=operand,
                                      shr_mem=self._shr_mem,
                                      num_threads=self._num_threads,
-                                     load_and_transpose=do_transpose)
+                                     load_and_transpose=do_transpose,
+                                     exact=exact,
+                                     row_mask=row_mask,
+                                     col_mask=col_mask,
+                                     **self._loader_options)
 
     self._instructions.append(load_op)
-    self._load_instrs.append(load_op)
+    if leader is None:
+      self._load_instrs.append(load_op)
+    else:
+      # Note: re-use a shr. mem. region of a previous load
+      leader.add_follower(load_op)
     return shr_mem_region
 
   def get_srh_mem_loads(self):
     return self._load_instrs
 
   def _insert_sync_threads(self):
-    self._instructions.append(SyncThreads(self._vm, self._num_threads))
+    self._instructions.extend(make_sync_threads(self._vm, self._instructions, self._num_threads))
 
   def _name_shr_reg(self):
     name = f'{GeneralLexicon.SHR_MEM_REGION_PREFIX}{self._counter}'
@@ -101,6 +243,59 @@ class ShrMemBasedDenseGemmBuilder(AbstractBuilder):
     return name
 
 
+class RegisterBlockedDenseGemmBuilder(ShrMemBasedDenseGemmBuilder):
+  """This class helps to assemble all necessary instructions
+  required to build a register-blocked dense gemm operation.
+  Both operands get loaded to shr. mem."""
+
+  def __init__(self,
+               vm,
+               symbol_table,
+               register_array,
+               shr_mem,
+               num_threads: int,
+               micro_tile,
+               num_thread_groups,
+               loader_options=None):
+    super(RegisterBlockedDenseGemmBuilder, self).__init__(vm,
+                                                          symbol_table,
+                                                          register_array,
+                                                          shr_mem,
+                                                          num_threads,
+                                                          loader_options=loader_options)
+    self._micro_tile = micro_tile
+    self._num_thread_groups = num_thread_groups
+
+  def build(self,
+            trans_a: bool,
+            trans_b: bool,
+            op1: Symbol,
+            op2: Symbol,
+            dest: Symbol):
+    self._reset()
+
+    # Note: each element of `op1` is reused by all column groups of threads.
+    # Thus, `op1` is always loaded to shr. mem. The loader delivers it as (MxK)
+    self._symbol_table.add_scope()
+    k_mask = ShrMemBasedDenseGemmBuilder._get_k_mask(trans_a, trans_b, op1.obj, op2.obj)
+    self._op1 = self._make_loader_and_symbol(operand=op1, do_transpose=trans_a, col_mask=k_mask)
+    self._op2 = self._make_loader_and_symbol(operand=op2,
+                                             do_transpose=False,
+                                             **self._get_op2_masks(trans_b, k_mask))
+
+    self._insert_sync_threads()
+
+    gemm_params = {'vm': self._vm,
+                   'trans_b': trans_b,
+                   'op1': self._op1,
+                   'op2': self._op2,
+                   'dest': dest,
+                   'micro_tile': self._micro_tile,
+                   'num_thread_groups': self._num_thread_groups,
+                   'k_mask': k_mask}
+    self._instructions.append(RegisterBlockedDenseGemm(**gemm_params))
+
+
 class RegisterOnlyDenseGemmBuilder(AbstractBuilder):
   """This class helps to assemble all necessary instructions
   required to build a shared-memory-based dense gemm operation"""
@@ -137,7 +332,8 @@ class RegisterOnlyDenseGemmBuilder(AbstractBuilder):
                    'op1': op1,
                    'op2': op2,
                    'dest': dest,
-                   'num_threads': self._num_threads}
+                   'num_threads': self._num_threads,
+                   'k_mask': ShrMemBasedDenseGemmBuilder._get_k_mask(trans_a, trans_b, op1.obj, op2.obj)}
     self._instructions.append(RegisterOnlyDenseGemm(**gemm_params))
 
   def get_srh_mem_loads(self):
@@ -153,11 +349,15 @@ class  ShrMemBasedSparseDenseGemmBuilder(AbstractBuilder):
                symbol_table,
                register_array,
                shr_mem,
-               num_threads: int):
+               num_threads: int,
+               looped: bool = False,
+               blocked: bool = False):
     super(ShrMemBasedSparseDenseGemmBuilder, self).__init__(vm=vm, symbol_table=symbol_table)
     self._dest_regs = register_array
     self._shr_mem = shr_mem
     self._num_threads = num_threads
+    self._looped = looped
+    self._blocked = blocked
 
     self._counter = 0
     self._load_instrs = []
@@ -181,7 +381,7 @@ class  ShrMemBasedSparseDenseGemmBuilder(AbstractBuilder):
             beta: float):
     self._reset()
 
-    if mat_a.get_values() == None:
+    if mat_a.get_values() is None:
       # Note: of trans_a==True then an operand is given as KxM instead of (MxK).
       # In this case, a loader will load an operand from glb. mem. to shr. mem
       # transposing it on the fly. In, short, the loader guaranties to deliver
@@ -190,9 +390,15 @@ class  ShrMemBasedSparseDenseGemmBuilder(AbstractBuilder):
       # Note: we will handle transposition of the second operand during
       # the matrix multiplication
       self._symbol_table.add_scope()
-      # This is a heuristics I have implemented as having too sparse matrices can increase bank conflicts
-      # And this heuristical optimization should remain until a better shared memory loader is implemented
-      if mat_a.sparsity() < 0.65:
+      # Note: all threads read the same non-zero at once. Thus, reads of a sparse operand from
+      # shr. mem. are broadcasts and do not cause bank conflicts (see BankConflictAnalyzer).
+      # The threshold only trades glb. mem. accesses for shr. mem. of very sparse matrices
+      if self._blocked:
+        # Note: blocks get reordered to the block-CSR order while loading
+        self._op1 = self._make_loader_and_symbol(operand=op1,
+                                                 do_transpose=False,
+                                                 block_order=mat_a.get_block_csr()[2])
+      elif mat_a.sparsity() < 0.65:
         self._op1 = self._make_loader_and_symbol(operand=op1, do_transpose=False)
       else:
         self._op1 = op1
@@ -221,21 +427,35 @@ class  ShrMemBasedSparseDenseGemmBuilder(AbstractBuilder):
                    'register_dest': register_dest,
                    'num_threads': self._num_threads,
                    'mat_a': mat_a}
-    self._instructions.append(ShrMemBasedSparseDenseGemm(**gemm_params))
+    if self._blocked:
+      self._instructions.append(ShrMemBasedBlockSparseDenseGemm(**gemm_params))
+    elif self._looped:
+      self._instructions.append(ShrMemBasedSparseDenseLoopedGemm(**gemm_params))
+    else:
+      self._instructions.append(ShrMemBasedSparseDenseGemm(**gemm_params))
 
-  def _make_loader_and_symbol(self, operand, do_transpose):
+  def _make_loader_and_symbol(self, operand, do_transpose, block_order=None):
     shr_mem_region = Symbol(name=self._name_shr_reg(),
                             stype=SymbolType.SharedMem,
                             obj=operand.obj)
 
     self._symbol_table.add_symbol(shr_mem_region)
 
-    load_op = shm_mem_loader_factory(vm=self._vm,
-                                     dest=shr_mem_region,
-                                     src=operand,
-                                     shr_mem=self._shr_mem,
-                                     num_threads=self._num_threads,
-                                     load_and_transpose=do_transpose)
+    if block_order is not None:
+      load_op = BlockPatchLoader(vm=self._vm,
+                                 dest=shr_mem_region,
+                                 src=operand,
+                                 shr_mem=self._shr_mem,
+                                 num_threads=self._num_threads,
+                                 load_and_transpose=False,
+                                 block_order=block_order)
+    else:
+      load_op = shm_mem_loader_factory(vm=self._vm,
+                                       dest=shr_mem_region,
+                                       src=operand,
+                                       shr_mem=self._shr_mem,
+                                       num_threads=self._num_threads,
+                                       load_and_transpose=do_transpose)
 
     self._instructions.append(load_op)
     self._load_instrs.append(load_op)
@@ -273,7 +493,7 @@ class  ShrMemBasedSparseDenseGemmBuilder(AbstractBuilder):
     return self._load_instrs
 
   def _insert_sync_threads(self):
-    self._instructions.append(SyncThreads(self._vm, self._num_threads))
+    self._instructions.extend(make_sync_threads(self._vm, self._instructions, self._num_threads))
 
   def _name_shr_reg(self):
     name = f'{GeneralLexicon.SHR_MEM_REGION_PREFIX}{self._counter}'
@@ -325,11 +545,15 @@ class ShrMemBasedDenseSparseGemmBuilder(AbstractBuilder):
                symbol_table,
                register_array,
                shr_mem,
-               num_threads: int):
+               num_threads: int,
+               looped: bool = False,
+               blocked: bool = False):
     super(ShrMemBasedDenseSparseGemmBuilder, self).__init__(vm=vm, symbol_table=symbol_table)
     self._dest_regs = register_array
     self._shr_mem = shr_mem
     self._num_threads = num_threads
+    self._looped = looped
+    self._blocked = blocked
 
     self._counter = 0
     self._load_instrs = []
@@ -354,7 +578,7 @@ class ShrMemBasedDenseSparseGemmBuilder(AbstractBuilder):
     # In this case, a loader will load an operand from glb. mem. to shr. mem
     # transposing it on the fly. In, short, the loader guaranties to deliver
     # an operand as (MxK) to shr. mem.
-    if mat_b.get_values() == None or trans_a:
+    if mat_b.get_values() is None or trans_a:
       self._symbol_table.add_scope()
 
     if trans_a:
@@ -365,13 +589,15 @@ class ShrMemBasedDenseSparseGemmBuilder(AbstractBuilder):
     # Note: we will handle transposition of the second operand during
     # the matrix multiplication
 
-    if mat_b.get_values() == None:
-      self._op2 = self._make_loader_and_symbol(operand=op2, do_transpose=False)
+    if mat_b.get_values() is None:
+      # Note: blocks get reordered to the block-CSC order while loading
+      block_order = mat_b.get_block_csc()[2] if self._blocked else None
+      self._op2 = self._make_loader_and_symbol(operand=op2, do_transpose=False, block_order=block_order)
     else:
       self._op2 = op2
 
 
-    if mat_b.get_values() == None or trans_a:
+    if mat_b.get_values() is None or trans_a:
       self._insert_sync_threads()
 
     gemm_params = {'vm': self._vm,
@@ -382,20 +608,34 @@ class ShrMemBasedDenseSparseGemmBuilder(AbstractBuilder):
                    'dest': dest,
                    'num_threads': self._num_threads,
                    'mat_b': mat_b}
-    self._instructions.append(ShrMemBasedDenseSparseGemm(**gemm_params))
+    if self._blocked:
+      self._instructions.append(ShrMemBasedDenseBlockSparseGemm(**gemm_params))
+    elif self._looped:
+      self._instructions.append(ShrMemBasedDenseSparseLoopedGemm(**gemm_params))
+    else:
+      self._instructions.append(ShrMemBasedDenseSparseGemm(**gemm_params))
 
-  def _make_loader_and_symbol(self, operand, do_transpose):
+  def _make_loader_and_symbol(self, operand, do_transpose, block_order=None):
     shr_mem_region = Symbol(name=self._name_shr_reg(),
                             stype=SymbolType.SharedMem,
                             obj=operand.obj)
 
     self._symbol_table.add_symbol(shr_mem_region)
-    load_op = shm_mem_loader_factory(vm=self._vm,
-                                     dest=shr_mem_region,
-                                     src=operand,
-                                     shr_mem=self._shr_mem,
-                                     num_threads=self._num_threads,
-                                     load_and_transpose=do_transpose)
+    if block_order is not None:
+      load_op = BlockPatchLoader(vm=self._vm,
+                                 dest=shr_mem_region,
+                                 src=operand,
+                                 shr_mem=self._shr_mem,
+                                 num_threads=self._num_threads,
+                                 load_and_transpose=False,
+                                 block_order=block_order)
+    else:
+      load_op = shm_mem_loader_factory(vm=self._vm,
+                                       dest=shr_mem_region,
+                                       src=operand,
+                                       shr_mem=self._shr_mem,
+                                       num_threads=self._num_threads,
+                                       load_and_transpose=do_transpose)
 
     self._instructions.append(load_op)
     self._load_instrs.append(load_op)
@@ -405,7 +645,7 @@ class ShrMemBasedDenseSparseGemmBuilder(AbstractBuilder):
     return self._load_instrs
 
   def _insert_sync_threads(self):
-    self._instructions.append(SyncThreads(self._vm, self._num_threads))
+    self._instructions.extend(make_sync_threads(self._vm, self._instructions, self._num_threads))
 
   def _name_shr_reg(self):
     name = f'{GeneralLexicon.SHR_MEM_REGION_PREFIX}{self._counter}'
@@ -1,2 +1,3 @@
 from .gemms.factory import GemmKernelsFactory
 from .gemms.factory import GemmKernelType
+from .gemms.cost_model import GemmCostModel, KernelCostEstimate
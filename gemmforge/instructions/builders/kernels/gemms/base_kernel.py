@@ -14,11 +14,21 @@ class BaseGemmKernelBuilder(AbstractBuilder):
       lead_dim_length = self._mat_a.get_actual_num_cols()
     else:
       lead_dim_length = self._mat_a.get_actual_num_rows()
-    num_vector_units_required = math.ceil(lead_dim_length / self._hw_descr.vec_unit_length)
     self._num_compute_threads = lead_dim_length
-    self._num_active_threads = num_vector_units_required * self._hw_descr.vec_unit_length
+    self._num_active_threads = self._get_num_active_threads(lead_dim_length)
     return (self._num_compute_threads, self._num_active_threads)
 
+  def _get_num_active_threads(self, num_compute_threads):
+    vec_unit_length = self._hw_descr.vec_unit_length
+    if self._pack_batch_elements and num_compute_threads < vec_unit_length:
+      # Note: several operations share a vector unit. Each operation gets a segment
+      # of lanes. The size of a segment is a power of 2. Thus, it divides
+      # the length of a vector unit and segments never cross vector units
+      return 2 ** math.ceil(math.log2(max(num_compute_threads, 1)))
+    else:
+      num_vector_units_required = math.ceil(num_compute_threads / vec_unit_length)
+      return num_vector_units_required * vec_unit_length
+
   def __init__(self, **kwargs):
     super(BaseGemmKernelBuilder, self).__init__(kwargs['vm'], kwargs['symbol_table'])
     self._trans_a = kwargs['trans_a']
@@ -29,6 +39,10 @@ class BaseGemmKernelBuilder(AbstractBuilder):
     self._alpha = kwargs['alpha']
     self._beta = kwargs['beta']
     self._hw_descr = kwargs['hw_descr']
+    self._pack_batch_elements = kwargs.get('pack_batch_elements', False)
+    self._num_k_stages = kwargs.get('num_k_stages', 1)
+    self._loader_options = kwargs.get('loader_options', {})
+    self._epilogues = kwargs.get('epilogues', [])
     self._deduce_num_threads()
 
     self._reg_array_obj = None
@@ -44,6 +58,17 @@ class BaseGemmKernelBuilder(AbstractBuilder):
   def get_shr_mem_loads(self):
     return self._shr_mem_loads
 
+  def get_micro_tile(self):
+    """returns a micro-tile computed by a thread or None
+    if each thread computes a single row of the result"""
+    return None
+
+  def _get_epilogue_symbols(self):
+    return [(epilogue, self._symbol_table[epilogue.get_matrix()]) for epilogue in self._epilogues]
+
+  def _get_accumulator_size(self):
+    return self._mat_c.get_actual_num_cols()
+
   def build_prologue(self):
     builder = GetElementPtrBuilder(self._vm, self._symbol_table)
     for symbol in self._symbol_table.from_global.values():
@@ -52,7 +77,7 @@ class BaseGemmKernelBuilder(AbstractBuilder):
 
     # create an array of registers
     builder = RegistersAllocBuilder(self._vm, self._symbol_table)
-    builder.build(self._mat_c.get_actual_num_cols(), 0.0)
+    builder.build(self._get_accumulator_size(), 0.0)
     self._instructions.extend(builder.get_instructions())
     self._reg_array_obj = builder.get_resultant_obj()
 
@@ -66,7 +91,8 @@ class BaseGemmKernelBuilder(AbstractBuilder):
                           self._symbol_table[self._reg_array_obj],
                           self._alpha,
                           self._beta,
-                          self._num_compute_threads)
+                          self._num_compute_threads,
+                          self._get_epilogue_symbols())
     self._instructions.append(store)
 
   def build(self):
@@ -0,0 +1,310 @@
+from gemmforge.thread_policies.gemm.register_blocked import RegisterBlockedGemmThreadPolicy
+from gemmforge.resources import compute_occupancy
+from copy import deepcopy
+import math
+
+
+def _get_known_costs():
+  """Approximate per-manufacturer costs. Instruction costs are given relative to an fma
+  instruction issued by a whole vector unit (warp, wavefront or sub-group).
+
+  Attributes:
+    issue_rate: vector-unit instructions issued per cycle per SM (CU, Xe-core)
+    mio_rate: memory-pipeline (L1, shr. mem., shuffle) wavefronts processed per cycle per SM
+    glb_bytes_per_cycle: glb. mem. bandwidth per cycle per SM
+    glb_latency: latency of a glb. mem. access in cycles
+    latency_threads: resident threads per SM required to hide latencies
+    shr_access: wavefronts of a shr. mem. access (broadcast or conflict-free)
+    shuffle: wavefronts of a broadcast within a vector unit
+    transaction_bytes: a glb. mem. transaction (cache line) size
+  """
+  costs = {}
+  costs['nvidia'] = {
+    'issue_rate': 4,
+    'mio_rate': 1,
+    'glb_bytes_per_cycle': 10,
+    'glb_latency': 500,
+    'latency_threads': 512,
+    'shr_access': 1,
+    'shuffle': 1,
+    'transaction_bytes': 128,
+  }
+
+  # Note: wavefront-wide shuffles go through the LDS crossbar (ds_bpermute)
+  costs['amd'] = deepcopy(costs['nvidia'])
+  costs['amd']['issue_rate'] = 1
+  costs['amd']['glb_bytes_per_cycle'] = 8
+  costs['amd']['latency_threads'] = 1024
+  costs['amd']['shuffle'] = 2
+
+  # Note: shared local memory has a lower throughput than sub-group shuffles
+  costs['intel'] = deepcopy(costs['nvidia'])
+  costs['intel']['issue_rate'] = 8
+  costs['intel']['mio_rate'] = 2
+  costs['intel']['glb_bytes_per_cycle'] = 16
+  costs['intel']['shr_access'] = 4
+  costs['intel']['transaction_bytes'] = 64
+  return costs
+
+
+class KernelCostEstimate:
+  """Predicted characteristics of a single gemm operation (i.e., a single batch element)
+  computed by a kernel of a given type
+
+  Attributes:
+    kernel_type: a string representation of a kernel type (see GemmKernelType.to_str)
+    num_threads: number of active threads per operation
+    shr_mem_per_op: shr. mem. footprint in bytes
+    regs_per_thread: estimated number of registers per thread
+    ops_per_sm: number of operations which can reside on an SM simultaneously
+    occupancy: ratio of resident threads to the max. number of threads per SM
+    flops: number of floating point operations
+    glb_mem_traffic: number of bytes moved from/to glb. mem.
+    num_instructions: number of issued vector-unit instructions
+    mio_wavefronts: number of wavefronts processed by the memory pipeline
+    time: predicted time in cycles per operation and SM; only suitable for comparisons
+  """
+  def __init__(self, kernel_type, num_threads, shr_mem_per_op, regs_per_thread, ops_per_sm,
+               occupancy, flops, glb_mem_traffic, num_instructions, mio_wavefronts, time):
+    self.kernel_type = kernel_type
+    self.num_threads = num_threads
+    self.shr_mem_per_op = shr_mem_per_op
+    self.regs_per_thread = regs_per_thread
+    self.ops_per_sm = ops_per_sm
+    self.occupancy = occupancy
+    self.flops = flops
+    self.glb_mem_traffic = glb_mem_traffic
+    self.num_instructions = num_instructions
+    self.mio_wavefronts = mio_wavefronts
+    self.time = time
+
+  def is_feasible(self):
+    return self.ops_per_sm > 0
+
+  def __str__(self):
+    return (f'{self.kernel_type}: time = {self.time:.1f}, threads = {self.num_threads}, '
+            f'shr. mem. = {self.shr_mem_per_op} B, regs = {self.regs_per_thread}, '
+            f'ops/sm = {self.ops_per_sm}, occupancy = {self.occupancy:.2f}, '
+            f'flops = {self.flops}, glb. traffic = {self.glb_mem_traffic} B, '
+            f'instructions = {self.num_instructions:.0f}, wavefronts = {self.mio_wavefronts:.0f}')
+
+
+class GemmCostModel:
+  """An analytic model which estimates the execution time of dense gemm kernels.
+
+  The model counts instructions issued by all vector units of an operation and wavefronts
+  which they cause in the memory pipeline. Glb. mem. accesses are counted in transactions.
+  Thus, strided accesses within a vector unit are penalized. The time of an operation
+  is bound by either the instruction issue, the memory pipeline or glb. mem. bandwidth.
+  It gets scaled if there are not enough resident threads to hide latencies. Each barrier
+  exposes the latency of preceding glb. mem. loads which is shared among resident operations.
+  """
+  KNOWN_COSTS = _get_known_costs()
+  CANDIDATES = ['shr_mem', 'register_only', 'register_blocked']
+
+  # Note: the model is not calibrated against measurements. Thus, a default kernel type
+  # is replaced only if another candidate is predicted to be considerably faster
+  MIN_SPEEDUP = 1.5
+
+  def __init__(self, vm, trans_a, trans_b, mat_a, mat_b, mat_c, beta, pack_batch_elements=False):
+    self._vm = vm
+    self._hw_descr = vm.get_hw_descr()
+    self._costs = GemmCostModel.KNOWN_COSTS[self._hw_descr.manufacturer]
+    self._trans_a = trans_a
+    self._trans_b = trans_b
+    self._beta = beta
+    self._pack_batch_elements = pack_batch_elements
+
+    self._m = mat_c.get_actual_num_rows()
+    self._n = mat_c.get_actual_num_cols()
+    self._k = mat_a.get_actual_num_rows() if trans_a else mat_a.get_actual_num_cols()
+
+  def get_estimates(self):
+    """Returns a dict which maps string representations of kernel types to their estimates"""
+    return {kernel_type: self.estimate(kernel_type) for kernel_type in GemmCostModel.CANDIDATES}
+
+  def select(self, candidates=None, default=None):
+    """Returns a string representation of the kernel type with the min. predicted time.
+    Ties are resolved in favour of the candidate listed first.
+
+    Args:
+      candidates: string representations of kernel types to choose from
+      default: a kernel type which is kept unless another candidate is predicted
+        to be at least MIN_SPEEDUP times faster
+    """
+    candidates = GemmCostModel.CANDIDATES if candidates is None else candidates
+    estimates = {kernel_type: self.estimate(kernel_type) for kernel_type in candidates}
+    feasible = [estimate for estimate in estimates.values() if estimate.is_feasible()]
+    if not feasible:
+      return candidates[0]
+    fastest = min(feasible, key=lambda estimate: estimate.time)
+
+    if default in estimates and estimates[default].is_feasible():
+      if fastest.time * GemmCostModel.MIN_SPEEDUP > estimates[default].time:
+        return default
+    return fastest.kernel_type
+
+  def estimate(self, kernel_type):
+    if kernel_type == 'shr_mem':
+      return self._estimate_shr_mem_based()
+    elif kernel_type == 'register_only':
+      return self._estimate_register_only()
+    elif kernel_type == 'register_blocked':
+      return self._estimate_register_blocked()
+    else:
+      raise RuntimeError(f'cost model: unknown kernel type: {kernel_type}')
+
+  def _estimate_shr_mem_based(self):
+    m, n, k = self._m, self._n, self._k
+    num_threads = self._get_num_active_threads(m)
+    num_vec_units = self._get_num_vec_units(num_threads)
+    shr_access = self._costs['shr_access']
+
+    shr_mem_volume = k * n + (m * k if self._trans_a else 0)
+    num_instructions, mio_wavefronts = self._count_shr_mem_loads(shr_mem_volume, num_threads)
+
+    # an element of A is either read from glb. mem. or from shr. mem. (if transposed)
+    op1_wavefronts = shr_access if self._trans_a else self._get_coalesced_wavefronts()
+    num_instructions += num_vec_units * k * (1 + 2 * n)
+    mio_wavefronts += num_vec_units * k * (op1_wavefronts + n * shr_access)
+
+    return self._make_estimate('shr_mem',
+                               num_threads=num_threads,
+                               shr_mem_volume=shr_mem_volume,
+                               accumulator_length=n,
+                               num_instructions=num_instructions,
+                               mio_wavefronts=mio_wavefronts,
+                               num_syncs=1)
+
+  def _estimate_register_only(self):
+    m, n, k = self._m, self._n, self._k
+    num_threads = self._get_num_active_threads(m)
+    num_vec_units = self._get_num_vec_units(num_threads)
+    vec_unit_length = self._hw_descr.vec_unit_length
+
+    if self._trans_a:
+      op1_wavefronts = self._get_strided_wavefronts(vec_unit_length)
+    else:
+      op1_wavefronts = self._get_coalesced_wavefronts()
+
+    # Note: lanes load different columns of B which get broadcast afterwards
+    num_op2_loads = math.ceil(n / vec_unit_length)
+    op2_wavefronts = self._get_coalesced_wavefronts() if self._trans_b else self._get_strided_wavefronts(n)
+
+    num_instructions = num_vec_units * k * (1 + num_op2_loads + 2 * n)
+    mio_wavefronts = num_vec_units * k * (op1_wavefronts
+                                          + num_op2_loads * op2_wavefronts
+                                          + n * self._costs['shuffle'])
+
+    return self._make_estimate('register_only',
+                               num_threads=num_threads,
+                               shr_mem_volume=0,
+                               accumulator_length=n,
+                               num_instructions=num_instructions,
+                               mio_wavefronts=mio_wavefronts,
+                               num_syncs=0)
+
+  def _estimate_register_blocked(self):
+    m, n, k = self._m, self._n, self._k
+    micro_tile = RegisterBlockedGemmThreadPolicy.select_micro_tile(self._vm, m, n)
+    tile_rows, tile_cols = micro_tile
+    num_row_groups, num_col_groups = RegisterBlockedGemmThreadPolicy.get_num_thread_groups(m, n, micro_tile)
+    num_threads = self._get_num_active_threads(num_row_groups * num_col_groups)
+    num_vec_units = self._get_num_vec_units(num_threads)
+
+    shr_mem_volume = m * k + k * n
+    num_instructions, mio_wavefronts = self._count_shr_mem_loads(shr_mem_volume, num_threads)
+
+    num_shr_mem_reads = tile_rows + tile_cols
+    num_instructions += num_vec_units * k * (num_shr_mem_reads + tile_rows * tile_cols)
+    mio_wavefronts += num_vec_units * k * num_shr_mem_reads * self._costs['shr_access']
+
+    return self._make_estimate('register_blocked',
+                               num_threads=num_threads,
+                               shr_mem_volume=shr_mem_volume,
+                               accumulator_length=tile_rows * tile_cols + tile_rows + tile_cols,
+                               num_instructions=num_instructions,
+                               mio_wavefronts=mio_wavefronts,
+                               num_syncs=1)
+
+  def _make_estimate(self, kernel_type, num_threads, shr_mem_volume, accumulator_length,
+                     num_instructions, mio_wavefronts, num_syncs):
+    hw_descr = self._hw_descr
+    bytes_per_real = self._vm.bytes_per_real()
+
+    # results are stored by all threads
+    num_stores = self._get_num_c_accesses() * self._n * self._m / hw_descr.vec_unit_length
+    num_instructions += num_stores
+    mio_wavefronts += num_stores * self._get_coalesced_wavefronts()
+
+    # Note: the same estimate as used by thread policies
+    factor = bytes_per_real / 4
+    regs_per_thread = int(factor * (hw_descr.vec_unit_length + accumulator_length))
+
+    shr_mem_per_op = shr_mem_volume * bytes_per_real
+    # Note: packed operations share a vector unit. Thus, they are grouped into a single block
+    ops_per_group = max(1, hw_descr.vec_unit_length // num_threads)
+    num_groups, occupancy, _ = compute_occupancy(hw_descr,
+                                                 num_threads * ops_per_group,
+                                                 regs_per_thread,
+                                                 shr_mem_per_op * ops_per_group)
+    ops_per_sm = num_groups * ops_per_group
+    resident_threads = ops_per_sm * num_threads
+
+    flops = 2 * self._m * self._n * self._k
+    glb_mem_traffic = self._get_glb_mem_traffic()
+
+    if ops_per_sm > 0:
+      efficiency = min(1.0, resident_threads / self._costs['latency_threads'])
+      time = max(num_instructions / self._costs['issue_rate'],
+                 mio_wavefronts / self._costs['mio_rate'],
+                 glb_mem_traffic / self._costs['glb_bytes_per_cycle']) / efficiency
+      time += num_syncs * self._costs['glb_latency'] / ops_per_sm
+    else:
+      time = math.inf
+
+    return KernelCostEstimate(kernel_type=kernel_type,
+                              num_threads=num_threads,
+                              shr_mem_per_op=shr_mem_per_op,
+                              regs_per_thread=regs_per_thread,
+                              ops_per_sm=ops_per_sm,
+                              occupancy=occupancy,
+                              flops=flops,
+                              glb_mem_traffic=glb_mem_traffic,
+                              num_instructions=num_instructions,
+                              mio_wavefronts=mio_wavefronts,
+                              time=time)
+
+  def _get_num_active_threads(self, num_compute_threads):
+    vec_unit_length = self._hw_descr.vec_unit_length
+    if self._pack_batch_elements and num_compute_threads < vec_unit_length:
+      return 2 ** math.ceil(math.log2(max(num_compute_threads, 1)))
+    return math.ceil(num_compute_threads / vec_unit_length) * vec_unit_length
+
+  def _get_num_vec_units(self, num_threads):
+    # Note: a packed operation occupies a fraction of a vector unit
+    return num_threads / self._hw_descr.vec_unit_length
+
+  def _get_coalesced_wavefronts(self):
+    """Returns the number of transactions of a glb. mem. access to consecutive elements"""
+    num_bytes = self._hw_descr.vec_unit_length * self._vm.bytes_per_real()
+    return math.ceil(num_bytes / self._costs['transaction_bytes'])
+
+  def _get_strided_wavefronts(self, num_distinct_lanes):
+    """Returns the number of transactions of a glb. mem. access where lanes touch different lines"""
+    return max(1, min(num_distinct_lanes, self._hw_descr.vec_unit_length))
+
+  def _count_shr_mem_loads(self, volume, num_threads):
+    """Returns the number of instructions and wavefronts required to load data to shr. mem."""
+    num_vec_units = self._get_num_vec_units(num_threads)
+    num_hops = math.ceil(volume / num_threads)
+    num_instructions = 2 * num_vec_units * num_hops
+    mio_wavefronts = num_vec_units * num_hops * (self._get_coalesced_wavefronts() + self._costs['shr_access'])
+    return num_instructions, mio_wavefronts
+
+  def _get_num_c_accesses(self):
+    return 2 if self._beta != 0.0 else 1
+
+  def _get_glb_mem_traffic(self):
+    volume = self._m * self._k + self._k * self._n + self._get_num_c_accesses() * self._m * self._n
+    return volume * self._vm.bytes_per_real()
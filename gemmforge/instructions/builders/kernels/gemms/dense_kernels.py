@@ -2,7 +2,11 @@ from .base_kernel import BaseGemmKernelBuilder
 from gemmforge.instructions.builders import ShrMemAllocBuilder
 from gemmforge.instructions.builders import ShrMemBasedDenseGemmBuilder
 from gemmforge.instructions.builders import RegisterOnlyDenseGemmBuilder
+from gemmforge.instructions.builders import RegisterBlockedDenseGemmBuilder
+from gemmforge.instructions import StoreRegBlockToGlb
+from gemmforge.thread_policies.gemm.register_blocked import RegisterBlockedGemmThreadPolicy
 from gemmforge.basic_types import ShrMemObject
+from gemmforge.exceptions import GenerationError
 
 
 class ShrMemBasedDenseGemmKernelBuilder(BaseGemmKernelBuilder):
@@ -24,7 +28,9 @@ class ShrMemBasedDenseGemmKernelBuilder(BaseGemmKernelBuilder):
                                           self._symbol_table,
                                           self._reg_array_obj,
                                           self._shr_mem_obj,
-                                          self._num_active_threads)
+                                          self._num_active_threads,
+                                          self._num_k_stages,
+                                          self._loader_options)
 
     builder.build(trans_a=self._trans_a,
                   trans_b=self._trans_b,
@@ -41,6 +47,9 @@ class RegisterOnlyDenseGemmKernelBuilder(BaseGemmKernelBuilder):
   This type of gemm kernels perform well on Nvidia and AMD GPUs"""
 
   def __init__(self, **kwargs):
+    if not kwargs['vm'].get_lexic().supports_partial_sub_group_broadcast():
+      # Note: each operation broadcasts values within its own segment of lanes
+      kwargs = dict(kwargs, pack_batch_elements=False)
     super(RegisterOnlyDenseGemmKernelBuilder, self).__init__(**kwargs)
 
   def build_kernel(self):
@@ -60,3 +69,79 @@ class RegisterOnlyDenseGemmKernelBuilder(BaseGemmKernelBuilder):
 
     self._shr_mem_loads = builder.get_srh_mem_loads()
     self._instructions.extend(builder.get_instructions())
+
+
+class RegisterBlockedDenseGemmKernelBuilder(BaseGemmKernelBuilder):
+  """ This is a class for building register-blocked gemm kernels.
+  Each thread computes an MR x NR micro-tile of matrix C which
+  reduces the number of shr. mem. reads per fma instruction"""
+
+  def __init__(self, **kwargs):
+    self._micro_tile = kwargs.get('micro_tile', None)
+    super(RegisterBlockedDenseGemmKernelBuilder, self).__init__(**kwargs)
+
+  def _deduce_num_threads(self):
+    if self._trans_a:
+      num_rows = self._mat_a.get_actual_num_cols()
+    else:
+      num_rows = self._mat_a.get_actual_num_rows()
+    num_cols = self._mat_c.get_actual_num_cols()
+
+    if self._micro_tile is None:
+      self._micro_tile = RegisterBlockedGemmThreadPolicy.select_micro_tile(self._vm, num_rows, num_cols)
+    else:
+      self._micro_tile = tuple(self._micro_tile)
+      if len(self._micro_tile) != 2 or min(self._micro_tile) < 1:
+        raise GenerationError(f'micro-tile must be a pair of positive integers, given: {self._micro_tile}')
+
+    self._num_thread_groups = RegisterBlockedGemmThreadPolicy.get_num_thread_groups(num_rows,
+                                                                                    num_cols,
+                                                                                    self._micro_tile)
+    num_row_groups, num_col_groups = self._num_thread_groups
+    self._num_compute_threads = num_row_groups * num_col_groups
+    self._num_active_threads = self._get_num_active_threads(self._num_compute_threads)
+    return (self._num_compute_threads, self._num_active_threads)
+
+  def get_micro_tile(self):
+    return self._micro_tile
+
+  def _get_accumulator_size(self):
+    tile_rows, tile_cols = self._micro_tile
+    return tile_rows * tile_cols
+
+  def build_kernel(self):
+    # create shared mem
+    builder = ShrMemAllocBuilder(self._vm, self._symbol_table)
+    builder.build(size=None)
+    self._instructions.extend(builder.get_instructions())
+    self._shr_mem_obj = builder.get_resultant_obj()
+
+    # generate the rest instructions i.e., load to shr. mem, compute
+    builder = RegisterBlockedDenseGemmBuilder(self._vm,
+                                              self._symbol_table,
+                                              self._reg_array_obj,
+                                              self._shr_mem_obj,
+                                              self._num_active_threads,
+                                              self._micro_tile,
+                                              self._num_thread_groups,
+                                              self._loader_options)
+
+    builder.build(trans_a=self._trans_a,
+                  trans_b=self._trans_b,
+                  op1=self._symbol_table[self._mat_a],
+                  op2=self._symbol_table[self._mat_b],
+                  dest=self._symbol_table[self._reg_array_obj])
+
+    self._shr_mem_loads = builder.get_srh_mem_loads()
+    self._instructions.extend(builder.get_instructions())
+
+  def build_epilogue(self):
+    store = StoreRegBlockToGlb(self._vm,
+                               self._symbol_table[self._mat_c],
+                               self._symbol_table[self._reg_array_obj],
+                               self._alpha,
+                               self._beta,
+                               self._micro_tile,
+                               self._num_thread_groups,
+                               self._get_epilogue_symbols())
+    self._instructions.append(store)
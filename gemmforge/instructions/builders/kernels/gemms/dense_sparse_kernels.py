@@ -12,13 +12,16 @@ class ShrMemBasedDenseSparseGemmKernelBuilder(BaseGemmKernelBuilder):
   """ This is a class for building shared-memory-based gemm kernels.
   This type of gemm kernels perform well on Nvidia and AMD GPUs"""
 
+  LOOPED = False
+  BLOCKED = False
+
   def __init__(self, **kwargs):
     super(ShrMemBasedDenseSparseGemmKernelBuilder, self).__init__(**kwargs)
 
   def build_prologue(self):
     builder = GetElementPtrBuilder(self._vm, self._symbol_table)
     for symbol in self._symbol_table.from_global.values():
-      if isinstance(symbol.obj, SparseMatrix) and symbol.obj.get_values() != None:
+      if isinstance(symbol.obj, SparseMatrix) and symbol.obj.get_values() is not None:
         continue
       builder.build(symbol)
       self._instructions.extend(builder.get_instructions())
@@ -30,7 +33,7 @@ class ShrMemBasedDenseSparseGemmKernelBuilder(BaseGemmKernelBuilder):
     self._reg_array_obj = builder.get_resultant_obj()
 
   def build_kernel(self):
-    if not self._trans_a and self._mat_b.get_values() != None:
+    if not self._trans_a and self._mat_b.get_values() is not None:
       self._shr_mem_obj = ShrMemObject(name=None, size=0)
       #self._shr_mem_obj = None
     else:
@@ -44,7 +47,9 @@ class ShrMemBasedDenseSparseGemmKernelBuilder(BaseGemmKernelBuilder):
                                                 self._symbol_table,
                                                 self._reg_array_obj,
                                                 self._shr_mem_obj,
-                                                self._num_active_threads)
+                                                self._num_active_threads,
+                                                self.LOOPED,
+                                                self.BLOCKED)
 
     builder.build(trans_a=self._trans_a,
                   trans_b=self._trans_b,
@@ -57,6 +62,18 @@ class ShrMemBasedDenseSparseGemmKernelBuilder(BaseGemmKernelBuilder):
     self._instructions.extend(builder.get_instructions())
 
 
+class ShrMemBasedDenseSparseLoopedGemmKernelBuilder(ShrMemBasedDenseSparseGemmKernelBuilder):
+  """Emits loops over compressed columns of B instead of unrolling all non-zeros.
+  Suitable for large sparse operands which would result in huge unrolled kernels"""
+  LOOPED = True
+
+
+class ShrMemBasedDenseBlockSparseGemmKernelBuilder(ShrMemBasedDenseSparseGemmKernelBuilder):
+  """Multiplies A by dense blocks of a block-sparse B, one block-column of B at a time.
+  Blocks of B get loaded to shr. mem. as a whole (see BlockPatchLoader)"""
+  BLOCKED = True
+
+
 class RegisterOnlyDenseSparseGemmKernelBuilder(BaseGemmKernelBuilder):
   """ This is a class for building default gemm kernels.
   This type of gemm kernels perform well on Nvidia and AMD GPUs"""
@@ -67,7 +84,7 @@ class RegisterOnlyDenseSparseGemmKernelBuilder(BaseGemmKernelBuilder):
   def build_prologue(self):
     builder = GetElementPtrBuilder(self._vm, self._symbol_table)
     for symbol in self._symbol_table.from_global.values():
-      if isinstance(symbol.obj, SparseMatrix) and symbol.obj.get_values() != None:
+      if isinstance(symbol.obj, SparseMatrix) and symbol.obj.get_values() is not None:
         print("skip", symbol)
         continue
       builder.build(symbol)
@@ -1,10 +1,16 @@
 from .dense_kernels import ShrMemBasedDenseGemmKernelBuilder
 from .dense_kernels import RegisterOnlyDenseGemmKernelBuilder
+from .dense_kernels import RegisterBlockedDenseGemmKernelBuilder
 from .dense_sparse_kernels import ShrMemBasedDenseSparseGemmKernelBuilder
+from .dense_sparse_kernels import ShrMemBasedDenseSparseLoopedGemmKernelBuilder
+from .dense_sparse_kernels import ShrMemBasedDenseBlockSparseGemmKernelBuilder
 from .dense_sparse_kernels import RegisterOnlyDenseSparseGemmKernelBuilder
 from .sparse_dense_kernels import ShrMemBasedSparseDenseGemmKernelBuilder
+from .sparse_dense_kernels import ShrMemBasedSparseDenseLoopedGemmKernelBuilder
+from .sparse_dense_kernels import ShrMemBasedBlockSparseDenseGemmKernelBuilder
 from .sparse_dense_kernels import RegisterOnlySparseDenseGemmKernelBuilder
-from gemmforge.matrix import SparseMatrix, DenseMatrix
+from .cost_model import GemmCostModel
+from gemmforge.matrix import SparseMatrix, BlockSparseMatrix, DenseMatrix
 from enum import Enum
 
 
@@ -16,6 +22,11 @@ class GemmKernelType(Enum):
   DENSE_SPARSE_REGISTER_ONLY_BASED = 4
   SPARSE_DENSE_SHR_MEM_BASED = 5
   SPARSE_DENSE_REGISTER_ONLY_BASED = 6
+  REGISTER_BLOCKED = 7
+  DENSE_SPARSE_SHR_MEM_LOOPED = 8
+  SPARSE_DENSE_SHR_MEM_LOOPED = 9
+  DENSE_SPARSE_SHR_MEM_BLOCKED = 10
+  SPARSE_DENSE_SHR_MEM_BLOCKED = 11
 
   @classmethod
   def to_str(cls, value):
@@ -33,11 +44,24 @@ class GemmKernelType(Enum):
       return GemmKernelType.SPARSE_DENSE_SHR_MEM_BASED
     elif value == "sparse_dense_register_only":
       return GemmKernelType.SPARSE_DENSE_REGISTER_ONLY_BASED
+    elif value == "register_blocked":
+      return GemmKernelType.REGISTER_BLOCKED
+    elif value == "dense_sparse_shr_mem_looped":
+      return GemmKernelType.DENSE_SPARSE_SHR_MEM_LOOPED
+    elif value == "sparse_dense_shr_mem_looped":
+      return GemmKernelType.SPARSE_DENSE_SHR_MEM_LOOPED
+    elif value == "dense_sparse_shr_mem_blocked":
+      return GemmKernelType.DENSE_SPARSE_SHR_MEM_BLOCKED
+    elif value == "sparse_dense_shr_mem_blocked":
+      return GemmKernelType.SPARSE_DENSE_SHR_MEM_BLOCKED
     else:
       RuntimeError('unknown representation of gemm kernel type as `str`')
 
 
 class GemmKernelsFactory:
+  # Note: sparse operands with more non-zeros result in too large unrolled kernels
+  MAX_NUM_UNROLLED_NON_ZEROS = 1024
+
   def __init__(self, **kwargs):
     self._kwargs = kwargs
     self._vm = kwargs['vm']
@@ -56,24 +80,51 @@ class GemmKernelsFactory:
   def _auto_select(self):
     model = self._hw_descr.model
     both_sparse_error = "Gemmforge does not support both matrix A and B being sparse"
-    if model == 'pvc':
-      if self._sparse_a and self._sparse_b:
-        raise Exception(both_sparse_error)
-      elif self._sparse_b:
+    if self._sparse_a and self._sparse_b:
+      raise Exception(both_sparse_error)
+    elif self._sparse_b:
+      if model == 'pvc':
         return GemmKernelType.DENSE_SPARSE_REGISTER_ONLY_BASED
-      elif self._sparse_a:
+      if GemmKernelsFactory._has_blocks(self._mat_b):
+        return GemmKernelType.DENSE_SPARSE_SHR_MEM_BLOCKED
+      if self._mat_b.get_el_count() > GemmKernelsFactory.MAX_NUM_UNROLLED_NON_ZEROS:
+        return GemmKernelType.DENSE_SPARSE_SHR_MEM_LOOPED
+      return GemmKernelType.DENSE_SPARSE_SHR_MEM_BASED
+    elif self._sparse_a:
+      if model == 'pvc':
         return GemmKernelType.SPARSE_DENSE_REGISTER_ONLY_BASED
-      else:
-        return GemmKernelType.REGISTER_ONLY_BASED
+      if GemmKernelsFactory._has_blocks(self._mat_a):
+        return GemmKernelType.SPARSE_DENSE_SHR_MEM_BLOCKED
+      if self._mat_a.get_el_count() > GemmKernelsFactory.MAX_NUM_UNROLLED_NON_ZEROS:
+        return GemmKernelType.SPARSE_DENSE_SHR_MEM_LOOPED
+      return GemmKernelType.SPARSE_DENSE_SHR_MEM_BASED
     else:
-      if self._sparse_a and self._sparse_b:
-        raise Exception(both_sparse_error)
-      elif self._sparse_b:
-        return GemmKernelType.DENSE_SPARSE_SHR_MEM_BASED
-      elif self._sparse_a:
-        return GemmKernelType.SPARSE_DENSE_SHR_MEM_BASED
-      else:
-        return GemmKernelType.SHR_MEM_BASED
+      cost_model = GemmKernelsFactory.make_cost_model(**self._kwargs)
+      default = 'register_only' if model == 'pvc' else 'shr_mem'
+      return GemmKernelType.to_str(cost_model.select(self._get_dense_candidates(), default=default))
+
+  @classmethod
+  def _has_blocks(cls, matrix):
+    return isinstance(matrix, BlockSparseMatrix) and matrix.get_block_volume() > 1
+
+  def _get_dense_candidates(self):
+    # Note: some options are supported only by particular kernel types
+    if self._kwargs.get('micro_tile', None) is not None:
+      return ['register_blocked']
+    if self._kwargs.get('num_k_stages', 1) > 1:
+      return ['shr_mem']
+    return GemmCostModel.CANDIDATES
+
+  @classmethod
+  def make_cost_model(cls, **kwargs):
+    return GemmCostModel(vm=kwargs['vm'],
+                         trans_a=kwargs['trans_a'],
+                         trans_b=kwargs['trans_b'],
+                         mat_a=kwargs['mat_a'],
+                         mat_b=kwargs['mat_b'],
+                         mat_c=kwargs['mat_c'],
+                         beta=kwargs['beta'],
+                         pack_batch_elements=kwargs.get('pack_batch_elements', False))
 
   def get_builder(self):
     if self._gemm_kernel_type == GemmKernelType.AUTO:
@@ -87,6 +138,14 @@ class GemmKernelsFactory:
       if not isinstance(self._mat_a, DenseMatrix) or not isinstance(self._mat_b, SparseMatrix):
         raise Exception("For dense x sparse kernel matrix A needs to be dense and matrix B sparse")
       return ShrMemBasedDenseSparseGemmKernelBuilder(**self._kwargs)
+    elif self._gemm_kernel_type == GemmKernelType.DENSE_SPARSE_SHR_MEM_LOOPED:
+      if not isinstance(self._mat_a, DenseMatrix) or not isinstance(self._mat_b, SparseMatrix):
+        raise Exception("For dense x sparse kernel matrix A needs to be dense and matrix B sparse")
+      return ShrMemBasedDenseSparseLoopedGemmKernelBuilder(**self._kwargs)
+    elif self._gemm_kernel_type == GemmKernelType.DENSE_SPARSE_SHR_MEM_BLOCKED:
+      if not isinstance(self._mat_a, DenseMatrix) or not isinstance(self._mat_b, BlockSparseMatrix):
+        raise Exception("For dense x block-sparse kernel matrix A needs to be dense and matrix B block-sparse")
+      return ShrMemBasedDenseBlockSparseGemmKernelBuilder(**self._kwargs)
     elif self._gemm_kernel_type == GemmKernelType.DENSE_SPARSE_REGISTER_ONLY_BASED:
       if not isinstance(self._mat_a, DenseMatrix) or not isinstance(self._mat_b, SparseMatrix):
         raise Exception("For dense x sparse kernel matrix A needs to be dense and matrix B sparse")
@@ -95,10 +154,22 @@ class GemmKernelsFactory:
       if not isinstance(self._mat_a, SparseMatrix) or not isinstance(self._mat_b, DenseMatrix):
         raise Exception("For sparse x dense kernel matrix A needs to be sparse and matrix B dense")
       return ShrMemBasedSparseDenseGemmKernelBuilder(**self._kwargs)
+    elif self._gemm_kernel_type == GemmKernelType.SPARSE_DENSE_SHR_MEM_LOOPED:
+      if not isinstance(self._mat_a, SparseMatrix) or not isinstance(self._mat_b, DenseMatrix):
+        raise Exception("For sparse x dense kernel matrix A needs to be sparse and matrix B dense")
+      return ShrMemBasedSparseDenseLoopedGemmKernelBuilder(**self._kwargs)
+    elif self._gemm_kernel_type == GemmKernelType.SPARSE_DENSE_SHR_MEM_BLOCKED:
+      if not isinstance(self._mat_a, BlockSparseMatrix) or not isinstance(self._mat_b, DenseMatrix):
+        raise Exception("For block-sparse x dense kernel matrix A needs to be block-sparse and matrix B dense")
+      return ShrMemBasedBlockSparseDenseGemmKernelBuilder(**self._kwargs)
     elif self._gemm_kernel_type == GemmKernelType.SPARSE_DENSE_REGISTER_ONLY_BASED:
       if not isinstance(self._mat_a, SparseMatrix) or not isinstance(self._mat_b, DenseMatrix):
         raise Exception("For sparse x dense kernel matrix A needs to be sparse and matrix B dense")
       return RegisterOnlySparseDenseGemmKernelBuilder(**self._kwargs)
+    elif self._gemm_kernel_type == GemmKernelType.REGISTER_BLOCKED:
+      if not isinstance(self._mat_a, DenseMatrix) or not isinstance(self._mat_b, DenseMatrix):
+        raise Exception("For register-blocked kernel matrices A and B need to be dense")
+      return RegisterBlockedDenseGemmKernelBuilder(**self._kwargs)
     else:
       raise RuntimeError('unknown gemm type')
 
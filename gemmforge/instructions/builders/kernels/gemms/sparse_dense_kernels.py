@@ -9,6 +9,7 @@ from gemmforge.instructions.builders import ShrMemAllocBuilder
 from gemmforge.instructions.builders import ShrMemBasedSparseDenseGemmBuilder
 from gemmforge.instructions.builders import RegisterOnlySparseDenseGemmBuilder
 from gemmforge.basic_types import ShrMemObject
+from gemmforge.exceptions import GenerationError
 import math
 
 
@@ -16,6 +17,9 @@ class ShrMemBasedSparseDenseGemmKernelBuilder(BaseGemmKernelBuilder):
   """ This is a class for building shared-memory-based gemm kernels.
   This type of gemm kernels perform well on Nvidia and AMD GPUs"""
 
+  LOOPED = False
+  BLOCKED = False
+
   def __init__(self, **kwargs):
     super(ShrMemBasedSparseDenseGemmKernelBuilder, self).__init__(**kwargs)
     self._deduce_num_threads()
@@ -25,15 +29,14 @@ class ShrMemBasedSparseDenseGemmKernelBuilder(BaseGemmKernelBuilder):
       lead_dim_length = self._mat_b.get_actual_num_rows()
     else:
       lead_dim_length = self._mat_b.get_actual_num_cols()
-    num_vector_units_required = math.ceil(lead_dim_length / self._hw_descr.vec_unit_length)
     self._num_compute_threads = lead_dim_length
-    self._num_active_threads = num_vector_units_required * self._hw_descr.vec_unit_length
+    self._num_active_threads = self._get_num_active_threads(lead_dim_length)
     return (self._num_compute_threads, self._num_active_threads)
 
   def build_prologue(self):
     builder = GetElementPtrBuilder(self._vm, self._symbol_table)
     for symbol in self._symbol_table.from_global.values():
-      if isinstance(symbol.obj, SparseMatrix) and symbol.obj.get_values() != None:
+      if isinstance(symbol.obj, SparseMatrix) and symbol.obj.get_values() is not None:
         continue
       builder.build(symbol)
       self._instructions.extend(builder.get_instructions())
@@ -45,6 +48,9 @@ class ShrMemBasedSparseDenseGemmKernelBuilder(BaseGemmKernelBuilder):
     self._reg_array_obj = builder.get_resultant_obj()
 
   def build_epilogue(self):
+    if self._epilogues:
+      raise GenerationError('sparse x dense kernels do not support epilogues')
+
     store_to_shr = StoreRegToShrMemColumn(self._vm,
                             self._symbol_table[self._mat_c],
                             self._symbol_table[self._reg_array_obj],
@@ -53,7 +59,7 @@ class ShrMemBasedSparseDenseGemmKernelBuilder(BaseGemmKernelBuilder):
                             self._num_compute_threads)
     self._instructions.append(store_to_shr)
     # insert sync here
-    self._instructions.append(SyncThreads(self._vm, self._num_compute_threads))
+    self._instructions.append(SyncThreads(self._vm, self._num_active_threads))
 
     # We need to find the original glb_C symbol, as the matrix C is now shr_mem_1
     # and currently there is no support to save the original name of the pointer,
@@ -77,7 +83,7 @@ class ShrMemBasedSparseDenseGemmKernelBuilder(BaseGemmKernelBuilder):
     self._instructions.append(store_to_glb)
 
   def build_kernel(self):
-    if self._trans_b and self._mat_a.get_values() != None:
+    if self._trans_b and self._mat_a.get_values() is not None:
       builder = ShrMemAllocBuilder(self._vm, self._symbol_table)
       builder.build(size=self._mat_c.num_rows * self._mat_c.num_cols)
       self._instructions.extend(builder.get_instructions())
@@ -93,7 +99,9 @@ class ShrMemBasedSparseDenseGemmKernelBuilder(BaseGemmKernelBuilder):
                                                 self._symbol_table,
                                                 self._reg_array_obj,
                                                 self._shr_mem_obj,
-                                                self._num_active_threads)
+                                                self._num_active_threads,
+                                                self.LOOPED,
+                                                self.BLOCKED)
 
     builder.build(trans_a=self._trans_a,
                   trans_b=self._trans_b,
@@ -108,6 +116,18 @@ class ShrMemBasedSparseDenseGemmKernelBuilder(BaseGemmKernelBuilder):
     self._instructions.extend(builder.get_instructions())
 
 
+class ShrMemBasedSparseDenseLoopedGemmKernelBuilder(ShrMemBasedSparseDenseGemmKernelBuilder):
+  """Emits loops over compressed rows of A instead of unrolling all non-zeros.
+  Suitable for large sparse operands which would result in huge unrolled kernels"""
+  LOOPED = True
+
+
+class ShrMemBasedBlockSparseDenseGemmKernelBuilder(ShrMemBasedSparseDenseGemmKernelBuilder):
+  """Multiplies dense blocks of a block-sparse A by B, one block-row of A at a time.
+  Blocks of A get loaded to shr. mem. as a whole (see BlockPatchLoader)"""
+  BLOCKED = True
+
+
 class RegisterOnlySparseDenseGemmKernelBuilder(BaseGemmKernelBuilder):
   def __init__(self, **kwargs):
     raise Exception("TODO: the optimization strategy of sparse x dense might not work for register only")
@@ -116,7 +136,7 @@ class RegisterOnlySparseDenseGemmKernelBuilder(BaseGemmKernelBuilder):
   def build_prologue(self):
     builder = GetElementPtrBuilder(self._vm, self._symbol_table)
     for symbol in self._symbol_table.from_global.values():
-      if isinstance(symbol.obj, SparseMatrix) and symbol.obj.get_values() != None:
+      if isinstance(symbol.obj, SparseMatrix) and symbol.obj.get_values() is not None:
         continue
       builder.build(symbol)
       self._instructions.extend(builder.get_instructions())
@@ -0,0 +1,57 @@
+from .abstract_instruction import AbstractInstruction
+from gemmforge.vm import VM
+from gemmforge.symbol_table import SymbolType, Symbol
+from gemmforge.exceptions import InternalError
+
+
+class CopyAddScale(AbstractInstruction):
+  """Computes `dest = alpha * src + beta * dest` where each thread processes a row of `src`.
+  Note, `src` can be located in glb. mem., shr. mem. or registers (a row per thread)"""
+
+  def __init__(self,
+               vm: VM,
+               src: Symbol,
+               dest: Symbol,
+               alpha: float,
+               beta: float):
+    super(CopyAddScale, self).__init__(vm)
+
+    if dest.stype not in [SymbolType.Global, SymbolType.SharedMem]:
+      raise InternalError('csa: operand `dest` must be either in glb. or shr. mem.')
+
+    self._src = src
+    self._dest = dest
+    self._alpha = alpha
+    self._beta = beta
+    self._is_ready = True
+
+  def gen_code(self, writer):
+    src_data_view = self._src.data_view
+    dest_data_view = self._dest.data_view
+    thread_idx_x = self._vm.get_lexic().thread_idx_x
+    real_suffix = self._vm.get_real_literal()
+
+    with writer.If(self.gen_mask_threads(src_data_view.rows)):
+      writer.Pragma("unroll")
+      with writer.For(f'int col = 0; col < {src_data_view.columns}; ++col'):
+        if self._src.stype == SymbolType.Register:
+          src_access = '' if self._src.obj.size == 1 else '[col]'
+        else:
+          src_access = f'[{thread_idx_x} + col * {src_data_view.lead_dim}]'
+
+        rhs = f'{self._dest.name}[{thread_idx_x} + col * {dest_data_view.lead_dim}]'
+        if self._alpha == 1.0:
+          lhs = f'{self._src.name}{src_access}'
+        else:
+          lhs = f'{self._alpha}{real_suffix} * {self._src.name}{src_access}'
+
+        if self._beta != 0.0:
+          if self._beta == 1.0:
+            lhs += f' + {rhs}'
+          else:
+            lhs += f' + {self._beta}{real_suffix} * {rhs}'
+
+        writer(f'{rhs} = {lhs};')
+
+  def __str__(self) -> str:
+    return f'{self._dest.name} = csa({self._src.name})'
@@ -3,6 +3,7 @@ from gemmforge.vm import VM
 from gemmforge.symbol_table import SymbolType, Symbol, DataView, InverseSymbolTable
 from gemmforge.basic_types import GeneralLexicon, DataFlowDirection, RegMemObject
 from gemmforge.exceptions import InternalError
+from gemmforge.common import get_mask_runs
 from abc import abstractmethod
 
 
@@ -20,6 +21,9 @@ class ShrMemBasedDenseGemm(AbstractInstruction):
     self._dest = kwargs['dest']
     self._num_threads = kwargs['num_threads']
 
+    # Note: k-iterations disabled by the mask get skipped (see DenseMatrix)
+    self._k_mask = kwargs.get('k_mask', None)
+
     if self._op1.stype == SymbolType.Batch:
       raise InternalError('gemm: `op1` is a batch type, must be either glb. or shr.')
 
@@ -36,17 +40,27 @@ class ShrMemBasedDenseGemm(AbstractInstruction):
     op1_data_view = self._op1.data_view
     op2_data_view = self._op2.data_view
     thread_idx_x = self._vm.get_lexic().thread_idx_x
-    with writer.If(self.gen_mask_threads(op1_data_view.rows)):
-      writer(f'{self._vm.fp_as_str()} {value_var};')
 
-      writer.Emptyline()
-      writer.Pragma('unroll')
-      with writer.For(f'int k = 0; k < {op1_data_view.columns}; ++k'):
-        op1_addr = f'{thread_idx_x} + k * {op1_data_view.lead_dim}'
-        writer(f'{value_var} = {self._op1.name}[{op1_addr}];')
+    # Note: `op1` is transposed only if it resides in shr. mem. Otherwise, a loader transposes it
+    num_rows = op1_data_view.columns if self._trans_a else op1_data_view.rows
+    num_k = op1_data_view.rows if self._trans_a else op1_data_view.columns
+    with writer.If(self.gen_mask_threads(num_rows)):
+      writer(f'{self._vm.fp_as_str()} {value_var};')
 
+      for k_begin, k_end in get_mask_runs(self._k_mask, num_k):
         writer.Emptyline()
-        self._get_inner_loop(writer, value_var)
+        writer.Pragma('unroll')
+        with writer.For(f'int k = {k_begin}; k < {k_end}; ++k'):
+          if self._op1.stype == SymbolType.Register:
+            op1_access = '' if self._op1.obj.size == 1 else '[k]'
+          elif self._trans_a:
+            op1_access = f'[k + {thread_idx_x} * {op1_data_view.lead_dim}]'
+          else:
+            op1_access = f'[{thread_idx_x} + k * {op1_data_view.lead_dim}]'
+          writer(f'{value_var} = {self._op1.name}{op1_access};')
+
+          writer.Emptyline()
+          self._get_inner_loop(writer, value_var)
 
   def _get_inner_loop(self, writer, op1_value):
     op2_data_view = self._op2.data_view
@@ -77,6 +91,13 @@ class RegisterOnlyDenseGemm(AbstractInstruction):
     self._dest = kwargs['dest']
     self._num_threads = kwargs['num_threads']
     self._vec_unit_length = self._vm.get_hw_descr().vec_unit_length
+    self._k_mask = kwargs.get('k_mask', None)
+
+    # Note: a vector unit can be shared by several operations (i.e., packed batch elements)
+    self._sub_group_size = min(self._num_threads, self._vec_unit_length)
+    self._broadcast_width = None
+    if self._sub_group_size < self._vec_unit_length:
+      self._broadcast_width = self._sub_group_size
 
     if self._op1.stype != SymbolType.Global:
       raise InternalError('gemm: `op1` must be glb. memory')
@@ -98,7 +119,7 @@ class RegisterOnlyDenseGemm(AbstractInstruction):
     op2_data_view = self._op2.data_view
     thread_idx_x = self._vm.get_lexic().thread_idx_x
 
-    warp_id = self._vm._lexic.get_sub_group_id(self._vec_unit_length)
+    warp_id = self._vm._lexic.get_sub_group_id(self._sub_group_size)
     writer(f'auto {warp_idx_variable} = {warp_id};')
 
     writer(f'{self._vm.fp_as_str()} {op1_variable};')
@@ -111,53 +132,54 @@ class RegisterOnlyDenseGemm(AbstractInstruction):
     else:
       sub_group = None
 
-    k_end = op1_data_view.rows if self._trans_a else op1_data_view.columns
+    num_k = op1_data_view.rows if self._trans_a else op1_data_view.columns
     num_cols = op1_data_view.columns if self._trans_a else op1_data_view.rows
 
-    writer.Emptyline()
-    writer.Pragma('unroll')
-    with writer.For(f'int k = 0; k < {k_end}; ++k'):
-      with writer.If(self.gen_mask_threads(num_cols)):
-        if self._trans_a:
-          op1_addr = f'k + {thread_idx_x} * {op1_data_view.lead_dim}'
-        else:
-          op1_addr = f'{thread_idx_x} + k * {op1_data_view.lead_dim}'
-        writer(f'{op1_variable} = {self._op1.name}[{op1_addr}];')
-
-      start_tile_variable = 'startTileN'
-      end_tile_variable = 'endTileN'
-
+    for k_begin, k_end in get_mask_runs(self._k_mask, num_k):
       writer.Emptyline()
       writer.Pragma('unroll')
-      with writer.For(f'int {start_tile_variable} = 0; '
-                      f'{start_tile_variable} < {self._dest.obj.size}; '
-                      f'{start_tile_variable} += {self._vec_unit_length}'):
-        writer(f'int shiftedWid = {start_tile_variable} + {warp_idx_variable};')
-        with writer.If(f'shiftedWid < {self._dest.obj.size}'):
-          if self._trans_b:
-            op2_addr = f'shiftedWid + k * {op2_data_view.lead_dim}'
+      with writer.For(f'int k = {k_begin}; k < {k_end}; ++k'):
+        with writer.If(self.gen_mask_threads(num_cols)):
+          if self._trans_a:
+            op1_addr = f'k + {thread_idx_x} * {op1_data_view.lead_dim}'
           else:
-            op2_addr = f'shiftedWid * {op2_data_view.lead_dim} + k'
-          writer(f'{op2_variable} = {self._op2.name}[{op2_addr}];')
+            op1_addr = f'{thread_idx_x} + k * {op1_data_view.lead_dim}'
+          writer(f'{op1_variable} = {self._op1.name}[{op1_addr}];')
 
-          if active_sub_group_mask:
-            writer(f'{sub_group} = {active_sub_group_mask};')
+        start_tile_variable = 'startTileN'
+        end_tile_variable = 'endTileN'
 
         writer.Emptyline()
-        writer(f'int {end_tile_variable} = '
-               f'{start_tile_variable} + {self._vec_unit_length};')
-
-        writer(f'{end_tile_variable} = '
-               f'({end_tile_variable} < {self._dest.obj.size}) '
-               f' ? {end_tile_variable} : {self._dest.obj.size};')
-
-        writer.Emptyline()
-        self._get_inner_loop(writer,
-                             op1_variable,
-                             op2_variable,
-                             start_tile_variable,
-                             end_tile_variable,
-                             sub_group)
+        writer.Pragma('unroll')
+        with writer.For(f'int {start_tile_variable} = 0; '
+                        f'{start_tile_variable} < {self._dest.obj.size}; '
+                        f'{start_tile_variable} += {self._sub_group_size}'):
+          writer(f'int shiftedWid = {start_tile_variable} + {warp_idx_variable};')
+          with writer.If(f'shiftedWid < {self._dest.obj.size}'):
+            if self._trans_b:
+              op2_addr = f'shiftedWid + k * {op2_data_view.lead_dim}'
+            else:
+              op2_addr = f'shiftedWid * {op2_data_view.lead_dim} + k'
+            writer(f'{op2_variable} = {self._op2.name}[{op2_addr}];')
+
+            if active_sub_group_mask:
+              writer(f'{sub_group} = {active_sub_group_mask};')
+
+          writer.Emptyline()
+          writer(f'int {end_tile_variable} = '
+                 f'{start_tile_variable} + {self._sub_group_size};')
+
+          writer(f'{end_tile_variable} = '
+                 f'({end_tile_variable} < {self._dest.obj.size}) '
+                 f' ? {end_tile_variable} : {self._dest.obj.size};')
+
+          writer.Emptyline()
+          self._get_inner_loop(writer,
+                               op1_variable,
+                               op2_variable,
+                               start_tile_variable,
+                               end_tile_variable,
+                               sub_group)
 
   def _get_inner_loop(self,
                       writer,
@@ -173,7 +195,8 @@ class RegisterOnlyDenseGemm(AbstractInstruction):
       tmp_value = 'tmp'
       broadcast_sync = self._vm._lexic.broadcast_sync(op2_variable,
                                                       "broadcastIdx",
-                                                      sub_group)
+                                                      sub_group,
+                                                      self._broadcast_width)
       writer(f'auto {tmp_value} = {broadcast_sync};')
 
       res_access = '' if self._dest.obj.size == 1 else '[n]'
@@ -181,3 +204,91 @@ class RegisterOnlyDenseGemm(AbstractInstruction):
 
   def __str__(self) -> str:
     return f'{self._dest.name} = rb_gemm({self._op1.name}, {self._op2.name})'
+
+
+class RegisterBlockedDenseGemm(AbstractInstruction):
+  """This is a gemm operation where each thread computes an MR x NR
+  micro-tile of the result. Rows and columns of a tile are strided
+  by the number of row and column thread groups, respectively. Thus,
+  neighbouring threads access neighbouring rows of shr. mem."""
+
+  def __init__(self, **kwargs):
+    super(RegisterBlockedDenseGemm, self).__init__(kwargs['vm'])
+    self._trans_b = kwargs['trans_b']
+    self._op1 = kwargs['op1']
+    self._op2 = kwargs['op2']
+    self._dest = kwargs['dest']
+    self._micro_tile = kwargs['micro_tile']
+    self._num_row_groups, self._num_col_groups = kwargs['num_thread_groups']
+    self._k_mask = kwargs.get('k_mask', None)
+
+    if self._op1.stype != SymbolType.SharedMem:
+      raise InternalError('gemm: `op1` must be in shr. mem.')
+
+    if self._op2.stype != SymbolType.SharedMem:
+      raise InternalError('gemm: `op2` must be in shr. mem.')
+
+    if self._dest.stype != SymbolType.Register:
+      raise InternalError('gemm: `dest` must be a register obj.')
+
+    tile_rows, tile_cols = self._micro_tile
+    if self._dest.obj.size != tile_rows * tile_cols:
+      raise InternalError('gemm: size of `dest` does not match the micro-tile')
+
+    self._is_ready = True
+
+  def gen_code(self, writer):
+    op1_data_view = self._op1.data_view
+    op2_data_view = self._op2.data_view
+    num_rows = op1_data_view.rows
+    num_cols = op2_data_view.rows if self._trans_b else op2_data_view.columns
+    tile_rows, tile_cols = self._micro_tile
+    thread_idx_x = self._vm.get_lexic().thread_idx_x
+    precision = self._vm.fp_as_str()
+
+    num_threads = self._num_row_groups * self._num_col_groups
+    with writer.If(self.gen_mask_threads(num_threads)):
+      writer(f'int rowGroup = {thread_idx_x} % {self._num_row_groups};')
+      writer(f'int colGroup = {thread_idx_x} / {self._num_row_groups};')
+
+      # Note: out-of-range rows and columns of a tile get clamped to the last
+      # valid ones. Their results are discarded during the store
+      rows = [self._get_index('rowGroup', i, self._num_row_groups, num_rows) for i in range(tile_rows)]
+      cols = [self._get_index('colGroup', j, self._num_col_groups, num_cols) for j in range(tile_cols)]
+      writer(f'int rows[{tile_rows}] = {{{", ".join(rows)}}};')
+      writer(f'int cols[{tile_cols}] = {{{", ".join(cols)}}};')
+      writer(f'{precision} valuesA[{tile_rows}];')
+      writer(f'{precision} valuesB[{tile_cols}];')
+
+      for k_begin, k_end in get_mask_runs(self._k_mask, op1_data_view.columns):
+        writer.Emptyline()
+        writer.Pragma('unroll')
+        with writer.For(f'int k = {k_begin}; k < {k_end}; ++k'):
+          writer.Pragma('unroll')
+          with writer.For(f'int i = 0; i < {tile_rows}; ++i'):
+            writer(f'valuesA[i] = {self._op1.name}[rows[i] + k * {op1_data_view.lead_dim}];')
+
+          writer.Pragma('unroll')
+          with writer.For(f'int j = 0; j < {tile_cols}; ++j'):
+            if self._trans_b:
+              op2_addr = f'cols[j] + {op2_data_view.lead_dim} * k'
+            else:
+              op2_addr = f'k + {op2_data_view.lead_dim} * cols[j]'
+            writer(f'valuesB[j] = {self._op2.name}[{op2_addr}];')
+
+          writer.Emptyline()
+          writer.Pragma('unroll')
+          with writer.For(f'int i = 0; i < {tile_rows}; ++i'):
+            writer.Pragma('unroll')
+            with writer.For(f'int j = 0; j < {tile_cols}; ++j'):
+              res_access = '' if self._dest.obj.size == 1 else f'[i * {tile_cols} + j]'
+              writer(f'{self._dest.name}{res_access} += valuesA[i] * valuesB[j];')
+
+  def _get_index(self, group, counter, num_groups, size):
+    index = f'{group} + {counter * num_groups}' if counter else group
+    if (counter + 1) * num_groups > size:
+      index = f'(({index}) < {size}) ? ({index}) : {size - 1}'
+    return index
+
+  def __str__(self) -> str:
+    return f'{self._dest.name} = blocked_gemm({self._op1.name}, {self._op2.name})'
@@ -1,4 +1,5 @@
 from .abstract_instruction import AbstractInstruction
+from .value_grouping import group_by_magnitude, gen_grouped_update
 from gemmforge.vm import VM
 from gemmforge.symbol_table import SymbolType, Symbol, DataView, InverseSymbolTable
 from gemmforge.basic_types import GeneralLexicon, DataFlowDirection, RegMemObject
@@ -20,7 +21,7 @@ class ShrMemBasedDenseSparseGemm(AbstractInstruction):
     if self._op1.stype == SymbolType.Batch:
       raise InternalError('gemm: `op1` is a batch type, must be either glb. or shr.')
 
-    if self._op2.obj.get_values() == None and self._op2.stype == SymbolType.Batch:
+    if self._op2.obj.get_values() is None and self._op2.stype == SymbolType.Batch:
       raise InternalError('gemm: `op2` is a batch type, must be either glb. or shr.')
 
     if self._dest.stype != SymbolType.Register:
@@ -32,6 +33,10 @@ class ShrMemBasedDenseSparseGemm(AbstractInstruction):
     self._is_ready = True
 
   def gen_code(self, writer):
+    if self._mat_b.get_values() is not None:
+      self._gen_grouped_code(writer)
+      return
+
     value_var = 'value'
     op1_data_view = self._op1.data_view
     op2_data_view = self._op2.data_view
@@ -54,6 +59,25 @@ class ShrMemBasedDenseSparseGemm(AbstractInstruction):
 
         self._get_inner_loop_sparse_with_a_row(writer, value_var, k, self._mat_b.get_values())
 
+  def _gen_grouped_code(self, writer):
+    """Accumulates each column of C with known values of B. Non-zeros of a column of B
+    get grouped by the magnitude of values which is factored out of the sum"""
+    values = self._mat_b.get_value_array()
+    lead_dim = self._op1.data_view.lead_dim
+    thread_idx_x = self._vm.get_lexic().thread_idx_x
+    with writer.If(self.gen_mask_threads(self._op1.data_view.rows)):
+      for col_id, non_zeros in enumerate(self._mat_b.get_coo_per_col()):
+        entries = []
+        for row_id in non_zeros:
+          it = self._mat_b.find_1d_offset(row_id, col_id)
+          entries.append((values[it], f'{self._op1.name}[{thread_idx_x} + {row_id} * {lead_dim}]'))
+
+        for magnitude, signed_terms in group_by_magnitude(entries):
+          writer(gen_grouped_update(f'{self._dest.name}[{col_id}]',
+                                    magnitude,
+                                    signed_terms,
+                                    self._vm.get_real_literal()))
+
   def _get_inner_loop_sparse_with_a_row(self, writer, op1_value, row_id, val_b=None):
     # Iterate the first column first then the second etc. (coo_b[0] if col major, otherwise coo_b[1] if row major)
     # As we iterate we need to find the element in the real ordering (coordiantes)
@@ -63,7 +87,7 @@ class ShrMemBasedDenseSparseGemm(AbstractInstruction):
     else:
       non_zeros = self._mat_b.get_coo_per_col()[row_id]
     if len(non_zeros) > 0:
-      value_known = val_b != None
+      value_known = val_b is not None
       writer.Comment(f"Mul begin col {row_id}")
 
       if not self._trans_b:
@@ -95,6 +119,91 @@ class ShrMemBasedDenseSparseGemm(AbstractInstruction):
     return f'{self._dest.name} = gemm({self._op1.name}, {self._op2.name})'
 
 
+class ShrMemBasedDenseSparseLoopedGemm(ShrMemBasedDenseSparseGemm):
+  """Iterates over non-zeros of each column of B with a loop instead of unrolling them.
+  Row indices (and values, if known) of B are kept in read-only arrays in the CSC order.
+  Thus, the size of the code grows with the number of columns rather than non-zeros"""
+
+  def gen_code(self, writer):
+    col_ptr, row_indices, storage_indices = self._mat_b.get_csc()
+    values = self._mat_b.get_values()
+    lead_dim = self._op1.data_view.lead_dim
+    thread_idx_x = self._vm.get_lexic().thread_idx_x
+
+    rows_name = f'{self._mat_b.name}_rows'
+    writer(f'static const int {rows_name}[{len(row_indices)}] = {{{", ".join(map(str, row_indices.tolist()))}}};')
+    if values is None:
+      values_name = f'{self._mat_b.name}_offsets'
+      entries = map(str, storage_indices.tolist())
+      writer(f'static const int {values_name}[{len(storage_indices)}] = {{{", ".join(entries)}}};')
+      get_value = lambda index: f'{self._op2.name}[{values_name}[{index}]]'
+    else:
+      values_name = f'{self._mat_b.name}_values'
+      literal = self._vm.get_real_literal()
+      entries = [f'{values[index]}{literal}' for index in storage_indices.tolist()]
+      writer(f'static const {self._vm.fp_as_str()} {values_name}[{len(entries)}] = {{{", ".join(entries)}}};')
+      get_value = lambda index: f'{values_name}[{index}]'
+
+    with writer.If(self.gen_mask_threads(self._op1.data_view.rows)):
+      for col_id in range(self._mat_b.get_actual_num_cols()):
+        begin, end = int(col_ptr[col_id]), int(col_ptr[col_id + 1])
+        if begin == end:
+          continue
+
+        with writer.For(f'int i = {begin}; i < {end}; ++i'):
+          op1_value = f'{self._op1.name}[{thread_idx_x} + {rows_name}[i] * {lead_dim}]'
+          writer(f'{self._dest.name}[{col_id}] += {op1_value} * {get_value("i")};')
+
+  def __str__(self) -> str:
+    return f'{self._dest.name} = looped_gemm({self._op1.name}, {self._op2.name})'
+
+
+class ShrMemBasedDenseBlockSparseGemm(ShrMemBasedDenseSparseGemm):
+  """Multiplies each thread's row of A by dense blocks of a block-sparse B.
+  Blocks are visited in the block-CSC order; the product with a single block is fully
+  unrolled so that each element of A, once loaded, feeds all columns of the block.
+  If values of B are not known, `op2` must hold the blocks in the block-CSC order (see BlockPatchLoader)"""
+
+  def gen_code(self, writer):
+    block_rows, block_cols = self._mat_b.get_block_size()
+    block_volume = self._mat_b.get_block_volume()
+    col_ptr, row_indices, storage_indices = self._mat_b.get_block_csc()
+    values = self._mat_b.get_values()
+    fp_type = self._vm.fp_as_str()
+    lead_dim = self._op1.data_view.lead_dim
+    thread_idx_x = self._vm.get_lexic().thread_idx_x
+
+    rows_name = f'{self._mat_b.name}_block_rows'
+    writer(f'static const int {rows_name}[{len(row_indices)}] = {{{", ".join(map(str, row_indices.tolist()))}}};')
+    if values is None:
+      blocks_name = self._op2.name
+    else:
+      blocks_name = f'{self._mat_b.name}_values'
+      literal = self._vm.get_real_literal()
+      entries = [f'{values[index * block_volume + item]}{literal}'
+                 for index in storage_indices.tolist() for item in range(block_volume)]
+      writer(f'static const {fp_type} {blocks_name}[{len(entries)}] = {{{", ".join(entries)}}};')
+
+    with writer.If(self.gen_mask_threads(self._op1.data_view.rows)):
+      for block_col in range(len(col_ptr) - 1):
+        begin, end = int(col_ptr[block_col]), int(col_ptr[block_col + 1])
+        if begin == end:
+          continue
+
+        with writer.For(f'int i = {begin}; i < {end}; ++i'):
+          writer(f'const int row = {rows_name}[i] * {block_rows};')
+          writer(f'const {fp_type}* block = &{blocks_name}[i * {block_volume}];')
+          writer(f'{fp_type} value;')
+          for row in range(block_rows):
+            writer(f'value = {self._op1.name}[{thread_idx_x} + (row + {row}) * {lead_dim}];')
+            for col in range(block_cols):
+              res_access = f'[{block_col * block_cols + col}]'
+              writer(f'{self._dest.name}{res_access} += value * block[{row + col * block_rows}];')
+
+  def __str__(self) -> str:
+    return f'{self._dest.name} = block_gemm({self._op1.name}, {self._op2.name})'
+
+
 class RegisterOnlyDenseSparseGemm(AbstractInstruction):
   def __init__(self, **kwargs):
     super(RegisterOnlyDenseSparseGemm, self).__init__(kwargs['vm'])
@@ -1,27 +1,55 @@
 from gemmforge.symbol_table import SymbolType
-from gemmforge.exceptions import InternalError
-from .shr_mem_loaders import ExtendedPatchLoader, ExactPatchLoader
+from gemmforge.exceptions import InternalError, GenerationError
+from .shr_mem_loaders import ExtendedPatchLoader, ExactPatchLoader, BlockPatchLoader
 from .shr_transpose_mem_loaders import ExtendedTransposePatchLoader, ExactTransposePatchLoader
+from .async_loaders import AsyncExtendedPatchLoader, AsyncExactPatchLoader
+from .async_loaders import AsyncExtendedTransposePatchLoader, AsyncExactTransposePatchLoader
 from math import ceil
 
 
-def shm_mem_loader_factory(vm, dest, src, shr_mem, num_threads, load_and_transpose=False):
+def shm_mem_loader_factory(vm, dest, src, shr_mem, num_threads, load_and_transpose=False, exact=False,
+                           strategy=None, unroll_threshold=None, row_mask=None, col_mask=None):
+  """Selects a loader from glb. to shr. mem.
+
+  Args:
+    exact: forces a loader which copies only the rows of `src` (e.g., for slices of a matrix)
+    strategy: either 'exact', 'extended' or None for the automatic selection
+    unroll_threshold: max. number of hops which get unrolled manually
+    row_mask, col_mask: rows/columns of `src` which need to be loaded (None means all).
+      Masks are only respected by the exact (non-transposing) loader which is preferred if masks are given
+  """
   params = {'vm': vm,
             'dest': dest,
             'src': src,
             'shr_mem': shr_mem,
             'num_threads': num_threads,
             'load_and_transpose': load_and_transpose}
+  if unroll_threshold is not None:
+    params['unroll_threshold'] = unroll_threshold
+
+  if strategy not in [None, 'exact', 'extended']:
+    raise GenerationError(f'shm-factory: unknown loader strategy, given: {strategy}')
 
+  has_masks = (row_mask is not None or col_mask is not None) and not load_and_transpose
   num_loads_per_column = ceil(src.data_view.rows / num_threads) * num_threads
+  if strategy is None:
+    use_exact = src.data_view.lead_dim > num_loads_per_column or has_masks
+  else:
+    use_exact = strategy == 'exact'
+
+  # Note: copy data without staging it in registers if hardware and backend allow
+  use_async = vm.supports_async_copy()
+
+  if exact or use_exact:
+    if has_masks:
+      params.update({'row_mask': row_mask, 'col_mask': col_mask})
 
-  if src.data_view.lead_dim > num_loads_per_column:
     if load_and_transpose:
-      return ExactTransposePatchLoader(**params)
+      return AsyncExactTransposePatchLoader(**params) if use_async else ExactTransposePatchLoader(**params)
     else:
-      return ExactPatchLoader(**params)
+      return AsyncExactPatchLoader(**params) if use_async else ExactPatchLoader(**params)
   else:
     if load_and_transpose:
-      return ExtendedTransposePatchLoader(**params)
+      return AsyncExtendedTransposePatchLoader(**params) if use_async else ExtendedTransposePatchLoader(**params)
     else:
-      return ExtendedPatchLoader(**params)
+      return AsyncExtendedPatchLoader(**params) if use_async else ExtendedPatchLoader(**params)
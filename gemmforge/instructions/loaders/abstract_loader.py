@@ -11,13 +11,21 @@ class AbstractShrMemWrite(AbstractInstruction):
     super().__init__(vm)
     self._shm_volume: int = 0
     self._shr_mem_offset = None
+    self._followers = []
+
+  def add_follower(self, instr):
+    """Makes `instr` to write to the same shr. mem. region as the current instruction.
+    It is the responsibility of the caller to separate their accesses with syncs"""
+    self._followers.append(instr)
 
   def compute_shared_mem_size(self):
-    return self._shm_volume
+    return max([self._shm_volume] + [instr.compute_shared_mem_size() for instr in self._followers])
 
   def set_shr_mem_offset(self, offset: int):
     self._shr_mem_offset = offset
     self._is_ready = True
+    for instr in self._followers:
+      instr.set_shr_mem_offset(offset)
 
   def __str__(self) -> str:
     pass
@@ -33,7 +41,7 @@ class AbstractShrMemLoader(AbstractShrMemWrite):
     self._shr_mem: ShrMemObject = kwargs['shr_mem']
     self._num_threads: int = kwargs['num_threads']
     self._load_and_transpose: bool = kwargs['load_and_transpose']
-    self._manual_unroll_threshold: int = 4
+    self._manual_unroll_threshold: int = kwargs.get('unroll_threshold', 4)
 
     self._check()
     self._lead_dim = None
@@ -46,6 +54,37 @@ class AbstractShrMemLoader(AbstractShrMemWrite):
     rhs = f'{self._src.name}[{glb_mem_address}]'
     writer(f'{lhs} = {rhs};')
 
+  def _assign_vector(self, writer, vector_type, shr_mem_address, glb_mem_address):
+    lhs = f'reinterpret_cast<{vector_type}*>({self._dest.name})[{shr_mem_address}]'
+    rhs = f'reinterpret_cast<const {vector_type}*>({self._src.name})[{glb_mem_address}]'
+    writer(f'{lhs} = {rhs};')
+
+  def _get_vector_width(self, contiguous_lengths):
+    """Returns the max. number of elements which can be moved with a single vector access
+    (16 or 8 bytes) or 1 if it is not possible. Alignment of shr. mem. is checked here whereas
+    alignment of glb. mem. can only be checked at run-time (see `_gen_alignment_check`).
+
+    Args:
+      contiguous_lengths: lengths (in elements) of contiguous chunks of a loader
+    """
+    if self._load_and_transpose:
+      return 1
+
+    lengths = [self._shr_mem_offset] + contiguous_lengths
+    if self._shr_mem.get_mults_per_block() > 1:
+      lengths.append(self._shr_mem.get_size_per_mult())
+
+    for num_bytes in [16, 8]:
+      width = num_bytes // self._vm.bytes_per_real()
+      if width < 2 or not self._lexic.get_vector_type(self._vm.fp_as_str(), width):
+        continue
+      if all(length % width == 0 for length in lengths):
+        return width
+    return 1
+
+  def _gen_alignment_check(self, vector_type):
+    return f'reinterpret_cast<size_t>({self._src.name}) % sizeof({vector_type}) == 0'
+
   def gen_code(self, writer) -> None:
     writer.Emptyline()
 
@@ -53,6 +92,18 @@ class AbstractShrMemLoader(AbstractShrMemWrite):
     rhs = f'{self._shr_mem.name}[{self._shr_mem_offset}]'
     writer(f'{lhs} = &{rhs};')
 
+  def is_async(self) -> bool:
+    return False
+
+  def get_vector_width(self) -> int:
+    """Returns the number of elements moved by a single access of the vectorized code path
+    or 1 if a loader does not vectorize its accesses"""
+    return 1
+
+  def get_num_copied_elements(self) -> int:
+    """Returns the number of elements which the loader copies from glb. to shr. mem. per operation"""
+    return self._shm_volume
+
   def get_src(self) -> Symbol:
     return self._src
 
@@ -77,3 +128,6 @@ class NoLoadShrMemLoader(AbstractShrMemLoader):
 
     self._dest.data_view = deepcopy(self._src.data_view)
     self._dest.data_view.lead_dim = data_view.rows
+
+  def get_num_copied_elements(self) -> int:
+    return 0
@@ -0,0 +1,41 @@
+from .shr_mem_loaders import ExtendedPatchLoader, ExactPatchLoader
+from .shr_transpose_mem_loaders import ExtendedTransposePatchLoader, ExactTransposePatchLoader
+
+
+class AsyncCopyMixin:
+  """Replaces element-wise copies of a loader with async. copies (e.g., cp.async)
+  which bypass registers. All copies of a loader are committed as a single batch.
+  A consumer must wait for the batch (see WaitAsyncCopies) before the next barrier"""
+
+  def _assign(self, writer, shr_mem_address, glb_mem_address):
+    lhs = f'{self._dest.name}[{shr_mem_address}]'
+    rhs = f'{self._src.name}[{glb_mem_address}]'
+    writer(f'{self._lexic.async_copy(lhs, rhs, self._vm.fp_as_str())};')
+
+  def _assign_vector(self, writer, vector_type, shr_mem_address, glb_mem_address):
+    lhs = f'reinterpret_cast<{vector_type}*>({self._dest.name})[{shr_mem_address}]'
+    rhs = f'reinterpret_cast<const {vector_type}*>({self._src.name})[{glb_mem_address}]'
+    writer(f'{self._lexic.async_copy(lhs, rhs, vector_type)};')
+
+  def gen_code(self, writer):
+    super().gen_code(writer)
+    writer(f'{self._lexic.async_copy_commit()};')
+
+  def is_async(self):
+    return True
+
+
+class AsyncExtendedPatchLoader(AsyncCopyMixin, ExtendedPatchLoader):
+  pass
+
+
+class AsyncExactPatchLoader(AsyncCopyMixin, ExactPatchLoader):
+  pass
+
+
+class AsyncExtendedTransposePatchLoader(AsyncCopyMixin, ExtendedTransposePatchLoader):
+  pass
+
+
+class AsyncExactTransposePatchLoader(AsyncCopyMixin, ExactTransposePatchLoader):
+  pass
@@ -4,6 +4,7 @@ from .abstract_loader import AbstractShrMemLoader
 from gemmforge.symbol_table import SymbolType, Symbol, DataView
 from copy import deepcopy
 from gemmforge.matrix import SparseMatrix, DenseMatrix
+from gemmforge.common import get_mask_runs
 
 
 class ExtendedPatchLoader(AbstractShrMemLoader):
@@ -31,45 +32,74 @@ class ExtendedPatchLoader(AbstractShrMemLoader):
     writer("// using ExtendedPatchLoader")
 
     with writer.Scope():
-
-      thread_idx_x = self._lexic.thread_idx_x
-      num_hops = int(self._shm_volume / self._num_threads)
-      if num_hops > 0:
-        if num_hops > self._manual_unroll_threshold:
-          # load using a for-loop
-          writer.Pragma("unroll")
-          with writer.For(f'int i = 0; i < {num_hops}; ++i'):
-            shr_mem_addr = f'{thread_idx_x} + i * {self._num_threads}'
-            glb_mem_addr = f'{thread_idx_x} + i * {self._num_threads}'
-
-            self._assign(writer, shr_mem_addr, glb_mem_addr)
-        else:
-          # load using manual loop unrolling
-          for counter in range(num_hops):
-            shr_mem_addr = f'{thread_idx_x} + {self._num_threads * counter}'
-            glb_mem_addr = f'{thread_idx_x} + {self._num_threads * counter}'
-
-            self._assign(writer, shr_mem_addr, glb_mem_addr)
-
-      # the last hop to fill shared mem with data
-      if (self._shm_volume % self._num_threads) != 0:
-        residue = self._shm_volume - num_hops * self._num_threads
-        with writer.If(f'{thread_idx_x} < {residue}'):
-          shr_mem_addr = f'{thread_idx_x} + {num_hops * self._num_threads}'
-          glb_mem_addr = f'{thread_idx_x} + {num_hops * self._num_threads}'
-
-          self._assign(writer, shr_mem_addr, glb_mem_addr)
+      vector_width = self.get_vector_width()
+      if vector_width > 1:
+        num_vectors = self._shm_volume // vector_width
+        vector_type = self._lexic.get_vector_type(self._vm.fp_as_str(), vector_width)
+
+        def assign_vector(writer, shr_mem_addr, glb_mem_addr):
+          self._assign_vector(writer, vector_type, shr_mem_addr, glb_mem_addr)
+
+        with writer.If(self._gen_alignment_check(vector_type)):
+          self._gen_hops(writer, num_vectors, assign_vector)
+          num_vectorized = num_vectors * vector_width
+          self._gen_hops(writer, self._shm_volume - num_vectorized, self._assign, offset=num_vectorized)
+        with writer.Else():
+          self._gen_hops(writer, self._shm_volume, self._assign)
+      else:
+        self._gen_hops(writer, self._shm_volume, self._assign)
+
+  def get_vector_width(self):
+    vector_width = self._get_vector_width(contiguous_lengths=[])
+    return vector_width if self._shm_volume // vector_width > 0 else 1
+
+  def _gen_hops(self, writer, volume, assign, offset=0):
+    """Copies `volume` contiguous elements (or vectors) starting from `offset`"""
+    thread_idx_x = self._lexic.thread_idx_x
+    num_hops = int(volume / self._num_threads)
+    if num_hops > 0:
+      if num_hops > self._manual_unroll_threshold:
+        # load using a for-loop
+        writer.Pragma("unroll")
+        with writer.For(f'int i = 0; i < {num_hops}; ++i'):
+          shr_mem_addr = f'{thread_idx_x} + i * {self._num_threads}'
+          glb_mem_addr = f'{thread_idx_x} + i * {self._num_threads}'
+          if offset:
+            shr_mem_addr += f' + {offset}'
+            glb_mem_addr += f' + {offset}'
+
+          assign(writer, shr_mem_addr, glb_mem_addr)
+      else:
+        # load using manual loop unrolling
+        for counter in range(num_hops):
+          shr_mem_addr = f'{thread_idx_x} + {self._num_threads * counter + offset}'
+          glb_mem_addr = f'{thread_idx_x} + {self._num_threads * counter + offset}'
+
+          assign(writer, shr_mem_addr, glb_mem_addr)
+
+    # the last hop to fill shared mem with data
+    if (volume % self._num_threads) != 0:
+      residue = volume - num_hops * self._num_threads
+      with writer.If(f'{thread_idx_x} < {residue}'):
+        shr_mem_addr = f'{thread_idx_x} + {num_hops * self._num_threads + offset}'
+        glb_mem_addr = f'{thread_idx_x} + {num_hops * self._num_threads + offset}'
+
+        assign(writer, shr_mem_addr, glb_mem_addr)
 
 
 class ExactPatchLoader(AbstractShrMemLoader):
   """A strategy which loads only a necessary part of a matrix into shared memory.
 
+  Rows and columns disabled by optional masks (`row_mask`, `col_mask`) are not loaded.
+  Their locations in shared memory remain uninitialized.
   """
 
   def __init__(self, **kwargs):
     super(ExactPatchLoader, self).__init__(**kwargs)
     data_view = self._src.data_view
     self._shm_volume = data_view.rows * data_view.columns
+    self._row_runs = get_mask_runs(kwargs.get('row_mask', None), data_view.rows)
+    self._col_runs = get_mask_runs(kwargs.get('col_mask', None), data_view.columns)
 
     self._dest.data_view = deepcopy(self._src.data_view)
     self._dest.data_view.lead_dim = data_view.rows
@@ -79,36 +109,109 @@ class ExactPatchLoader(AbstractShrMemLoader):
     writer("// using ExactPatchLoader")
 
     with writer.Scope():
-
       src_data_view = self._src.data_view
       dest_data_view = self._dest.data_view
-      thread_idx_x = self._lexic.thread_idx_x
+      vector_width = self.get_vector_width()
+      if vector_width > 1:
+        vector_type = self._lexic.get_vector_type(self._vm.fp_as_str(), vector_width)
+
+        def assign_vector(writer, shr_mem_addr, glb_mem_addr):
+          self._assign_vector(writer, vector_type, shr_mem_addr, glb_mem_addr)
+
+        with writer.If(self._gen_alignment_check(vector_type)):
+          self._gen_columns(writer,
+                            src_data_view.lead_dim // vector_width,
+                            dest_data_view.lead_dim // vector_width,
+                            assign_vector,
+                            vector_width)
+        with writer.Else():
+          self._gen_columns(writer, src_data_view.lead_dim, dest_data_view.lead_dim, self._assign)
+      else:
+        self._gen_columns(writer, src_data_view.lead_dim, dest_data_view.lead_dim, self._assign)
+
+  def get_vector_width(self):
+    return self._get_patch_vector_width()
+
+  def _get_patch_vector_width(self):
+    run_bounds = [bound for run in self._row_runs for bound in run]
+    return self._get_vector_width(contiguous_lengths=[self._dest.data_view.lead_dim,
+                                                      self._src.data_view.lead_dim] + run_bounds)
+
+  def _gen_columns(self, writer, src_lead_dim, dest_lead_dim, assign, vector_width=1):
+    """Copies non-masked rows of each non-masked column. Lead. dims. are given in vectors"""
+    for col_begin, col_end in self._col_runs:
+      writer.Pragma("unroll")
+      with writer.For(f'int i = {col_begin}; i < {col_end}; ++i'):
+        for row_begin, row_end in self._row_runs:
+          self._gen_column_run(writer,
+                               row_begin // vector_width,
+                               (row_end - row_begin) // vector_width,
+                               src_lead_dim,
+                               dest_lead_dim,
+                               assign)
+
+  def _gen_column_run(self, writer, start, length, src_lead_dim, dest_lead_dim, assign):
+    """Copies `length` elements (or vectors) of the i-th column beginning from `start`"""
+    thread_idx_x = self._lexic.thread_idx_x
+    num_hops = int(length / self._num_threads)
+    if num_hops > 0:
+      if num_hops > self._manual_unroll_threshold:
+        writer.Pragma("unroll")
+        with writer.For(f'int counter = 0; counter < {num_hops}; ++counter'):
+          run_offset = f' + {start}' if start else ''
+          shr_mem_addr = f'{thread_idx_x}'
+          shr_mem_addr += f' + counter * {self._num_threads}{run_offset} + i * {dest_lead_dim}'
+
+          glb_mem_addr = f'{thread_idx_x}'
+          glb_mem_addr += f' + counter * {self._num_threads}{run_offset} + i * {src_lead_dim}'
+
+          assign(writer, shr_mem_addr, glb_mem_addr)
+      else:
+        for counter in range(num_hops):
+          offset = counter * self._num_threads + start
+          shr_mem_addr = f'{thread_idx_x} + {offset} + i * {dest_lead_dim}'
+          glb_mem_addr = f'{thread_idx_x} + {offset} + i * {src_lead_dim}'
+          assign(writer, shr_mem_addr, glb_mem_addr)
+
+    # the last hop to fill shared mem with data
+    if (length % self._num_threads) != 0:
+      residue = length - num_hops * self._num_threads
+      with writer.If(f'{thread_idx_x} < {residue}'):
+        finial_offset = num_hops * self._num_threads + start
+        shr_mem_addr = f'{thread_idx_x} + {finial_offset} + i * {dest_lead_dim}'
+        glb_mem_addr = f'{thread_idx_x} + {finial_offset} + i * {src_lead_dim}'
+        assign(writer, shr_mem_addr, glb_mem_addr)
+
+
+class BlockPatchLoader(AbstractShrMemLoader):
+  """A strategy which loads non-zero blocks of a block-sparse matrix into shared memory
+  and places them in the given order (e.g., block-CSC). Consecutive threads copy
+  consecutive elements of blocks. Thus, accesses to glb. mem. remain coalesced.
+  """
+
+  def __init__(self, **kwargs):
+    super(BlockPatchLoader, self).__init__(**kwargs)
+    matrix = self._src.obj
+    self._block_volume = matrix.get_block_volume()
+    self._block_order = [int(index) for index in kwargs['block_order']]
+    self._shm_volume = matrix.get_el_count()
+
+    self._dest.data_view = deepcopy(self._src.data_view)
+
+  def gen_code(self, writer):
+    super(BlockPatchLoader, self).gen_code(writer)
+    writer("// using BlockPatchLoader")
+
+    thread_idx_x = self._lexic.thread_idx_x
+    with writer.Scope():
+      if self._block_order == list(range(len(self._block_order))):
+        glb_mem_addr = 'i'
+      else:
+        table_name = f'{self._dest.name}_blocks'
+        offsets = [str(index * self._block_volume) for index in self._block_order]
+        writer(f'static const int {table_name}[{len(offsets)}] = {{{", ".join(offsets)}}};')
+        glb_mem_addr = f'{table_name}[i / {self._block_volume}] + i % {self._block_volume}'
+
       writer.Pragma("unroll")
-      with writer.For(f'int i = 0; i < {src_data_view.columns}; ++i'):
-        num_hops = int(dest_data_view.lead_dim / self._num_threads)
-        if num_hops > 0:
-          if num_hops > self._manual_unroll_threshold:
-            writer.Pragma("unroll")
-            with writer.For(f'int counter = 0; counter < {num_hops}; ++counter'):
-              shr_mem_addr = f'{thread_idx_x}'
-              shr_mem_addr += f' + counter * {self._num_threads} + i * {dest_data_view.lead_dim}'
-
-              glb_mem_addr = f'{thread_idx_x}'
-              glb_mem_addr += f' + counter * {self._num_threads} + i * {src_data_view.lead_dim}'
-
-              self._assign(writer, shr_mem_addr, glb_mem_addr)
-          else:
-            for counter in range(num_hops):
-              offset = counter * self._num_threads
-              shr_mem_addr = f'{thread_idx_x} + {offset} + i * {dest_data_view.lead_dim}'
-              glb_mem_addr = f'{thread_idx_x} + {offset} + i * {src_data_view.lead_dim}'
-              self._assign(writer, shr_mem_addr, glb_mem_addr)
-
-        # the last hop to fill shared mem with data
-        if (dest_data_view.lead_dim % self._num_threads) != 0:
-          residue = dest_data_view.lead_dim - num_hops * self._num_threads
-          with writer.If(f'{thread_idx_x} < {residue}'):
-            finial_offset = num_hops * self._num_threads
-            shr_mem_addr = f'{thread_idx_x} + {finial_offset} + i * {dest_data_view.lead_dim}'
-            glb_mem_addr = f'{thread_idx_x} + {finial_offset} + i * {src_data_view.lead_dim}'
-            self._assign(writer, shr_mem_addr, glb_mem_addr)
+      with writer.For(f'int i = {thread_idx_x}; i < {self._shm_volume}; i += {self._num_threads}'):
+        self._assign(writer, 'i', glb_mem_addr)
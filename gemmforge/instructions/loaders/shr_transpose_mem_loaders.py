@@ -4,20 +4,29 @@ from .abstract_loader import AbstractShrMemLoader
 from gemmforge.symbol_table import SymbolType, DataView
 from copy import deepcopy
 from gemmforge.matrix import SparseMatrix, DenseMatrix
+from gemmforge.bank_conflicts import count_wavefronts, split_into_vector_units, get_hop_indices
+import numpy as np
 
 
-def _find_next_prime(number):
-  factor = 2
-  return _find_prime_in_range(number, factor * number)
+def _find_padded_lead_dim(vm, min_lead_dim, get_addresses):
+  """Returns the smallest lead. dim. which minimizes the number of shr. mem. wavefronts
+  of a transposing loader (see gemmforge.bank_conflicts). Candidates cover all offsets
+  of a column from the first bank. Thus, padding never exceeds the width of all banks
 
-
-def _find_prime_in_range(source, target):
-  for number in range(source, target):
-    for i in range(2, number):
-      if number % i == 0:
-        break
-    else:
-      return number
+  Args:
+    get_addresses: a function which returns addresses written by threads of a loader
+      as an array of a shape (num_steps, num_threads) for a given lead. dim.
+  """
+  hw_descr = vm.get_hw_descr()
+  element_size = vm.bytes_per_real()
+  num_offsets = max(1, hw_descr.shr_mem_num_banks * hw_descr.shr_mem_bank_width // element_size)
+  candidates = []
+  for lead_dim in range(min_lead_dim, min_lead_dim + num_offsets):
+    addresses = split_into_vector_units(get_addresses(lead_dim), hw_descr.vec_unit_length)
+    addresses = np.where(addresses >= 0, addresses * element_size, -1)
+    num_wavefronts, _, _ = count_wavefronts(hw_descr, addresses, element_size)
+    candidates.append((num_wavefronts, lead_dim))
+  return min(candidates)[1]
 
 
 class ExtendedTransposePatchLoader(AbstractShrMemLoader):
@@ -25,18 +34,27 @@ class ExtendedTransposePatchLoader(AbstractShrMemLoader):
     super(ExtendedTransposePatchLoader, self).__init__(**kwargs)
 
     data_view = self._src.data_view
-    matrix = self._src.obj
-    optimal_num_cols = _find_next_prime(data_view.columns)
-    if isinstance(matrix, DenseMatrix):
-      self._shm_volume = data_view.lead_dim * optimal_num_cols
-    else:  # Has to be sparse if not dense
-      self._shm_volume = matrix.get_el_count()
+    optimal_num_cols = _find_padded_lead_dim(self._vm, data_view.columns, self._get_shr_mem_addresses)
+    self._shm_volume = self._get_volume(optimal_num_cols)
 
     self._dest.data_view = DataView(rows=data_view.columns,
                                     columns=data_view.rows,
                                     lead_dim=optimal_num_cols,
                                     is_transposed=True)
 
+  def _get_volume(self, lead_dim):
+    matrix = self._src.obj
+    if isinstance(matrix, DenseMatrix):
+      return self._src.data_view.lead_dim * lead_dim
+    else:  # Has to be sparse if not dense
+      return matrix.get_el_count()
+
+  def _get_shr_mem_addresses(self, lead_dim):
+    """Returns addresses written by each thread per hop for a given lead. dim. of `dest`"""
+    src_lead_dim = self._src.data_view.lead_dim
+    index = get_hop_indices(self._get_volume(lead_dim), self._num_threads, self._num_threads)
+    return np.where(index >= 0, (index % src_lead_dim) * lead_dim + index // src_lead_dim, -1)
+
   def gen_code(self, writer):
     super(ExtendedTransposePatchLoader, self).gen_code(writer)
     writer("// using ExtendedTransposePatchLoader")
@@ -101,7 +119,7 @@ class ExactTransposePatchLoader(AbstractShrMemLoader):
     super(ExactTransposePatchLoader, self).__init__(**kwargs)
 
     data_view = self._src.data_view
-    optimal_num_cols = _find_next_prime(data_view.columns)
+    optimal_num_cols = _find_padded_lead_dim(self._vm, data_view.columns, self._get_shr_mem_addresses)
     self._shm_volume = data_view.lead_dim * optimal_num_cols
 
     self._dest.data_view = DataView(rows=data_view.columns,
@@ -109,6 +127,14 @@ class ExactTransposePatchLoader(AbstractShrMemLoader):
                                     lead_dim=optimal_num_cols,
                                     is_transposed=True)
 
+  def _get_shr_mem_addresses(self, lead_dim):
+    """Returns addresses written by each thread per hop (and column of `src`)
+    for a given lead. dim. of `dest`"""
+    data_view = self._src.data_view
+    rows = get_hop_indices(data_view.rows, self._num_threads, self._num_threads)
+    cols = np.arange(data_view.columns)[:, None, None]
+    return np.where(rows >= 0, rows * lead_dim + cols, -1).reshape(-1, self._num_threads)
+
   def gen_code(self, writer):
     super(ExactTransposePatchLoader, self).gen_code(writer)
     writer("// using ExactTransposePatchLoader")
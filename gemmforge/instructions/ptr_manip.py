@@ -50,3 +50,32 @@ class GetElementPtr(AbstractInstruction):
 
   def __str__(self) -> str:
     return f'{self._dest.name} = getelementptr_b2g {self._src.name};'
+
+
+class GetSubMatrixPtr(AbstractInstruction):
+  """Computes a pointer to a sub-matrix of an operand located either in glb. or shr. mem.
+  (e.g., a slice of an operand along the k-dimension)"""
+  def __init__(self,
+               vm: VM,
+               src: Symbol,
+               dest: Symbol,
+               offset: int):
+    super(GetSubMatrixPtr, self).__init__(vm)
+    if src.stype not in [SymbolType.Global, SymbolType.SharedMem]:
+      raise GenerationError(f'sub-matrix: `src` must be either in glb. or shr. mem., given {src.stype}')
+
+    self._src = src
+    self._dest = dest
+    self._offset = offset
+    self._is_ready = True
+
+  def gen_code(self, writer):
+    if self._src.stype == SymbolType.Global:
+      lhs = 'const ' if self._src.obj.direction == DataFlowDirection.SOURCE else ''
+      lhs += f'{self._vm.fp_as_str()} * const __restrict__ {self._dest.name}'
+    else:
+      lhs = f'{self._vm.fp_as_str()} * const {self._dest.name}'
+    writer(f'{lhs} = &{self._src.name}[{self._offset}];')
+
+  def __str__(self) -> str:
+    return f'{self._dest.name} = getelementptr {self._src.name}, {self._offset};'
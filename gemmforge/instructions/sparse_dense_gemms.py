@@ -1,4 +1,5 @@
 from .abstract_instruction import AbstractInstruction
+from .value_grouping import group_by_magnitude, gen_grouped_update
 from gemmforge.vm import VM
 from gemmforge.symbol_table import SymbolType, Symbol, DataView, InverseSymbolTable
 from gemmforge.basic_types import GeneralLexicon, DataFlowDirection, RegMemObject
@@ -18,7 +19,7 @@ class ShrMemBasedSparseDenseGemm(AbstractInstruction):
     self._num_threads = kwargs['num_threads']
     self._mat_a = kwargs['mat_a']
 
-    if self._op1.obj.get_values() == None and self._op1.stype == SymbolType.Batch:
+    if self._op1.obj.get_values() is None and self._op1.stype == SymbolType.Batch:
       raise InternalError('gemm: `op1` is a batch type, must be either glb. or shr.')
 
     if self._op2.stype == SymbolType.Batch:
@@ -33,11 +34,15 @@ class ShrMemBasedSparseDenseGemm(AbstractInstruction):
     self._is_ready = True
 
   def gen_code(self, writer):
+    if self._mat_a.get_values() is not None:
+      self._gen_grouped_code(writer)
+      return
+
     value_var = 'value'
     op1_data_view = self._op1.data_view
     op2_data_view = self._op2.data_view
     thread_idx_x = self._vm.get_lexic().thread_idx_x
-    with writer.If(self.gen_mask_threads(self._op2.obj.get_actual_num_cols())):
+    with writer.If(self.gen_mask_threads(self._op2.data_view.columns)):
       writer(f'{self._vm.fp_as_str()} {value_var};')
 
       writer.Emptyline()
@@ -58,6 +63,25 @@ class ShrMemBasedSparseDenseGemm(AbstractInstruction):
         writer.Emptyline()
         self._get_inner_loop_sparse_with_a_col(writer, value_var, k, self._mat_a.get_values())
 
+  def _gen_grouped_code(self, writer):
+    """Accumulates each row of C with known values of A. Non-zeros of a row of A
+    get grouped by the magnitude of values which is factored out of the sum"""
+    values = self._mat_a.get_value_array()
+    lead_dim = self._op2.data_view.lead_dim
+    thread_idx_x = self._vm.get_lexic().thread_idx_x
+    with writer.If(self.gen_mask_threads(self._op2.data_view.columns)):
+      for row_id, non_zeros in enumerate(self._mat_a.get_coo_per_row()):
+        entries = []
+        for col_id in non_zeros:
+          it = self._mat_a.find_1d_offset(row_id, col_id)
+          entries.append((values[it], f'{self._op2.name}[{thread_idx_x} * {lead_dim} + {col_id}]'))
+
+        for magnitude, signed_terms in group_by_magnitude(entries):
+          writer(gen_grouped_update(f'{self._register_dest.name}[{row_id}]',
+                                    magnitude,
+                                    signed_terms,
+                                    self._vm.get_real_literal()))
+
   def _get_inner_loop_sparse_with_a_col(self, writer, op2_value, b_col_id, val_a=None):
     # Iterate the first column first then the second etc. (coo_b[0] if col major, otherwise coo_b[1] if row major)
     # As we iterate we need to find the element in the real ordering (coordiantes)
@@ -66,7 +90,7 @@ class ShrMemBasedSparseDenseGemm(AbstractInstruction):
     a_col_id = b_col_id
     non_zeros = self._mat_a.get_coo_per_col()[a_col_id]
     if len(non_zeros) > 0:
-      value_known = val_a != None
+      value_known = val_a is not None
       writer.Comment(f"Mul begin col {a_col_id}")
 
       if self._trans_a:
@@ -99,6 +123,91 @@ class ShrMemBasedSparseDenseGemm(AbstractInstruction):
     return f'{self._register_dest.name} = gemm({self._op1.name}, {self._op2.name})'
 
 
+class ShrMemBasedSparseDenseLoopedGemm(ShrMemBasedSparseDenseGemm):
+  """Iterates over non-zeros of each row of A with a loop instead of unrolling them.
+  Column indices (and values, if known) of A are kept in read-only arrays in the CSR order.
+  Thus, the size of the code grows with the number of rows rather than non-zeros"""
+
+  def gen_code(self, writer):
+    row_ptr, col_indices, storage_indices = self._mat_a.get_csr()
+    values = self._mat_a.get_values()
+    lead_dim = self._op2.data_view.lead_dim
+    thread_idx_x = self._vm.get_lexic().thread_idx_x
+
+    cols_name = f'{self._mat_a.name}_cols'
+    writer(f'static const int {cols_name}[{len(col_indices)}] = {{{", ".join(map(str, col_indices.tolist()))}}};')
+    if values is None:
+      values_name = f'{self._mat_a.name}_offsets'
+      entries = map(str, storage_indices.tolist())
+      writer(f'static const int {values_name}[{len(storage_indices)}] = {{{", ".join(entries)}}};')
+      get_value = lambda index: f'{self._op1.name}[{values_name}[{index}]]'
+    else:
+      values_name = f'{self._mat_a.name}_values'
+      literal = self._vm.get_real_literal()
+      entries = [f'{values[index]}{literal}' for index in storage_indices.tolist()]
+      writer(f'static const {self._vm.fp_as_str()} {values_name}[{len(entries)}] = {{{", ".join(entries)}}};')
+      get_value = lambda index: f'{values_name}[{index}]'
+
+    with writer.If(self.gen_mask_threads(self._op2.data_view.columns)):
+      for row_id in range(self._mat_a.get_actual_num_rows()):
+        begin, end = int(row_ptr[row_id]), int(row_ptr[row_id + 1])
+        if begin == end:
+          continue
+
+        with writer.For(f'int i = {begin}; i < {end}; ++i'):
+          op2_value = f'{self._op2.name}[{thread_idx_x} * {lead_dim} + {cols_name}[i]]'
+          writer(f'{self._register_dest.name}[{row_id}] += {get_value("i")} * {op2_value};')
+
+  def __str__(self) -> str:
+    return f'{self._register_dest.name} = looped_gemm({self._op1.name}, {self._op2.name})'
+
+
+class ShrMemBasedBlockSparseDenseGemm(ShrMemBasedSparseDenseGemm):
+  """Multiplies dense blocks of a block-sparse A by each thread's column of B.
+  Blocks are visited in the block-CSR order; the product with a single block is fully
+  unrolled so that each element of B, once loaded, feeds all rows of the block.
+  If values of A are not known, `op1` must hold the blocks in the block-CSR order (see BlockPatchLoader)"""
+
+  def gen_code(self, writer):
+    block_rows, block_cols = self._mat_a.get_block_size()
+    block_volume = self._mat_a.get_block_volume()
+    row_ptr, col_indices, storage_indices = self._mat_a.get_block_csr()
+    values = self._mat_a.get_values()
+    fp_type = self._vm.fp_as_str()
+    lead_dim = self._op2.data_view.lead_dim
+    thread_idx_x = self._vm.get_lexic().thread_idx_x
+
+    cols_name = f'{self._mat_a.name}_block_cols'
+    writer(f'static const int {cols_name}[{len(col_indices)}] = {{{", ".join(map(str, col_indices.tolist()))}}};')
+    if values is None:
+      blocks_name = self._op1.name
+    else:
+      blocks_name = f'{self._mat_a.name}_values'
+      literal = self._vm.get_real_literal()
+      entries = [f'{values[index * block_volume + item]}{literal}'
+                 for index in storage_indices.tolist() for item in range(block_volume)]
+      writer(f'static const {fp_type} {blocks_name}[{len(entries)}] = {{{", ".join(entries)}}};')
+
+    with writer.If(self.gen_mask_threads(self._op2.data_view.columns)):
+      for block_row in range(len(row_ptr) - 1):
+        begin, end = int(row_ptr[block_row]), int(row_ptr[block_row + 1])
+        if begin == end:
+          continue
+
+        with writer.For(f'int i = {begin}; i < {end}; ++i'):
+          writer(f'const int col = {cols_name}[i] * {block_cols};')
+          writer(f'const {fp_type}* block = &{blocks_name}[i * {block_volume}];')
+          writer(f'{fp_type} value;')
+          for col in range(block_cols):
+            writer(f'value = {self._op2.name}[{thread_idx_x} * {lead_dim} + col + {col}];')
+            for row in range(block_rows):
+              res_access = f'[{block_row * block_rows + row}]'
+              writer(f'{self._register_dest.name}{res_access} += block[{row + col * block_rows}] * value;')
+
+  def __str__(self) -> str:
+    return f'{self._register_dest.name} = block_gemm({self._op1.name}, {self._op2.name})'
+
+
 class RegisterOnlySparseDenseGemm(AbstractInstruction):
   def __init__(self, **kwargs):
     super(RegisterOnlySparseDenseGemm, self).__init__(kwargs['vm'])
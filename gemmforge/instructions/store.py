@@ -7,6 +7,26 @@ import math
 
 def round_up_to_nearest_vec_length(n, vec_length):
     return math.ceil(n / vec_length) * vec_length
+
+
+def gen_epilogues(writer, expr, epilogues, row, col, precision):
+  """Emits a chain of epilogues applied to `expr` (see gemmforge.epilogues).
+
+  Args:
+    epilogues: a list of (epilogue, glb. mem. symbol of its matrix) pairs
+
+  Returns:
+    an expression of the result of the chain
+  """
+  if not epilogues:
+    return expr
+
+  result = 'result'
+  writer(f'{precision} {result} = {expr};')
+  real_suffix = 'f' if precision == "float" else ''
+  for epilogue, symbol in epilogues:
+    epilogue.gen_code(writer, result, symbol, row, col, real_suffix)
+  return result
   
 class StoreRegToGlb(AbstractInstruction):
   def __init__(self,
@@ -15,7 +35,8 @@ class StoreRegToGlb(AbstractInstruction):
                src: Symbol,
                alpha: float,
                beta: float,
-               num_threads: int):
+               num_threads: int,
+               epilogues=None):
     super(StoreRegToGlb, self).__init__(vm)
 
     if dest.stype != SymbolType.Global:
@@ -29,6 +50,7 @@ class StoreRegToGlb(AbstractInstruction):
     self._alpha = alpha
     self._beta = beta
     self._num_threads = num_threads
+    self._epilogues = epilogues if epilogues else []
     self._is_ready = True
 
   def gen_code(self, writer):
@@ -54,6 +76,13 @@ class StoreRegToGlb(AbstractInstruction):
           else:
             lhs = f'{self._alpha}{real_suffix} * {self._src.name}{src_access}'
 
+        lhs = gen_epilogues(writer,
+                            lhs,
+                            self._epilogues,
+                            self._vm.get_lexic().thread_idx_x,
+                            'n',
+                            precision)
+
         if not isinstance(self._beta, float):
           lhs += f' + {self._beta} * {rhs}'
         else:
@@ -201,3 +230,141 @@ class StoreRegToShrMemColumn(AbstractInstruction):
 
   def __str__(self) -> str:
     return 'not implemented'
+
+
+class StoreRegToShrMem(AbstractInstruction):
+  """Stores a result, computed in registers (a row per thread), to a region of shr. mem.
+  (e.g., an intermediate result of a chain of operations)"""
+
+  def __init__(self,
+               vm: VM,
+               dest: Symbol,
+               src: Symbol,
+               alpha: float,
+               beta: float,
+               num_threads: int):
+    super(StoreRegToShrMem, self).__init__(vm)
+
+    if dest.stype != SymbolType.SharedMem:
+      raise InternalError('store: operand `dest` is not in shr. mem.')
+
+    if src.stype != SymbolType.Register:
+      raise InternalError('store: operand `src` is not a register obj')
+
+    self._dest = dest
+    self._src = src
+    self._alpha = alpha
+    self._beta = beta
+    self._num_threads = num_threads
+    self._is_ready = True
+
+  def gen_code(self, writer):
+    dest_data_view = self._dest.data_view
+    precision = self._vm.fp_as_str()
+
+    with writer.If(self.gen_mask_threads(self._num_threads)):
+      writer.Pragma("unroll")
+      with writer.For(f'int n = 0; n < {dest_data_view.columns}; ++n'):
+        rhs = "{}[{} + {} * n]".format(self._dest.name,
+                                       self._vm.get_lexic().thread_idx_x,
+                                       dest_data_view.lead_dim)
+
+        real_suffix = 'f' if precision == "float" else ''
+
+        src_access = '' if self._src.obj.size == 1 else '[n]'
+        if self._alpha == 1.0:
+          lhs = f'{self._src.name}{src_access}'
+        else:
+          lhs = f'{self._alpha}{real_suffix} * {self._src.name}{src_access}'
+
+        if self._beta != 0.0:
+          if self._beta == 1.0:
+            lhs += f' + {rhs}'
+          else:
+            lhs += f' + {self._beta}{real_suffix} * {rhs}'
+
+        writer(f'{rhs} = {lhs};')
+
+  def __str__(self) -> str:
+    return f'{self._dest.name} = store_r2s({self._src.name})'
+
+
+class StoreRegBlockToGlb(AbstractInstruction):
+  """Stores MR x NR micro-tiles, computed by RegisterBlockedDenseGemm, to glb. mem."""
+
+  def __init__(self,
+               vm: VM,
+               dest: Symbol,
+               src: Symbol,
+               alpha: float,
+               beta: float,
+               micro_tile,
+               num_thread_groups,
+               epilogues=None):
+    super(StoreRegBlockToGlb, self).__init__(vm)
+
+    if dest.stype != SymbolType.Global:
+      raise InternalError('store: operand `dest` is not in glb mem.')
+
+    if src.stype != SymbolType.Register:
+      raise InternalError('store: operand `src` is not a register obj')
+
+    self._dest = dest
+    self._src = src
+    self._alpha = alpha
+    self._beta = beta
+    self._micro_tile = micro_tile
+    self._num_row_groups, self._num_col_groups = num_thread_groups
+    self._epilogues = epilogues if epilogues else []
+    self._is_ready = True
+
+  def gen_code(self, writer):
+    dest_matrix = self._dest.obj
+    dest_name = self._dest.name
+    precision = self._vm.fp_as_str()
+    thread_idx_x = self._vm.get_lexic().thread_idx_x
+    tile_rows, tile_cols = self._micro_tile
+
+    num_threads = self._num_row_groups * self._num_col_groups
+    with writer.If(self.gen_mask_threads(num_threads)):
+      writer(f'int rowGroup = {thread_idx_x} % {self._num_row_groups};')
+      writer(f'int colGroup = {thread_idx_x} / {self._num_row_groups};')
+
+      writer.Pragma("unroll")
+      with writer.For(f'int i = 0; i < {tile_rows}; ++i'):
+        writer(f'int row = rowGroup + i * {self._num_row_groups};')
+        writer.Pragma("unroll")
+        with writer.For(f'int j = 0; j < {tile_cols}; ++j'):
+          writer(f'int col = colGroup + j * {self._num_col_groups};')
+          condition = f'(row < {dest_matrix.get_actual_num_rows()}) && '
+          condition += f'(col < {dest_matrix.get_actual_num_cols()})'
+          with writer.If(condition):
+            rhs = f'{dest_name}[row + {dest_matrix.num_rows} * col]'
+
+            real_suffix = 'f' if precision == "float" else ''
+
+            src_access = '' if self._src.obj.size == 1 else f'[i * {tile_cols} + j]'
+            if not isinstance(self._alpha, float):
+              lhs = f'{self._alpha} * {self._src.name}{src_access}'
+            else:
+              if self._alpha == 1.0:
+                lhs = f'{self._src.name}{src_access}'
+              else:
+                lhs = f'{self._alpha}{real_suffix} * {self._src.name}{src_access}'
+
+            lhs = gen_epilogues(writer, lhs, self._epilogues, 'row', 'col', precision)
+
+            if not isinstance(self._beta, float):
+              lhs += f' + {self._beta} * {rhs}'
+            else:
+              if self._beta != 0.0:
+                if self._beta == 1.0:
+                  lhs += f' + {rhs}'
+                else:
+                  const = f'{self._beta}{real_suffix}'
+                  lhs += f' + {const} * {rhs}'
+
+            writer(f'{rhs} = {lhs};')
+
+  def __str__(self) -> str:
+    return f'{self._dest.name} = store_blocked({self._src.name})'
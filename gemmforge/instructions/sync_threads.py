@@ -14,10 +14,31 @@ class SyncThreads(AbstractInstruction):
 
   def __str__(self) -> str:
     lexic = self._vm.get_lexic()
-    if self._num_threads > self._vm.get_hw_descr().vec_unit_length:
+    vec_unit_length = self._vm.get_hw_descr().vec_unit_length
+    if self._num_threads > vec_unit_length:
       return f'{lexic.sync_threads()};'
+    elif self._num_threads < vec_unit_length:
+      # Note: several operations share a vector unit. Sync. only lanes of the current operation
+      segment = f'0x{(1 << self._num_threads) - 1:x}u'
+      shift = f'(({lexic.thread_idx_y} * {self._num_threads}) % {vec_unit_length})'
+      return f'{lexic.sync_vec_unit(mask=f"({segment} << {shift})")};'
     else:
       return f'{lexic.sync_vec_unit()};'
 
   def gen_mask_threads(self, num_threads) -> str:
     return ''
+
+
+class WaitAsyncCopies(AbstractInstruction):
+  """Waits for completion of async. copies issued by the current thread.
+  Note, it must be followed by a barrier to make the data visible to other threads"""
+  def __init__(self, vm, num_pending=0):
+    super().__init__(vm)
+    self._num_pending = num_pending
+    self._is_ready = True
+
+  def gen_code(self, writer):
+    writer(f'{self.__str__()}')
+
+  def __str__(self) -> str:
+    return f'{self._vm.get_lexic().async_copy_wait(self._num_pending)};'
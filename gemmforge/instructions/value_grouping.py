@@ -0,0 +1,39 @@
+def group_by_magnitude(entries):
+  """Groups terms of a sum of products `value * term` by the magnitude of values.
+  Groups follow the order of the first occurrence. Zero values are dropped.
+
+  Args:
+    entries: a list of (value, term) pairs where `term` is an expression
+
+  Returns:
+    a list of (magnitude, [(is_negative, term), ...]) pairs
+  """
+  groups = {}
+  for value, term in entries:
+    value = float(value)
+    if value == 0.0:
+      continue
+    groups.setdefault(abs(value), []).append((value < 0.0, term))
+  return list(groups.items())
+
+
+def gen_grouped_update(dest, magnitude, signed_terms, real_literal):
+  """Returns a statement which accumulates `magnitude * sum(+-terms)` to `dest`.
+  Multiplications by 1 are skipped; a group of negative terms gets subtracted"""
+  operator = '+='
+  if all(is_negative for is_negative, _ in signed_terms):
+    operator = '-='
+    signed_terms = [(False, term) for _, term in signed_terms]
+
+  expr = ''
+  for index, (is_negative, term) in enumerate(signed_terms):
+    if index == 0:
+      expr += f'-{term}' if is_negative else term
+    else:
+      expr += f' - {term}' if is_negative else f' + {term}'
+
+  if magnitude == 1.0:
+    return f'{dest} {operator} {expr};'
+  if len(signed_terms) > 1:
+    expr = f'({expr})'
+  return f'{dest} {operator} {magnitude!r}{real_literal} * {expr};'
@@ -0,0 +1,633 @@
+from .exceptions import GenerationError, InternalError
+from .symbol_table import SymbolType
+from .common import get_mask_runs
+import numpy as np
+
+
+class _Buffer:
+  """A flat memory buffer. A shr. mem. buffer additionally tracks which threads accessed
+  its locations since the last barrier and which locations wait for async. copies"""
+  NO_THREAD = -1
+  MANY_THREADS = -2
+
+  def __init__(self, values, is_shared):
+    self.values = values
+    self.is_shared = is_shared
+    if is_shared:
+      self.writers = np.full(values.shape, _Buffer.NO_THREAD, dtype=np.int64)
+      self.readers = np.full(values.shape, _Buffer.NO_THREAD, dtype=np.int64)
+      self.pending = np.zeros(values.shape, dtype=np.int64)
+
+
+class _Pointer:
+  """Points to `base` of a buffer for each batch element. Accesses must stay within [begin, end)"""
+
+  def __init__(self, buffer, base, begin, end):
+    self.buffer = buffer
+    self.base = base
+    self.begin = begin
+    self.end = end
+
+  def shift(self, offset):
+    return _Pointer(self.buffer, self.base + offset, self.begin, self.end)
+
+
+class Interpreter:
+  """Executes the instruction stream of a generated kernel on the CPU with NumPy.
+
+  Each instruction is executed for all threads and batch elements at once, i.e., threads
+  and batch elements are axes of arrays. Addresses follow the generated code. Thus, the
+  interpreter serves as a reference implementation of new kernel variants.
+
+  Shr. mem. is initialized with NaNs. Reads of glb. mem. outside of a batch element
+  return NaNs as well whereas out-of-bounds writes raise InternalError. If `check_races`
+  is True, conflicting accesses of different threads to shr. mem. which are not separated
+  by a barrier, as well as reads of pending async. copies, raise InternalError.
+
+  Note, instructions are available only if a kernel has not been restored from the cache"""
+
+  def __init__(self, generator, check_races=True):
+    if not hasattr(generator, 'get_instructions'):
+      raise GenerationError(f'interpreter: {type(generator).__name__} is not supported')
+
+    self._instructions = generator.get_instructions()
+    if not self._instructions:
+      raise GenerationError('interpreter: no instructions are given. Either the kernel '
+                            'has not been generated or it has been restored from the cache')
+
+    self._generator = generator
+    self._check_races = check_races
+    self._dtype = np.float32 if generator._vm.fp_as_str() == 'float' else np.float64
+    self._num_threads = generator._num_active_threads
+    self._num_ops_per_block = generator._num_ops_per_block
+
+    self._elements = None
+    self._scalars = {}
+    self._arrays = {}
+    self._pointers = {}
+    self._registers = {}
+    self._buffers = []
+    self._num_async_batches = 0
+    self._stats = {}
+
+  def run(self, data, num_elements, flags=None, scalars=None):
+    """Runs a kernel.
+
+    Args:
+      data: a dict which maps names of matrices (e.g., A, B, C) to arrays. A matrix with
+        the `none` addressing is given as a 1D array. Otherwise, an array has a shape
+        (num_elements, volume) where the volume is at least the real volume of the matrix
+      num_elements: the number of batch elements
+      flags: an optional array which enables batch elements
+      scalars: values of scalars given as strings (e.g., alpha and beta) by their names
+
+    Returns:
+      a dict which maps names of matrices to arrays after the execution
+    """
+    self._elements = np.arange(num_elements)
+    if flags is not None:
+      self._elements = self._elements[np.asarray(flags, dtype=bool)[:num_elements]]
+    self._scalars = scalars if scalars else {}
+    self._pointers = {}
+    self._registers = {}
+    self._buffers = []
+    self._num_async_batches = 0
+    self._stats = {'glb_loads': 0, 'glb_stores': 0, 'shr_loads': 0, 'shr_stores': 0, 'flops': 0}
+
+    self._arrays = {}
+    for matrix in self._generator._matrices:
+      if matrix.name not in data:
+        continue
+      array = np.array(data[matrix.name], dtype=self._dtype)
+      if matrix.addressing == 'none':
+        array = array.reshape(-1)
+        volume = array.size
+      else:
+        if array.ndim != 2 or array.shape[0] != num_elements:
+          raise GenerationError(f'interpreter: data of {matrix.name} must have a shape (num_elements, volume)')
+        volume = array.shape[1]
+      self._arrays[matrix.name] = (array.shape, _Buffer(array.reshape(-1), is_shared=False), volume)
+
+    if len(self._elements):
+      for instruction in self._instructions:
+        self._execute(instruction)
+
+    return {name: buffer.values.reshape(shape) for name, (shape, buffer, _) in self._arrays.items()}
+
+  def get_stats(self):
+    """Returns numbers of loaded and stored values and flops per batch element of the last run.
+    Each scalar access of the generated code is counted, i.e., vectorization is not taken into account"""
+    num_elements = max(len(self._elements), 1) if self._elements is not None else 1
+    return {key: value / num_elements for key, value in self._stats.items()}
+
+  def _execute(self, instruction):
+    for cls in type(instruction).__mro__:
+      handler = getattr(self, f'_exec_{cls.__name__}', None)
+      if handler is not None:
+        handler(instruction)
+        return
+    raise GenerationError(f'interpreter: {type(instruction).__name__} is not supported')
+
+  # memory accesses
+  def _get_pointer(self, symbol):
+    if symbol.name not in self._pointers:
+      raise InternalError(f'interpreter: {symbol.name} has not been declared')
+    return self._pointers[symbol.name]
+
+  def _get_addresses(self, pointer, index, is_write):
+    index = np.asarray(index, dtype=np.int64)
+    expand = (slice(None),) + (None,) * index.ndim
+    addresses = pointer.base[expand] + index[None]
+    is_inside = (addresses >= pointer.begin[expand]) & (addresses < pointer.end[expand])
+    if (is_write or pointer.buffer.is_shared) and not np.all(is_inside):
+      raise InternalError('interpreter: out-of-bounds access')
+    return addresses, is_inside
+
+  def _get_thread_ids(self, threads, shape):
+    threads = np.asarray(threads, dtype=np.int64)
+    expand = (slice(None),) + (None,) * threads.ndim
+    return np.broadcast_to(self._elements[expand] * self._num_threads + threads[None], shape)
+
+  def _load(self, symbol, index, threads=None):
+    """Returns values of `symbol[index]` as an array of a shape (num_elements,) + index.shape.
+    `threads` are ids of threads which read locations. None means that all threads read them"""
+    pointer = self._get_pointer(symbol)
+    addresses, is_inside = self._get_addresses(pointer, index, is_write=False)
+    buffer = pointer.buffer
+    values = np.where(is_inside, buffer.values[np.where(is_inside, addresses, 0)], np.nan)
+
+    if buffer.is_shared:
+      self._stats['shr_loads'] += addresses.size
+      if self._check_races:
+        self._track_reads(buffer, addresses, threads)
+    else:
+      self._stats['glb_loads'] += addresses.size
+    return values.astype(self._dtype)
+
+  def _store(self, symbol, index, values, threads=None, is_async=False):
+    pointer = self._get_pointer(symbol)
+    addresses, _ = self._get_addresses(pointer, index, is_write=True)
+    buffer = pointer.buffer
+    values = np.broadcast_to(values, addresses.shape)
+
+    if buffer.is_shared:
+      self._stats['shr_stores'] += addresses.size
+      if self._check_races:
+        self._track_writes(buffer, addresses, threads, is_async)
+    else:
+      self._stats['glb_stores'] += addresses.size
+    buffer.values[addresses] = values
+
+  @classmethod
+  def _merge_accesses(cls, addresses, thread_ids):
+    """Returns unique addresses and ids of threads which accessed them.
+    A location accessed by several threads gets MANY_THREADS"""
+    addresses, thread_ids = addresses.reshape(-1), thread_ids.reshape(-1)
+    unique_addresses, groups = np.unique(addresses, return_inverse=True)
+    merged = np.full(unique_addresses.shape, _Buffer.NO_THREAD, dtype=np.int64)
+    merged[groups] = thread_ids
+    is_shared = np.zeros(unique_addresses.shape, dtype=bool)
+    np.logical_or.at(is_shared, groups, merged[groups] != thread_ids)
+    return unique_addresses, np.where(is_shared, _Buffer.MANY_THREADS, merged)
+
+  def _track_reads(self, buffer, addresses, threads):
+    if np.any(buffer.pending[addresses]):
+      raise InternalError('interpreter: a read of shr. mem. before async. copies have been waited for')
+
+    if threads is None:
+      addresses = np.unique(addresses)
+      readers = np.full(addresses.shape, _Buffer.MANY_THREADS, dtype=np.int64)
+    else:
+      addresses, readers = self._merge_accesses(addresses, self._get_thread_ids(threads, addresses.shape))
+
+    writers = buffer.writers[addresses]
+    if np.any((writers != _Buffer.NO_THREAD) & (writers != readers)):
+      raise InternalError('interpreter: a read of shr. mem. written by another thread without a barrier')
+
+    previous = buffer.readers[addresses]
+    is_same = (previous == _Buffer.NO_THREAD) | (previous == readers)
+    buffer.readers[addresses] = np.where(is_same, readers, _Buffer.MANY_THREADS)
+
+  def _track_writes(self, buffer, addresses, threads, is_async):
+    addresses, writers = self._merge_accesses(addresses, self._get_thread_ids(threads, addresses.shape))
+    if np.any(writers == _Buffer.MANY_THREADS):
+      raise InternalError('interpreter: several threads write to the same location of shr. mem.')
+
+    for accesses in [buffer.readers[addresses], buffer.writers[addresses]]:
+      if np.any((accesses != _Buffer.NO_THREAD) & (accesses != writers)):
+        raise InternalError('interpreter: a write to shr. mem. accessed by another thread without a barrier')
+    buffer.writers[addresses] = writers
+    if is_async:
+      buffer.pending[addresses] = self._num_async_batches
+
+  # scalars
+  def _get_scalar(self, value):
+    if isinstance(value, str):
+      if value not in self._scalars:
+        raise GenerationError(f'interpreter: a value of `{value}` is not given')
+      return self._dtype(self._scalars[value])
+    return self._dtype(value)
+
+  def _scale(self, value, alpha):
+    if isinstance(alpha, float) and alpha == 1.0:
+      return value
+    return self._get_scalar(alpha) * value
+
+  def _add_scaled(self, value, beta, load):
+    """Returns `value + beta * load()`. Note, `load` is not called if beta is known to be 0"""
+    if isinstance(beta, float):
+      if beta == 0.0:
+        return value
+      if beta == 1.0:
+        return value + load()
+    return value + self._get_scalar(beta) * load()
+
+  # registers
+  def _get_registers(self, symbol, threads, index):
+    """Returns `symbol[index]` of the given threads as an array of a shape (num_elements,) + index.shape"""
+    index = np.asarray(index, dtype=np.int64)
+    if symbol.obj.size == 1:
+      index = np.zeros_like(index)
+    return self._registers[symbol.name][:, threads, index]
+
+  def _accumulate(self, symbol, threads, index, values):
+    """Adds values of a shape (num_elements, threads, index) to `symbol[index]` of each thread"""
+    index = np.asarray(index, dtype=np.int64)
+    if symbol.obj.size == 1:
+      index = np.zeros_like(index)
+    registers = self._registers[symbol.name]
+    registers[:, threads[:, None], index[None, :]] += values.astype(self._dtype)
+
+  @classmethod
+  def _get_indices(cls, runs):
+    return np.concatenate([np.arange(begin, end) for begin, end in runs] + [np.zeros(0, dtype=np.int64)])
+
+  # pointers and allocations
+  def _exec_GetElementPtr(self, instruction):
+    src = instruction._src
+    if src.name not in self._arrays:
+      raise GenerationError(f'interpreter: data of {src.name} is not given')
+    _, buffer, volume = self._arrays[src.name]
+
+    if src.obj.addressing == 'none':
+      begin = np.zeros_like(self._elements)
+    else:
+      begin = self._elements * volume
+    base = begin + src.obj.get_offset_to_first_element()
+    self._pointers[instruction._dest.name] = _Pointer(buffer, base, begin, begin + volume)
+
+  def _exec_GetSubMatrixPtr(self, instruction):
+    pointer = self._get_pointer(instruction._src)
+    self._pointers[instruction._dest.name] = pointer.shift(instruction._offset)
+
+  def _exec_RegisterAlloc(self, instruction):
+    init_value = instruction._init_value
+    init_value = init_value if isinstance(init_value, float) else np.nan
+    shape = (len(self._elements), self._num_threads, instruction._dest.obj.size)
+    self._registers[instruction._dest.name] = np.full(shape, init_value, dtype=self._dtype)
+
+  def _exec_ShrMemAlloc(self, instruction):
+    shr_mem_obj = instruction._dest.obj
+    total_size = shr_mem_obj.get_total_size()
+    size_per_mult = shr_mem_obj.get_size_per_mult()
+    num_blocks = self._elements[-1] // self._num_ops_per_block + 1
+
+    buffer = _Buffer(np.full(num_blocks * total_size, np.nan, dtype=self._dtype), is_shared=True)
+    self._buffers.append(buffer)
+
+    begin = (self._elements // self._num_ops_per_block) * total_size
+    begin += (self._elements % self._num_ops_per_block) * size_per_mult
+    self._pointers[shr_mem_obj.name] = _Pointer(buffer, begin, begin, begin + size_per_mult)
+
+  def _exec_ShrMemRegion(self, instruction):
+    pointer = self._get_pointer(instruction._shr_mem)
+    self._pointers[instruction._dest.name] = pointer.shift(instruction._shr_mem_offset)
+
+  # synchronization
+  def _exec_SyncThreads(self, instruction):
+    for buffer in self._buffers:
+      buffer.writers.fill(_Buffer.NO_THREAD)
+      buffer.readers.fill(_Buffer.NO_THREAD)
+
+  def _exec_WaitAsyncCopies(self, instruction):
+    last_completed = self._num_async_batches - instruction._num_pending
+    for buffer in self._buffers:
+      buffer.pending[buffer.pending <= last_completed] = 0
+
+  # loaders
+  def _exec_AbstractShrMemLoader(self, instruction):
+    shr_mem = self._get_pointer(instruction._shr_mem)
+    self._pointers[instruction._dest.name] = shr_mem.shift(instruction._shr_mem_offset)
+
+  def _copy_to_shr_mem(self, instruction, dest_index, src_index, threads):
+    self._exec_AbstractShrMemLoader(instruction)
+    if instruction.is_async():
+      # Note: all copies of a loader are committed as a single batch
+      self._num_async_batches += 1
+    values = self._load(instruction._src, src_index)
+    self._store(instruction._dest, dest_index, values, threads, is_async=instruction.is_async())
+
+  def _exec_ExtendedPatchLoader(self, instruction):
+    index = np.arange(instruction._shm_volume)
+    self._copy_to_shr_mem(instruction, index, index, index % instruction._num_threads)
+
+  def _exec_ExactPatchLoader(self, instruction):
+    src_lead_dim = instruction._src.data_view.lead_dim
+    dest_lead_dim = instruction._dest.data_view.lead_dim
+    cols = self._get_indices(instruction._col_runs)
+    dest_index, src_index, threads = [[np.zeros(0, dtype=np.int64)] for _ in range(3)]
+    for begin, end in instruction._row_runs:
+      rows = np.arange(begin, end)
+      dest_index.append((rows[None, :] + cols[:, None] * dest_lead_dim).reshape(-1))
+      src_index.append((rows[None, :] + cols[:, None] * src_lead_dim).reshape(-1))
+      threads.append(np.tile((rows - begin) % instruction._num_threads, len(cols)))
+    self._copy_to_shr_mem(instruction, *[np.concatenate(item) for item in [dest_index, src_index, threads]])
+
+  def _exec_ExtendedTransposePatchLoader(self, instruction):
+    src_lead_dim = instruction._src.data_view.lead_dim
+    dest_lead_dim = instruction._dest.data_view.lead_dim
+    index = np.arange(instruction._shm_volume)
+    dest_index = (index % src_lead_dim) * dest_lead_dim + index // src_lead_dim
+    self._copy_to_shr_mem(instruction, dest_index, index, index % instruction._num_threads)
+
+  def _exec_ExactTransposePatchLoader(self, instruction):
+    src_data_view = instruction._src.data_view
+    dest_lead_dim = instruction._dest.data_view.lead_dim
+    rows = np.arange(src_data_view.rows)[None, :]
+    cols = np.arange(src_data_view.columns)[:, None]
+    dest_index = (rows * dest_lead_dim + cols).reshape(-1)
+    src_index = (rows + cols * src_data_view.lead_dim).reshape(-1)
+    threads = np.broadcast_to(rows % instruction._num_threads, (cols.size, rows.size)).reshape(-1)
+    self._copy_to_shr_mem(instruction, dest_index, src_index, threads)
+
+  def _exec_BlockPatchLoader(self, instruction):
+    index = np.arange(instruction._shm_volume)
+    block_volume = instruction._block_volume
+    block_order = np.array(instruction._block_order, dtype=np.int64)
+    src_index = block_order[index // block_volume] * block_volume + index % block_volume
+    self._copy_to_shr_mem(instruction, index, src_index, index % instruction._num_threads)
+
+  # dense gemms
+  def _exec_ShrMemBasedDenseGemm(self, instruction):
+    op1, op2 = instruction._op1, instruction._op2
+    trans_a = instruction._trans_a
+    num_rows = op1.data_view.columns if trans_a else op1.data_view.rows
+    num_k = op1.data_view.rows if trans_a else op1.data_view.columns
+    threads = np.arange(num_rows)
+    ks = self._get_indices(get_mask_runs(instruction._k_mask, num_k))
+    cols = np.arange(instruction._dest.obj.size)
+
+    if op1.stype == SymbolType.Register:
+      values1 = self._get_registers(op1, threads[:, None], ks[None, :])
+    else:
+      if trans_a:
+        index = ks[None, :] + threads[:, None] * op1.data_view.lead_dim
+      else:
+        index = threads[:, None] + ks[None, :] * op1.data_view.lead_dim
+      values1 = self._load(op1, index, np.broadcast_to(threads[:, None], index.shape))
+
+    if instruction._trans_b:
+      index = cols[None, :] + op2.data_view.lead_dim * ks[:, None]
+    else:
+      index = ks[:, None] + op2.data_view.lead_dim * cols[None, :]
+    values2 = self._load(op2, index)
+
+    self._accumulate(instruction._dest, threads, cols, np.einsum('etk,ekn->etn', values1, values2))
+    self._stats['flops'] += 2 * len(self._elements) * threads.size * ks.size * cols.size
+
+  def _exec_RegisterOnlyDenseGemm(self, instruction):
+    op1, op2 = instruction._op1, instruction._op2
+    trans_a = instruction._trans_a
+    num_rows = op1.data_view.columns if trans_a else op1.data_view.rows
+    num_k = op1.data_view.rows if trans_a else op1.data_view.columns
+    rows = np.arange(num_rows)
+    ks = self._get_indices(get_mask_runs(instruction._k_mask, num_k))
+    cols = np.arange(instruction._dest.obj.size)
+
+    if trans_a:
+      index = ks[None, :] + rows[:, None] * op1.data_view.lead_dim
+    else:
+      index = rows[:, None] + ks[None, :] * op1.data_view.lead_dim
+    # Note: threads beyond rows of `op1` accumulate an uninitialized value
+    values1 = np.full((len(self._elements), self._num_threads, ks.size), np.nan, dtype=self._dtype)
+    values1[:, :num_rows, :] = self._load(op1, index)
+
+    if instruction._trans_b:
+      index = cols[None, :] + ks[:, None] * op2.data_view.lead_dim
+    else:
+      index = cols[None, :] * op2.data_view.lead_dim + ks[:, None]
+    values2 = self._load(op2, index)
+
+    threads = np.arange(self._num_threads)
+    self._accumulate(instruction._dest, threads, cols, np.einsum('etk,ekn->etn', values1, values2))
+    self._stats['flops'] += 2 * len(self._elements) * num_rows * ks.size * cols.size
+
+  def _exec_RegisterBlockedDenseGemm(self, instruction):
+    op1, op2 = instruction._op1, instruction._op2
+    num_rows = op1.data_view.rows
+    num_cols = op2.data_view.rows if instruction._trans_b else op2.data_view.columns
+    tile_rows, tile_cols = instruction._micro_tile
+    num_row_groups, num_col_groups = instruction._num_row_groups, instruction._num_col_groups
+    ks = self._get_indices(get_mask_runs(instruction._k_mask, op1.data_view.columns))
+
+    # Note: out-of-range rows and columns of a tile are clamped as in the generated code
+    threads = np.arange(num_row_groups * num_col_groups)
+    rows = threads[:, None] % num_row_groups + np.arange(tile_rows)[None, :] * num_row_groups
+    cols = threads[:, None] // num_row_groups + np.arange(tile_cols)[None, :] * num_col_groups
+    rows, cols = np.minimum(rows, num_rows - 1), np.minimum(cols, num_cols - 1)
+
+    index = rows[:, :, None] + ks[None, None, :] * op1.data_view.lead_dim
+    values1 = self._load(op1, index)
+
+    if instruction._trans_b:
+      index = cols[:, :, None] + op2.data_view.lead_dim * ks[None, None, :]
+    else:
+      index = ks[None, None, :] + op2.data_view.lead_dim * cols[:, :, None]
+    values2 = self._load(op2, index)
+
+    tiles = np.einsum('etik,etjk->etij', values1, values2).reshape(len(self._elements), threads.size, -1)
+    self._accumulate(instruction._dest, threads, np.arange(tile_rows * tile_cols), tiles)
+    self._stats['flops'] += 2 * len(self._elements) * threads.size * ks.size * tile_rows * tile_cols
+
+  # sparse gemms
+  @classmethod
+  def _get_unrolled_non_zeros(cls, matrix):
+    """Returns rows, columns and storage indices of non-zeros as they appear in unrolled code"""
+    coordinates = np.asarray(matrix.get_coordinate_array(), dtype=np.int64)
+    offsets = [matrix.find_1d_offset(row, col) for row, col in coordinates.tolist()]
+    return coordinates[:, 0], coordinates[:, 1], np.array(offsets, dtype=np.int64)
+
+  @classmethod
+  def _get_block_non_zeros(cls, matrix, block_ptr, block_indices, storage_blocks, is_csc):
+    """Returns rows and columns of non-zeros of a block-sparse matrix visited in the block-CSC
+    (or block-CSR) order, their positions in the compressed order and storage indices"""
+    block_rows, block_cols = matrix.get_block_size()
+    block_volume = matrix.get_block_volume()
+    lines = np.repeat(np.arange(len(block_ptr) - 1), np.diff(block_ptr))
+    positions = np.repeat(np.arange(len(block_indices)), block_volume)
+    items = np.tile(np.arange(block_volume), len(block_indices))
+
+    block_row_ids = np.asarray(block_indices if is_csc else lines, dtype=np.int64)[positions]
+    block_col_ids = np.asarray(lines if is_csc else block_indices, dtype=np.int64)[positions]
+    rows = block_row_ids * block_rows + items % block_rows
+    cols = block_col_ids * block_cols + items // block_rows
+    storage_index = np.asarray(storage_blocks, dtype=np.int64)[positions] * block_volume + items
+    return rows, cols, positions * block_volume + items, storage_index
+
+  def _get_sparse_values(self, symbol, matrix, index, storage_index):
+    """Returns values of non-zeros either known at compile-time or loaded from `symbol[index]`"""
+    if matrix.get_values() is not None:
+      values = matrix.get_value_array()[storage_index].astype(self._dtype)
+      return np.broadcast_to(values, (len(self._elements), values.size))
+    return self._load(symbol, index)
+
+  def _multiply_sparse(self, dest, threads, dense_values, sparse_values, dest_index):
+    """Accumulates `dense_values[:, t, i] * sparse_values[:, i]` to `dest[dest_index[i]]` of each thread t"""
+    num_dest_values = dest.obj.size
+    scatter = np.zeros((dest_index.size, num_dest_values), dtype=self._dtype)
+    scatter[np.arange(dest_index.size), dest_index] = 1.0
+    products = np.einsum('eti,ei,ic->etc', dense_values, sparse_values, scatter)
+    self._accumulate(dest, threads, np.arange(num_dest_values), products)
+    self._stats['flops'] += 2 * len(self._elements) * threads.size * dest_index.size
+
+  def _multiply_dense_sparse(self, instruction, rows, cols, index, storage_index):
+    op1 = instruction._op1
+    threads = np.arange(op1.data_view.rows)
+    dense_index = threads[:, None] + rows[None, :] * op1.data_view.lead_dim
+    dense_values = self._load(op1, dense_index, np.broadcast_to(threads[:, None], dense_index.shape))
+    sparse_values = self._get_sparse_values(instruction._op2, instruction._mat_b, index, storage_index)
+    self._multiply_sparse(instruction._dest, threads, dense_values, sparse_values, cols)
+
+  def _exec_ShrMemBasedDenseSparseGemm(self, instruction):
+    rows, cols, offsets = self._get_unrolled_non_zeros(instruction._mat_b)
+    self._multiply_dense_sparse(instruction, rows, cols, offsets, offsets)
+
+  def _exec_ShrMemBasedDenseSparseLoopedGemm(self, instruction):
+    col_ptr, rows, storage_index = instruction._mat_b.get_csc()
+    cols = np.repeat(np.arange(len(col_ptr) - 1), np.diff(col_ptr))
+    storage_index = np.asarray(storage_index, dtype=np.int64)
+    self._multiply_dense_sparse(instruction, np.asarray(rows, dtype=np.int64), cols, storage_index, storage_index)
+
+  def _exec_ShrMemBasedDenseBlockSparseGemm(self, instruction):
+    matrix = instruction._mat_b
+    rows, cols, index, storage_index = self._get_block_non_zeros(matrix, *matrix.get_block_csc(), is_csc=True)
+    self._multiply_dense_sparse(instruction, rows, cols, index, storage_index)
+
+  def _multiply_sparse_dense(self, instruction, rows, cols, index, storage_index):
+    op2 = instruction._op2
+    threads = np.arange(op2.data_view.columns)
+    dense_index = threads[:, None] * op2.data_view.lead_dim + cols[None, :]
+    dense_values = self._load(op2, dense_index, np.broadcast_to(threads[:, None], dense_index.shape))
+    sparse_values = self._get_sparse_values(instruction._op1, instruction._mat_a, index, storage_index)
+    self._multiply_sparse(instruction._register_dest, threads, dense_values, sparse_values, rows)
+
+  def _exec_ShrMemBasedSparseDenseGemm(self, instruction):
+    rows, cols, offsets = self._get_unrolled_non_zeros(instruction._mat_a)
+    self._multiply_sparse_dense(instruction, rows, cols, offsets, offsets)
+
+  def _exec_ShrMemBasedSparseDenseLoopedGemm(self, instruction):
+    row_ptr, cols, storage_index = instruction._mat_a.get_csr()
+    rows = np.repeat(np.arange(len(row_ptr) - 1), np.diff(row_ptr))
+    storage_index = np.asarray(storage_index, dtype=np.int64)
+    self._multiply_sparse_dense(instruction, rows, np.asarray(cols, dtype=np.int64), storage_index, storage_index)
+
+  def _exec_ShrMemBasedBlockSparseDenseGemm(self, instruction):
+    matrix = instruction._mat_a
+    rows, cols, index, storage_index = self._get_block_non_zeros(matrix, *matrix.get_block_csr(), is_csc=False)
+    self._multiply_sparse_dense(instruction, rows, cols, index, storage_index)
+
+  # stores
+  def _store_to_glb(self, instruction, values, rows, cols):
+    """Stores `alpha * values` to glb. mem. applying epilogues (see gemmforge.epilogues)"""
+    dest = instruction._dest
+    index = rows + dest.obj.num_rows * cols
+    value = self._scale(values, instruction._alpha)
+
+    for epilogue, symbol in instruction._epilogues:
+      def load(epilogue_rows, epilogue_cols, symbol=symbol):
+        return self._load(symbol, np.broadcast_to(epilogue_rows + symbol.obj.num_rows * epilogue_cols, index.shape))
+
+      def store(epilogue_rows, epilogue_cols, epilogue_values, symbol=symbol):
+        epilogue_index = np.broadcast_to(epilogue_rows + symbol.obj.num_rows * epilogue_cols, index.shape)
+        self._store(symbol, epilogue_index, epilogue_values)
+
+      value = epilogue.evaluate(value, rows, cols, load, store)
+
+    self._store(dest, index, self._add_scaled(value, instruction._beta, lambda: self._load(dest, index)))
+
+  def _exec_StoreRegToGlb(self, instruction):
+    threads = np.arange(instruction._num_threads)
+    cols = np.arange(instruction._dest.obj.get_actual_num_cols())
+    values = self._get_registers(instruction._src, threads[:, None], cols[None, :])
+    rows, cols = np.broadcast_arrays(threads[:, None], cols[None, :])
+    self._store_to_glb(instruction, values, rows, cols)
+
+  def _exec_StoreRegBlockToGlb(self, instruction):
+    matrix = instruction._dest.obj
+    tile_rows, tile_cols = instruction._micro_tile
+    num_row_groups, num_col_groups = instruction._num_row_groups, instruction._num_col_groups
+    threads = np.arange(num_row_groups * num_col_groups)
+
+    rows = threads[:, None, None] % num_row_groups + np.arange(tile_rows)[None, :, None] * num_row_groups
+    cols = threads[:, None, None] // num_row_groups + np.arange(tile_cols)[None, None, :] * num_col_groups
+    tiles = np.arange(tile_rows * tile_cols).reshape(1, tile_rows, tile_cols)
+    threads, rows, cols, tiles = np.broadcast_arrays(threads[:, None, None], rows, cols, tiles)
+
+    is_inside = (rows < matrix.get_actual_num_rows()) & (cols < matrix.get_actual_num_cols())
+    threads, rows, cols, tiles = threads[is_inside], rows[is_inside], cols[is_inside], tiles[is_inside]
+    values = self._get_registers(instruction._src, threads, tiles)
+    self._store_to_glb(instruction, values, rows, cols)
+
+  def _exec_StoreRegToShrMem(self, instruction):
+    dest = instruction._dest
+    threads = np.arange(instruction._num_threads)
+    cols = np.arange(dest.data_view.columns)
+    index = threads[:, None] + dest.data_view.lead_dim * cols[None, :]
+    thread_ids = np.broadcast_to(threads[:, None], index.shape)
+
+    values = self._scale(self._get_registers(instruction._src, threads[:, None], cols[None, :]), instruction._alpha)
+    values = self._add_scaled(values, instruction._beta, lambda: self._load(dest, index, thread_ids))
+    self._store(dest, index, values, thread_ids)
+
+  def _exec_StoreRegToShrMemColumn(self, instruction):
+    dest = instruction._dest
+    threads = np.arange(instruction._num_threads)
+    rows = np.arange(dest.obj.get_actual_num_rows())
+    index = threads[:, None] * dest.obj.num_rows + rows[None, :]
+    thread_ids = np.broadcast_to(threads[:, None], index.shape)
+
+    values = self._scale(self._get_registers(instruction._src, threads[:, None], rows[None, :]), instruction._alpha)
+    values = self._add_scaled(values, instruction._beta, lambda: self._load(dest, index, thread_ids))
+    self._store(dest, index, values, thread_ids)
+
+  def _exec_StoreShrMemToGlb(self, instruction):
+    dest, src = instruction._dest, instruction._src
+    num_threads = instruction._num_threads
+    lead_dim = dest.data_view.lead_dim
+    num_hops = lead_dim // num_threads
+
+    # Note: the last hop uses the lead. dim. of `src` to address glb. mem. as the generated code does
+    col = np.arange(dest.data_view.columns)[:, None]
+    main = np.arange(num_hops * num_threads)[None, :]
+    residue = np.arange(num_hops * num_threads, lead_dim)[None, :]
+    src_index = np.concatenate([(main + col * lead_dim).reshape(-1), (residue + col * lead_dim).reshape(-1)])
+    dest_index = np.concatenate([(main + col * src.obj.num_rows).reshape(-1),
+                                 (residue + col * src.data_view.lead_dim).reshape(-1)])
+    threads = src_index % lead_dim % num_threads
+    self._store(dest, dest_index, self._load(src, src_index, threads))
+
+  def _exec_CopyAddScale(self, instruction):
+    src, dest = instruction._src, instruction._dest
+    threads = np.arange(src.data_view.rows)
+    cols = np.arange(src.data_view.columns)
+    thread_ids = np.broadcast_to(threads[:, None], (threads.size, cols.size))
+
+    if src.stype == SymbolType.Register:
+      values = self._get_registers(src, threads[:, None], cols[None, :])
+    else:
+      values = self._load(src, threads[:, None] + cols[None, :] * src.data_view.lead_dim, thread_ids)
+
+    index = threads[:, None] + cols[None, :] * dest.data_view.lead_dim
+    values = self._add_scaled(self._scale(values, instruction._alpha), instruction._beta,
+                              lambda: self._load(dest, index, thread_ids))
+    self._store(dest, index, values, thread_ids)
@@ -1,2 +1,4 @@
 from .dense import DenseMatrix
 from .sparse import SparseMatrix
+from .block_sparse import BlockSparseMatrix
+from .sparse_io import load_sparse_matrix, load_matrix_market, load_npz, load_json
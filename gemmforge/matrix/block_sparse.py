@@ -0,0 +1,120 @@
+from gemmforge.exceptions import GenerationError
+from gemmforge.matrix.sparse import SparseMatrix
+import hashlib
+import numpy as np
+
+
+class BlockSparseMatrix(SparseMatrix):
+  """A sparse matrix whose non-zeros form dense blocks of the same size aligned to a grid.
+  Each block is stored contiguously in the column-major order, i.e., the coordinates
+  (and values) of the i-th block occupy entries [i * r * c, (i + 1) * r * c) of the storage.
+
+  The block size is detected from the coordinates if it is not given.
+  A pattern without block structure gets 1x1 blocks"""
+  # Note: the largest block edge considered during the detection
+  MAX_BLOCK_EDGE = 8
+
+  def __init__(self, num_rows, num_cols, addressing, coordinates, values=None, block_size=None):
+    super(BlockSparseMatrix, self).__init__(num_rows, num_cols, addressing, coordinates, values)
+
+    if block_size is None:
+      block_size = BlockSparseMatrix.detect_block_size(num_rows, num_cols, self._coo_array)
+    elif not BlockSparseMatrix._fits(num_rows, num_cols, self._coo_array, tuple(block_size)):
+      raise GenerationError(f'block sparse matrix: the pattern does not consist of '
+                            f'contiguously stored {block_size[0]}x{block_size[1]} blocks')
+    self._block_size = tuple(block_size)
+
+    block_rows, block_cols = self._block_size
+    heads = self._coo_array[::block_rows * block_cols]
+    self._block_coo_array = np.stack([heads[:, 0] // block_rows, heads[:, 1] // block_cols], axis=1)
+
+    num_block_rows, num_block_cols = num_rows // block_rows, num_cols // block_cols
+    self._block_csr = SparseMatrix._compress(self._block_coo_array[:, 0],
+                                             self._block_coo_array[:, 1],
+                                             num_block_rows)
+    self._block_csc = SparseMatrix._compress(self._block_coo_array[:, 1],
+                                             self._block_coo_array[:, 0],
+                                             num_block_cols)
+
+  @classmethod
+  def from_blocks(cls, num_rows, num_cols, addressing, block_size, blocks, values=None):
+    """Creates a matrix from a list of [block_row, block_col] pairs given in the storage order"""
+    block_rows, block_cols = block_size
+    blocks = np.asarray(blocks, dtype=np.int32).reshape(-1, 2)
+    local_rows = np.tile(np.arange(block_rows, dtype=np.int32), block_cols)
+    local_cols = np.repeat(np.arange(block_cols, dtype=np.int32), block_rows)
+
+    rows = (blocks[:, 0:1] * block_rows + local_rows).reshape(-1)
+    cols = (blocks[:, 1:2] * block_cols + local_cols).reshape(-1)
+    return cls(num_rows, num_cols, addressing,
+               coordinates=np.stack([rows, cols], axis=1),
+               values=values,
+               block_size=block_size)
+
+  @classmethod
+  def from_sparse(cls, matrix, block_size=None):
+    """Converts a SparseMatrix, e.g., loaded with `load_sparse_matrix`"""
+    return cls(matrix.num_rows, matrix.num_cols, matrix.addressing,
+               coordinates=matrix.get_coordinate_array(),
+               values=matrix.get_values(),
+               block_size=block_size)
+
+  @classmethod
+  def detect_block_size(cls, num_rows, num_cols, coordinates):
+    """Returns the largest (rows, cols) block size which the storage of `coordinates` is
+    compatible with. Edges of blocks must divide the corresponding dimensions of a matrix"""
+    coordinates = np.asarray(coordinates, dtype=np.int32).reshape(-1, 2)
+    candidates = [(rows, cols)
+                  for rows in range(1, min(num_rows, cls.MAX_BLOCK_EDGE) + 1)
+                  for cols in range(1, min(num_cols, cls.MAX_BLOCK_EDGE) + 1)
+                  if num_rows % rows == 0 and num_cols % cols == 0]
+    candidates.sort(key=lambda size: (size[0] * size[1], min(size)), reverse=True)
+    for block_size in candidates:
+      if cls._fits(num_rows, num_cols, coordinates, block_size):
+        return block_size
+    return (1, 1)
+
+  @classmethod
+  def _fits(cls, num_rows, num_cols, coordinates, block_size):
+    block_rows, block_cols = block_size
+    block_volume = block_rows * block_cols
+    if block_rows < 1 or block_cols < 1 or num_rows % block_rows or num_cols % block_cols:
+      return False
+    if coordinates.shape[0] % block_volume:
+      return False
+
+    rows, cols = coordinates[:, 0], coordinates[:, 1]
+    local = rows % block_rows + (cols % block_cols) * block_rows
+    if not np.array_equal(local, np.arange(coordinates.shape[0]) % block_volume):
+      return False
+
+    blocks = ((rows // block_rows) * (num_cols // block_cols) + cols // block_cols).reshape(-1, block_volume)
+    if not np.all(blocks == blocks[:, 0:1]):
+      return False
+    return len(np.unique(blocks[:, 0])) == blocks.shape[0]
+
+  def get_block_size(self):
+    return self._block_size
+
+  def get_block_volume(self):
+    return self._block_size[0] * self._block_size[1]
+
+  def get_num_blocks(self):
+    return self._block_coo_array.shape[0]
+
+  def get_block_coordinate_array(self):
+    """Returns a (num_blocks, 2) int32 array of (block_row, block_col) pairs in the storage order"""
+    return self._block_coo_array
+
+  def get_block_csr(self):
+    """Returns (block_row_ptr, block_col_indices, storage_block_indices). See `SparseMatrix.get_csr`"""
+    return self._block_csr
+
+  def get_block_csc(self):
+    """Returns (block_col_ptr, block_row_indices, storage_block_indices). See `SparseMatrix.get_csr`"""
+    return self._block_csc
+
+  def get_fingerprint(self, with_values=True):
+    pattern = super(BlockSparseMatrix, self).get_fingerprint(with_values)
+    block_rows, block_cols = self._block_size
+    return hashlib.sha256(f'{pattern}:{block_rows}x{block_cols}'.encode()).hexdigest()
@@ -3,7 +3,9 @@ from gemmforge.matrix.matrix import Matrix
 
 
 class DenseMatrix(Matrix):
-  def __init__(self, num_rows, num_cols, addressing, bbox=None):
+  """Optional row and column masks mark slices of a matrix which are known to be zero (False).
+  Kernels may skip loading and multiplying such slices; thus, they must hold zeros in memory"""
+  def __init__(self, num_rows, num_cols, addressing, bbox=None, row_mask=None, col_mask=None):
     Matrix.__init__(self, num_rows, num_cols, addressing)
 
     if bbox is not None:
@@ -25,6 +27,18 @@ class DenseMatrix(Matrix):
     else:
       self.bbox = (0, 0, num_rows, num_cols)
 
+    self.row_mask = DenseMatrix._check_mask(row_mask, num_rows, 'row')
+    self.col_mask = DenseMatrix._check_mask(col_mask, num_cols, 'column')
+
+  @classmethod
+  def _check_mask(cls, mask, size, kind):
+    if mask is None:
+      return None
+    mask = [bool(is_set) for is_set in mask]
+    if len(mask) != size:
+      raise GenerationError(f'{kind} mask must have {size} entries, given: {len(mask)}')
+    return mask
+
   def get_actual_num_rows(self):
     return self.bbox[2] - self.bbox[0]
 
@@ -40,9 +54,25 @@ class DenseMatrix(Matrix):
   def get_offset_to_first_element(self):
     return self.num_rows * self.bbox[1] + self.bbox[0]
 
+  def get_actual_row_mask(self):
+    """Returns the row mask restricted to the bounding box or None if all rows are used"""
+    if self.row_mask is None or all(self.row_mask[self.bbox[0]:self.bbox[2]]):
+      return None
+    return self.row_mask[self.bbox[0]:self.bbox[2]]
+
+  def get_actual_col_mask(self):
+    """Returns the column mask restricted to the bounding box or None if all columns are used"""
+    if self.col_mask is None or all(self.col_mask[self.bbox[1]:self.bbox[3]]):
+      return None
+    return self.col_mask[self.bbox[1]:self.bbox[3]]
+
   def __str__(self):
     string = super().__str__()
     string += "bounding box = {}\n".format(self.bbox)
     string += "num. actual rows = {}\n".format(self.get_actual_num_rows())
     string += "num. actual cols = {}\n".format(self.get_actual_num_cols())
+    if self.get_actual_row_mask() is not None:
+      string += "row mask = {}\n".format(''.join(map(str, map(int, self.get_actual_row_mask()))))
+    if self.get_actual_col_mask() is not None:
+      string += "col mask = {}\n".format(''.join(map(str, map(int, self.get_actual_col_mask()))))
     return string
@@ -1,6 +1,8 @@
 from gemmforge.exceptions import GenerationError
 from gemmforge.matrix.matrix import Matrix
+import hashlib
 import json
+import numpy as np
 
 
 # Cordinate object form needs be a dictionary of the following entries:
@@ -8,47 +10,63 @@ import json
 # cols - number of columns (int) e.g. "cols": 2
 # entries - and array of coordinate arrays of row,col, 0-indexed e.g. "entries" : [[0,0],[1,1]] (given as the storage order)
 # Optionally values = [0.2f, 9.4f]... (it is assumed that non of the values here are 0)
+# Such files, as well as Matrix Market and scipy .npz files, can be loaded with sparse_io.load_sparse_matrix
 class SparseMatrix(Matrix):
+  """Coordinates are kept as an int32 array in the storage order and values as a float64 array.
+  CSR/CSC indices are built at construction. The dense view and the per-row/per-column lists
+  are built on the first access"""
   def __init__(self, num_rows, num_cols, addressing, coordinates, values=None):
     Matrix.__init__(self, num_rows, num_cols, addressing)
-    self.elcount = 0
 
-    self.values = values
-
-    self.dense_representation = [[0] * num_cols for _ in range(num_rows)]
-    i = 0
-    for coordinate in coordinates:
-      val = "X"
-      if values != None:
-        assert i < len(values), f"i < len(values) : {i} < {len}"
-        val = values[i]
-      self.dense_representation[int(coordinate[0])][int(coordinate[1])] = val
-      i += 1
     self.coo = coordinates
+    self._coo_array = np.asarray(coordinates, dtype=np.int32).reshape(-1, 2)
+    self.elcount = self._coo_array.shape[0]
 
-    self.coo_per_row = [[] for _ in range(num_rows)]
-    self.coo_per_col = [[] for _ in range(num_cols)]
-
-    i = 0
-    for coordinate in coordinates:
-      val = "X"
-      if values != None:
-        val = values[i]
-      self.coo_per_row[int(coordinate[0])].append(int(coordinate[1]))
-      self.coo_per_col[int(coordinate[1])].append(int(coordinate[0]))
-      self.elcount += 1
-      i += 1
-
-    non_zero_cols = 0
-    non_zero_rows = 1
-    for i in self.coo_per_col:
-      if len(i) > 0:
-        non_zero_cols += 1
-    for i in self.coo_per_row:
-      if len(i) > 0:
-        non_zero_rows += 1
-    self.num_max_non_zero_cols = non_zero_cols
-    self.num_max_non_zero_rows = non_zero_rows
+    rows, cols = self._coo_array[:, 0], self._coo_array[:, 1]
+    if self.elcount and (rows.min() < 0 or rows.max() >= num_rows or cols.min() < 0 or cols.max() >= num_cols):
+      raise GenerationError(f'sparse matrix: coordinates are out of bounds ({num_rows}x{num_cols})')
+
+    # Note: values are emitted as given by the user; the array is used for hashing and evaluation
+    self.values = values
+    self._value_array = None
+    if values is not None:
+      assert len(values) >= self.elcount, f"len(values) >= num. non-zeros : {len(values)} < {self.elcount}"
+      self._value_array = np.asarray(values[:self.elcount], dtype=np.float64)
+
+    self._csr = SparseMatrix._compress(rows, cols, num_rows)
+    self._csc = SparseMatrix._compress(cols, rows, num_cols)
+
+    # Note: the count of non-zero rows starts at 1 as it always did. Register estimates
+    # of sparse-dense kernels depend on these values
+    self.num_max_non_zero_cols = int(np.count_nonzero(np.diff(self._csc[0])))
+    self.num_max_non_zero_rows = int(np.count_nonzero(np.diff(self._csr[0]))) + 1
+
+    self._dense_representation = None
+    self._coo_per_row = None
+    self._coo_per_col = None
+    self._offsets = None
+    self._fingerprints = {}
+
+  @property
+  def dense_representation(self):
+    if self._dense_representation is None:
+      dense = [[0] * self.num_cols for _ in range(self.num_rows)]
+      for index, (row, col) in enumerate(self._coo_array.tolist()):
+        dense[row][col] = "X" if self.values is None else self.values[index]
+      self._dense_representation = dense
+    return self._dense_representation
+
+  @property
+  def coo_per_row(self):
+    if self._coo_per_row is None:
+      self._coo_per_row = SparseMatrix._split(*self._csr[:2])
+    return self._coo_per_row
+
+  @property
+  def coo_per_col(self):
+    if self._coo_per_col is None:
+      self._coo_per_col = SparseMatrix._split(*self._csc[:2])
+    return self._coo_per_col
 
   def get_actual_num_rows(self):
     return self.num_rows
@@ -84,25 +102,66 @@ class SparseMatrix(Matrix):
   def get_coordinates(self):
     return self.coo
 
+  def get_coordinate_array(self):
+    """Returns a (nnz, 2) int32 array of (row, col) pairs in the storage order"""
+    return self._coo_array
+
   def get_values(self):
     return self.values
 
+  def get_value_array(self):
+    """Returns a float64 array of values in the storage order or None"""
+    return self._value_array
+
   def get_el_count(self):
     return self.elcount
 
+  def get_csr(self):
+    """Returns (row_ptr, col_indices, storage_indices) as int32 arrays. Non-zeros of each row
+    follow the storage order. `storage_indices` maps them to positions in the storage"""
+    return self._csr
+
+  def get_csc(self):
+    """Returns (col_ptr, row_indices, storage_indices). See `get_csr`"""
+    return self._csc
+
+  def get_fingerprint(self, with_values=True):
+    """Returns a stable hash of the shape, the addressing and the sparsity pattern.
+    Values are included unless `with_values` is False"""
+    if with_values not in self._fingerprints:
+      hasher = hashlib.sha256()
+      hasher.update(f'{self.num_rows}x{self.num_cols}:{self.addressing}:{self.elcount}'.encode())
+      hasher.update(self._coo_array.astype('<i4').tobytes())
+      if with_values and self._value_array is not None:
+        hasher.update(self._value_array.astype('<f8').tobytes())
+      self._fingerprints[with_values] = hasher.hexdigest()
+    return self._fingerprints[with_values]
+
   def find_1d_offset(self, row, col):
     assert (row < self.get_actual_num_rows())
     assert (col < self.get_actual_num_cols())
-    coordinates = self.get_coordinates()
-    i = 0
-    for (_row, _col) in coordinates:
-      if row == _row and col == _col:
-        break
-      i += 1
-    assert (i < len(coordinates))
-    return i
+    if self._offsets is None:
+      # Note: the first occurrence of a duplicated coordinate wins
+      keys = (self._coo_array[:, 0].astype(np.int64) * self.num_cols + self._coo_array[:, 1]).tolist()
+      self._offsets = dict(zip(reversed(keys), range(self.elcount - 1, -1, -1)))
+    offset = self._offsets.get(int(row) * self.num_cols + int(col), None)
+    assert (offset is not None)
+    return offset
+
+  @classmethod
+  def _compress(cls, major, minor, num_lines):
+    storage_indices = np.argsort(major, kind='stable').astype(np.int32)
+    line_ptr = np.zeros(num_lines + 1, dtype=np.int32)
+    np.cumsum(np.bincount(major, minlength=num_lines), out=line_ptr[1:])
+    return line_ptr, minor[storage_indices], storage_indices
+
+  @classmethod
+  def _split(cls, line_ptr, indices):
+    indices = indices.tolist()
+    line_ptr = line_ptr.tolist()
+    return [indices[begin:end] for begin, end in zip(line_ptr[:-1], line_ptr[1:])]
 
   def sparsity(self):
     size = self.get_actual_num_cols() * self.get_actual_num_rows()
     el_count = self.get_el_count()
-    return 1.0 - float(el_count / size)
\ No newline at end of file
+    return 1.0 - float(el_count / size)
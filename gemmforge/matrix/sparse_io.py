@@ -0,0 +1,193 @@
+from gemmforge.exceptions import GenerationError
+from gemmforge.matrix.sparse import SparseMatrix
+import json
+import numpy as np
+import os
+import struct
+import warnings
+import zipfile
+
+
+def load_sparse_matrix(path, addressing, with_values=True):
+  """Loads a sparse matrix. The format is deduced from the file extension:
+  `.mtx` (Matrix Market), `.npz` (scipy-style COO/CSR/CSC) or `.json`.
+
+  Args:
+    addressing: batch addressing of the matrix (see Matrix.ADDRESSIGN)
+    with_values: if False, only the sparsity pattern is loaded
+  """
+  extension = os.path.splitext(path)[1].lower()
+  loaders = {'.mtx': load_matrix_market,
+             '.npz': load_npz,
+             '.json': load_json}
+  if extension not in loaders:
+    raise GenerationError(f'sparse io: unknown file format, given: {path}')
+  return loaders[extension](path, addressing, with_values)
+
+
+def load_json(path, addressing, with_values=True):
+  """Loads a matrix described with the json schema of SparseMatrix:
+  {"rows": int, "cols": int, "entries": [[row, col], ...], "values": [...] (optional)}"""
+  with open(path, 'r') as file:
+    try:
+      descr = json.load(file)
+    except ValueError as err:
+      raise GenerationError(f'sparse io: cannot parse {path}: {err}')
+
+  for key in ['rows', 'cols', 'entries']:
+    if key not in descr:
+      raise GenerationError(f'sparse io: `{key}` is missing in {path}')
+
+  values = descr.get('values', None) if with_values else None
+  return SparseMatrix(num_rows=descr['rows'],
+                      num_cols=descr['cols'],
+                      addressing=addressing,
+                      coordinates=np.asarray(descr['entries'], dtype=np.int32).reshape(-1, 2),
+                      values=values)
+
+
+def load_matrix_market(path, addressing, with_values=True):
+  """Loads a matrix in the Matrix Market coordinate format. Entries of general matrices
+  are kept in the order of the file. Symmetric and skew-symmetric matrices get expanded
+  and stored in the column-major order"""
+  with open(path, 'rb') as file:
+    banner = file.readline().decode().split()
+    if len(banner) != 5 or banner[0].lower() != '%%matrixmarket':
+      raise GenerationError(f'sparse io: {path} is not a Matrix Market file')
+
+    obj, layout, field, symmetry = [item.lower() for item in banner[1:]]
+    if obj != 'matrix' or layout != 'coordinate':
+      raise GenerationError(f'sparse io: only coordinate matrices are supported, given: {layout}')
+    if field not in ['real', 'integer', 'pattern']:
+      raise GenerationError(f'sparse io: unsupported field type, given: {field}')
+    if symmetry not in ['general', 'symmetric', 'skew-symmetric']:
+      raise GenerationError(f'sparse io: unsupported symmetry, given: {symmetry}')
+
+    line = file.readline()
+    while line.startswith(b'%') or not line.strip():
+      if not line:
+        raise GenerationError(f'sparse io: the size line is missing in {path}')
+      line = file.readline()
+    try:
+      num_rows, num_cols, num_entries = [int(item) for item in line.split()]
+    except ValueError:
+      raise GenerationError(f'sparse io: cannot parse the size line of {path}: {line.decode().strip()}')
+
+    # Note: the body is converted by the C-parser of numpy without creating a python object per entry
+    num_fields = 2 if field == 'pattern' else 3
+    try:
+      with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)
+        body = np.loadtxt(file, dtype=np.float64, comments='%', ndmin=2)
+    except ValueError as err:
+      raise GenerationError(f'sparse io: cannot parse entries of {path}: {err}')
+
+  if body.size == 0:
+    body = body.reshape(0, num_fields)
+  if body.shape != (num_entries, num_fields):
+    raise GenerationError(f'sparse io: expected {num_entries} entries in {path}')
+
+  rows = body[:, 0].astype(np.int32) - 1
+  cols = body[:, 1].astype(np.int32) - 1
+  values = body[:, 2] if (field != 'pattern' and with_values) else None
+
+  if symmetry != 'general':
+    off_diagonal = rows != cols
+    sign = -1.0 if symmetry == 'skew-symmetric' else 1.0
+    rows, cols = np.concatenate([rows, cols[off_diagonal]]), np.concatenate([cols, rows[off_diagonal]])
+    if values is not None:
+      values = np.concatenate([values, sign * values[off_diagonal]])
+
+    order = np.lexsort((rows, cols))
+    rows, cols = rows[order], cols[order]
+    if values is not None:
+      values = values[order]
+
+  return SparseMatrix(num_rows=num_rows,
+                      num_cols=num_cols,
+                      addressing=addressing,
+                      coordinates=np.stack([rows, cols], axis=1),
+                      values=values)
+
+
+def load_npz(path, addressing, with_values=True):
+  """Loads a matrix saved with `scipy.sparse.save_npz` (COO, CSR or CSC).
+  Arrays of uncompressed archives are memory-mapped. The storage order follows the format,
+  i.e., the order of entries for COO, row-major for CSR and column-major for CSC"""
+  arrays = _NpzArchive(path)
+  if 'format' not in arrays or 'shape' not in arrays:
+    raise GenerationError(f'sparse io: {path} is not a scipy sparse archive')
+
+  fmt = arrays['format'].item()
+  fmt = fmt.decode() if isinstance(fmt, bytes) else str(fmt)
+  num_rows, num_cols = [int(item) for item in arrays['shape']]
+
+  if fmt == 'coo':
+    rows, cols = arrays['row'], arrays['col']
+  elif fmt in ['csr', 'csc']:
+    indptr = arrays['indptr']
+    major = np.repeat(np.arange(len(indptr) - 1, dtype=np.int32), np.diff(indptr))
+    minor = arrays['indices']
+    rows, cols = (major, minor) if fmt == 'csr' else (minor, major)
+  else:
+    raise GenerationError(f'sparse io: unsupported sparse format, given: {fmt}')
+
+  values = arrays['data'] if with_values and 'data' in arrays else None
+  return SparseMatrix(num_rows=num_rows,
+                      num_cols=num_cols,
+                      addressing=addressing,
+                      coordinates=np.stack([rows, cols], axis=1),
+                      values=values)
+
+
+class _NpzArchive:
+  """Gives access to arrays of an npz-file. Members stored without compression
+  are memory-mapped; compressed ones are read as usual"""
+  LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+
+  def __init__(self, path):
+    self._path = path
+    try:
+      with zipfile.ZipFile(path) as archive:
+        self._members = {os.path.splitext(info.filename)[0]: info for info in archive.infolist()}
+    except (OSError, zipfile.BadZipFile) as err:
+      raise GenerationError(f'sparse io: cannot open {path}: {err}')
+    self._arrays = {}
+
+  def __contains__(self, name):
+    return name in self._members
+
+  def __getitem__(self, name):
+    if name not in self._arrays:
+      info = self._members[name]
+      if info.compress_type == zipfile.ZIP_STORED:
+        self._arrays[name] = self._map(info)
+      else:
+        with np.load(self._path, allow_pickle=False) as archive:
+          self._arrays[name] = archive[name]
+    return self._arrays[name]
+
+  def _map(self, info):
+    with open(self._path, 'rb') as file:
+      file.seek(info.header_offset)
+      header = _NpzArchive.LOCAL_HEADER.unpack(file.read(_NpzArchive.LOCAL_HEADER.size))
+      name_length, extra_length = header[-2], header[-1]
+      file.seek(name_length + extra_length, os.SEEK_CUR)
+
+      version = np.lib.format.read_magic(file)
+      if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+      else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(file)
+      offset = file.tell()
+
+    if dtype.hasobject:
+      raise GenerationError(f'sparse io: object arrays are not supported, given: {info.filename}')
+    if not np.prod(shape, dtype=np.int64):
+      return np.empty(shape, dtype=dtype)
+    return np.memmap(self._path,
+                     dtype=dtype,
+                     mode='r',
+                     offset=offset,
+                     shape=shape,
+                     order='F' if fortran_order else 'C')
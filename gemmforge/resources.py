@@ -0,0 +1,113 @@
+from .exceptions import GenerationError
+import json
+import math
+
+
+def compute_occupancy(hw_descr, num_threads_per_block, num_regs_per_thread, shr_mem_per_block):
+  """Computes how many blocks of a kernel can reside on a single SM (CU, sub-slice).
+
+  Threads and registers are allocated per vector unit (warp, wavefront). Therefore,
+  the number of threads of a block gets rounded up to a multiple of the vector unit length.
+
+  Args:
+    hw_descr (HwDecription): a description of the target hardware
+    num_threads_per_block (int): the number of threads of a block
+    num_regs_per_thread (int): the estimated number of registers per thread
+    shr_mem_per_block (int): shr. mem. of a block in bytes
+
+  Returns:
+    a tuple of the number of blocks per SM, the theoretical occupancy
+    and the name of the resource which limits the number of blocks
+  """
+  num_vec_units = math.ceil(num_threads_per_block / hw_descr.vec_unit_length)
+  num_allocated_threads = num_vec_units * hw_descr.vec_unit_length
+
+  # Note: a block which exceeds the per-block register limit cannot be launched at all.
+  # Otherwise, blocks share the register file of an SM
+  num_regs_per_block = num_allocated_threads * num_regs_per_thread
+  if num_regs_per_block > hw_descr.max_reg_per_block:
+    num_blocks_wrt_regs = 0
+  else:
+    num_blocks_wrt_regs = int(hw_descr.regs_per_sm // num_regs_per_block)
+
+  # Note: if several resources give the same limit, the first one gets reported
+  limits = {'threads': hw_descr.max_threads_per_sm // num_allocated_threads,
+            'registers': num_blocks_wrt_regs}
+  if shr_mem_per_block:
+    limits['shared_memory'] = hw_descr.max_local_mem_size_per_block // shr_mem_per_block
+  limits['blocks'] = hw_descr.max_block_per_sm
+
+  limiting_resource = min(limits, key=limits.get)
+  num_blocks_per_sm = limits[limiting_resource]
+  occupancy = num_blocks_per_sm * num_allocated_threads / hw_descr.max_threads_per_sm
+  return num_blocks_per_sm, occupancy, limiting_resource
+
+
+class ResourceReport:
+  """Resources requested by a kernel and the resulting theoretical occupancy.
+
+  Attributes:
+    base_name (str): the name of the kernel
+    arch (str): the target architecture
+    num_threads_per_block (int): the number of threads of a block
+    num_ops_per_block (int): the number of operations (batch elements) per block
+    num_regs_per_thread (int): registers per thread as estimated by the thread policy
+    shr_mem_per_block (int): shr. mem. of a block in bytes
+    num_blocks_per_sm (int): the number of blocks which can reside on a single SM
+    occupancy (float): the ratio of resident threads to the maximal number of threads per SM
+    limiting_resource (str): `threads`, `registers`, `shared_memory` or `blocks`
+  """
+
+  def __init__(self, base_name, hw_descr, num_threads_per_block, num_ops_per_block,
+               num_regs_per_thread, shr_mem_per_block):
+    self.base_name = base_name
+    self.arch = hw_descr.model
+    self.num_threads_per_block = num_threads_per_block
+    self.num_ops_per_block = num_ops_per_block
+    self.num_regs_per_thread = num_regs_per_thread
+    self.shr_mem_per_block = shr_mem_per_block
+
+    self.num_blocks_per_sm, self.occupancy, self.limiting_resource = compute_occupancy(hw_descr,
+                                                                                       num_threads_per_block,
+                                                                                       num_regs_per_thread,
+                                                                                       shr_mem_per_block)
+
+  @classmethod
+  def from_generator(cls, generator):
+    """Makes a report of a generated kernel. Note, it also works for kernels restored from the cache"""
+    if generator._num_regs_per_thread is None:
+      raise GenerationError(f'resources of {generator.get_base_name()} are unknown: '
+                            f'the kernel has not been generated yet or was restored from an outdated cache record')
+
+    return cls(base_name=generator.get_base_name(),
+               hw_descr=generator._hw_descr,
+               num_threads_per_block=generator._num_active_threads * generator._num_ops_per_block,
+               num_ops_per_block=generator._num_ops_per_block,
+               num_regs_per_thread=generator._num_regs_per_thread,
+               shr_mem_per_block=generator._shr_mem_per_block)
+
+  def is_single_block_per_sm(self):
+    return self.num_blocks_per_sm <= 1
+
+  def to_dict(self):
+    return {'base_name': self.base_name,
+            'arch': self.arch,
+            'num_threads_per_block': self.num_threads_per_block,
+            'num_ops_per_block': self.num_ops_per_block,
+            'num_regs_per_thread': self.num_regs_per_thread,
+            'shr_mem_per_block': self.shr_mem_per_block,
+            'num_blocks_per_sm': self.num_blocks_per_sm,
+            'occupancy': self.occupancy,
+            'limiting_resource': self.limiting_resource}
+
+  def __str__(self):
+    return (f'{self.base_name}: threads/block = {self.num_threads_per_block}, '
+            f'regs/thread = {self.num_regs_per_thread}, '
+            f'shr. mem./block = {self.shr_mem_per_block} bytes, '
+            f'blocks/SM = {self.num_blocks_per_sm}, '
+            f'occupancy = {self.occupancy:.2f} (limited by {self.limiting_resource})')
+
+
+def dump_resource_reports(reports):
+  """Returns a json-document with a list of reports (see ResourceReport.to_dict)"""
+  return json.dumps([report.to_dict() for report in reports], indent=2)
@@ -0,0 +1,167 @@
+from .exceptions import GenerationError
+from .basic_types import DataFlowDirection
+from .matrix import SparseMatrix
+from .instructions.loaders.abstract_loader import AbstractShrMemLoader
+import math
+
+POINTER_SIZE = 8
+
+
+class RooflineEstimate:
+  """An upper bound of the performance of a kernel given by the roofline model.
+
+  Compulsory glb. mem. traffic is counted per batch element. Matrices with the `none` addressing
+  are shared by all elements. Therefore, they are read once per launch. Values of sparse matrices
+  which are known at generation time are a part of the generated code and are not read. Unless
+  the number of elements is given, methods return values of a large batch where shared reads
+  are negligible.
+
+  Attributes:
+    base_name (str): the name of the kernel
+    flops (int): flops per batch element
+    glb_mem_reads (int): bytes read from glb. mem. per batch element
+    glb_mem_writes (int): bytes written to glb. mem. per batch element
+    shared_glb_mem_reads (int): bytes of matrices read once per launch
+    shr_mem_stores (int): bytes copied by loaders to shr. mem. per batch element
+      (None if the kernel has been restored from the cache)
+    peak_gflops (float): the peak rate of the precision of the kernel, GFLOP/s
+    peak_bandwidth (float): the peak glb. mem. bandwidth, GB/s
+  """
+
+  def __init__(self, base_name, flops, glb_mem_reads, glb_mem_writes, shared_glb_mem_reads,
+               shr_mem_stores, peak_gflops, peak_bandwidth):
+    self.base_name = base_name
+    self.flops = flops
+    self.glb_mem_reads = glb_mem_reads
+    self.glb_mem_writes = glb_mem_writes
+    self.shared_glb_mem_reads = shared_glb_mem_reads
+    self.shr_mem_stores = shr_mem_stores
+    self.peak_gflops = peak_gflops
+    self.peak_bandwidth = peak_bandwidth
+
+  def _get_volumes(self, num_elements):
+    """Returns flops and bytes of glb. mem. traffic of a launch. If `num_elements` is None,
+    the values per element of a large batch (i.e., without shared reads) are returned"""
+    traffic = self.glb_mem_reads + self.glb_mem_writes
+    if num_elements is None:
+      return self.flops, traffic
+    return self.flops * num_elements, traffic * num_elements + self.shared_glb_mem_reads
+
+  def get_arithmetic_intensity(self, num_elements=None):
+    """Returns flops per byte of glb. mem. traffic"""
+    flops, traffic = self._get_volumes(num_elements)
+    return flops / traffic if traffic else math.inf
+
+  def get_time(self, num_elements=None):
+    """Returns the lower bound of the time of a launch in seconds"""
+    flops, traffic = self._get_volumes(num_elements)
+    return max(flops / (self.peak_gflops * 1e9), traffic / (self.peak_bandwidth * 1e9))
+
+  def get_gflops(self, num_elements=None):
+    """Returns the upper bound of the attainable performance in GFLOP/s"""
+    flops, _ = self._get_volumes(num_elements)
+    time = self.get_time(num_elements)
+    return flops / time / 1e9 if time else 0.0
+
+  def get_bound(self, num_elements=None):
+    """Returns either `compute` or `memory`"""
+    flops, traffic = self._get_volumes(num_elements)
+    is_compute_bound = flops / self.peak_gflops >= traffic / self.peak_bandwidth
+    return 'compute' if is_compute_bound else 'memory'
+
+  def __str__(self):
+    return (f'{self.base_name}: flops = {self.flops}, '
+            f'glb. mem. = {self.glb_mem_reads} + {self.glb_mem_writes} bytes, '
+            f'intensity = {self.get_arithmetic_intensity():.2f} flop/byte, '
+            f'bound = {self.get_gflops():.1f} GFLOP/s ({self.get_bound()})')
+
+
+class RooflinePredictor:
+  """Predicts the roofline bound of a generated kernel (see RooflineEstimate)"""
+
+  def __init__(self, generator):
+    self._generator = generator
+    self._vm = generator._vm
+    self._hw_descr = self._vm.get_hw_descr()
+
+  def predict(self):
+    peak_gflops = self._hw_descr.get_peak_gflops(self._vm.fp_as_str())
+    if peak_gflops is None:
+      raise GenerationError(f'roofline: {self._hw_descr.model} does not support '
+                            f'{self._vm.fp_as_str()} natively')
+
+    reads, writes, shared_reads = 0, 0, 0
+    for matrix, is_read, is_written in self._get_accesses():
+      volume = self._get_num_bytes(matrix)
+      if matrix.addressing == 'none':
+        shared_reads += volume if is_read else 0
+        writes += volume if is_written else 0
+        continue
+
+      reads += volume if is_read else 0
+      writes += volume if is_written else 0
+      if matrix.addressing == 'pointer_based':
+        reads += POINTER_SIZE
+
+    return RooflineEstimate(base_name=self._generator.get_base_name(),
+                            flops=self._generator.get_flops(),
+                            glb_mem_reads=reads,
+                            glb_mem_writes=writes,
+                            shared_glb_mem_reads=shared_reads,
+                            shr_mem_stores=self._get_shr_mem_stores(),
+                            peak_gflops=peak_gflops,
+                            peak_bandwidth=self._hw_descr.glb_mem_bandwidth)
+
+  def _get_num_bytes(self, matrix):
+    if isinstance(matrix, SparseMatrix):
+      num_values = 0 if matrix.get_values() is not None else matrix.get_el_count()
+    else:
+      num_values = matrix.get_actual_volume()
+    return num_values * self._vm.bytes_per_real()
+
+  def _get_shr_mem_stores(self):
+    if not hasattr(self._generator, 'get_instructions'):
+      return 0
+
+    instructions = self._generator.get_instructions()
+    if not instructions:
+      return None
+
+    num_elements = sum([instr.get_num_copied_elements() for instr in instructions
+                        if isinstance(instr, AbstractShrMemLoader)])
+    return num_elements * self._vm.bytes_per_real()
+
+  def _get_accesses(self):
+    """Returns a list of (matrix, is_read, is_written) of all kernel arguments"""
+    for cls in type(self._generator).__mro__:
+      handler = getattr(self, f'_get_accesses_{cls.__name__}', None)
+      if handler is not None:
+        return handler(self._generator)
+    raise GenerationError(f'roofline: {type(self._generator).__name__} is not supported')
+
+  def _get_accesses_GemmGenerator(self, generator):
+    accesses = [(generator._mat_a, True, False),
+                (generator._mat_b, True, False),
+                (generator._mat_c, generator._beta != 0.0, True)]
+    for epilogue in generator._epilogues:
+      is_written = epilogue.DIRECTION == DataFlowDirection.SINK
+      accesses.append((epilogue.get_matrix(), epilogue.is_matrix_read(), is_written))
+    return accesses
+
+  def _get_accesses_CsaGenerator(self, generator):
+    return [(generator._mat_a, True, False),
+            (generator._mat_b, generator._beta != 0.0, True)]
+
+  def _get_accesses_ChainGenerator(self, generator):
+    accesses = []
+    for matrix in generator._matrices:
+      is_read = False
+      is_written = False
+      # Note: values written by a previous op. do not need to be loaded from glb. mem. again
+      for op in generator._ops:
+        if not is_written and any(matrix is source for source in generator._get_sources(op)):
+          is_read = True
+        if matrix is generator._get_result(op):
+          is_written = True
+      accesses.append((matrix, is_read, is_written))
+    return accesses
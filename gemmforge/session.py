@@ -0,0 +1,88 @@
+from . import constructs
+from .cache import make_spec_key
+from .exceptions import GenerationError
+from .resources import dump_resource_reports
+from io import StringIO
+
+
+class GenerationSession:
+  """Deduplicates structurally identical kernels within a single generation run.
+
+  A generator, passed to `add`, gets generated only if there has not been
+  any other generator with the same specification before. Otherwise, the base name
+  of the already generated kernel is returned and the generator is discarded.
+  Each unique kernel is emitted only once into the combined translation unit.
+  """
+
+  def __init__(self, vm):
+    self._vm = vm
+    self._registry = {}
+    self._generators = []
+    self._num_requests = 0
+
+  def add(self, generator):
+    """Generates a kernel if necessary. Note, `set` must have been called on the generator before.
+
+    Returns:
+      the base name of the kernel which must be used to call the requested operation
+    """
+    generator._check_if_set()
+    if generator._vm is not self._vm:
+      raise GenerationError('session: a generator must use the same vm as the session')
+
+    self._num_requests += 1
+    key = make_spec_key(generator)
+    if key in self._registry:
+      return self._registry[key].get_base_name()
+
+    base_name = generator.get_base_name()
+    for known_generator in self._generators:
+      if known_generator.get_base_name() == base_name:
+        raise GenerationError(f'session: base name {base_name} is already used by another kernel')
+
+    generator.generate()
+    self._registry[key] = generator
+    self._generators.append(generator)
+    return base_name
+
+  def get_generator(self, base_name):
+    for generator in self._generators:
+      if generator.get_base_name() == base_name:
+        return generator
+    raise GenerationError(f'session: kernel {base_name} is not registered')
+
+  def get_num_requests(self):
+    return self._num_requests
+
+  def get_num_kernels(self):
+    return len(self._generators)
+
+  def get_source(self, with_includes=True):
+    """Returns a translation unit which contains all unique kernels and their launchers"""
+    src = StringIO()
+    if with_includes:
+      with constructs.Cpp(StringIO()) as file:
+        for header_file in self._vm.get_headers():
+          file.Include(f'{header_file}')
+        src.write(file.stream.getvalue())
+
+    for generator in self._generators:
+      src.write(generator.get_kernel())
+      src.write(generator.get_launcher())
+    return src.getvalue()
+
+  def get_header(self):
+    """Returns declarations of all launchers of the session"""
+    header = StringIO()
+    for generator in self._generators:
+      header.write(generator.get_launcher_header())
+    return header.getvalue()
+
+  def get_resource_reports(self):
+    """Returns resource reports of all unique kernels (see ResourceReport)"""
+    return [generator.get_resource_report() for generator in self._generators]
+
+  def get_resource_reports_as_json(self):
+    """Returns resource reports of all unique kernels as a json-document.
+    It is meant to be written next to the translation unit (see `get_source`)"""
+    return dump_resource_reports(self.get_resource_reports())
@@ -1,6 +1,8 @@
 from gemmforge.vm import VM
+from gemmforge.resources import compute_occupancy
 from ..matrix import DenseMatrix, SparseMatrix
 from abc import ABC, abstractmethod
+import math
 
 
 class AbstractUniOpThreadPolicy(ABC):
@@ -16,6 +18,12 @@ class AbstractUniOpThreadPolicy(ABC):
   def get_num_ops_per_block(self):
     pass
 
+  @abstractmethod
+  def get_num_regs_per_thread(self):
+    """Returns the estimated number of registers per thread which
+    the policy uses to compute the number of operations per block"""
+    pass
+
 
 class AbstractBinaryOpThreadPolicy(AbstractUniOpThreadPolicy):
   def __init__(self,
@@ -40,7 +48,68 @@ class AbstractGemmLikeThreadPolicy(AbstractBinaryOpThreadPolicy):
                res: DenseMatrix):
     super().__init__(vm, num_threads, op1, op2)
     self._res = res
+    self._num_elements = None
 
   @abstractmethod
   def get_num_ops_per_block(self):
     pass
+
+  def set_num_elements_hint(self, num_elements):
+    """Sets the expected number of batch elements which is used to account for the tail of a launch"""
+    self._num_elements = num_elements
+
+  def _find_num_ops_per_block(self, shr_mem_per_op=0):
+    """Searches for the number of operations per block with the lowest predicted time.
+
+    An SM processes as many operations at once as its resident blocks contain. The number of
+    resident blocks is limited by threads, registers, shr. mem. and blocks per SM. A launch takes
+    as many waves as it needs to process all blocks; the last block and the last wave can be
+    partially filled. Ties are resolved in favor of smaller blocks.
+    """
+    hw_descr = self._vm.get_hw_descr()
+    num_regs_per_thread = self.get_num_regs_per_thread()
+    shr_mem_bytes = shr_mem_per_op * self._vm.bytes_per_real()
+
+    max_num_ops = max(hw_descr.max_num_threads // self._num_threads, 1)
+    if shr_mem_bytes:
+      max_num_ops = min(max_num_ops, max(hw_descr.max_local_mem_size_per_block // shr_mem_bytes, 1))
+
+    best_num_ops = 1
+    best_time = None
+    for num_ops in range(1, max_num_ops + 1):
+      num_blocks_per_sm, _, _ = compute_occupancy(hw_descr,
+                                                  num_ops * self._num_threads,
+                                                  num_regs_per_thread,
+                                                  num_ops * shr_mem_bytes)
+      if num_blocks_per_sm == 0:
+        break
+
+      if self._num_elements is None:
+        # time per operation of a long (steady-state) launch
+        time = 1.0 / (num_blocks_per_sm * num_ops)
+      else:
+        num_blocks = math.ceil(self._num_elements / num_ops)
+        time = math.ceil(num_blocks / (hw_descr.num_sms * num_blocks_per_sm))
+
+      if best_time is None or time < best_time:
+        best_time = time
+        best_num_ops = num_ops
+    return best_num_ops
+
+  def align_num_ops_per_block(self, num_ops, shr_mem_per_op=0):
+    """Adjusts the number of operations per block to occupy complete vector units
+    in case if several operations (batch elements) share a vector unit"""
+    hw_descr = self._vm.get_hw_descr()
+    if self._num_threads >= hw_descr.vec_unit_length:
+      return num_ops
+
+    ops_per_vec_unit = hw_descr.vec_unit_length // self._num_threads
+    max_num_ops = hw_descr.max_num_threads // self._num_threads
+    if shr_mem_per_op:
+      shr_mem_bytes = shr_mem_per_op * self._vm.bytes_per_real()
+      max_num_ops = min(max_num_ops, hw_descr.max_local_mem_size_per_block // shr_mem_bytes)
+
+    aligned_num_ops = math.ceil(num_ops / ops_per_vec_unit) * ops_per_vec_unit
+    while aligned_num_ops > max_num_ops and aligned_num_ops > ops_per_vec_unit:
+      aligned_num_ops -= ops_per_vec_unit
+    return aligned_num_ops
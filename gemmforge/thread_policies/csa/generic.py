@@ -10,9 +10,12 @@ class GenericCsaThreadPolicy(AbstractBinaryOpThreadPolicy):
                op2: DenseMatrix):
     super().__init__(vm, num_threads, op1, op2)
 
+  def get_num_regs_per_thread(self):
+    return 10  # Note: derived experimentally
+
   def get_num_ops_per_block(self):
     total_num_threas_per_op = self._num_threads * self._op1.get_actual_num_cols()
-    max_num_regs_per_thread = 10  # Note: derived experimentally
+    max_num_regs_per_thread = self.get_num_regs_per_thread()
 
     hw_descr = self._vm.get_hw_descr()
     mults_wrt_num_regs = hw_descr.max_reg_per_block / (total_num_threas_per_op * max_num_regs_per_thread)
@@ -2,6 +2,7 @@ from gemmforge.vm import VM
 from ..matrix import DenseMatrix, SparseMatrix
 from .gemm.generic import GenericGemmThreadPolicy
 from .gemm.only_register_based import OnlyRegisterBasedThreadPolicy
+from .gemm.register_blocked import RegisterBlockedGemmThreadPolicy
 from .csa.generic import GenericCsaThreadPolicy
 from typing import Union
 from .gemm.dense_sparse import GenericDenseSparseGemmThreadPolicy
@@ -21,11 +22,26 @@ class TheadPolicyFactory:
                       num_threads: int,
                       op1: DenseMatrix,
                       op2: Union[DenseMatrix, SparseMatrix],
-                      res: DenseMatrix):
+                      res: DenseMatrix,
+                      micro_tile=None,
+                      num_elements=None):
+    policy = cls._make_gemm_policy(vm, shr_mem_per_op, num_threads, op1, op2, res, micro_tile)
+    policy.set_num_elements_hint(num_elements)
+    return policy
 
+  @classmethod
+  def _make_gemm_policy(cls, vm, shr_mem_per_op, num_threads, op1, op2, res, micro_tile):
     hw_descr = vm.get_hw_descr()
     if hw_descr.manufacturer in TheadPolicyFactory.ALLOWED_MANUFACTURES:
-      if shr_mem_per_op == 0:
+      if micro_tile is not None:
+        return RegisterBlockedGemmThreadPolicy(vm,
+                                               shr_mem_per_op,
+                                               num_threads,
+                                               op1,
+                                               op2,
+                                               res,
+                                               micro_tile)
+      elif shr_mem_per_op == 0:
         if isinstance(op1, DenseMatrix) and isinstance(op2, DenseMatrix):
           return OnlyRegisterBasedThreadPolicy(vm,
                                                num_threads,
@@ -18,9 +18,11 @@ class GenericDenseSparseGemmThreadPolicy(AbstractGemmLikeThreadPolicy):
   def _estimate_num_registers_per_mult(self, accumulator_length):
     return self._g._estimate_num_registers_per_mult(accumulator_length)
 
+  def get_num_regs_per_thread(self):
+    return self._estimate_num_registers_per_mult(self._op2.get_actual_num_cols())
+
   def get_num_ops_per_block(self):
-    accumulator_length = self._op2.get_actual_num_cols()
-    max_num_regs_per_thread = self._estimate_num_registers_per_mult(accumulator_length)
+    max_num_regs_per_thread = self.get_num_regs_per_thread()
 
     hw_descr = self._vm.get_hw_descr()
     shr_mem_bytes = self._shr_mem_per_op * self._vm.bytes_per_real()
@@ -56,9 +58,11 @@ class DenseSparseOnlyRegisterBasedThreadPolicy(AbstractGemmLikeThreadPolicy):
     factor = self._vm.bytes_per_real() / 4
     return factor * (self._vm._hw_descr.vec_unit_length + accumulator_length)
 
+  def get_num_regs_per_thread(self):
+    return self._estimate_num_registers_per_mult(self._res.get_actual_num_cols())
+
   def get_num_ops_per_block(self):
-    accumulator_length = self._res.get_actual_num_cols()
-    max_num_regs_per_thread = self._estimate_num_registers_per_mult(accumulator_length)
+    max_num_regs_per_thread = self.get_num_regs_per_thread()
 
     hw_descr = self._vm.get_hw_descr()
     mults_per_sm = hw_descr.max_reg_per_block / (self._num_threads * max_num_regs_per_thread)
@@ -16,11 +16,8 @@ class OnlyRegisterBasedThreadPolicy(AbstractGemmLikeThreadPolicy):
     factor = self._vm.bytes_per_real() / 4
     return factor * (self._vm._hw_descr.vec_unit_length + accumulator_length)
 
-  def get_num_ops_per_block(self):
-    accumulator_length = self._res.get_actual_num_cols()
-    max_num_regs_per_thread = self._estimate_num_registers_per_mult(accumulator_length)
-
-    hw_descr = self._vm.get_hw_descr()
-    mults_per_sm = hw_descr.max_reg_per_block / (self._num_threads * max_num_regs_per_thread)
+  def get_num_regs_per_thread(self):
+    return self._estimate_num_registers_per_mult(self._res.get_actual_num_cols())
 
-    return max(int(mults_per_sm / hw_descr.max_block_per_sm), 1)
+  def get_num_ops_per_block(self):
+    return self._find_num_ops_per_block()
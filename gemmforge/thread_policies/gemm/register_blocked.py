@@ -0,0 +1,70 @@
+from .generic import GenericGemmThreadPolicy
+from ..abstract_thread_policy import DenseMatrix
+from gemmforge.vm import VM
+import math
+
+
+class RegisterBlockedGemmThreadPolicy(GenericGemmThreadPolicy):
+  """Each thread computes an MR x NR micro-tile of the result"""
+  TILE_CANDIDATES = [1, 2, 4, 8]
+  MAX_NUM_ACCUMULATORS = 32
+
+  def __init__(self,
+               vm: VM,
+               shr_mem_per_op: int,
+               num_threads: int,
+               op1: DenseMatrix,
+               op2: DenseMatrix,
+               res: DenseMatrix,
+               micro_tile):
+    super().__init__(vm, shr_mem_per_op, num_threads, op1, op2, res)
+    self._micro_tile = micro_tile
+
+  def get_num_regs_per_thread(self):
+    tile_rows, tile_cols = self._micro_tile
+    accumulator_length = tile_rows * tile_cols + tile_rows + tile_cols
+    return self._estimate_num_registers_per_mult(accumulator_length)
+
+  @classmethod
+  def get_num_thread_groups(cls, num_rows, num_cols, micro_tile):
+    tile_rows, tile_cols = micro_tile
+    return math.ceil(num_rows / tile_rows), math.ceil(num_cols / tile_cols)
+
+  @classmethod
+  def select_micro_tile(cls, vm: VM, num_rows: int, num_cols: int):
+    """Selects a micro-tile which minimizes the amount of instructions issued per operation.
+
+    Each thread performs MR * NR fma- and MR + NR shr. mem. load instructions per iteration
+    along the k-dimension. Threads of a partially filled warp (or sub-group) are counted
+    as active because they occupy the hardware anyway.
+    """
+    hw_descr = vm.get_hw_descr()
+    max_num_accumulators = cls.MAX_NUM_ACCUMULATORS * 4 / vm.bytes_per_real()
+
+    best_tile = (1, 1)
+    best_cost = None
+    for tile_rows in cls.TILE_CANDIDATES:
+      for tile_cols in cls.TILE_CANDIDATES:
+        if tile_rows * tile_cols > max_num_accumulators:
+          continue
+
+        # do not produce tiles which exceed the matrix itself
+        if tile_rows > 1 and (tile_rows // 2) >= num_rows:
+          continue
+        if tile_cols > 1 and (tile_cols // 2) >= num_cols:
+          continue
+
+        num_row_groups, num_col_groups = cls.get_num_thread_groups(num_rows,
+                                                                   num_cols,
+                                                                   (tile_rows, tile_cols))
+        num_threads = num_row_groups * num_col_groups
+        num_active_threads = math.ceil(num_threads / hw_descr.vec_unit_length) * hw_descr.vec_unit_length
+        if num_active_threads > hw_descr.max_num_threads:
+          continue
+
+        cost = num_active_threads * (tile_rows * tile_cols + tile_rows + tile_cols)
+        if best_cost is None or cost < best_cost:
+          best_cost = cost
+          best_tile = (tile_rows, tile_cols)
+
+    return best_tile
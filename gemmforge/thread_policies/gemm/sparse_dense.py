@@ -18,12 +18,15 @@ class GenericSparseDenseGemmThreadPolicy(AbstractGemmLikeThreadPolicy):
   def _estimate_num_registers_per_mult(self, accumulator_length):
     return self._g._estimate_num_registers_per_mult(accumulator_length)
 
+  def get_num_regs_per_thread(self):
+    return self._estimate_num_registers_per_mult(self._res.get_actual_num_rows())
+
   def get_num_ops_per_block(self):
     accumulator_length = self._res.get_actual_num_rows()
     hwfactor = 1.0
     if accumulator_length < self._vm._hw_descr.vec_unit_length:
         hwfactor = float(int(self._vm._hw_descr.vec_unit_length / accumulator_length))
-    max_num_regs_per_thread = self._estimate_num_registers_per_mult(accumulator_length)
+    max_num_regs_per_thread = self.get_num_regs_per_thread()
 
     hw_descr = self._vm.get_hw_descr()
     shr_mem_bytes = self._shr_mem_per_op * self._vm.bytes_per_real()
@@ -61,9 +64,11 @@ class SparseDenseOnlyRegisterBasedThreadPolicy(AbstractGemmLikeThreadPolicy):
     factor = self._vm.bytes_per_real() / 4
     return factor * (self._vm._hw_descr.vec_unit_length  + accumulator_length)
 
+  def get_num_regs_per_thread(self):
+    return self._estimate_num_registers_per_mult(self._op1.get_actual_num_max_nonzero_rows())
+
   def get_num_ops_per_block(self):
-    accumulator_length = self._op1.get_actual_num_max_nonzero_rows()
-    max_num_regs_per_thread = self._estimate_num_registers_per_mult(accumulator_length)
+    max_num_regs_per_thread = self.get_num_regs_per_thread()
 
     hw_descr = self._vm.get_hw_descr()
     mults_per_sm = hw_descr.max_reg_per_block / (self._num_threads * max_num_regs_per_thread)
@@ -0,0 +1,5 @@
+from .database import TuningDatabase, TuningRecord, make_problem_key
+from .variants import TuningVariant, SearchSpace
+from .timers import AbstractTimer, FakeTimer, CommandTimer
+from .harness import BenchmarkHarness
+from .autotuner import Autotuner, TuningResult
@@ -0,0 +1,102 @@
+from gemmforge.exceptions import GenerationError
+from gemmforge.instructions.builders.kernels import GemmKernelType
+from .database import TuningRecord
+from .harness import BenchmarkHarness
+from .variants import SearchSpace
+import copy
+import os
+import tempfile
+
+
+class TuningResult:
+  def __init__(self, variant, time, measurements, num_rejected):
+    self.variant = variant
+    self.time = time
+    self.measurements = measurements
+    self.num_rejected = num_rejected
+
+
+class Autotuner:
+  """Sweeps generation options of a gemm, measures each distinct kernel and records
+  the fastest variant in a tuning database. Subsequent generations of the same gemm
+  pick up the recorded options (see GemmGenerator.set_tuning_database).
+
+  Variants which produce identical kernels are measured only once.
+  """
+  def __init__(self, vm, timer, database=None, search_space=None, harness=None, work_dir=None):
+    self._vm = vm
+    self._timer = timer
+    self._database = database
+    self._search_space = SearchSpace() if search_space is None else search_space
+    self._harness = BenchmarkHarness(vm) if harness is None else harness
+    self._work_dir = work_dir
+
+  def tune(self, spec):
+    """Tunes a GemmSpec which must not fix any generation options.
+
+    Returns:
+      a TuningResult of the fastest variant
+    """
+    if spec.kernel_type != GemmKernelType.AUTO or spec.options:
+      raise GenerationError('tuning: a tuned spec must not fix generation options')
+
+    variants = self._search_space.enumerate(self._vm, spec)
+    if self._work_dir is None:
+      with tempfile.TemporaryDirectory(prefix='gemmforge_tuning_') as work_dir:
+        result = self._sweep(spec, variants, work_dir)
+    else:
+      result = self._sweep(spec, variants, self._work_dir)
+
+    if self._database is not None:
+      generator = spec.make_generator(self._vm)
+      record = TuningRecord(options=result.variant.to_dict(),
+                            time=result.time,
+                            num_variants=len(result.measurements),
+                            arch=self._vm.get_hw_descr().model,
+                            description=generator.get_base_name())
+      self._database.update(generator, record)
+    return result
+
+  def _sweep(self, spec, variants, work_dir):
+    measurements = []
+    kernel_to_time = {}
+    num_rejected = 0
+    for index, variant in enumerate(variants):
+      try:
+        generator = self._make_generator(spec, variant)
+        generator.generate()
+      except GenerationError:
+        num_rejected += 1
+        continue
+
+      # Note: kernel names differ among variants; thus, they are excluded from comparisons
+      base_name = generator.get_base_name()
+      kernel = generator.get_kernel().replace(base_name, '')
+      if kernel in kernel_to_time:
+        continue
+
+      variant_dir = os.path.join(work_dir, f'variant_{index}')
+      self._harness.write(generator, variant_dir)
+      time = self._timer.measure(variant, generator, variant_dir)
+      kernel_to_time[kernel] = time
+      measurements.append((variant, time))
+
+    if not measurements:
+      raise GenerationError('tuning: no feasible variants found')
+
+    best_variant, best_time = min(measurements, key=lambda item: item[1])
+    return TuningResult(variant=best_variant,
+                        time=best_time,
+                        measurements=measurements,
+                        num_rejected=num_rejected)
+
+  def _make_generator(self, spec, variant):
+    variant_spec = copy.copy(spec)
+    variant_spec.kernel_type = GemmKernelType.to_str(variant.kernel_type)
+    variant_spec.options = variant.get_options()
+    variant_spec.base_name = None
+
+    generator = variant_spec.make_generator(self._vm)
+    generator.set_cache(None)
+    generator.set_tuning_database(None)
+    return generator
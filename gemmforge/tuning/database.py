@@ -0,0 +1,140 @@
+from gemmforge.exceptions import GenerationError
+import hashlib
+import json
+import os
+import tempfile
+
+
+def make_problem_key(generator):
+  """Computes a key of an operation which a generator was set to (i.e., a gemm signature).
+  In contrast to `make_spec_key`, it does not depend on generation options.
+  Note, `set` must have been called on the generator before"""
+  vm = generator._vm
+  hw_descr = vm.get_hw_descr()
+  material = [f'arch: {hw_descr.model}',
+              f'backend: {hw_descr.backend}',
+              f'fp_type: {vm.fp_as_str()}',
+              f'generator: {type(generator).__name__}']
+  material.extend(generator._get_problem_material())
+  return hashlib.sha256('\n'.join(material).encode()).hexdigest()
+
+
+class TuningRecord:
+  """The fastest known variant of an operation"""
+  def __init__(self, options, time, num_variants=None, arch=None, description=None):
+    self.options = options
+    self.time = time
+    self.num_variants = num_variants
+    self.arch = arch
+    self.description = description
+
+  def to_dict(self):
+    return {'options': self.options,
+            'time': self.time,
+            'num_variants': self.num_variants,
+            'arch': self.arch,
+            'description': self.description}
+
+  @classmethod
+  def from_dict(cls, data):
+    return cls(options=data['options'],
+               time=data['time'],
+               num_variants=data.get('num_variants', None),
+               arch=data.get('arch', None),
+               description=data.get('description', None))
+
+
+class TuningDatabase:
+  """Persistent storage of tuning results kept in a single json-file.
+
+  The file is re-written atomically on each update. A record gets replaced only
+  by a faster one unless `overwrite` is requested.
+  """
+  ENV_PATH = 'GEMMFORGE_TUNING_DB'
+
+  # Note: maps a path to the state of its file and the parsed database
+  _shared = {}
+
+  def __init__(self, path):
+    self._path = os.path.abspath(path)
+    self._records = self._read()
+
+  @classmethod
+  def from_env(cls):
+    """Returns a database if `GEMMFORGE_TUNING_DB` env. variable is set. Otherwise, None"""
+    path = os.environ.get(cls.ENV_PATH, None)
+    if not path:
+      return None
+    return cls.get_shared(path)
+
+  @classmethod
+  def get_shared(cls, path):
+    """Returns a database which is shared among all callers. The file gets parsed
+    only once unless it has changed (e.g., by an autotuner) since the last call"""
+    path = os.path.abspath(path)
+    try:
+      file_stat = os.stat(path)
+      state = (file_stat.st_mtime_ns, file_stat.st_size)
+    except OSError:
+      state = None
+
+    known_state, database = cls._shared.get(path, (None, None))
+    if database is None or known_state != state:
+      database = cls(path)
+      cls._shared[path] = (state, database)
+    return database
+
+  @property
+  def path(self):
+    return self._path
+
+  def lookup(self, generator):
+    """Returns the best known record for an operation or None"""
+    return self.get(make_problem_key(generator))
+
+  def get(self, key):
+    data = self._records.get(key, None)
+    return None if data is None else TuningRecord.from_dict(data)
+
+  def update(self, generator, record, overwrite=False):
+    """Stores a record. Returns True if the database has been changed"""
+    key = make_problem_key(generator)
+
+    # Note: other processes may have tuned other operations in the meantime
+    self._records = self._read()
+    known = self.get(key)
+    if known is not None and not overwrite and known.time <= record.time:
+      return False
+
+    self._records[key] = record.to_dict()
+    self._write()
+    return True
+
+  def __contains__(self, key):
+    return key in self._records
+
+  def __len__(self):
+    return len(self._records)
+
+  def _read(self):
+    try:
+      with open(self._path, 'r') as file:
+        data = json.load(file)
+    except OSError:
+      return {}
+    except ValueError as err:
+      raise GenerationError(f'tuning: cannot parse {self._path}: {err}')
+    return data.get('records', {})
+
+  def _write(self):
+    directory = os.path.dirname(self._path)
+    os.makedirs(directory, exist_ok=True)
+    file_descr, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+      with os.fdopen(file_descr, 'w') as file:
+        json.dump({'records': self._records}, file, indent=2, sort_keys=True)
+      os.replace(tmp_path, self._path)
+    except OSError:
+      if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+      raise
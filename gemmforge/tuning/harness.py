@@ -0,0 +1,138 @@
+from gemmforge import constructs
+from gemmforge.basic_types import DataFlowDirection
+from gemmforge.exceptions import GenerationError
+from gemmforge.roofline import RooflinePredictor
+from io import StringIO
+import os
+
+
+class BenchmarkHarness:
+  """Writes a standalone benchmark of a single generated kernel.
+
+  The layout follows benchmarks/gemm-chain: `kernels.{cu,cpp}`, `kernels.h`,
+  `main.{cu,cpp}` and `config.cmake`. The benchmark relies on the Device library
+  and prints `elapsed time: <value>, ns` which is parsed by CommandTimer. If the peak rates
+  of the arch. are known, the roofline bound of the kernel is printed as well
+  """
+  def __init__(self, vm, num_elements=10000, num_repeats=100):
+    self._vm = vm
+    self._num_elements = num_elements
+    self._num_repeats = num_repeats
+
+  def write(self, generator, work_dir):
+    """Writes benchmark sources of a generator which has already generated its kernel"""
+    os.makedirs(work_dir, exist_ok=True)
+    extension = 'cu' if self._vm.get_hw_descr().backend == 'cuda' else 'cpp'
+
+    with open(os.path.join(work_dir, f'kernels.{extension}'), 'w') as file:
+      for header_file in self._vm.get_headers():
+        file.write(f'#include \"{header_file}\"\n')
+      file.write(generator.get_kernel())
+      file.write(generator.get_launcher())
+
+    with open(os.path.join(work_dir, 'kernels.h'), 'w') as file:
+      file.write(generator.get_launcher_header())
+
+    with open(os.path.join(work_dir, f'main.{extension}'), 'w') as file:
+      file.write(self.get_main(generator))
+
+    hw_descr = self._vm.get_hw_descr()
+    with open(os.path.join(work_dir, 'config.cmake'), 'w') as file:
+      file.write(f'set(DEVICE_BACKEND {hw_descr.backend})\n')
+      file.write(f'set(DEVICE_ARCH {hw_descr.model})\n')
+      file.write(f'set(SM_ARCH {hw_descr.model})\n')
+      file.write(f'set(REAL_SIZE_IN_BYTES {self._vm.bytes_per_real()})\n')
+      file.write(f'set(REAL_SIZE {self._vm.bytes_per_real()})\n')
+
+  def get_main(self, generator):
+    precision = self._vm.fp_as_str()
+    # Note: the launcher expects the operands of epilogues after A, B and C
+    matrices = generator._matrices
+
+    src = StringIO()
+    with constructs.Cpp(src) as file:
+      file.Include('kernels.h')
+      file.Include('gemmforge_aux.h')
+      file.includeSys('device.h')
+      file.includeSys('chrono')
+      file.includeSys('iostream')
+      file.includeSys('vector')
+      file.includeSys('stddef.h')
+      file.Emptyline()
+      file('using namespace device;')
+      file.Emptyline()
+
+      with file.Function('main', '', 'int'):
+        file('DeviceInstance &device = DeviceInstance::getInstance();')
+        file('device.api->setDevice(0);')
+        file('device.api->initialize();')
+        file.Emptyline()
+
+        for matrix in matrices:
+          self._gen_allocation(file, matrix, precision)
+
+        args = [f'{matrix.name}, 0' for matrix in matrices]
+        if not isinstance(generator._alpha, float):
+          args.insert(0, '1.0')
+        args.extend([f'{self._num_elements}', 'nullptr', 'nullptr'])
+        call_site = f'{generator.get_base_name()}({", ".join(args)});'
+
+        # Note: the first launch warms up the device
+        file(call_site)
+        file('device.api->synchDevice();')
+        file.Emptyline()
+
+        file('auto start = std::chrono::high_resolution_clock::now();')
+        with file.For(f'size_t repeat = 0; repeat < {self._num_repeats}; ++repeat'):
+          file(call_site)
+        file('device.api->synchDevice();')
+        file('auto end = std::chrono::high_resolution_clock::now();')
+        file.Emptyline()
+
+        file(f'std::cout << "num. elements: " << {self._num_elements} << std::endl;')
+        file(f'std::cout << "num. repeats: " << {self._num_repeats} << std::endl;')
+        file('std::chrono::duration<double, std::nano> elapsed_time = end - start;')
+        file(f'double average_time = elapsed_time.count() / {self._num_repeats};')
+        file('std::cout << "elapsed time: " << average_time << ", ns" << std::endl;')
+        flops = f'{self._num_elements} * static_cast<double>({generator.get_flops()})'
+        file(f'std::cout << "GFLOP/s: " << {flops} / average_time << std::endl;')
+        if self._vm.get_hw_descr().get_peak_gflops(precision) is not None:
+          estimate = RooflinePredictor(generator).predict()
+          roofline_time = estimate.get_time(self._num_elements) * 1e9
+          file(f'std::cout << "roofline time: " << {roofline_time} << ", ns" << std::endl;')
+          file(f'std::cout << "roofline GFLOP/s: " << {flops} / {roofline_time} << std::endl;')
+          file(f'std::cout << "fraction of roofline: " << {roofline_time} / average_time << std::endl;')
+        file.Emptyline()
+
+        for matrix in matrices:
+          file(f'device.api->freeMem({matrix.name});')
+          if matrix.addressing == 'pointer_based':
+            file(f'device.api->freeMem({matrix.name}_data);')
+        file('device.api->finalize();')
+        file('return 0;')
+
+      content = src.getvalue()
+    return content
+
+  def _gen_allocation(self, file, matrix, precision):
+    volume = matrix.get_real_volume()
+    if matrix.addressing == 'none':
+      size = f'{volume}'
+    else:
+      size = f'{volume} * {self._num_elements}'
+
+    alloc = f'device.api->allocGlobMem({size} * sizeof({precision}))'
+    if matrix.addressing == 'pointer_based':
+      file(f'auto* {matrix.name}_data = static_cast<{precision}*>({alloc});')
+      file(f'std::vector<{precision}*> {matrix.name}_ptrs({self._num_elements});')
+      with file.For(f'size_t i = 0; i < {self._num_elements}; ++i'):
+        file(f'{matrix.name}_ptrs[i] = {matrix.name}_data + i * {volume};')
+      ptr_alloc = f'device.api->allocGlobMem({self._num_elements} * sizeof({precision}*))'
+      qualifier = 'const ' if matrix.direction == DataFlowDirection.SOURCE else ''
+      file(f'auto** {matrix.name} = static_cast<{qualifier}{precision}**>({ptr_alloc});')
+      file(f'device.api->copyTo({matrix.name}, {matrix.name}_ptrs.data(), '
+           f'{self._num_elements} * sizeof({precision}*));')
+    elif matrix.addressing in ['none', 'strided']:
+      file(f'auto* {matrix.name} = static_cast<{precision}*>({alloc});')
+    else:
+      raise GenerationError(f'harness: unknown addressing, given: {matrix.addressing}')
@@ -0,0 +1,86 @@
+from abc import ABC, abstractmethod
+from gemmforge.exceptions import GenerationError
+from gemmforge.cache import make_spec_key
+import re
+import shlex
+import subprocess
+
+
+class AbstractTimer(ABC):
+  """Measures the execution time of a generated kernel"""
+
+  @abstractmethod
+  def measure(self, variant, generator, work_dir):
+    """Returns time in ns.
+
+    Args:
+      variant: a TuningVariant which the kernel has been generated for
+      generator: a generator which has already generated its kernel
+      work_dir: a directory with a benchmark harness of the kernel (see BenchmarkHarness)
+    """
+    pass
+
+
+class FakeTimer(AbstractTimer):
+  """A deterministic timer for machines without GPUs (e.g., for testing).
+
+  The time is given by the cost model of the kernel type, scaled by a pseudo-random
+  factor in [1 - noise, 1 + noise] derived from the complete kernel specification.
+  Thus, the same variant is always assigned the same time.
+  """
+  def __init__(self, noise=0.2):
+    self._noise = noise
+    self.num_measurements = 0
+
+  def measure(self, variant, generator, work_dir):
+    self.num_measurements += 1
+    time = generator.get_cost_estimates()[variant.kernel_type].time
+
+    key = make_spec_key(generator)
+    factor = int(key[:8], 16) / 0xffffffff
+    return time * (1.0 + self._noise * (2.0 * factor - 1.0))
+
+
+class CommandTimer(AbstractTimer):
+  """Builds and runs a benchmark harness with shell commands.
+
+  Commands get formatted with `work_dir`, e.g.:
+    CommandTimer(build_command='cmake -S {work_dir} -B {work_dir}/build && make -C {work_dir}/build',
+                 run_command='{work_dir}/build/bench')
+  The output of the run command must contain `elapsed time: <value>, ns`
+  which is printed by the harness. The min. value over all repeats is returned.
+  """
+  PATTERN = re.compile(r'elapsed time:\s*([-+0-9.eE]+)\s*,\s*ns')
+
+  def __init__(self, build_command, run_command, num_repeats=3, timeout=None):
+    self._build_command = build_command
+    self._run_command = run_command
+    self._num_repeats = num_repeats
+    self._timeout = timeout
+
+  def measure(self, variant, generator, work_dir):
+    self._execute(self._build_command, work_dir)
+    times = [self._parse(self._execute(self._run_command, work_dir)) for _ in range(self._num_repeats)]
+    return min(times)
+
+  def _execute(self, command, work_dir):
+    command = command.format(work_dir=shlex.quote(work_dir))
+    try:
+      result = subprocess.run(command,
+                              shell=True,
+                              cwd=work_dir,
+                              capture_output=True,
+                              text=True,
+                              timeout=self._timeout)
+    except subprocess.TimeoutExpired:
+      raise GenerationError(f'tuning: `{command}` timed out')
+
+    if result.returncode != 0:
+      raise GenerationError(f'tuning: `{command}` failed with:\n{result.stderr}')
+    return result.stdout
+
+  def _parse(self, output):
+    match = CommandTimer.PATTERN.search(output)
+    if match is None:
+      raise GenerationError(f'tuning: cannot find elapsed time in:\n{output}')
+    return float(match.group(1))
@@ -0,0 +1,91 @@
+from gemmforge.exceptions import GenerationError
+from gemmforge.matrix import SparseMatrix
+
+
+class TuningVariant:
+  """A point of the search space of the autotuner. None stands for a default value
+  which the generator deduces itself"""
+  def __init__(self, kernel_type, num_ops_per_block=None, loader_strategy=None, unroll_threshold=None):
+    self.kernel_type = kernel_type
+    self.num_ops_per_block = num_ops_per_block
+    self.loader_strategy = loader_strategy
+    self.unroll_threshold = unroll_threshold
+
+  def get_options(self):
+    """Returns generation options (see GemmGenerator) which are different from their defaults"""
+    options = {}
+    if self.num_ops_per_block is not None:
+      options['num_ops_per_block'] = self.num_ops_per_block
+    if self.loader_strategy is not None:
+      options['loader_strategy'] = self.loader_strategy
+    if self.unroll_threshold is not None:
+      options['unroll_threshold'] = self.unroll_threshold
+    return options
+
+  def to_dict(self):
+    return dict(self.get_options(), kernel_type=self.kernel_type)
+
+  def __str__(self):
+    options = ', '.join([f'{key}={value}' for key, value in self.get_options().items()])
+    return f'{self.kernel_type}({options})'
+
+
+class SearchSpace:
+  """Enumerates variants of dense gemm kernels.
+
+  Loader options are relevant only for kernel types which stage operands in shr. mem.
+  Numbers of ops. per block are powers of 2 which do not exceed the max. block size.
+  Variants which are infeasible for a particular operation get rejected by the generator
+  """
+  KERNEL_TYPES = ['shr_mem', 'register_only', 'register_blocked']
+  LOADER_STRATEGIES = [None, 'exact', 'extended']
+  UNROLL_THRESHOLDS = [None, 2, 8]
+  SHR_MEM_KERNEL_TYPES = ['shr_mem', 'register_blocked']
+
+  def __init__(self,
+               kernel_types=None,
+               num_ops_per_block=None,
+               loader_strategies=None,
+               unroll_thresholds=None):
+    self._kernel_types = SearchSpace.KERNEL_TYPES if kernel_types is None else kernel_types
+    self._num_ops_per_block = num_ops_per_block
+    self._loader_strategies = SearchSpace.LOADER_STRATEGIES if loader_strategies is None else loader_strategies
+    self._unroll_thresholds = SearchSpace.UNROLL_THRESHOLDS if unroll_thresholds is None else unroll_thresholds
+
+    for kernel_type in self._kernel_types:
+      if kernel_type not in SearchSpace.KERNEL_TYPES:
+        raise GenerationError(f'tuning: unknown kernel type, given: {kernel_type}')
+
+  def enumerate(self, vm, spec):
+    """Returns a list of TuningVariant objects for a GemmSpec"""
+    if any([isinstance(matrix, SparseMatrix) for matrix in [spec.mat_a, spec.mat_b]]):
+      raise GenerationError('tuning: only dense gemms can be tuned')
+
+    variants = []
+    for kernel_type in self._kernel_types:
+      if kernel_type in SearchSpace.SHR_MEM_KERNEL_TYPES:
+        loader_strategies = self._loader_strategies
+        unroll_thresholds = self._unroll_thresholds
+      else:
+        loader_strategies = [None]
+        unroll_thresholds = [None]
+
+      for num_ops in self._get_num_ops_candidates(vm):
+        for strategy in loader_strategies:
+          for threshold in unroll_thresholds:
+            variants.append(TuningVariant(kernel_type=kernel_type,
+                                          num_ops_per_block=num_ops,
+                                          loader_strategy=strategy,
+                                          unroll_threshold=threshold))
+    return variants
+
+  def _get_num_ops_candidates(self, vm):
+    if self._num_ops_per_block is not None:
+      return self._num_ops_per_block
+
+    candidates = [None]
+    num_ops = 1
+    while num_ops <= vm.get_hw_descr().max_num_threads:
+      candidates.append(num_ops)
+      num_ops *= 2
+    return candidates
@@ -1 +1,2 @@
 from .vm import VM, vm_factory
+from .hw_descr import register_arch, load_arch_file
@@ -1,4 +1,5 @@
-from copy import deepcopy
+import json
+import os
 
 
 class HwDecription:
@@ -9,10 +10,23 @@ class HwDecription:
     self.max_reg_per_block = param_table['max_reg_per_block']
     self.max_threads_per_sm = param_table['max_threads_per_sm']
     self.max_block_per_sm = param_table['max_block_per_sm']
+    self.async_copy = param_table.get('async_copy', False)
+    self.shr_mem_num_banks = param_table['shr_mem_num_banks']
+    self.shr_mem_bank_width = param_table['shr_mem_bank_width']
+    self.num_sms = param_table['num_sms']
+    self.regs_per_sm = param_table['regs_per_sm']
+    self.l2_cache_size = param_table['l2_cache_size']
+    self.glb_mem_bandwidth = param_table['glb_mem_bandwidth']
+    self.peak_fp32_gflops = param_table['peak_fp32_gflops']
+    self.peak_fp64_gflops = param_table['peak_fp64_gflops']
     self.manufacturer = param_table['name']
     self.model = arch
     self.backend = backend
 
+  def get_peak_gflops(self, fp_type):
+    """Returns the peak rate of the given precision or None if it is not supported natively"""
+    return self.peak_fp32_gflops if fp_type == 'float' else self.peak_fp64_gflops
+
 
 def report_error(usr_vendor, user_sub_arch):
   print(f'{user_sub_arch} is not listed in allowed set for {usr_vendor}')
@@ -44,119 +58,109 @@ def hw_descr_factory(arch, backend):
   raise ValueError(f'Unknown gpu architecture: {backend} {arch}')
 
 
+# Note: architectures are described in json-files of the following format:
+#
+#   {"format_version": 1,
+#    "architectures": {"<arch>": {"inherits": "<another arch>", "<param>": <value>, ...}, ...}}
+#
+# An architecture takes all parameters of the one it inherits and overrides the given ones.
+# Sizes are given in bytes, `glb_mem_bandwidth` in GB/s and peak rates in GFLOP/s
+# (null if a precision is not supported natively). `num_sms` counts SMs (CUs, sub-slices, Xe-cores).
+# Shr. mem. consists of `shr_mem_num_banks` banks which are `shr_mem_bank_width` bytes wide
+# (see gemmforge.bank_conflicts)
+ARCH_FORMAT_VERSION = 1
+ARCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'arch')
+REQUIRED_ARCH_PARAMS = ['name',
+                        'vec_unit_length',
+                        'max_local_mem_size_per_block',
+                        'max_num_threads',
+                        'max_reg_per_block',
+                        'max_threads_per_sm',
+                        'max_block_per_sm',
+                        'shr_mem_num_banks',
+                        'shr_mem_bank_width',
+                        'num_sms',
+                        'regs_per_sm',
+                        'l2_cache_size',
+                        'glb_mem_bandwidth',
+                        'peak_fp32_gflops',
+                        'peak_fp64_gflops']
+
+_builtin_arch = None
+_custom_arch = {}
+
+
+def read_arch_file(file_path):
+  """Returns unresolved architecture descriptions (i.e., with `inherits`) of a json-file"""
+  with open(file_path, 'r') as file:
+    content = json.load(file)
+
+  version = content.get('format_version', None)
+  if version != ARCH_FORMAT_VERSION:
+    raise ValueError(f'{file_path}: unsupported format version {version}, expected {ARCH_FORMAT_VERSION}')
+  return content['architectures']
+
+
+def _get_builtin_arch():
+  global _builtin_arch
+  if _builtin_arch is None:
+    _builtin_arch = {}
+    for file_name in sorted(os.listdir(ARCH_DIR)):
+      if file_name.endswith('.json'):
+        _builtin_arch.update(read_arch_file(os.path.join(ARCH_DIR, file_name)))
+  return _builtin_arch
+
+
+def register_arch(arch, params, inherits=None):
+  """Registers a custom architecture or overrides a known one.
+
+  Args:
+    arch (str): the name of the architecture which is passed to `vm_factory`
+    params (dict): parameters of the architecture (see REQUIRED_ARCH_PARAMS)
+    inherits (str): the name of an architecture which provides the parameters which are not given
+  """
+  description = dict(params)
+  if inherits is not None:
+    description['inherits'] = inherits
+  _register({arch: description})
+
+
+def load_arch_file(file_path):
+  """Registers all architectures of a json-file (see `register_arch`).
+  Architectures of the file can inherit each other regardless of their order"""
+  _register(read_arch_file(file_path))
+
+
+def _register(descriptions):
+  # Note: nothing gets registered if any of the descriptions is invalid
+  raw_arch = {**_get_builtin_arch(), **_custom_arch, **descriptions}
+  for arch in descriptions:
+    _resolve_arch(raw_arch, arch, [])
+  _custom_arch.update(descriptions)
+
+
+def _resolve_arch(raw_arch, arch, visited):
+  if arch not in raw_arch:
+    raise ValueError(f'unknown architecture {arch} (inherited by {visited[-1]})')
+  if arch in visited:
+    raise ValueError(f'cyclic inheritance of architectures: {" -> ".join(visited + [arch])}')
+
+  params = dict(raw_arch[arch])
+  parent = params.pop('inherits', None)
+  if parent is not None:
+    params = {**_resolve_arch(raw_arch, parent, visited + [arch]), **params}
+  params.pop('description', None)
+
+  if not visited:
+    missing = [param for param in REQUIRED_ARCH_PARAMS if param not in params]
+    if missing:
+      raise ValueError(f'architecture {arch} misses parameters: {", ".join(missing)}')
+  return params
+
+
 def get_known_arch():
-  arch = {}
-
-  # Nvidia architecture
-  # from: https://en.wikipedia.org/wiki/CUDA
-  nvidia_warp = 32
-  KB = 1024
-
-  arch['sm_60'] = {
-    'vec_unit_length': nvidia_warp,
-    'max_local_mem_size_per_block': 48 * KB,
-    'max_num_threads': 1024,
-    'max_reg_per_block': 64 * KB,
-    'max_threads_per_sm': 2048,
-    'max_block_per_sm': 32,
-    'name': 'nvidia',
-  }
-
-  arch['sm_61'] = deepcopy(arch['sm_60'])
-  arch['sm_62'] = deepcopy(arch['sm_60'])
-
-  arch['sm_70'] = deepcopy(arch['sm_60'])
-  arch['sm_70']['max_local_mem_size_per_block'] = 96 * KB
-  arch['sm_71'] = deepcopy(arch['sm_60'])
-
-  arch['sm_75'] = deepcopy(arch['sm_60'])
-  arch['sm_75']['max_local_mem_size_per_block'] = 64 * KB
-  arch['sm_75']['max_block_per_sm'] = 16
-
-  arch['sm_80'] = deepcopy(arch['sm_60'])
-  arch['sm_80']['max_local_mem_size_per_block'] = 163 * KB
-
-  arch['sm_86'] = deepcopy(arch['sm_60'])
-  arch['sm_86']['max_local_mem_size_per_block'] = 99 * KB
-  arch['sm_86']['max_block_per_sm'] = 16
-  arch['sm_86']['max_threads_per_sm'] = 1536
-
-  arch['sm_89'] = deepcopy(arch['sm_60'])
-  arch['sm_89']['max_local_mem_size_per_block'] = 99 * KB
-
-  arch['sm_90'] = deepcopy(arch['sm_60'])
-  arch['sm_90']['max_local_mem_size_per_block'] = 227 * KB
-
-  # AMD
-  # MI50
-
-  # info:
-  # 1. p31. https://www.olcf.ornl.gov/wp-content/uploads/2019/10/ORNL_Application_Readiness_Workshop-AMD_GPU_Basics.pd
-  # 2. p16. https://developer.amd.com/wordpress/media/2017/08/Vega_Shader_ISA_28July2017.pdf
-  # 3. https://en.wikipedia.org/wiki/Graphics_Core_Next#CU_scheduler
-  # 4. https://en.wikipedia.org/wiki/Graphics_Core_Next#Compute_units
-
-  amd_wavefront = 64
-  arch['gfx906'] = {
-    'vec_unit_length': amd_wavefront,
-    'max_local_mem_size_per_block': 64 * KB,
-    'max_num_threads': 1024,
-    'max_reg_per_block': 256 * KB,
-    'max_threads_per_sm': 40 * amd_wavefront,
-    'max_block_per_sm': 40,
-    'hw_fp_word_size': 4,
-    'mem_access_align_size': 32,
-    'name': 'amd',
-  }
-
-  arch['gfx908'] = deepcopy(arch['gfx906'])
-  arch['gfx908']['max_reg_per_block'] = 512 * KB
-
-  arch['gfx90a'] = deepcopy(arch['gfx908'])
-
-  arch['gfx942'] = deepcopy(arch['gfx90a'])
-  arch['gfx940'] = deepcopy(arch['gfx942'])
-  arch['gfx941'] = deepcopy(arch['gfx942'])
-
-  arch['gfx1010'] = {
-    'vec_unit_length': 32,
-    'max_local_mem_size_per_block': 128 * KB,
-    'max_num_threads': 1024,
-    'max_reg_per_block': 256 * KB,
-    'max_threads_per_sm': 40 * 32,
-    'max_block_per_sm': 40,
-    'hw_fp_word_size': 4,
-    'mem_access_align_size': 32,
-    'name': 'amd',
-  }
-
-  arch['gfx1030'] = deepcopy(arch['gfx1010'])
-  arch['gfx1100'] = deepcopy(arch['gfx1010'])
-  arch['gfx1101'] = deepcopy(arch['gfx1010'])
-  arch['gfx1102'] = deepcopy(arch['gfx1010'])
-  arch['gfx1150'] = deepcopy(arch['gfx1010'])
-  arch['gfx1200'] = deepcopy(arch['gfx1010'])
-
-  # Intel
-  arch['dg1'] = {
-    'vec_unit_length': 64,
-    'max_local_mem_size_per_block': 64 * KB,
-    'max_num_threads': 512,
-    'max_reg_per_block': 64 * KB,
-    'max_threads_per_sm': 512,
-    'max_block_per_sm': 64,
-    'name': 'intel',
-  }
-
-  for intel_integrated_gpu in ['bdw', 'skl', 'Gen8', 'Gen9', 'Gen11', 'Gen12LP']:
-    arch[intel_integrated_gpu] = {'vec_unit_length': 32,
-                                  'max_local_mem_size_per_block': 48 * KB,
-                                  'max_num_threads': 256,
-                                  'max_reg_per_block': 64 * KB,
-                                  'max_threads_per_sm': 256,
-                                  'max_block_per_sm': 32,
-                                  'name': 'intel'}
-  return arch
+  raw_arch = {**_get_builtin_arch(), **_custom_arch}
+  return {arch: _resolve_arch(raw_arch, arch, []) for arch in raw_arch}
 
 
 def retrieve_arch(arch_table, vendor):
@@ -26,8 +26,8 @@ class CudaLexic(Lexic):
   def sync_threads(self):
     return "__syncthreads()"
 
-  def sync_vec_unit(self):
-    return "__syncwarp()"
+  def sync_vec_unit(self, mask=None):
+    return f"__syncwarp({mask})" if mask else "__syncwarp()"
 
   def get_sub_group_id(self, sub_group_size):
     return f'{self.thread_idx_x} % {sub_group_size}'
@@ -35,9 +35,31 @@ class CudaLexic(Lexic):
   def active_sub_group_mask(self):
     return "__activemask()"
 
-  def broadcast_sync(self, variable, lane, mask):
+  def broadcast_sync(self, variable, lane, mask, width=None):
+    if width:
+      return f'__shfl_sync({mask}, {variable}, {lane}, {width})'
     return f'__shfl_sync({mask}, {variable}, {lane})'
 
+  def get_vector_type(self, precision, num_elements):
+    if (precision, num_elements) in [('float', 2), ('float', 4), ('double', 2)]:
+      return f'{precision}{num_elements}'
+    return None
+
+  def supports_async_copy(self):
+    return True
+
+  def async_copy(self, dest, src, precision):
+    return f'__pipeline_memcpy_async(&{dest}, &{src}, sizeof({precision}))'
+
+  def async_copy_commit(self):
+    return '__pipeline_commit()'
+
+  def async_copy_wait(self, num_pending=0):
+    return f'__pipeline_wait_prior({num_pending})'
+
+  def get_async_copy_headers(self):
+    return ['cuda_pipeline.h']
+
   def kernel_range_object(self):
     return "dim3"
 
@@ -16,7 +16,7 @@ class HipLexic(CudaLexic):
   def get_launch_code(self, func_name, grid, block, stream, func_params):
     return f"hipLaunchKernelGGL(kernel_{func_name}, {grid}, {block}, 0, {stream}, {func_params})"
 
-  def sync_vec_unit(self):
+  def sync_vec_unit(self, mask=None):
     # RoCM (AMD) currently doesn't support __syncwarp
     return "__syncthreads()"
 
@@ -26,8 +26,16 @@ class HipLexic(CudaLexic):
   def active_sub_group_mask(self):
     return None
 
-  def broadcast_sync(self, variable, lane, mask):
+  def broadcast_sync(self, variable, lane, mask, width=None):
+    if width:
+      return f'__shfl({variable}, {lane}, {width})'
     return f'__shfl({variable}, {lane})'
 
+  def supports_async_copy(self):
+    # Note: HIP does not expose a portable async. copy to LDS. LDS-direct loads
+    # of CDNA2+ (e.g., gfx90a) write wavefront-contiguous chunks which do not
+    # match the addressing of our loaders
+    return False
+
   def get_headers(self):
     return ["hip/hip_runtime.h"]
@@ -38,7 +38,7 @@ class Lexic(ABC):
     pass
 
   @abstractmethod
-  def sync_vec_unit(self):
+  def sync_vec_unit(self, mask=None):
     pass
 
   @abstractmethod
@@ -50,9 +50,39 @@ class Lexic(ABC):
     return None
 
   @abstractmethod
-  def broadcast_sync(self, variable, lane, mask):
+  def broadcast_sync(self, variable, lane, mask, width=None):
     pass
 
+  def supports_partial_sub_group_broadcast(self):
+    """returns True if `broadcast_sync` can be restricted to a segment of a sub-group"""
+    return True
+
+  def get_vector_type(self, precision, num_elements):
+    """returns a built-in vector type (e.g., float4) of a given length or
+    None if a backend cannot guarantee its alignment"""
+    return None
+
+  def supports_async_copy(self):
+    """returns True if a backend can copy data from glb. to shr. mem. bypassing registers"""
+    return False
+
+  def async_copy(self, dest, src, precision):
+    """returns a statement which asynchronously copies a single element
+    from glb. (`src`) to shr. mem. (`dest`)"""
+    return None
+
+  def async_copy_commit(self):
+    """returns a statement which submits all previously issued async. copies as a batch"""
+    return None
+
+  def async_copy_wait(self, num_pending=0):
+    """returns a statement which waits until at most `num_pending` batches of async. copies
+    are still in flight"""
+    return None
+
+  def get_async_copy_headers(self):
+    return []
+
   @abstractmethod
   def kernel_range_object(self):
     pass
@@ -39,7 +39,7 @@ class SyclLexic(Lexic):
   def sync_threads(self):
     return "item.barrier()"
 
-  def sync_vec_unit(self):
+  def sync_vec_unit(self, mask=None):
     return "item.barrier()"
 
   def get_sub_group_id(self, sub_group_size):
@@ -48,9 +48,23 @@ class SyclLexic(Lexic):
   def active_sub_group_mask(self):
     return f'item.get_sub_group()'
 
-  def broadcast_sync(self, variable, lane, mask):
+  def broadcast_sync(self, variable, lane, mask, width=None):
     return f'group_broadcast({mask}, {variable}, {lane})'
 
+  def supports_partial_sub_group_broadcast(self):
+    # Note: `group_broadcast` always involves the whole sub-group
+    return False
+
+  def get_vector_type(self, precision, num_elements):
+    # Note: alignment of local accessors is not guaranteed to be larger than
+    # the alignment of the underlying type
+    return None
+
+  def supports_async_copy(self):
+    # Note: SYCL 2020 does not provide async. copies from glb. to local memory
+    # which would be executed by individual work-items
+    return False
+
   def kernel_range_object(self):
     return "cl::sycl::range<3>"
 
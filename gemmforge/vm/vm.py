@@ -39,7 +39,13 @@ class VM:
     return ceil(num / self._hw_descr.vec_unit_length) * self._hw_descr.vec_unit_length
 
   def get_headers(self):
-    return ['gemmforge_aux.h'] + self._lexic.get_headers()
+    headers = ['gemmforge_aux.h'] + self._lexic.get_headers()
+    if self.supports_async_copy():
+      headers.extend(self._lexic.get_async_copy_headers())
+    return headers
+
+  def supports_async_copy(self):
+    return self._hw_descr.async_copy and self._lexic.supports_async_copy()
 
   @classmethod
   def _is_valid_type(self, fp_type: str):
@@ -76,6 +76,9 @@ for suite in suites:
       if kernel_type == "shr_mem":
         dense_kernel_type = GemmKernelType.SHR_MEM_BASED
         dense_sparse_kernel_type = GemmKernelType.DENSE_SPARSE_SHR_MEM_BASED
+      elif kernel_type == "shr_mem_looped":
+        dense_kernel_type = GemmKernelType.SHR_MEM_BASED
+        dense_sparse_kernel_type = GemmKernelType.DENSE_SPARSE_SHR_MEM_LOOPED
       elif kernel_type == "register_only":
         dense_kernel_type = GemmKernelType.REGISTER_ONLY_BASED
         dense_sparse_kernel_type = GemmKernelType.DENSE_SPARSE_REGISTER_ONLY_BASED
@@ -0,0 +1,74 @@
+import numpy as np
+from gemmforge import GemmGenerator, GemmKernelType, Interpreter, SparseMatrix
+
+
+def generate_gemm(vm, mat_a, mat_b, mat_c, kernel_type=GemmKernelType.AUTO, trans_a=False, trans_b=False,
+                  alpha=1.0, beta=0.0, epilogues=None, num_elements=None, **options):
+  """Generates a gemm kernel bypassing the kernel cache and the tuning database.
+  `options` are passed to GemmGenerator (e.g., micro_tile or num_k_stages)"""
+  gen = GemmGenerator(vm, kernel_type, **options)
+  gen.set_cache(None)
+  gen.set_tuning_database(None)
+  gen.set(trans_a, trans_b, mat_a, mat_b, mat_c, alpha=alpha, beta=beta, epilogues=epilogues,
+          num_elements=num_elements)
+  gen.generate()
+  return gen
+
+
+def view(matrix, array):
+  """Returns the bounding box of each batch element as an array of a shape (elements, rows, cols).
+  Sparse matrices get expanded; their values known at compile-time take precedence over `array`"""
+  if isinstance(matrix, SparseMatrix):
+    values = array.reshape(-1, matrix.get_el_count())
+    if matrix.get_value_array() is not None:
+      values = np.broadcast_to(matrix.get_value_array(), values.shape)
+    dense = np.zeros((values.shape[0], matrix.num_rows, matrix.num_cols))
+    rows, cols = matrix.get_coordinate_array().T
+    dense[:, rows, cols] = values
+    return dense
+
+  full = array.reshape(-1, matrix.num_cols, matrix.num_rows).transpose(0, 2, 1)
+  bbox = matrix.bbox
+  return full[:, bbox[0]:bbox[2], bbox[1]:bbox[3]]
+
+
+def make_data(matrix, num_elements, rng):
+  """Returns random values of a matrix. Rows and columns disabled by masks are zeros"""
+  if matrix.addressing == 'none':
+    num_elements = 1
+  data = rng.uniform(-1.0, 1.0, size=(num_elements, matrix.get_real_volume()))
+  if isinstance(matrix, SparseMatrix):
+    return data.reshape(-1) if matrix.addressing == 'none' else data
+
+  bbox_view = view(matrix, data)
+  row_mask, col_mask = matrix.get_actual_row_mask(), matrix.get_actual_col_mask()
+  if row_mask is not None:
+    bbox_view[:, ~np.array(row_mask), :] = 0.0
+  if col_mask is not None:
+    bbox_view[:, :, ~np.array(col_mask)] = 0.0
+  return data.reshape(-1) if matrix.addressing == 'none' else data
+
+
+def run_gemm(gen, num_elements=None, seed=7):
+  """Runs a generated kernel in the interpreter with random data. By default, the batch
+  spans more than two blocks so that the last block is incomplete.
+
+  Returns:
+    the interpreter, the input data and the results
+  """
+  if num_elements is None:
+    num_elements = 2 * gen._num_ops_per_block + 1
+  rng = np.random.default_rng(seed)
+  data = {matrix.name: make_data(matrix, num_elements, rng) for matrix in gen._matrices}
+  interpreter = Interpreter(gen)
+  results = interpreter.run(data, num_elements)
+  return interpreter, data, results
+
+
+def compute_gemm(gen, data):
+  """Returns `alpha * op(A) x op(B) + beta * C` restricted to the bounding box of C"""
+  op1 = view(gen._mat_a, data['A'])
+  op2 = view(gen._mat_b, data['B'])
+  op1 = op1.transpose(0, 2, 1) if gen._trans_a else op1
+  op2 = op2.transpose(0, 2, 1) if gen._trans_b else op2
+  return gen._alpha * op1 @ op2 + gen._beta * view(gen._mat_c, data['C'])
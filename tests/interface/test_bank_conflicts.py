@@ -0,0 +1,71 @@
+import unittest
+import numpy as np
+from gemmforge import DenseMatrix, SparseMatrix, GemmGenerator, GemmKernelType
+from gemmforge import BankConflictAnalyzer, GenerationError
+from gemmforge.bank_conflicts import count_wavefronts
+from gemmforge.instructions.loaders import ExtendedTransposePatchLoader
+from gemmforge.vm import vm_factory
+from helpers import generate_gemm, run_gemm, compute_gemm, view
+
+
+class TestBankConflicts(unittest.TestCase):
+
+  def test_bank_model(self):
+    hw_descr = vm_factory(arch='sm_60', backend='cuda', fp_type='float').get_hw_descr()
+    lanes = np.arange(32)[None, :]
+    self.assertEqual(count_wavefronts(hw_descr, 4 * lanes, 4), (1, 1, 1))
+    self.assertEqual(count_wavefronts(hw_descr, 4 * 32 * lanes, 4), (32, 1, 32))
+    self.assertEqual(count_wavefronts(hw_descr, 4 * 2 * lanes, 4), (2, 1, 2))
+    self.assertEqual(count_wavefronts(hw_descr, np.zeros((1, 32), dtype=int), 4), (1, 1, 1))
+
+    # Note: 8-byte accesses are served by half-warps
+    self.assertEqual(count_wavefronts(hw_descr, 8 * lanes, 8), (2, 2, 1))
+    self.assertEqual(count_wavefronts(hw_descr, 8 * 2 * lanes, 8), (4, 2, 2))
+
+    inactive = np.where(lanes < 4, 4 * 32 * lanes, -1)
+    self.assertEqual(count_wavefronts(hw_descr, inactive, 4), (4, 1, 4))
+
+    intel_hw_descr = vm_factory(arch='dg1', backend='oneapi', fp_type='float').get_hw_descr()
+    self.assertEqual(intel_hw_descr.shr_mem_num_banks, 16)
+
+  def test_transpose_padding(self):
+    for fp_type in ['float', 'double']:
+      vm = vm_factory(arch='sm_60', backend='cuda', fp_type=fp_type)
+      for num_k in [2, 8, 16]:
+        mat_a = DenseMatrix(num_rows=num_k, num_cols=40, addressing='strided')
+        mat_b = DenseMatrix(num_rows=num_k, num_cols=7, addressing='strided')
+        mat_c = DenseMatrix(num_rows=40, num_cols=7, addressing='strided')
+        gen = generate_gemm(vm, mat_a, mat_b, mat_c, kernel_type=GemmKernelType.SHR_MEM_BASED,
+                            trans_a=True, beta=1.0)
+
+        loaders = [instr for instr in gen.get_instructions() if isinstance(instr, ExtendedTransposePatchLoader)]
+        self.assertEqual(len(loaders), 1)
+        lead_dim = loaders[0].get_dest().data_view.lead_dim
+        self.assertTrue(40 <= lead_dim < 40 + 128 // vm.bytes_per_real())
+        _, data, results = run_gemm(gen)
+        self.assertTrue(np.allclose(view(mat_c, results['C']), compute_gemm(gen, data), atol=1e-5))
+
+        reports = BankConflictAnalyzer(gen).analyze()
+        report = [report for report in reports if report.instruction == 'ExtendedTransposePatchLoader'][0]
+        self.assertTrue(report.is_write)
+        self.assertEqual(report.get_degree(), 1.0, msg=f'{fp_type}, {num_k}: {report}')
+
+  def test_sparse_dense(self):
+    vm = vm_factory(arch='sm_60', backend='cuda', fp_type='float')
+    mat_a = SparseMatrix(8, 8, 'none', [[row, col] for row in range(8) for col in range(row % 2, 8, 2)])
+    mat_b = DenseMatrix(num_rows=8, num_cols=32, addressing='strided')
+    mat_c = DenseMatrix(num_rows=8, num_cols=32, addressing='strided')
+    gen = generate_gemm(vm, mat_a, mat_b, mat_c, kernel_type=GemmKernelType.SPARSE_DENSE_SHR_MEM_BASED, beta=1.0)
+
+    reports = [report for report in BankConflictAnalyzer(gen).analyze()
+               if report.instruction == 'ShrMemBasedSparseDenseGemm']
+    self.assertEqual(len(reports), 2)
+    degrees = sorted(report.max_degree for report in reports)
+
+    # Note: the sparse operand gets broadcast whereas each thread reads a column of B
+    self.assertEqual(degrees, [1, 8])
+
+  def test_without_instructions(self):
+    vm = vm_factory(arch='sm_60', backend='cuda', fp_type='float')
+    with self.assertRaises(GenerationError):
+      BankConflictAnalyzer(GemmGenerator(vm))
@@ -0,0 +1,42 @@
+import unittest
+from gemmforge import DenseMatrix
+from gemmforge import GemmGenerator
+from gemmforge import GemmSpec, CsaSpec, generate_batch
+from gemmforge.vm import vm_factory
+
+
+class TestBatchGeneration(unittest.TestCase):
+
+  def setUp(self):
+    self._vm = vm_factory(arch='sm_60', backend='cuda', fp_type='float')
+
+  def _make_spec(self, alpha):
+    mat_a = DenseMatrix(num_rows=56, num_cols=9, addressing='strided', bbox=[0, 0, 56, 9])
+    mat_b = DenseMatrix(num_rows=9, num_cols=9, addressing='strided', bbox=[0, 0, 9, 9])
+    mat_c = DenseMatrix(num_rows=56, num_cols=9, addressing='strided', bbox=[0, 0, 56, 9])
+    return GemmSpec(False, False, mat_a, mat_b, mat_c, alpha=alpha, beta=0.0)
+
+  def test_order_and_duplicates(self):
+    mat_a = DenseMatrix(num_rows=56, num_cols=9, addressing='strided', bbox=[0, 0, 56, 9])
+    mat_b = DenseMatrix(num_rows=56, num_cols=9, addressing='strided', bbox=[0, 0, 56, 9])
+    specs = [self._make_spec(1.0),
+             CsaSpec(mat_a, mat_b, alpha=1.0, beta=1.0),
+             self._make_spec(2.0),
+             self._make_spec(1.0)]
+    results = generate_batch(self._vm, specs, max_workers=2)
+
+    self.assertEqual(len(results), len(specs))
+    self.assertIs(results[0], results[3])
+    self.assertEqual(len(set(result.base_name for result in results)), 3)
+
+    for spec, result in zip(specs[:3], results[:3]):
+      gen = spec.make_generator(self._vm)
+      gen.generate()
+      self.assertEqual(result.base_name, gen.get_base_name())
+      self.assertEqual(result.kernel, gen.get_kernel())
+      self.assertEqual(result.launcher, gen.get_launcher())
+      self.assertEqual(result.header, gen.get_launcher_header())
+
+  def test_serial(self):
+    results = generate_batch(self._vm, [self._make_spec(1.0), self._make_spec(3.0)], max_workers=1)
+    self.assertNotEqual(results[0].base_name, results[1].base_name)
@@ -0,0 +1,113 @@
+import unittest
+import numpy as np
+from gemmforge import DenseMatrix, SparseMatrix, BlockSparseMatrix, GemmKernelType
+from gemmforge import GenerationError
+from gemmforge.vm import vm_factory
+from helpers import generate_gemm, run_gemm, compute_gemm, view
+
+
+class TestBlockSparseMatrix(unittest.TestCase):
+
+  def setUp(self):
+    self._blocks = [[0, 0], [2, 1], [1, 1]]
+    self._matrix = BlockSparseMatrix.from_blocks(num_rows=9, num_cols=6, addressing='none',
+                                                 block_size=(3, 3), blocks=self._blocks)
+
+  def test_from_blocks(self):
+    self.assertEqual(self._matrix.get_block_size(), (3, 3))
+    self.assertEqual(self._matrix.get_num_blocks(), 3)
+    self.assertEqual(self._matrix.get_el_count(), 27)
+    self.assertEqual(self._matrix.get_block_coordinate_array().tolist(), self._blocks)
+    # the second block starts at (6, 3) and is stored column-major
+    self.assertEqual(self._matrix.get_coordinate_array()[9:12].tolist(), [[6, 3], [7, 3], [8, 3]])
+    self.assertEqual(self._matrix.find_1d_offset(7, 4), 13)
+
+    col_ptr, row_indices, storage_indices = self._matrix.get_block_csc()
+    self.assertEqual(col_ptr.tolist(), [0, 1, 3])
+    self.assertEqual(row_indices.tolist(), [0, 2, 1])
+    self.assertEqual(storage_indices.tolist(), [0, 1, 2])
+
+    row_ptr, col_indices, storage_indices = self._matrix.get_block_csr()
+    self.assertEqual(row_ptr.tolist(), [0, 1, 2, 3])
+    self.assertEqual(storage_indices.tolist(), [0, 2, 1])
+
+  def test_detection(self):
+    coordinates = self._matrix.get_coordinate_array()
+    self.assertEqual(BlockSparseMatrix(9, 6, 'none', coordinates).get_block_size(), (3, 3))
+
+    converted = BlockSparseMatrix.from_sparse(SparseMatrix(9, 6, 'none', coordinates))
+    self.assertEqual(converted.get_block_size(), (3, 3))
+
+    # blocks are not stored contiguously
+    scattered = [[0, 0], [2, 2], [1, 0], [0, 1], [1, 1]]
+    self.assertEqual(BlockSparseMatrix(9, 6, 'none', scattered).get_block_size(), (1, 1))
+
+  def test_wrong_block_size(self):
+    with self.assertRaises(GenerationError):
+      BlockSparseMatrix(9, 6, 'none', self._matrix.get_coordinate_array(), block_size=(2, 3))
+
+  def test_fingerprint(self):
+    coordinates = self._matrix.get_coordinate_array()
+    elementwise = BlockSparseMatrix(9, 6, 'none', coordinates, block_size=(1, 1))
+    self.assertNotEqual(elementwise.get_fingerprint(), self._matrix.get_fingerprint())
+    self.assertNotEqual(SparseMatrix(9, 6, 'none', coordinates).get_fingerprint(), self._matrix.get_fingerprint())
+
+
+class TestBlockSparseKernels(unittest.TestCase):
+
+  def setUp(self):
+    self._vm = vm_factory(arch='sm_60', backend='cuda', fp_type='float')
+
+  def _generate(self, kernel_type, sparse, sparse_a, trans_a=False, trans_b=False):
+    if sparse_a:
+      mat_a = sparse
+      mat_b = DenseMatrix(num_rows=56 if trans_b else 6, num_cols=6 if trans_b else 56, addressing='strided')
+      mat_c = DenseMatrix(num_rows=9, num_cols=56, addressing='strided')
+    else:
+      mat_a = DenseMatrix(num_rows=9 if trans_a else 56, num_cols=56 if trans_a else 9, addressing='strided')
+      mat_b = sparse
+      mat_c = DenseMatrix(num_rows=56, num_cols=6, addressing='strided')
+
+    gen = generate_gemm(self._vm, mat_a, mat_b, mat_c, kernel_type=kernel_type,
+                        trans_a=trans_a, trans_b=trans_b, beta=1.0)
+    _, data, results = run_gemm(gen)
+    self.assertTrue(np.allclose(view(mat_c, results['C']), compute_gemm(gen, data), atol=1e-5))
+    return gen
+
+  def test_dense_block_sparse(self):
+    sparse = BlockSparseMatrix.from_blocks(9, 6, 'none', (3, 3), [[0, 0], [2, 1], [1, 1]])
+    blocked = self._generate(GemmKernelType.AUTO, sparse, sparse_a=False)
+    kernel = blocked.get_kernel()
+    self.assertIn('static const int B_block_rows[3] = {0, 2, 1};', kernel)
+    self.assertIn('BlockPatchLoader', kernel)
+    self.assertNotIn('_blocks[', kernel)
+
+    unrolled = self._generate(GemmKernelType.DENSE_SPARSE_SHR_MEM_BASED, sparse, sparse_a=False)
+    self.assertNotIn('B_block_rows', unrolled.get_kernel())
+    self.assertNotEqual(blocked.get_base_name(), unrolled.get_base_name())
+
+    transposed = self._generate(GemmKernelType.DENSE_SPARSE_SHR_MEM_BLOCKED, sparse, sparse_a=False, trans_a=True)
+    self.assertIn('B_block_rows', transposed.get_kernel())
+
+  def test_block_sparse_dense(self):
+    sparse = BlockSparseMatrix.from_blocks(9, 6, 'none', (3, 3), [[0, 0], [2, 1], [1, 1]])
+    kernel = self._generate(GemmKernelType.AUTO, sparse, sparse_a=True).get_kernel()
+    self.assertIn('static const int A_block_cols[3] = {0, 1, 1};', kernel)
+    # blocks get reordered to the block-CSR order while loading
+    self.assertIn('_blocks[3] = {0, 18, 9};', kernel)
+
+    kernel = self._generate(GemmKernelType.AUTO, sparse, sparse_a=True, trans_b=True).get_kernel()
+    self.assertIn('if (threadIdx.x < 56)', kernel)
+
+  def test_values(self):
+    values = [float(index + 1) for index in range(18)]
+    sparse = BlockSparseMatrix.from_blocks(9, 6, 'none', (3, 3), [[2, 1], [0, 0]], values=values)
+    kernel = self._generate(GemmKernelType.AUTO, sparse, sparse_a=False).get_kernel()
+    # the block of the first block-column comes first
+    self.assertIn('static const float B_values[18] = {10.0f, 11.0f', kernel)
+    self.assertNotIn('BlockPatchLoader', kernel)
+
+  def test_elementwise_pattern(self):
+    sparse = BlockSparseMatrix(9, 6, 'none', [[0, 0], [4, 5]])
+    kernel = self._generate(GemmKernelType.AUTO, sparse, sparse_a=False).get_kernel()
+    self.assertNotIn('B_block_rows', kernel)
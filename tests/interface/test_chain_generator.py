@@ -0,0 +1,103 @@
+import unittest
+from gemmforge import DenseMatrix, SparseMatrix, ChainGenerator, GemmSpec, CsaSpec, GenerationError
+from gemmforge.chain_generator import assign_shr_mem_offsets
+from gemmforge.symbol_table import SymbolType
+from gemmforge.vm import vm_factory
+
+
+class TestShrMemPlanning(unittest.TestCase):
+
+  def test_offsets(self):
+    offsets, total_size = assign_shr_mem_offsets([(0, 0, 10), (0, 2, 5), (1, 1, 8), (2, 3, 4)])
+    self.assertEqual(offsets, [0, 10, 0, 0])
+    self.assertEqual(total_size, 15)
+
+  def test_gaps(self):
+    offsets, total_size = assign_shr_mem_offsets([(0, 1, 4), (0, 0, 4), (0, 1, 4), (1, 1, 3)])
+    self.assertEqual(offsets, [0, 4, 8, 4])
+    self.assertEqual(total_size, 12)
+
+
+class TestChainGenerator(unittest.TestCase):
+
+  def setUp(self):
+    self._vm = vm_factory(arch='sm_60', backend='cuda', fp_type='float')
+    self._f_mr_t = DenseMatrix(num_rows=56, num_cols=9, addressing='none')
+    self._d_k = DenseMatrix(num_rows=9, num_cols=21, addressing='strided')
+    self._a_plus = DenseMatrix(num_rows=21, num_cols=9, addressing='strided')
+    self._r_div_m = DenseMatrix(num_rows=56, num_cols=56, addressing='none')
+    self._i_surf = DenseMatrix(num_rows=56, num_cols=9, addressing='strided')
+    self._tmp1 = DenseMatrix(num_rows=56, num_cols=21, addressing='strided')
+    self._tmp2 = DenseMatrix(num_rows=56, num_cols=9, addressing='strided')
+
+  def _get_ops(self):
+    return [GemmSpec(False, False, self._f_mr_t, self._d_k, self._tmp1, alpha=1.0, beta=0.0),
+            GemmSpec(False, False, self._tmp1, self._a_plus, self._tmp2, alpha=1.0, beta=0.0),
+            GemmSpec(False, False, self._r_div_m, self._tmp2, self._i_surf, alpha=1.0, beta=1.0)]
+
+  def _generate(self, ops, **kwargs):
+    gen = ChainGenerator(self._vm)
+    gen.set_cache(None)
+    gen.set(ops, **kwargs)
+    gen.generate()
+    return gen
+
+  def test_temporaries(self):
+    gen = self._generate(self._get_ops())
+    self.assertEqual(gen.get_temporaries(), [(self._tmp1, SymbolType.Register),
+                                             (self._tmp2, SymbolType.SharedMem)])
+
+    kernel = gen.get_kernel()
+    self.assertIn('value = reg0[k];', kernel)
+    self.assertIn('tmp1[threadIdx.x + 56 * n] = reg1[n];', kernel)
+    self.assertIn('reg2[n] += value * tmp1[k + 56 * n];', kernel)
+    self.assertEqual(gen.get_launcher_header().count('extraOffset'), 5)
+
+    # Note: the region of tmp2 reuses the region of B of the first gemm
+    self.assertIn('totalShrMem[693]', kernel)
+
+  def test_explicit_temporaries(self):
+    gen = self._generate(self._get_ops(), temporaries=[self._tmp2])
+    self.assertEqual(gen.get_temporaries(), [(self._tmp2, SymbolType.SharedMem)])
+    self.assertEqual(gen.get_launcher_header().count('extraOffset'), 6)
+
+  def test_csa(self):
+    result = DenseMatrix(num_rows=56, num_cols=9, addressing='strided')
+    ops = self._get_ops()[:2] + [CsaSpec(self._tmp2, result, alpha=2.0, beta=1.0)]
+    kernel = self._generate(ops).get_kernel()
+    self.assertIn('glb_M3[threadIdx.x + col * 56] = 2.0f * reg1[col] + glb_M3[threadIdx.x + col * 56];', kernel)
+
+  def test_transposed_temporary(self):
+    result = DenseMatrix(num_rows=21, num_cols=9, addressing='strided')
+    ops = self._get_ops()[:1] + [GemmSpec(True, False, self._tmp1, self._i_surf, result, alpha=1.0, beta=0.0)]
+    gen = self._generate(ops)
+    self.assertEqual(gen.get_temporaries(), [(self._tmp1, SymbolType.SharedMem)])
+    self.assertIn('value = tmp0[k + threadIdx.x * 56];', gen.get_kernel())
+
+  def test_base_name(self):
+    ops = self._get_ops()
+    self.assertNotEqual(self._generate(ops).get_base_name(),
+                        self._generate(ops, temporaries=[]).get_base_name())
+    self.assertEqual(self._generate(ops, base_name='call_chain').get_base_name(), 'call_chain')
+
+  def test_errors(self):
+    ops = self._get_ops()
+    ops[1].alpha = 'alpha'
+    with self.assertRaises(GenerationError):
+      self._generate(ops)
+
+    ops = self._get_ops()
+    ops[0].mat_b = DenseMatrix(num_rows=8, num_cols=21, addressing='strided')
+    with self.assertRaises(GenerationError):
+      self._generate(ops)
+
+    sparse = SparseMatrix(num_rows=21, num_cols=9, addressing='none', coordinates=[[0, 0], [1, 1]])
+    ops = self._get_ops()
+    ops[1].mat_b = sparse
+    with self.assertRaises(GenerationError):
+      self._generate(ops)
+
+    ops = self._get_ops()
+    ops[0] = GemmSpec(False, False, self._f_mr_t, self._d_k, self._tmp1, alpha=1.0, beta=0.0, num_k_stages=2)
+    with self.assertRaises(GenerationError):
+      self._generate(ops)
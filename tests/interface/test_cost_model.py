@@ -0,0 +1,91 @@
+import unittest
+from gemmforge import DenseMatrix
+from gemmforge.instructions import ShrMemBasedDenseGemm, RegisterOnlyDenseGemm, RegisterBlockedDenseGemm
+from gemmforge.vm import vm_factory
+from gemmforge.instructions.builders.kernels import GemmCostModel
+from helpers import generate_gemm
+
+
+class TestCostModel(unittest.TestCase):
+
+  def setUp(self):
+    self._vm = vm_factory(arch='sm_60', backend='cuda', fp_type='float')
+
+  def _make_matrices(self, m, n, k, trans_b=False):
+    mat_a = DenseMatrix(num_rows=m, num_cols=k, addressing='strided', bbox=[0, 0, m, k])
+    if trans_b:
+      mat_b = DenseMatrix(num_rows=n, num_cols=k, addressing='strided', bbox=[0, 0, n, k])
+    else:
+      mat_b = DenseMatrix(num_rows=k, num_cols=n, addressing='strided', bbox=[0, 0, k, n])
+    mat_c = DenseMatrix(num_rows=m, num_cols=n, addressing='strided', bbox=[0, 0, m, n])
+    return mat_a, mat_b, mat_c
+
+  def _select(self, m, n, k, **options):
+    """Returns the type of gemm instructions of a kernel generated with AUTO"""
+    gen = generate_gemm(self._vm, *self._make_matrices(m, n, k), beta=1.0, **options)
+    gemm_types = {type(instr) for instr in gen.get_instructions()
+                  if isinstance(instr, (ShrMemBasedDenseGemm, RegisterOnlyDenseGemm, RegisterBlockedDenseGemm))}
+    self.assertEqual(len(gemm_types), 1)
+    return gemm_types.pop()
+
+  def test_estimates(self):
+    estimates = generate_gemm(self._vm, *self._make_matrices(56, 9, 20), beta=1.0).get_cost_estimates()
+    self.assertEqual(set(estimates.keys()), {'shr_mem', 'register_only', 'register_blocked'})
+
+    shr_mem = estimates['shr_mem']
+    self.assertEqual(shr_mem.num_threads, 64)
+    self.assertEqual(shr_mem.shr_mem_per_op, 20 * 9 * 4)
+    self.assertEqual(shr_mem.flops, 2 * 56 * 9 * 20)
+    self.assertEqual(shr_mem.glb_mem_traffic, (56 * 20 + 20 * 9 + 2 * 56 * 9) * 4)
+    self.assertEqual(estimates['register_only'].shr_mem_per_op, 0)
+    self.assertEqual(estimates['register_blocked'].shr_mem_per_op, (56 * 20 + 20 * 9) * 4)
+    for estimate in estimates.values():
+      self.assertTrue(estimate.is_feasible())
+      self.assertGreater(estimate.time, 0.0)
+      self.assertGreater(estimate.occupancy, 0.0)
+      self.assertLessEqual(estimate.occupancy, 1.0)
+
+  def test_strided_loads_penalized(self):
+    mat_a, mat_b, mat_c = self._make_matrices(56, 9, 56)
+    regular = GemmCostModel(self._vm, False, False, mat_a, mat_b, mat_c, beta=1.0)
+    mat_a, mat_b, mat_c = self._make_matrices(56, 9, 56, trans_b=True)
+    transposed = GemmCostModel(self._vm, False, True, mat_a, mat_b, mat_c, beta=1.0)
+
+    # lanes read columns of B in a strided fashion if B is not transposed
+    self.assertGreater(regular.estimate('register_only').mio_wavefronts,
+                       transposed.estimate('register_only').mio_wavefronts)
+    self.assertEqual(regular.select(), 'shr_mem')
+    self.assertEqual(transposed.select(), 'register_only')
+
+    # Note: the predicted gain is too small to replace a default kernel type
+    self.assertEqual(transposed.select(default='shr_mem'), 'shr_mem')
+    self.assertEqual(transposed.select(default='register_only'), 'register_only')
+
+  def test_auto_selection(self):
+    # Note: AUTO keeps the default kernel type for common shapes
+    for arch, backend, fp_type in [('sm_60', 'cuda', 'float'), ('sm_80', 'cuda', 'double'), ('gfx90a', 'hip', 'double')]:
+      self._vm = vm_factory(arch=arch, backend=backend, fp_type=fp_type)
+      for m, n, k in [(56, 9, 9), (56, 9, 56), (56, 9, 4)]:
+        self.assertEqual(self._select(m, n, k), ShrMemBasedDenseGemm, msg=f'{arch}: {m}x{n}x{k}')
+
+    self._vm = vm_factory(arch='pvc', backend='oneapi', fp_type='double')
+    self.assertEqual(self._select(56, 9, 56), RegisterOnlyDenseGemm)
+
+    # a considerably faster candidate replaces the default
+    self._vm = vm_factory(arch='sm_60', backend='cuda', fp_type='float')
+    self.assertEqual(self._select(9, 56, 56), RegisterBlockedDenseGemm)
+
+    # options restrict candidates
+    self.assertEqual(self._select(56, 9, 4, num_k_stages=2), ShrMemBasedDenseGemm)
+    self.assertEqual(self._select(56, 9, 4, micro_tile=(2, 2)), RegisterBlockedDenseGemm)
+
+  def test_infeasible(self):
+    # B does not fit into shr. mem.
+    mat_a, mat_b, mat_c = self._make_matrices(32, 128, 128)
+    model = GemmCostModel(self._vm, False, False, mat_a, mat_b, mat_c, beta=0.0)
+    self.assertFalse(model.estimate('register_blocked').is_feasible())
+    self.assertNotEqual(model.select(), 'register_blocked')
+
+
+if __name__ == '__main__':
+  unittest.main()
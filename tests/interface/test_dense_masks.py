@@ -0,0 +1,68 @@
+import unittest
+import numpy as np
+from gemmforge import DenseMatrix, GemmKernelType, GenerationError
+from gemmforge.common import get_mask_runs, combine_masks
+from gemmforge.vm import vm_factory
+from helpers import generate_gemm, run_gemm, compute_gemm, view
+
+
+class TestMasks(unittest.TestCase):
+
+  def test_runs(self):
+    self.assertEqual(get_mask_runs(None, 5), [(0, 5)])
+    self.assertEqual(get_mask_runs([True, True, False, True, False], 5), [(0, 2), (3, 4)])
+    self.assertEqual(get_mask_runs([False, False], 2), [])
+
+  def test_combination(self):
+    self.assertIsNone(combine_masks(None, None))
+    self.assertEqual(combine_masks([True, False, True], None, [True, True, False]), [True, False, False])
+
+  def test_matrix(self):
+    with self.assertRaises(GenerationError):
+      DenseMatrix(num_rows=4, num_cols=3, addressing='strided', row_mask=[True, False])
+
+    matrix = DenseMatrix(num_rows=4, num_cols=3, addressing='strided', bbox=[1, 0, 3, 3],
+                         row_mask=[False, True, True, False])
+    self.assertIsNone(matrix.get_actual_row_mask())
+    self.assertIsNone(matrix.get_actual_col_mask())
+
+
+class TestMaskedKernels(unittest.TestCase):
+
+  def setUp(self):
+    self._vm = vm_factory(arch='sm_60', backend='cuda', fp_type='float')
+    self._mask = [True, True, False, False, True, True, True, True]
+
+  def _generate(self, kernel_type, mask_a=None, mask_b=None):
+    return generate_gemm(self._vm,
+                         DenseMatrix(num_rows=32, num_cols=8, addressing='strided', col_mask=mask_a),
+                         DenseMatrix(num_rows=8, num_cols=9, addressing='strided', row_mask=mask_b),
+                         DenseMatrix(num_rows=32, num_cols=9, addressing='strided'),
+                         kernel_type=kernel_type,
+                         beta=1.0)
+
+  def _run(self, gen):
+    """Checks results and returns the number of flops per batch element"""
+    interpreter, data, results = run_gemm(gen)
+    self.assertTrue(np.allclose(view(gen._mat_c, results['C']), compute_gemm(gen, data), atol=1e-5))
+    return interpreter.get_stats()['flops']
+
+  def test_shr_mem(self):
+    plain = self._generate(GemmKernelType.SHR_MEM_BASED)
+    masked = self._generate(GemmKernelType.SHR_MEM_BASED, mask_a=self._mask)
+    self.assertNotEqual(plain.get_base_name(), masked.get_base_name())
+
+    # Note: 2 of 8 columns of A are skipped
+    self.assertEqual(self._run(masked), self._run(plain) * 6 / 8)
+
+  def test_combined_masks(self):
+    mask_b = [True, True, True, True, True, True, False, True]
+    plain = self._generate(GemmKernelType.SHR_MEM_BASED)
+    masked = self._generate(GemmKernelType.SHR_MEM_BASED, mask_a=self._mask, mask_b=mask_b)
+    self.assertEqual(self._run(masked), self._run(plain) * 5 / 8)
+
+  def test_register_kernels(self):
+    for kernel_type in [GemmKernelType.REGISTER_ONLY_BASED, GemmKernelType.REGISTER_BLOCKED]:
+      plain = self._generate(kernel_type)
+      masked = self._generate(kernel_type, mask_b=self._mask)
+      self.assertEqual(self._run(masked), self._run(plain) * 6 / 8, msg=f'{kernel_type}')
@@ -0,0 +1,68 @@
+import unittest
+import numpy as np
+from gemmforge import DenseMatrix, SparseMatrix, GemmKernelType
+from gemmforge import AddMatrix, ScaleByVector, CopyTo, GenerationError
+from gemmforge.vm import vm_factory
+from helpers import generate_gemm, run_gemm, compute_gemm, view
+
+
+class TestEpilogues(unittest.TestCase):
+
+  def setUp(self):
+    self._vm = vm_factory(arch='sm_60', backend='cuda', fp_type='float')
+
+  def _generate(self, kernel_type, epilogues, mat_a=None, mat_b=None):
+    return generate_gemm(self._vm,
+                         mat_a if mat_a else DenseMatrix(num_rows=8, num_cols=4, addressing='strided'),
+                         mat_b if mat_b else DenseMatrix(num_rows=4, num_cols=5, addressing='strided'),
+                         DenseMatrix(num_rows=8, num_cols=5, addressing='strided'),
+                         kernel_type=kernel_type,
+                         alpha=2.0,
+                         beta=1.0,
+                         epilogues=epilogues)
+
+  def _assert_close(self, matrix, computed, expected):
+    self.assertTrue(np.allclose(view(matrix, computed), expected, atol=1e-5))
+
+  def test_chain(self):
+    epilogues = [ScaleByVector(DenseMatrix(num_rows=8, num_cols=1, addressing='strided')),
+                 CopyTo(DenseMatrix(num_rows=8, num_cols=5, addressing='strided')),
+                 AddMatrix(DenseMatrix(num_rows=8, num_cols=5, addressing='pointer_based'), scale=0.5)]
+    gen = self._generate(GemmKernelType.SHR_MEM_BASED, epilogues)
+    self.assertEqual([matrix.name for matrix in gen._matrices], ['A', 'B', 'C', 'E0', 'E1', 'E2'])
+    self.assertEqual(gen.get_flops(), 2 * 3 * 8 * 5 + 40 + 40 + 80)
+
+    _, data, results = run_gemm(gen)
+    value = 2.0 * view(gen._mat_a, data['A']) @ view(gen._mat_b, data['B'])
+    value *= view(epilogues[0].get_matrix(), data['E0'])
+    self._assert_close(epilogues[1].get_matrix(), results['E1'], value)
+    value += 0.5 * view(epilogues[2].get_matrix(), data['E2'])
+    self._assert_close(gen._mat_c, results['C'], value + view(gen._mat_c, data['C']))
+
+    plain = self._generate(GemmKernelType.SHR_MEM_BASED, None)
+    self.assertNotEqual(gen.get_base_name(), plain.get_base_name())
+    _, data, results = run_gemm(plain)
+    self._assert_close(plain._mat_c, results['C'], compute_gemm(plain, data))
+
+  def test_register_blocked(self):
+    epilogues = [ScaleByVector(DenseMatrix(num_rows=1, num_cols=5, addressing='strided'), per_row=False),
+                 CopyTo(DenseMatrix(num_rows=8, num_cols=5, addressing='strided'), beta=1.0)]
+    gen = self._generate(GemmKernelType.REGISTER_BLOCKED, epilogues)
+
+    _, data, results = run_gemm(gen)
+    value = 2.0 * view(gen._mat_a, data['A']) @ view(gen._mat_b, data['B'])
+    value *= view(epilogues[0].get_matrix(), data['E0'])
+    copy = epilogues[1].get_matrix()
+    self._assert_close(copy, results['E1'], value + view(copy, data['E1']))
+    self._assert_close(gen._mat_c, results['C'], value + view(gen._mat_c, data['C']))
+
+  def test_wrong_shape(self):
+    with self.assertRaises(GenerationError):
+      self._generate(GemmKernelType.AUTO, [ScaleByVector(DenseMatrix(num_rows=1, num_cols=5, addressing='strided'))])
+
+  def test_sparse_dense(self):
+    sparse = SparseMatrix(8, 4, 'none', [[0, 0], [3, 2], [7, 3]])
+    with self.assertRaises(GenerationError):
+      self._generate(GemmKernelType.AUTO,
+                     [CopyTo(DenseMatrix(num_rows=8, num_cols=5, addressing='strided'))],
+                     mat_a=sparse)
@@ -0,0 +1,58 @@
+import unittest
+from gemmforge import DenseMatrix, SparseMatrix
+from gemmforge import GemmGenerator, CsaGenerator
+from gemmforge import GenerationSession, GenerationError
+from gemmforge.vm import vm_factory
+
+
+class TestGenerationSession(unittest.TestCase):
+
+  def setUp(self):
+    self._vm = vm_factory(arch='sm_60', backend='cuda', fp_type='float')
+    self._session = GenerationSession(self._vm)
+
+  def _make_gemm(self, alpha=1.0, base_name=None):
+    gen = GemmGenerator(self._vm)
+    gen.set_cache(None)
+    mat_a = DenseMatrix(num_rows=56, num_cols=9, addressing='strided', bbox=[0, 0, 56, 9])
+    mat_b = DenseMatrix(num_rows=9, num_cols=9, addressing='strided', bbox=[0, 0, 9, 9])
+    mat_c = DenseMatrix(num_rows=56, num_cols=9, addressing='strided', bbox=[0, 0, 56, 9])
+    gen.set(False, False, mat_a, mat_b, mat_c, alpha=alpha, beta=0.0, base_name=base_name)
+    return gen
+
+  def test_duplicates_are_generated_once(self):
+    name = self._session.add(self._make_gemm())
+
+    def fail():
+      raise AssertionError('a duplicate must not be generated')
+
+    duplicate = self._make_gemm(base_name='call_site_kernel')
+    duplicate.generate = fail
+    self.assertEqual(self._session.add(duplicate), name)
+
+    other_name = self._session.add(self._make_gemm(alpha=2.0))
+    self.assertNotEqual(other_name, name)
+
+    self.assertEqual(self._session.get_num_requests(), 3)
+    self.assertEqual(self._session.get_num_kernels(), 2)
+
+    src = self._session.get_source()
+    self.assertEqual(src.count(f' kernel_{name}('), 1)
+    self.assertEqual(src.count(f' kernel_{other_name}('), 1)
+    self.assertEqual(self._session.get_header().count(f'void {name}('), 1)
+
+  def test_csa(self):
+    def make_csa():
+      gen = CsaGenerator(self._vm)
+      gen.set_cache(None)
+      mat_a = DenseMatrix(num_rows=56, num_cols=9, addressing='strided', bbox=[0, 0, 56, 9])
+      mat_b = DenseMatrix(num_rows=56, num_cols=9, addressing='strided', bbox=[0, 0, 56, 9])
+      gen.set(mat_a, mat_b, alpha=1.0, beta=1.0)
+      return gen
+
+    self.assertEqual(self._session.add(make_csa()), self._session.add(make_csa()))
+    self.assertEqual(self._session.get_num_kernels(), 1)
+
+  def test_name_clash(self):
+    self._session.add(self._make_gemm(base_name='foo'))
+    self.assertRaises(GenerationError, self._session.add, self._make_gemm(alpha=2.0, base_name='foo'))
@@ -0,0 +1,77 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from gemmforge import DenseMatrix
+from gemmforge.vm import vm_factory, register_arch, load_arch_file
+from gemmforge.vm.hw_descr import get_known_arch
+from helpers import generate_gemm
+
+
+class TestHwDescr(unittest.TestCase):
+
+  def test_inheritance(self):
+    known_arch = get_known_arch()
+    self.assertEqual(known_arch['sm_86']['async_copy'], True)
+    self.assertEqual(known_arch['sm_86']['max_threads_per_sm'], 1536)
+    self.assertEqual(known_arch['sm_86']['shr_mem_num_banks'], 32)
+    self.assertNotIn('inherits', known_arch['sm_86'])
+
+    hw_descr = vm_factory(arch='gfx90a', backend='hip', fp_type='double').get_hw_descr()
+    self.assertEqual(hw_descr.max_reg_per_block, 512 * 1024)
+    self.assertEqual(hw_descr.get_peak_gflops('double'), hw_descr.peak_fp64_gflops)
+
+    hw_descr = vm_factory(arch='dg1', backend='oneapi', fp_type='float').get_hw_descr()
+    self.assertIsNone(hw_descr.get_peak_gflops('double'))
+
+  def test_pvc(self):
+    vm = vm_factory(arch='pvc', backend='oneapi', fp_type='double')
+    self.assertEqual(vm.get_hw_descr().manufacturer, 'intel')
+
+    gen = generate_gemm(vm,
+                        DenseMatrix(num_rows=56, num_cols=9, addressing='strided'),
+                        DenseMatrix(num_rows=9, num_cols=9, addressing='strided'),
+                        DenseMatrix(num_rows=56, num_cols=9, addressing='strided'))
+    self.assertEqual(gen._num_active_threads, 64)
+
+  def test_register_arch(self):
+    register_arch('test_sm_80_small', {'num_sms': 4, 'peak_fp32_gflops': 100}, inherits='sm_80')
+    hw_descr = vm_factory(arch='test_sm_80_small', backend='cuda', fp_type='float').get_hw_descr()
+    self.assertEqual(hw_descr.num_sms, 4)
+    self.assertEqual(hw_descr.get_peak_gflops('float'), 100)
+    self.assertEqual(hw_descr.async_copy, True)
+
+    with self.assertRaises(ValueError):
+      register_arch('test_incomplete', {'name': 'nvidia', 'vec_unit_length': 32})
+    with self.assertRaises(ValueError):
+      register_arch('test_orphan', {}, inherits='unknown_arch')
+    with self.assertRaises(ValueError):
+      vm_factory(arch='test_incomplete', backend='cuda', fp_type='float')
+
+  def test_arch_file(self):
+    work_dir = tempfile.mkdtemp()
+    try:
+      file_path = os.path.join(work_dir, 'arch.json')
+      content = {'format_version': 1,
+                 'architectures': {'test_gfx_a': {'inherits': 'test_gfx_b', 'num_sms': 8},
+                                   'test_gfx_b': {'inherits': 'test_gfx_a', 'num_sms': 16}}}
+      with open(file_path, 'w') as file:
+        json.dump(content, file)
+      with self.assertRaises(ValueError):
+        load_arch_file(file_path)
+
+      content['architectures']['test_gfx_b']['inherits'] = 'gfx906'
+      with open(file_path, 'w') as file:
+        json.dump(content, file)
+      load_arch_file(file_path)
+      self.assertEqual(vm_factory(arch='test_gfx_a', backend='hip', fp_type='float').get_hw_descr().num_sms, 8)
+      self.assertEqual(vm_factory(arch='test_gfx_b', backend='hip', fp_type='float').get_hw_descr().num_sms, 16)
+
+      content['format_version'] = 2
+      with open(file_path, 'w') as file:
+        json.dump(content, file)
+      with self.assertRaises(ValueError):
+        load_arch_file(file_path)
+    finally:
+      shutil.rmtree(work_dir)
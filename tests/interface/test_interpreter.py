@@ -0,0 +1,130 @@
+import unittest
+import numpy as np
+from gemmforge import DenseMatrix, SparseMatrix, GemmGenerator, GemmKernelType
+from gemmforge import ChainGenerator, GemmSpec, CopyTo, Interpreter, GenerationError
+from gemmforge.instructions import SyncThreads
+from gemmforge.exceptions import InternalError
+from gemmforge.vm import vm_factory
+from helpers import generate_gemm, run_gemm, compute_gemm, view
+
+
+class TestInterpreter(unittest.TestCase):
+
+  def setUp(self):
+    self._rng = np.random.default_rng(7)
+
+  def _make_data(self, matrix, num_elements):
+    return self._rng.uniform(-1.0, 1.0, size=(num_elements, matrix.get_real_volume()))
+
+  def _check_gemm(self, gen, atol=1e-8):
+    _, data, results = run_gemm(gen)
+    self.assertTrue(np.allclose(view(gen._mat_c, results['C']), compute_gemm(gen, data), atol=atol),
+                    msg=gen.get_base_name())
+
+  def test_dense_kernels(self):
+    vm = vm_factory(arch='sm_60', backend='cuda', fp_type='double')
+    for kernel_type in [GemmKernelType.SHR_MEM_BASED,
+                        GemmKernelType.REGISTER_ONLY_BASED,
+                        GemmKernelType.REGISTER_BLOCKED]:
+      for trans_a, trans_b in [(False, False), (True, True)]:
+        mat_a = DenseMatrix(num_rows=7 if trans_a else 20, num_cols=20 if trans_a else 7, addressing='strided')
+        mat_b = DenseMatrix(num_rows=9 if trans_b else 7, num_cols=7 if trans_b else 9, addressing='pointer_based')
+        mat_c = DenseMatrix(num_rows=24, num_cols=10, addressing='strided', bbox=[2, 1, 22, 10])
+        self._check_gemm(generate_gemm(vm, mat_a, mat_b, mat_c, kernel_type=kernel_type,
+                                       trans_a=trans_a, trans_b=trans_b, alpha=1.5, beta=0.5))
+
+  def test_async_stages(self):
+    vm = vm_factory(arch='sm_80', backend='cuda', fp_type='float')
+    mat_a = DenseMatrix(num_rows=16, num_cols=24, addressing='strided')
+    mat_b = DenseMatrix(num_rows=24, num_cols=8, addressing='strided')
+    mat_c = DenseMatrix(num_rows=16, num_cols=8, addressing='strided')
+    self._check_gemm(generate_gemm(vm, mat_a, mat_b, mat_c, kernel_type=GemmKernelType.SHR_MEM_BASED,
+                                   num_k_stages=3), atol=1e-5)
+
+  def test_sparse(self):
+    vm = vm_factory(arch='sm_60', backend='cuda', fp_type='double')
+    coordinates = [[0, 0], [2, 0], [1, 1], [3, 2], [0, 2]]
+    mat_a = DenseMatrix(num_rows=10, num_cols=4, addressing='strided')
+    mat_b = SparseMatrix(4, 3, 'none', coordinates)
+    mat_c = DenseMatrix(num_rows=10, num_cols=3, addressing='strided')
+
+    for kernel_type in [GemmKernelType.DENSE_SPARSE_SHR_MEM_BASED, GemmKernelType.DENSE_SPARSE_SHR_MEM_LOOPED]:
+      gen = generate_gemm(vm, mat_a, mat_b, mat_c, kernel_type=kernel_type)
+
+      values = np.array([1.0, 2.0, 3.0, 4.0, 5.0])
+      data = {'A': self._make_data(mat_a, 3), 'B': values, 'C': self._make_data(mat_c, 3)}
+      results = Interpreter(gen).run(data, 3, flags=[1, 0, 1])
+
+      dense_b = np.zeros((4, 3))
+      for value, (row, col) in zip(values, coordinates):
+        dense_b[row, col] = value
+      expected = view(mat_a, data['A']) @ dense_b
+      computed = view(mat_c, results['C'])
+      self.assertTrue(np.allclose(computed[[0, 2]], expected[[0, 2]]))
+      self.assertTrue(np.array_equal(computed[1], view(mat_c, data['C'])[1]))
+
+  def test_epilogues_and_scalars(self):
+    vm = vm_factory(arch='sm_60', backend='cuda', fp_type='double')
+    mat_a = DenseMatrix(num_rows=8, num_cols=4, addressing='strided')
+    mat_b = DenseMatrix(num_rows=4, num_cols=5, addressing='strided')
+    mat_c = DenseMatrix(num_rows=8, num_cols=5, addressing='strided')
+    mat_e = DenseMatrix(num_rows=8, num_cols=5, addressing='strided')
+    gen = GemmGenerator(vm, GemmKernelType.SHR_MEM_BASED)
+    gen.set_cache(None)
+    gen.set(False, False, mat_a, mat_b, mat_c, alpha='alpha', beta=1.0,
+            base_name='scaled_gemm', epilogues=[CopyTo(mat_e)])
+    gen.generate()
+
+    data = {name: self._make_data(matrix, 2) for name, matrix in [('A', mat_a), ('B', mat_b),
+                                                                  ('C', mat_c), ('E0', mat_e)]}
+    interpreter = Interpreter(gen)
+    with self.assertRaises(GenerationError):
+      interpreter.run(data, 2)
+
+    results = interpreter.run(data, 2, scalars={'alpha': 3.0})
+    product = 3.0 * view(mat_a, data['A']) @ view(mat_b, data['B'])
+    self.assertTrue(np.allclose(view(mat_e, results['E0']), product))
+    self.assertTrue(np.allclose(view(mat_c, results['C']), product + view(mat_c, data['C'])))
+    self.assertEqual(interpreter.get_stats()['glb_stores'], 2 * 8 * 5)
+
+  def test_chain(self):
+    vm = vm_factory(arch='sm_60', backend='cuda', fp_type='double')
+    mat_a = DenseMatrix(num_rows=6, num_cols=5, addressing='strided')
+    mat_b = DenseMatrix(num_rows=5, num_cols=4, addressing='strided')
+    mat_d = DenseMatrix(num_rows=4, num_cols=3, addressing='strided')
+    temp = DenseMatrix(num_rows=6, num_cols=4, addressing='strided')
+    mat_e = DenseMatrix(num_rows=6, num_cols=3, addressing='strided')
+
+    gen = ChainGenerator(vm)
+    gen.set_cache(None)
+    gen.set([GemmSpec(False, False, mat_a, mat_b, temp, 1.0, 0.0),
+             GemmSpec(False, False, temp, mat_d, mat_e, 2.0, 0.0)], temporaries=[temp])
+    gen.generate()
+
+    names = {matrix.name: matrix for matrix in [mat_a, mat_b, mat_d, mat_e]}
+    data = {name: self._make_data(matrix, 3) for name, matrix in names.items()}
+    results = Interpreter(gen).run(data, 3)
+    expected = 2.0 * view(mat_a, data[mat_a.name]) @ view(mat_b, data[mat_b.name]) @ view(mat_d, data[mat_d.name])
+    self.assertTrue(np.allclose(view(mat_e, results[mat_e.name]), expected))
+
+  def test_races(self):
+    vm = vm_factory(arch='sm_60', backend='cuda', fp_type='float')
+    mat_a = DenseMatrix(num_rows=16, num_cols=8, addressing='strided')
+    mat_b = DenseMatrix(num_rows=8, num_cols=8, addressing='strided')
+    mat_c = DenseMatrix(num_rows=16, num_cols=8, addressing='strided')
+    gen = generate_gemm(vm, mat_a, mat_b, mat_c, kernel_type=GemmKernelType.SHR_MEM_BASED)
+
+    data = {name: self._make_data(matrix, 2) for name, matrix in [('A', mat_a), ('B', mat_b), ('C', mat_c)]}
+    Interpreter(gen).run(data, 2)
+
+    instructions = gen.get_instructions()
+    instructions[:] = [instr for instr in instructions if not isinstance(instr, SyncThreads)]
+    with self.assertRaises(InternalError):
+      Interpreter(gen).run(data, 2)
+    Interpreter(gen, check_races=False).run(data, 2)
+
+  def test_without_instructions(self):
+    vm = vm_factory(arch='sm_60', backend='cuda', fp_type='float')
+    gen = GemmGenerator(vm)
+    with self.assertRaises(GenerationError):
+      Interpreter(gen)
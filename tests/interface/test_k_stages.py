@@ -0,0 +1,43 @@
+import unittest
+import numpy as np
+from gemmforge import DenseMatrix, GemmKernelType, GenerationError
+from gemmforge.instructions import SyncThreads
+from gemmforge.vm import vm_factory
+from helpers import generate_gemm, run_gemm, compute_gemm, view
+
+
+class TestKStages(unittest.TestCase):
+
+  def setUp(self):
+    self._vm = vm_factory(arch='sm_60', backend='cuda', fp_type='float')
+
+  def _generate(self, num_k_stages, kernel_type=GemmKernelType.SHR_MEM_BASED):
+    return generate_gemm(self._vm,
+                         DenseMatrix(num_rows=56, num_cols=12, addressing='strided', bbox=[0, 0, 56, 12]),
+                         DenseMatrix(num_rows=12, num_cols=9, addressing='strided', bbox=[0, 0, 12, 9]),
+                         DenseMatrix(num_rows=56, num_cols=9, addressing='strided', bbox=[0, 0, 56, 9]),
+                         kernel_type=kernel_type,
+                         num_k_stages=num_k_stages)
+
+  def _check_results(self, gen):
+    # Note: the interpreter raises if barriers do not separate accesses to shared buffers
+    _, data, results = run_gemm(gen)
+    self.assertTrue(np.allclose(view(gen._mat_c, results['C']), compute_gemm(gen, data), atol=1e-5))
+
+  def test_double_buffering(self):
+    gen = self._generate(num_k_stages=4)
+    self._check_results(gen)
+
+    # Note: two buffers of 3x9 elements each
+    self.assertEqual(gen._shr_mem_obj.get_size_per_mult(), 2 * 3 * 9)
+    num_syncs = len([instr for instr in gen.get_instructions() if isinstance(instr, SyncThreads)])
+    self.assertGreater(num_syncs, 1)
+
+  def test_single_stage(self):
+    gen = self._generate(num_k_stages=1)
+    self._check_results(gen)
+    self.assertEqual(gen._shr_mem_obj.get_size_per_mult(), 12 * 9)
+
+  def test_unsupported_kernel_types(self):
+    for kernel_type in [GemmKernelType.REGISTER_ONLY_BASED, GemmKernelType.REGISTER_BLOCKED]:
+      self.assertRaises(GenerationError, self._generate, num_k_stages=2, kernel_type=kernel_type)
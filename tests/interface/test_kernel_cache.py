@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+import unittest
+from gemmforge import DenseMatrix, SparseMatrix
+from gemmforge import GemmGenerator, CsaGenerator
+from gemmforge import KernelCache
+from gemmforge.vm import vm_factory
+
+
+class TestKernelCache(unittest.TestCase):
+
+  def setUp(self):
+    self._vm = vm_factory(arch='sm_60', backend='cuda', fp_type='float')
+    self._cache_dir = tempfile.mkdtemp()
+    self._cache = KernelCache(self._cache_dir)
+
+  def tearDown(self):
+    shutil.rmtree(self._cache_dir)
+
+  def _make_gemm(self, mat_b=None):
+    gen = GemmGenerator(self._vm)
+    gen.set_cache(self._cache)
+    mat_a = DenseMatrix(num_rows=56, num_cols=9, addressing='strided', bbox=[0, 0, 56, 9])
+    if mat_b is None:
+      mat_b = DenseMatrix(num_rows=9, num_cols=9, addressing='strided', bbox=[0, 0, 9, 9])
+    mat_c = DenseMatrix(num_rows=56, num_cols=9, addressing='strided', bbox=[0, 0, 56, 9])
+    gen.set(False, False, mat_a, mat_b, mat_c, alpha=1.1, beta=0.0)
+    return gen
+
+  def test_hit_skips_generation(self):
+    gen = self._make_gemm()
+    gen.generate()
+
+    def fail():
+      raise AssertionError('instructions must not be emitted on a cache hit')
+
+    cached_gen = self._make_gemm()
+    cached_gen._emit_instructions = fail
+    cached_gen._analyze = fail
+    cached_gen.generate()
+
+    self.assertEqual(gen.get_kernel(), cached_gen.get_kernel())
+    self.assertEqual(gen.get_launcher(), cached_gen.get_launcher())
+    self.assertEqual(gen.get_launcher_header(), cached_gen.get_launcher_header())
+    self.assertEqual(gen._kernel_type, cached_gen._kernel_type)
+    self.assertEqual(gen._num_ops_per_block, cached_gen._num_ops_per_block)
+
+  def test_sparsity_pattern_is_part_of_key(self):
+    mat_b = SparseMatrix(num_rows=9, num_cols=9, addressing='strided',
+                         coordinates=[[0, 0], [1, 1]], values=None)
+    gen = self._make_gemm(mat_b)
+
+    other_b = SparseMatrix(num_rows=9, num_cols=9, addressing='strided',
+                           coordinates=[[0, 0], [2, 1]], values=None)
+    other_gen = self._make_gemm(other_b)
+    self.assertNotEqual(self._cache.make_key(gen), self._cache.make_key(other_gen))
+
+  def test_csa(self):
+    mat_a = DenseMatrix(num_rows=56, num_cols=9, addressing='strided', bbox=[0, 0, 56, 9])
+    mat_b = DenseMatrix(num_rows=56, num_cols=9, addressing='strided', bbox=[0, 0, 56, 9])
+    gen = CsaGenerator(self._vm)
+    gen.set_cache(self._cache)
+    gen.set(mat_a, mat_b, alpha=1.0, beta=1.0)
+    gen.generate()
+
+    cached_gen = CsaGenerator(self._vm)
+    cached_gen.set_cache(self._cache)
+    cached_gen.set(mat_a, mat_b, alpha=1.0, beta=1.0)
+    cached_gen._analyze = None
+    cached_gen.generate()
+    self.assertEqual(gen.get_kernel(), cached_gen.get_kernel())
+
+  def test_eviction(self):
+    cache = KernelCache(self._cache_dir, max_size=3 * 1024)
+    record = {'payload': 'x' * 1000}
+    for index in range(10):
+      cache.put(f'key{index}', record)
+      os.utime(os.path.join(self._cache_dir, f'key{index}.json'), (index, index))
+
+    self.assertLessEqual(cache.get_size(), 3 * 1024)
+    self.assertIn('key9', cache)
+    self.assertNotIn('key0', cache)
+
+  def test_corrupted_entry(self):
+    with open(os.path.join(self._cache_dir, 'broken.json'), 'w') as file:
+      file.write('{not a json')
+    self.assertIsNone(self._cache.get('broken'))
+
+
+if __name__ == '__main__':
+  unittest.main()
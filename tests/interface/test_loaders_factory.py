@@ -1,13 +1,15 @@
 import unittest
-from gemmforge import DenseMatrix
+from gemmforge import DenseMatrix, GemmKernelType
 from gemmforge.vm import vm_factory
 from gemmforge.instructions.loaders import shm_mem_loader_factory
 from gemmforge.instructions.loaders import ExactPatchLoader, ExtendedPatchLoader
 from gemmforge.instructions.loaders import ExactTransposePatchLoader
 from gemmforge.instructions.loaders import ExtendedTransposePatchLoader
+from gemmforge.instructions.loaders import AsyncExactPatchLoader, AsyncExtendedTransposePatchLoader
 from gemmforge.basic_types import ShrMemObject
 from gemmforge.symbol_table import Symbol, SymbolType, InverseSymbolTable
 from gemmforge.symbol_table import DataView
+from helpers import generate_gemm
 
 
 class TestLoaders(unittest.TestCase):
@@ -172,6 +174,56 @@ class TestLoaders(unittest.TestCase):
                                     load_and_transpose=True)
     self.assertIsInstance(loader, ExactTransposePatchLoader)
 
+  def test_async_loaders(self):
+    matrix = DenseMatrix(num_rows=33,
+                         num_cols=56,
+                         addressing='none',
+                         bbox=[0, 0, 15, 20])
+    params = {'shr_mem': self._shr_mem_obj, 'num_threads': 32}
+
+    # sm_60 does not support async. copies
+    src, dest = self._make_symbols(matrix)
+    loader = shm_mem_loader_factory(vm=self._vm, dest=dest, src=src, **params)
+    self.assertFalse(loader.is_async())
+
+    vm = vm_factory(arch='sm_80', backend='cuda', fp_type='float')
+    src, dest = self._make_symbols(matrix)
+    loader = shm_mem_loader_factory(vm=vm, dest=dest, src=src, **params)
+    self.assertIsInstance(loader, AsyncExactPatchLoader)
+
+    src, dest = self._make_symbols(matrix)
+    loader = shm_mem_loader_factory(vm=vm, dest=dest, src=src, load_and_transpose=True, exact=False, **params)
+    self.assertIsInstance(loader, ExactTransposePatchLoader)
+
+    matrix = DenseMatrix(num_rows=31,
+                         num_cols=56,
+                         addressing='none',
+                         bbox=[0, 0, 15, 20])
+    src, dest = self._make_symbols(matrix)
+    loader = shm_mem_loader_factory(vm=vm, dest=dest, src=src, load_and_transpose=True, **params)
+    self.assertIsInstance(loader, AsyncExtendedTransposePatchLoader)
+
+    # the hip backend does not provide async. copies
+    vm = vm_factory(arch='gfx90a', backend='hip', fp_type='float')
+    src, dest = self._make_symbols(matrix)
+    loader = shm_mem_loader_factory(vm=vm, dest=dest, src=src, **params)
+    self.assertFalse(loader.is_async())
+
+  def test_async_copies_in_gemm(self):
+    vm = vm_factory(arch='sm_80', backend='cuda', fp_type='float')
+    mat_a = DenseMatrix(num_rows=9, num_cols=56, addressing='strided', bbox=[0, 0, 9, 56])
+    mat_b = DenseMatrix(num_rows=9, num_cols=9, addressing='strided', bbox=[0, 0, 9, 9])
+    mat_c = DenseMatrix(num_rows=56, num_cols=9, addressing='strided', bbox=[0, 0, 56, 9])
+    gen = generate_gemm(vm, mat_a, mat_b, mat_c, kernel_type=GemmKernelType.SHR_MEM_BASED, trans_a=True)
+    kernel = gen.get_kernel()
+
+    self.assertIn('__pipeline_memcpy_async(&', kernel)
+    self.assertEqual(kernel.count('__pipeline_commit();'), 2)
+    # a single wait must precede the barrier
+    self.assertEqual(kernel.count('__pipeline_wait_prior(0);'), 1)
+    self.assertLess(kernel.index('__pipeline_wait_prior(0);'), kernel.index('__syncthreads();'))
+    self.assertIn('cuda_pipeline.h', vm.get_headers())
+
 
 if __name__ == '__main__':
   unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from unittest import mock
+import numpy as np
+from gemmforge import DenseMatrix, SparseMatrix, GemmKernelType
+from gemmforge.instructions.builders.kernels.gemms.factory import GemmKernelsFactory
+from gemmforge.vm import vm_factory
+from helpers import generate_gemm, run_gemm, compute_gemm, view
+
+
+class TestLoopedSparseKernels(unittest.TestCase):
+
+  def setUp(self):
+    self._vm = vm_factory(arch='sm_60', backend='cuda', fp_type='float')
+    coordinates = [[i, j] for j in range(9) for i in range(9) if (i + j) % 3 != 0]
+    self._values = [float(index + 1) for index in range(len(coordinates))]
+    self._coordinates = coordinates
+
+  def _generate(self, kernel_type, sparse_a, with_values=False):
+    values = self._values if with_values else None
+    sparse = SparseMatrix(num_rows=9, num_cols=9, addressing='none',
+                          coordinates=self._coordinates, values=values)
+    if sparse_a:
+      mat_a = sparse
+      mat_b = DenseMatrix(num_rows=9, num_cols=56, addressing='strided')
+      mat_c = DenseMatrix(num_rows=9, num_cols=56, addressing='strided')
+    else:
+      mat_a = DenseMatrix(num_rows=56, num_cols=9, addressing='strided')
+      mat_b = sparse
+      mat_c = DenseMatrix(num_rows=56, num_cols=9, addressing='strided')
+
+    gen = generate_gemm(self._vm, mat_a, mat_b, mat_c, kernel_type=kernel_type, beta=1.0)
+    _, data, results = run_gemm(gen)
+    self.assertTrue(np.allclose(view(mat_c, results['C']), compute_gemm(gen, data), atol=1e-5))
+    return gen
+
+  def test_dense_sparse(self):
+    unrolled = self._generate(GemmKernelType.DENSE_SPARSE_SHR_MEM_BASED, sparse_a=False)
+    looped = self._generate(GemmKernelType.DENSE_SPARSE_SHR_MEM_LOOPED, sparse_a=False)
+    self.assertIn('static const int B_rows[54]', looped.get_kernel())
+    self.assertIn('B_offsets', looped.get_kernel())
+    self.assertLess(len(looped.get_kernel()), len(unrolled.get_kernel()))
+    self.assertNotEqual(looped.get_base_name(), unrolled.get_base_name())
+
+  def test_sparse_dense(self):
+    unrolled = self._generate(GemmKernelType.SPARSE_DENSE_SHR_MEM_BASED, sparse_a=True)
+    looped = self._generate(GemmKernelType.SPARSE_DENSE_SHR_MEM_LOOPED, sparse_a=True)
+    self.assertIn('static const int A_cols[54]', looped.get_kernel())
+    self.assertIn('A_offsets', looped.get_kernel())
+    self.assertLess(len(looped.get_kernel()), len(unrolled.get_kernel()))
+
+  def test_values(self):
+    gen = self._generate(GemmKernelType.SPARSE_DENSE_SHR_MEM_LOOPED, sparse_a=True, with_values=True)
+    self.assertIn('static const float A_values[54]', gen.get_kernel())
+    self.assertNotIn('A_offsets', gen.get_kernel())
+
+  def test_auto_selection(self):
+    gen = self._generate(GemmKernelType.AUTO, sparse_a=False)
+    self.assertNotIn('B_rows', gen.get_kernel())
+
+    with mock.patch.object(GemmKernelsFactory, 'MAX_NUM_UNROLLED_NON_ZEROS', 32):
+      gen = self._generate(GemmKernelType.AUTO, sparse_a=False)
+      self.assertIn('B_rows', gen.get_kernel())
+      gen = self._generate(GemmKernelType.AUTO, sparse_a=True)
+      self.assertIn('A_cols', gen.get_kernel())
@@ -0,0 +1,45 @@
+import unittest
+import numpy as np
+from gemmforge import DenseMatrix, GemmKernelType
+from gemmforge.vm import vm_factory
+from helpers import generate_gemm, run_gemm, compute_gemm, view
+
+
+class TestBatchElementPacking(unittest.TestCase):
+
+  def _generate(self, vm, kernel_type, pack_batch_elements=True):
+    return generate_gemm(vm,
+                         DenseMatrix(num_rows=9, num_cols=9, addressing='strided', bbox=[0, 0, 9, 9]),
+                         DenseMatrix(num_rows=9, num_cols=9, addressing='strided', bbox=[0, 0, 9, 9]),
+                         DenseMatrix(num_rows=9, num_cols=9, addressing='strided', bbox=[0, 0, 9, 9]),
+                         kernel_type=kernel_type,
+                         beta=1.0,
+                         pack_batch_elements=pack_batch_elements)
+
+  def _check_results(self, gen):
+    _, data, results = run_gemm(gen)
+    self.assertTrue(np.allclose(view(gen._mat_c, results['C']), compute_gemm(gen, data), atol=1e-5))
+
+  def test_segments_fill_vector_units(self):
+    vm = vm_factory(arch='gfx90a', backend='hip', fp_type='double')
+    gen = self._generate(vm, GemmKernelType.SHR_MEM_BASED)
+    self.assertEqual(gen._num_active_threads, 16)
+    self.assertEqual(gen._num_ops_per_block % 4, 0)
+    self._check_results(gen)
+
+    gen = self._generate(vm, GemmKernelType.SHR_MEM_BASED, pack_batch_elements=False)
+    self.assertEqual(gen._num_active_threads, 64)
+
+  def test_packed_kernels(self):
+    vm = vm_factory(arch='sm_60', backend='cuda', fp_type='float')
+    for kernel_type in [GemmKernelType.SHR_MEM_BASED, GemmKernelType.REGISTER_ONLY_BASED]:
+      gen = self._generate(vm, kernel_type)
+      self.assertEqual(gen._num_active_threads, 16)
+      self.assertEqual(gen._num_ops_per_block % 2, 0)
+      self._check_results(gen)
+
+  def test_sycl_register_only(self):
+    vm = vm_factory(arch='dg1', backend='oneapi', fp_type='float')
+    gen = self._generate(vm, GemmKernelType.REGISTER_ONLY_BASED)
+    self.assertEqual(gen._num_active_threads, vm.get_hw_descr().vec_unit_length)
+    self._check_results(gen)
@@ -0,0 +1,61 @@
+import unittest
+import numpy as np
+from gemmforge import DenseMatrix, GemmGenerator, GemmKernelType
+from gemmforge.vm import vm_factory
+from helpers import generate_gemm, run_gemm, compute_gemm, view
+
+
+class TestRegisterBlockedKernel(unittest.TestCase):
+
+  def setUp(self):
+    self._vm = vm_factory(arch='sm_60', backend='cuda', fp_type='float')
+
+  def _generate(self, micro_tile=None):
+    return generate_gemm(self._vm,
+                         DenseMatrix(num_rows=56, num_cols=9, addressing='strided', bbox=[0, 0, 56, 9]),
+                         DenseMatrix(num_rows=9, num_cols=9, addressing='strided', bbox=[0, 0, 9, 9]),
+                         DenseMatrix(num_rows=56, num_cols=9, addressing='strided', bbox=[0, 0, 56, 9]),
+                         kernel_type=GemmKernelType.REGISTER_BLOCKED,
+                         micro_tile=micro_tile)
+
+  def _check_results(self, gen):
+    _, data, results = run_gemm(gen)
+    self.assertTrue(np.allclose(view(gen._mat_c, results['C']), compute_gemm(gen, data), atol=1e-5))
+
+  def test_auto_tile(self):
+    gen = self._generate()
+    tile_rows, tile_cols = gen._micro_tile
+    self.assertGreater(tile_rows * tile_cols, 1)
+    self.assertEqual(gen._num_active_threads % self._vm.get_hw_descr().vec_unit_length, 0)
+    self.assertLessEqual(gen._num_active_threads, 64)
+    self._check_results(gen)
+
+  def test_user_tile(self):
+    gen = self._generate(micro_tile=(2, 3))
+    self.assertEqual(gen._micro_tile, (2, 3))
+    # ceil(56 / 2) * ceil(9 / 3) = 84 threads
+    self.assertEqual(gen._num_compute_threads, 84)
+    self.assertEqual(gen._num_active_threads, 96)
+    self.assertNotEqual(gen.get_base_name(), self._generate().get_base_name())
+    self._check_results(gen)
+
+  def test_reused_generator(self):
+    def set_cube(gen, size):
+      gen.set(False, False,
+              DenseMatrix(num_rows=size, num_cols=size, addressing='strided'),
+              DenseMatrix(num_rows=size, num_cols=size, addressing='strided'),
+              DenseMatrix(num_rows=size, num_cols=size, addressing='strided'),
+              alpha=1.0, beta=0.0)
+      gen.generate()
+
+    gen = GemmGenerator(self._vm, GemmKernelType.REGISTER_BLOCKED)
+    gen.set_cache(None)
+    set_cube(gen, 84)
+    set_cube(gen, 9)
+
+    fresh_gen = GemmGenerator(self._vm, GemmKernelType.REGISTER_BLOCKED)
+    fresh_gen.set_cache(None)
+    set_cube(fresh_gen, 9)
+    self.assertEqual(gen._micro_tile, fresh_gen._micro_tile)
+    self.assertEqual(gen.get_base_name(), fresh_gen.get_base_name())
+    self.assertEqual(gen.get_kernel(), fresh_gen.get_kernel())
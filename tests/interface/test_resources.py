@@ -0,0 +1,129 @@
+import json
+import shutil
+import tempfile
+import unittest
+from gemmforge import DenseMatrix, GemmGenerator, GemmKernelType, CsaGenerator, ChainGenerator
+from gemmforge import GemmSpec, GenerationSession, GenerationError, KernelCache
+from gemmforge.resources import compute_occupancy
+from gemmforge.vm import vm_factory
+from helpers import generate_gemm
+
+
+class TestResources(unittest.TestCase):
+
+  def setUp(self):
+    self._vm = vm_factory(arch='sm_60', backend='cuda', fp_type='float')
+
+  def _make_matrices(self, num_cols=9):
+    return (DenseMatrix(num_rows=56, num_cols=9, addressing='strided'),
+            DenseMatrix(num_rows=9, num_cols=num_cols, addressing='strided'),
+            DenseMatrix(num_rows=56, num_cols=num_cols, addressing='strided'))
+
+  def _make_gemm(self, num_cols=9):
+    """Returns a generator which has not generated its kernel yet"""
+    gen = GemmGenerator(self._vm, GemmKernelType.SHR_MEM_BASED)
+    gen.set_cache(None)
+    gen.set(False, False, *self._make_matrices(num_cols), alpha=1.0, beta=0.0)
+    return gen
+
+  def test_occupancy(self):
+    hw_descr = self._vm.get_hw_descr()
+    self.assertEqual(compute_occupancy(hw_descr, 64, 16, 0), (32, 1.0, 'threads'))
+    self.assertEqual(compute_occupancy(hw_descr, 64, 64, 0), (16, 0.5, 'registers'))
+    self.assertEqual(compute_occupancy(hw_descr, 64, 16, 16 * 1024), (3, 0.09375, 'shared_memory'))
+
+    # Note: threads are allocated per warp
+    self.assertEqual(compute_occupancy(hw_descr, 8, 16, 0), (32, 0.5, 'blocks'))
+
+    # Note: the register file of a CU is smaller than the per-block limit
+    hw_descr = vm_factory(arch='gfx90a', backend='hip', fp_type='double').get_hw_descr()
+    self.assertEqual(compute_occupancy(hw_descr, 64, 146, 0), (14, 0.35, 'registers'))
+    self.assertEqual(compute_occupancy(hw_descr, 1024, 1024, 0)[0], 0)
+
+  def test_gemm(self):
+    gen = generate_gemm(self._vm, *self._make_matrices(), kernel_type=GemmKernelType.SHR_MEM_BASED)
+    report = gen.get_resource_report()
+    self.assertEqual(report.num_threads_per_block, 64 * report.num_ops_per_block)
+    self.assertEqual(report.num_regs_per_thread, 32 + 9)
+    self.assertEqual(report.shr_mem_per_block, 9 * 9 * 4 * report.num_ops_per_block)
+    self.assertEqual(report.limiting_resource, 'registers')
+    self.assertEqual(report.num_blocks_per_sm, 65536 // (64 * report.num_ops_per_block * 41))
+
+    # Note: a wide accumulator leaves room for a single block only
+    gen = generate_gemm(self._vm, *self._make_matrices(num_cols=512), kernel_type=GemmKernelType.REGISTER_ONLY_BASED)
+    report = gen.get_resource_report()
+    self.assertTrue(report.is_single_block_per_sm())
+    self.assertEqual(report.limiting_resource, 'registers')
+
+  def test_num_ops_per_block(self):
+    vm = vm_factory(arch='sm_80', backend='cuda', fp_type='float')
+
+    def generate(num_elements):
+      return generate_gemm(vm,
+                           DenseMatrix(num_rows=32, num_cols=9, addressing='strided'),
+                           DenseMatrix(num_rows=9, num_cols=9, addressing='strided'),
+                           DenseMatrix(num_rows=32, num_cols=9, addressing='strided'),
+                           kernel_type=GemmKernelType.SHR_MEM_BASED,
+                           num_elements=num_elements)
+
+    # Note: a single op. per block would be limited by the number of blocks per SM
+    gen = generate(num_elements=None)
+    report = gen.get_resource_report()
+    self.assertGreater(report.num_ops_per_block, 1)
+    self.assertEqual(report.limiting_resource, 'registers')
+    self.assertGreater(report.occupancy, 0.5)
+
+    # Note: a few elements fit into a single wave anyway
+    small_gen = generate(num_elements=3)
+    self.assertEqual(small_gen.get_resource_report().num_ops_per_block, 1)
+    self.assertNotEqual(small_gen.get_base_name(), gen.get_base_name())
+
+  def test_csa_and_chain(self):
+    mat_a = DenseMatrix(num_rows=56, num_cols=9, addressing='strided')
+    mat_b = DenseMatrix(num_rows=56, num_cols=9, addressing='strided')
+    gen = CsaGenerator(self._vm)
+    gen.set_cache(None)
+    gen.set(mat_a, mat_b, alpha=1.0, beta=1.0)
+    gen.generate()
+    report = gen.get_resource_report()
+    self.assertEqual(report.shr_mem_per_block, 0)
+    self.assertEqual(report.num_regs_per_thread, 10)
+
+    tmp = DenseMatrix(num_rows=9, num_cols=9, addressing='strided')
+    mat_c = DenseMatrix(num_rows=56, num_cols=9, addressing='strided')
+    mat_d = DenseMatrix(num_rows=56, num_cols=9, addressing='strided')
+    gen = ChainGenerator(self._vm)
+    gen.set_cache(None)
+    gen.set([GemmSpec(True, False, mat_a, mat_b, tmp, alpha=1.0, beta=0.0),
+             GemmSpec(False, False, mat_c, tmp, mat_d, alpha=1.0, beta=0.0)])
+    gen.generate()
+    report = gen.get_resource_report()
+    self.assertEqual(report.shr_mem_per_block, gen._shr_mem_obj.get_total_size() * 4)
+    self.assertEqual(report.num_threads_per_block, gen._num_active_threads * report.num_ops_per_block)
+
+  def test_not_generated(self):
+    with self.assertRaises(GenerationError):
+      self._make_gemm().get_resource_report()
+
+  def test_cache_and_session(self):
+    cache_dir = tempfile.mkdtemp()
+    try:
+      gen = self._make_gemm()
+      gen.set_cache(KernelCache(cache_dir))
+      gen.generate()
+
+      cached_gen = self._make_gemm()
+      cached_gen.set_cache(KernelCache(cache_dir))
+      cached_gen.generate()
+      self.assertIsNone(cached_gen._shr_mem_obj)
+      self.assertEqual(cached_gen.get_resource_report().to_dict(), gen.get_resource_report().to_dict())
+    finally:
+      shutil.rmtree(cache_dir)
+
+    session = GenerationSession(self._vm)
+    session.add(self._make_gemm())
+    session.add(self._make_gemm(num_cols=7))
+    reports = json.loads(session.get_resource_reports_as_json())
+    self.assertEqual([report['base_name'] for report in reports],
+                     [report.base_name for report in session.get_resource_reports()])
+    self.assertEqual(reports[0]['limiting_resource'], 'registers')
@@ -0,0 +1,98 @@
+import unittest
+from gemmforge import DenseMatrix, GemmKernelType, CsaGenerator, ChainGenerator
+from gemmforge import GemmSpec, GenerationError, RooflinePredictor, CopyTo, AddMatrix
+from gemmforge.vm import vm_factory
+from helpers import generate_gemm
+
+
+class TestRoofline(unittest.TestCase):
+
+  def setUp(self):
+    self._vm = vm_factory(arch='sm_80', backend='cuda', fp_type='float')
+
+  def _make_gemm(self, addressing, beta, vm=None, epilogues=None):
+    return generate_gemm(self._vm if vm is None else vm,
+                         DenseMatrix(num_rows=56, num_cols=9, addressing=addressing[0]),
+                         DenseMatrix(num_rows=9, num_cols=9, addressing=addressing[1]),
+                         DenseMatrix(num_rows=56, num_cols=9, addressing=addressing[2]),
+                         kernel_type=GemmKernelType.SHR_MEM_BASED,
+                         beta=beta,
+                         epilogues=epilogues)
+
+  def test_gemm(self):
+    gen = self._make_gemm(['strided', 'strided', 'strided'], beta=0.0)
+    estimate = RooflinePredictor(gen).predict()
+    self.assertEqual(estimate.flops, gen.get_flops())
+    self.assertEqual(estimate.glb_mem_reads, (56 * 9 + 9 * 9) * 4)
+    self.assertEqual(estimate.glb_mem_writes, 56 * 9 * 4)
+    self.assertEqual(estimate.shared_glb_mem_reads, 0)
+    self.assertGreater(estimate.shr_mem_stores, 0)
+
+    # Note: `none` matrices are read once per launch and pointers are read per element
+    gen = self._make_gemm(['strided', 'none', 'pointer_based'], beta=1.0)
+    estimate = RooflinePredictor(gen).predict()
+    self.assertEqual(estimate.glb_mem_reads, (56 * 9 + 56 * 9) * 4 + 8)
+    self.assertEqual(estimate.glb_mem_writes, 56 * 9 * 4)
+    self.assertEqual(estimate.shared_glb_mem_reads, 9 * 9 * 4)
+    self.assertGreater(estimate.get_time(1), estimate.get_time())
+
+  def test_epilogues(self):
+    def predict(beta):
+      epilogues = [AddMatrix(DenseMatrix(num_rows=56, num_cols=9, addressing='strided')),
+                   CopyTo(DenseMatrix(num_rows=56, num_cols=9, addressing='strided'), beta=beta)]
+      gen = self._make_gemm(['strided', 'strided', 'strided'], beta=0.0, epilogues=epilogues)
+      return RooflinePredictor(gen).predict()
+
+    estimate = predict(beta=0.0)
+    self.assertEqual(estimate.glb_mem_reads, (2 * 56 * 9 + 9 * 9) * 4)
+    self.assertEqual(estimate.glb_mem_writes, 2 * 56 * 9 * 4)
+
+    # Note: E = value + beta * E loads E as well
+    estimate = predict(beta=0.5)
+    self.assertEqual(estimate.glb_mem_reads, (3 * 56 * 9 + 9 * 9) * 4)
+    self.assertEqual(estimate.glb_mem_writes, 2 * 56 * 9 * 4)
+
+  def test_bound(self):
+    gen = self._make_gemm(['strided', 'strided', 'strided'], beta=0.0)
+    estimate = RooflinePredictor(gen).predict()
+    self.assertEqual(estimate.get_bound(), 'memory')
+    num_bytes = estimate.glb_mem_reads + estimate.glb_mem_writes
+    self.assertAlmostEqual(estimate.get_gflops(), estimate.flops / num_bytes * estimate.peak_bandwidth)
+    self.assertAlmostEqual(estimate.get_time(1000), 1000 * num_bytes / (estimate.peak_bandwidth * 1e9))
+
+    estimate.peak_bandwidth = 1e9
+    self.assertEqual(estimate.get_bound(), 'compute')
+    self.assertAlmostEqual(estimate.get_gflops(), estimate.peak_gflops)
+
+  def test_csa_and_chain(self):
+    mat_a = DenseMatrix(num_rows=56, num_cols=9, addressing='strided')
+    mat_b = DenseMatrix(num_rows=56, num_cols=9, addressing='strided')
+    gen = CsaGenerator(self._vm)
+    gen.set_cache(None)
+    gen.set(mat_a, mat_b, alpha=1.0, beta=1.0)
+    gen.generate()
+    estimate = RooflinePredictor(gen).predict()
+    self.assertEqual(estimate.flops, 2 * 56 * 9)
+    self.assertEqual(estimate.glb_mem_reads, 2 * 56 * 9 * 4)
+    self.assertEqual(estimate.glb_mem_writes, 56 * 9 * 4)
+    self.assertEqual(estimate.shr_mem_stores, 0)
+
+    # Note: the temporary never reaches glb. mem.
+    tmp = DenseMatrix(num_rows=9, num_cols=9, addressing='strided')
+    mat_c = DenseMatrix(num_rows=56, num_cols=9, addressing='strided')
+    mat_d = DenseMatrix(num_rows=56, num_cols=9, addressing='strided')
+    gen = ChainGenerator(self._vm)
+    gen.set_cache(None)
+    gen.set([GemmSpec(True, False, mat_a, mat_b, tmp, alpha=1.0, beta=0.0),
+             GemmSpec(False, False, mat_c, tmp, mat_d, alpha=1.0, beta=0.0)])
+    gen.generate()
+    estimate = RooflinePredictor(gen).predict()
+    self.assertEqual(estimate.flops, gen.get_flops())
+    self.assertEqual(estimate.glb_mem_reads, 3 * 56 * 9 * 4)
+    self.assertEqual(estimate.glb_mem_writes, 56 * 9 * 4)
+
+  def test_unknown_peak(self):
+    vm = vm_factory(arch='dg1', backend='oneapi', fp_type='double')
+    gen = self._make_gemm(['strided', 'strided', 'strided'], beta=0.0, vm=vm)
+    with self.assertRaises(GenerationError):
+      RooflinePredictor(gen).predict()
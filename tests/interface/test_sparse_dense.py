@@ -0,0 +1,40 @@
+import unittest
+import numpy as np
+from io import StringIO
+from gemmforge import DenseMatrix, SparseMatrix, GemmKernelType, constructs
+from gemmforge.instructions import ShrMemBasedSparseDenseGemm
+from gemmforge.vm import vm_factory
+from helpers import generate_gemm, run_gemm, compute_gemm, view
+
+
+class TestSparseDenseKernels(unittest.TestCase):
+
+  def _get_gemm_code(self, gen):
+    gemms = [instr for instr in gen.get_instructions() if isinstance(instr, ShrMemBasedSparseDenseGemm)]
+    self.assertEqual(len(gemms), 1)
+    src = StringIO()
+    with constructs.Cpp(src) as file:
+      gemms[0].gen_code(file)
+      return src.getvalue()
+
+  def test_non_square_transposed_b(self):
+    vm = vm_factory(arch='sm_60', backend='cuda', fp_type='float')
+    coordinates = [[0, 0], [2, 1], [1, 3], [4, 5], [8, 2], [5, 5]]
+    mat_a = SparseMatrix(num_rows=9, num_cols=6, addressing='none', coordinates=coordinates)
+    # Note: B^T has more columns than B
+    mat_b = DenseMatrix(num_rows=20, num_cols=6, addressing='strided')
+    mat_c = DenseMatrix(num_rows=9, num_cols=20, addressing='strided')
+
+    for kernel_type in [GemmKernelType.SPARSE_DENSE_SHR_MEM_BASED, GemmKernelType.SPARSE_DENSE_SHR_MEM_LOOPED]:
+      gen = generate_gemm(vm, mat_a, mat_b, mat_c, kernel_type=kernel_type, trans_b=True, beta=1.0)
+      # Note: each column of C gets computed by a thread
+      self.assertIn('if (threadIdx.x < 20) {', self._get_gemm_code(gen))
+      self.assertNotIn('if (threadIdx.x < 6) {', self._get_gemm_code(gen))
+
+      _, data, results = run_gemm(gen)
+      self.assertTrue(np.allclose(view(mat_c, results['C']), compute_gemm(gen, data), atol=1e-5),
+                      msg=f'{kernel_type}')
+
+
+if __name__ == '__main__':
+  unittest.main()
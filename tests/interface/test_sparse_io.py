@@ -0,0 +1,102 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from gemmforge import load_sparse_matrix, GenerationError
+
+
+class TestSparseIO(unittest.TestCase):
+
+  def setUp(self):
+    self._tmp_dir = tempfile.mkdtemp()
+
+    # [[1, 0, 2],
+    #  [0, 0, 3],
+    #  [4, 5, 0]] given in the column-major storage order
+    self._coordinates = [[0, 0], [2, 0], [2, 1], [0, 2], [1, 2]]
+    self._values = [1.0, 4.0, 5.0, 2.0, 3.0]
+
+  def tearDown(self):
+    shutil.rmtree(self._tmp_dir)
+
+  def _write(self, name, content):
+    path = os.path.join(self._tmp_dir, name)
+    with open(path, 'w') as file:
+      file.write(content)
+    return path
+
+  def _check(self, matrix, with_values=True):
+    self.assertEqual((matrix.num_rows, matrix.num_cols), (3, 3))
+    self.assertEqual(matrix.get_coordinate_array().tolist(), self._coordinates)
+    if with_values:
+      self.assertEqual(list(matrix.get_values()), self._values)
+    else:
+      self.assertIsNone(matrix.get_values())
+
+  def test_json(self):
+    descr = {'rows': 3, 'cols': 3, 'entries': self._coordinates, 'values': self._values}
+    path = self._write('matrix.json', json.dumps(descr))
+    self._check(load_sparse_matrix(path, 'none'))
+    self._check(load_sparse_matrix(path, 'none', with_values=False), with_values=False)
+
+    path = self._write('broken.json', json.dumps({'rows': 3, 'cols': 3}))
+    self.assertRaises(GenerationError, load_sparse_matrix, path, 'none')
+
+  def test_matrix_market(self):
+    entries = '\n'.join([f'{row + 1} {col + 1} {value}' for (row, col), value in zip(self._coordinates,
+                                                                                    self._values)])
+    path = self._write('matrix.mtx', '%%MatrixMarket matrix coordinate real general\n'
+                                     '% a comment\n'
+                                     f'3 3 5\n{entries}\n')
+    self._check(load_sparse_matrix(path, 'strided'))
+
+    entries = '\n'.join([f'{row + 1} {col + 1}' for row, col in self._coordinates])
+    path = self._write('pattern.mtx', f'%%MatrixMarket matrix coordinate pattern general\n3 3 5\n{entries}\n')
+    self._check(load_sparse_matrix(path, 'strided'), with_values=False)
+
+  def test_symmetric_matrix_market(self):
+    path = self._write('symmetric.mtx', '%%MatrixMarket matrix coordinate real symmetric\n'
+                                        '3 3 3\n1 1 1.0\n3 1 2.0\n3 2 3.0\n')
+    matrix = load_sparse_matrix(path, 'none')
+    self.assertEqual(matrix.get_coordinate_array().tolist(), [[0, 0], [2, 0], [2, 1], [0, 2], [1, 2]])
+    self.assertEqual(list(matrix.get_values()), [1.0, 2.0, 3.0, 2.0, 3.0])
+
+    path = self._write('array.mtx', '%%MatrixMarket matrix array real general\n1 1\n1.0\n')
+    self.assertRaises(GenerationError, load_sparse_matrix, path, 'none')
+
+  def test_broken_matrix_market(self):
+    banner = '%%MatrixMarket matrix coordinate real general\n'
+    for name, content in [('header_only.mtx', f'{banner}% a comment\n'),
+                          ('truncated.mtx', f'{banner}3 3 2\n1 1 1.0\n'),
+                          ('ragged.mtx', f'{banner}3 3 2\n1 1 1.0\n2 2\n'),
+                          ('garbage.mtx', f'{banner}3 3 1\n1 1 abc\n')]:
+      path = self._write(name, content)
+      self.assertRaises(GenerationError, load_sparse_matrix, path, 'none')
+
+  def test_npz(self):
+    coordinates = np.array(self._coordinates, dtype=np.int32)
+    values = np.array(self._values)
+    shape = np.array([3, 3])
+
+    path = os.path.join(self._tmp_dir, 'coo.npz')
+    np.savez(path, format=np.array('coo'), shape=shape, row=coordinates[:, 0], col=coordinates[:, 1], data=values)
+    matrix = load_sparse_matrix(path, 'none')
+    self._check(matrix)
+    self.assertIsInstance(matrix.get_coordinates(), np.ndarray)
+
+    path = os.path.join(self._tmp_dir, 'csc.npz')
+    np.savez_compressed(path, format=np.array('csc'), shape=shape, indptr=np.array([0, 2, 3, 5]),
+                        indices=coordinates[:, 0], data=values)
+    self._check(load_sparse_matrix(path, 'none'))
+
+    path = os.path.join(self._tmp_dir, 'csr.npz')
+    np.savez(path, format=np.array('csr'), shape=shape, indptr=np.array([0, 2, 3, 5]),
+             indices=np.array([0, 2, 2, 0, 1]), data=np.array([1.0, 2.0, 3.0, 4.0, 5.0]))
+    matrix = load_sparse_matrix(path, 'none', with_values=False)
+    self.assertEqual(matrix.get_coordinate_array().tolist(), [[0, 0], [0, 2], [1, 2], [2, 0], [2, 1]])
+
+  def test_unknown_format(self):
+    path = self._write('matrix.txt', '')
+    self.assertRaises(GenerationError, load_sparse_matrix, path, 'none')
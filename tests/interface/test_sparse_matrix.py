@@ -0,0 +1,78 @@
+import unittest
+import numpy as np
+from gemmforge import SparseMatrix
+
+
+class TestSparseMatrix(unittest.TestCase):
+
+  def setUp(self):
+    # [[1, 0, 2],
+    #  [0, 0, 3],
+    #  [4, 5, 0]] given in the column-major storage order
+    self._coordinates = [[0, 0], [2, 0], [2, 1], [0, 2], [1, 2]]
+    self._matrix = SparseMatrix(num_rows=3, num_cols=3, addressing='strided',
+                                coordinates=self._coordinates, values=[1, 4, 5, 2, 3])
+
+  def test_find_1d_offset(self):
+    for index, (row, col) in enumerate(self._coordinates):
+      self.assertEqual(self._matrix.find_1d_offset(row, col), index)
+    self.assertRaises(AssertionError, self._matrix.find_1d_offset, 1, 1)
+
+  def test_csr(self):
+    row_ptr, col_indices, storage_indices = self._matrix.get_csr()
+    self.assertEqual(row_ptr.tolist(), [0, 2, 3, 5])
+    self.assertEqual(col_indices.tolist(), [0, 2, 2, 0, 1])
+    self.assertEqual(storage_indices.tolist(), [0, 3, 4, 1, 2])
+    self.assertEqual(col_indices.dtype, np.int32)
+
+    values = self._matrix.get_values()
+    self.assertEqual([values[index] for index in storage_indices], [1, 2, 3, 4, 5])
+
+  def test_csc(self):
+    col_ptr, row_indices, storage_indices = self._matrix.get_csc()
+    self.assertEqual(col_ptr.tolist(), [0, 2, 3, 5])
+    self.assertEqual(row_indices.tolist(), [0, 2, 2, 0, 1])
+    self.assertEqual(storage_indices.tolist(), [0, 1, 2, 3, 4])
+
+  def test_num_non_zero_rows_and_cols(self):
+    # Note: pins the values of the original implementation, i.e., the row count starts at 1
+    matrix = SparseMatrix(num_rows=4, num_cols=3, addressing='strided', coordinates=[[0, 0], [2, 0], [2, 1]])
+    self.assertEqual(matrix.num_max_non_zero_cols, 2)
+    self.assertEqual(matrix.num_max_non_zero_rows, 3)
+    self.assertEqual(matrix.get_actual_num_max_nonzero_cols(), 2)
+    self.assertEqual(matrix.get_actual_num_max_nonzero_rows(), 2)
+
+  def test_csr_matches_coo_per_row(self):
+    row_ptr, col_indices, _ = self._matrix.get_csr()
+    for row, cols in enumerate(self._matrix.get_coo_per_row()):
+      self.assertEqual(col_indices[row_ptr[row]:row_ptr[row + 1]].tolist(), cols)
+
+  def test_lazy_views(self):
+    matrix = SparseMatrix(num_rows=3, num_cols=3, addressing='strided', coordinates=self._coordinates)
+    self.assertIsNone(matrix._dense_representation)
+    self.assertIsNone(matrix._coo_per_col)
+    self.assertEqual(matrix.get_coo_per_col(), [[0, 2], [2], [0, 1]])
+    self.assertEqual(matrix.dense_representation, [['X', 0, 'X'], [0, 0, 'X'], ['X', 'X', 0]])
+    self.assertEqual(self._matrix.dense_representation[2], [4, 5, 0])
+
+  def test_numpy_input(self):
+    matrix = SparseMatrix(num_rows=3, num_cols=3, addressing='strided',
+                          coordinates=np.array(self._coordinates),
+                          values=np.array([1.0, 4.0, 5.0, 2.0, 3.0]))
+    self.assertEqual(matrix.get_fingerprint(), self._matrix.get_fingerprint())
+    self.assertEqual(matrix.find_1d_offset(1, 2), 4)
+
+  def test_fingerprint(self):
+    same = SparseMatrix(num_rows=3, num_cols=3, addressing='strided',
+                        coordinates=self._coordinates, values=[1, 4, 5, 2, 3])
+    self.assertEqual(same.get_fingerprint(), self._matrix.get_fingerprint())
+
+    other_values = SparseMatrix(num_rows=3, num_cols=3, addressing='strided',
+                                coordinates=self._coordinates, values=[1, 4, 5, 2, 7])
+    self.assertNotEqual(other_values.get_fingerprint(), self._matrix.get_fingerprint())
+    self.assertEqual(other_values.get_fingerprint(with_values=False),
+                     self._matrix.get_fingerprint(with_values=False))
+
+    other_order = SparseMatrix(num_rows=3, num_cols=3, addressing='strided',
+                               coordinates=list(reversed(self._coordinates)))
+    self.assertNotEqual(other_order.get_fingerprint(), self._matrix.get_fingerprint(with_values=False))
@@ -0,0 +1,162 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from gemmforge import DenseMatrix, SparseMatrix, GemmGenerator, GemmSpec, GenerationError, AddMatrix, CopyTo
+from gemmforge.vm import vm_factory
+from gemmforge.tuning import Autotuner, FakeTimer, CommandTimer, TuningDatabase, SearchSpace, BenchmarkHarness
+
+
+class TestTuning(unittest.TestCase):
+
+  def setUp(self):
+    self._vm = vm_factory(arch='sm_60', backend='cuda', fp_type='float')
+    self._tmp_dir = tempfile.mkdtemp()
+    self._database = TuningDatabase(os.path.join(self._tmp_dir, 'tuning.json'))
+
+  def tearDown(self):
+    shutil.rmtree(self._tmp_dir)
+
+  def _make_spec(self, **options):
+    mat_a = DenseMatrix(num_rows=56, num_cols=9, addressing='strided', bbox=[0, 0, 56, 9])
+    mat_b = DenseMatrix(num_rows=9, num_cols=9, addressing='none', bbox=[0, 0, 9, 9])
+    mat_c = DenseMatrix(num_rows=56, num_cols=9, addressing='strided', bbox=[0, 0, 56, 9])
+    return GemmSpec(False, False, mat_a, mat_b, mat_c, alpha=1.0, beta=1.0, **options)
+
+  def _make_generator(self, spec):
+    gen = GemmGenerator(self._vm, spec.kernel_type, **spec.options)
+    gen.set_cache(None)
+    gen.set_tuning_database(self._database)
+    gen.set(spec.trans_a, spec.trans_b, spec.mat_a, spec.mat_b, spec.mat_c, spec.alpha, spec.beta)
+    return gen
+
+  def test_fake_timer_is_deterministic(self):
+    results = []
+    for _ in range(2):
+      timer = FakeTimer()
+      results.append(Autotuner(self._vm, timer).tune(self._make_spec()))
+      self.assertEqual(timer.num_measurements, len(results[-1].measurements))
+
+    self.assertEqual(str(results[0].variant), str(results[1].variant))
+    self.assertEqual(results[0].time, results[1].time)
+    self.assertEqual(results[0].time, min([time for _, time in results[0].measurements]))
+
+  def test_identical_kernels_are_measured_once(self):
+    search_space = SearchSpace(kernel_types=['shr_mem'],
+                               num_ops_per_block=[None],
+                               loader_strategies=[None],
+                               unroll_thresholds=[None, 2, 8, 16])
+    result = Autotuner(self._vm, FakeTimer(), search_space=search_space).tune(self._make_spec())
+
+    # Note: B is too small to be loaded in more than 2 hops
+    self.assertEqual(len(result.measurements), 1)
+
+  def test_database_is_consulted(self):
+    spec = self._make_spec()
+    default_gen = self._make_generator(spec)
+    self.assertIsNone(default_gen.get_tuning_record())
+
+    tuner = Autotuner(self._vm, FakeTimer(), self._database)
+    result = tuner.tune(spec)
+
+    database = TuningDatabase(self._database.path)
+    self.assertEqual(len(database), 1)
+    tuned_gen = self._make_generator(spec)
+    tuned_gen.set_tuning_database(database)
+    tuned_gen.set(spec.trans_a, spec.trans_b, spec.mat_a, spec.mat_b, spec.mat_c, spec.alpha, spec.beta)
+
+    record = tuned_gen.get_tuning_record()
+    self.assertIsNotNone(record)
+    self.assertEqual(record.options, result.variant.to_dict())
+    self.assertNotEqual(tuned_gen.get_base_name(), default_gen.get_base_name())
+    tuned_gen.generate()
+    if result.variant.num_ops_per_block is not None:
+      self.assertGreaterEqual(tuned_gen._num_ops_per_block, result.variant.num_ops_per_block)
+
+    # explicitly requested options take precedence over tuning results
+    explicit_gen = self._make_generator(self._make_spec(loader_strategy='exact'))
+    self.assertIsNone(explicit_gen.get_tuning_record())
+
+  def test_env_database_is_shared(self):
+    with mock.patch.dict(os.environ, {TuningDatabase.ENV_PATH: self._database.path}):
+      first_gen = GemmGenerator(self._vm)
+      second_gen = GemmGenerator(self._vm)
+      self.assertIsNotNone(first_gen._tuning_db)
+      self.assertIs(first_gen._tuning_db, second_gen._tuning_db)
+      self.assertEqual(len(first_gen._tuning_db), 0)
+
+      # the file gets parsed again once it has been changed
+      Autotuner(self._vm, FakeTimer(), self._database).tune(self._make_spec())
+      tuned_gen = GemmGenerator(self._vm)
+      self.assertIsNot(tuned_gen._tuning_db, first_gen._tuning_db)
+      self.assertEqual(len(tuned_gen._tuning_db), 1)
+      self.assertIs(GemmGenerator(self._vm)._tuning_db, tuned_gen._tuning_db)
+
+  def test_slower_records_are_ignored(self):
+    spec = self._make_spec()
+    Autotuner(self._vm, FakeTimer(), self._database).tune(spec)
+    with open(self._database.path) as file:
+      before = json.load(file)
+
+    Autotuner(self._vm, FakeTimer(noise=0.0), self._database,
+              search_space=SearchSpace(kernel_types=['register_only'])).tune(spec)
+    slow_time = TuningDatabase(self._database.path).lookup(self._make_generator(spec)).time
+    self.assertLessEqual(slow_time, before['records'][list(before['records'])[0]]['time'])
+
+  def test_requested_num_ops_per_block(self):
+    gen = self._make_generator(self._make_spec(num_ops_per_block=3))
+    gen.generate()
+    self.assertEqual(gen._num_ops_per_block, 3)
+    self.assertIn('block(64, 3, 1)', gen.get_launcher())
+
+    gen = self._make_generator(self._make_spec(num_ops_per_block=1024))
+    self.assertRaises(GenerationError, gen.generate)
+
+  def test_harness(self):
+    gen = self._make_generator(self._make_spec())
+    gen.generate()
+    work_dir = os.path.join(self._tmp_dir, 'bench')
+    BenchmarkHarness(self._vm, num_elements=100, num_repeats=10).write(gen, work_dir)
+
+    self.assertEqual(set(os.listdir(work_dir)), {'kernels.cu', 'kernels.h', 'main.cu', 'config.cmake'})
+    with open(os.path.join(work_dir, 'main.cu')) as file:
+      main = file.read()
+    self.assertIn(f'{gen.get_base_name()}(A, 0, B, 0, C, 0, 100, nullptr, nullptr);', main)
+    self.assertIn('"elapsed time: "', main)
+    self.assertIn('"roofline time: "', main)
+
+  def test_harness_with_epilogues(self):
+    mat_d = DenseMatrix(num_rows=56, num_cols=9, addressing='pointer_based', bbox=[0, 0, 56, 9])
+    mat_e = DenseMatrix(num_rows=56, num_cols=9, addressing='strided', bbox=[0, 0, 56, 9])
+    spec = self._make_spec()
+    spec.epilogues = [AddMatrix(mat_d), CopyTo(mat_e)]
+    gen = spec.make_generator(self._vm)
+    gen.set_cache(None)
+    gen.generate()
+
+    main = BenchmarkHarness(self._vm, num_elements=100, num_repeats=10).get_main(gen)
+    self.assertIn(f'{gen.get_base_name()}(A, 0, B, 0, C, 0, E0, 0, E1, 0, 100, nullptr, nullptr);', main)
+    self.assertIn('auto** E0 = static_cast<const float**>(', main)
+    self.assertIn('auto* E1 = static_cast<float*>(', main)
+    self.assertIn('device.api->freeMem(E0_data);', main)
+    self.assertIn('device.api->freeMem(E1);', main)
+
+  def test_command_timer(self):
+    timer = CommandTimer(build_command='true', run_command='echo "elapsed time: 12.5, ns"', num_repeats=2)
+    self.assertEqual(timer.measure(None, None, self._tmp_dir), 12.5)
+
+    timer = CommandTimer(build_command='false', run_command='true')
+    self.assertRaises(GenerationError, timer.measure, None, None, self._tmp_dir)
+
+  def test_sparse_is_rejected(self):
+    mat_a = DenseMatrix(num_rows=9, num_cols=9, addressing='strided', bbox=[0, 0, 9, 9])
+    mat_b = SparseMatrix(num_rows=9, num_cols=9, addressing='strided',
+                         coordinates=[[0, 0], [1, 1]], values=None)
+    mat_c = DenseMatrix(num_rows=9, num_cols=9, addressing='strided', bbox=[0, 0, 9, 9])
+    spec = GemmSpec(False, False, mat_a, mat_b, mat_c, alpha=1.0, beta=0.0)
+    self.assertRaises(GenerationError, Autotuner(self._vm, FakeTimer()).tune, spec)
+
+    self.assertRaises(GenerationError, Autotuner(self._vm, FakeTimer()).tune,
+                      self._make_spec(num_k_stages=2))
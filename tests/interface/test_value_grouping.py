@@ -0,0 +1,42 @@
+import unittest
+from gemmforge import DenseMatrix, SparseMatrix, GemmKernelType
+from gemmforge.instructions.value_grouping import group_by_magnitude, gen_grouped_update
+from gemmforge.vm import vm_factory
+from helpers import generate_gemm
+
+
+class TestValueGrouping(unittest.TestCase):
+
+  def test_groups(self):
+    groups = group_by_magnitude([(2.0, 'a'), (1.0, 'b'), (-2.0, 'c'), (0.0, 'd'), (-1.0, 'e')])
+    self.assertEqual(groups, [(2.0, [(False, 'a'), (True, 'c')]),
+                              (1.0, [(False, 'b'), (True, 'e')])])
+
+  def test_updates(self):
+    self.assertEqual(gen_grouped_update('r', 1.0, [(False, 'a'), (True, 'b')], 'f'), 'r += a - b;')
+    self.assertEqual(gen_grouped_update('r', 1.0, [(True, 'a')], 'f'), 'r -= a;')
+    self.assertEqual(gen_grouped_update('r', 0.5, [(True, 'a'), (True, 'b')], 'f'), 'r -= 0.5f * (a + b);')
+    self.assertEqual(gen_grouped_update('r', 0.5, [(True, 'a'), (False, 'b')], ''), 'r += 0.5 * (-a + b);')
+    self.assertEqual(gen_grouped_update('r', 3.0, [(False, 'a')], 'f'), 'r += 3.0f * a;')
+
+  def test_kernels(self):
+    vm = vm_factory(arch='sm_60', backend='cuda', fp_type='float')
+    coordinates = [[0, 0], [1, 0], [2, 0], [0, 1], [2, 1]]
+    values = [1.0, -1.0, 0.5, -2.0, -2.0]
+
+    gen = generate_gemm(vm,
+                        DenseMatrix(num_rows=8, num_cols=3, addressing='strided'),
+                        SparseMatrix(3, 2, 'none', coordinates, values),
+                        DenseMatrix(num_rows=8, num_cols=2, addressing='strided'),
+                        kernel_type=GemmKernelType.DENSE_SPARSE_SHR_MEM_BASED)
+    kernel = gen.get_kernel()
+    self.assertIn('reg0[0] += glb_A[threadIdx.x + 0 * 8] - glb_A[threadIdx.x + 1 * 8];', kernel)
+    self.assertIn('reg0[1] -= 2.0f * (glb_A[threadIdx.x + 0 * 8] + glb_A[threadIdx.x + 2 * 8]);', kernel)
+
+    gen = generate_gemm(vm,
+                        SparseMatrix(3, 2, 'none', coordinates, values),
+                        DenseMatrix(num_rows=2, num_cols=8, addressing='strided'),
+                        DenseMatrix(num_rows=3, num_cols=8, addressing='strided'),
+                        kernel_type=GemmKernelType.SPARSE_DENSE_SHR_MEM_BASED)
+    self.assertIn('reg0[0] -= 2.0f * shrRegion0[threadIdx.x * 2 + 1];', gen.get_kernel())
+    self.assertIn('reg0[1] -= shrRegion0[threadIdx.x * 2 + 0];', gen.get_kernel())
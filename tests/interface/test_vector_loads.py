@@ -0,0 +1,161 @@
+import re
+import unittest
+import numpy as np
+from io import StringIO
+from gemmforge import DenseMatrix, GemmKernelType, constructs
+from gemmforge.instructions.loaders import ExtendedPatchLoader, ExactPatchLoader
+from gemmforge.instructions.loaders.abstract_loader import AbstractShrMemLoader
+from gemmforge.vm import vm_factory
+from helpers import generate_gemm, run_gemm, compute_gemm, view
+
+
+def _trace_loader(loader, is_aligned):
+  """Executes the emitted code of a (cuda) loader for each thread of a block.
+
+  Returns:
+    the shr. mem. element written by each copy, mapped to the glb. mem. element it is read from,
+    and the number of vector accesses
+  """
+  src = StringIO()
+  with constructs.Cpp(src) as file:
+    loader.gen_code(file)
+    code = src.getvalue()
+
+  shr_name, glb_name = loader._dest.name, loader.get_src().name
+  vector = re.compile(rf'reinterpret_cast<(\w+)\*>\({shr_name}\)\[(.+)\] = '
+                      rf'reinterpret_cast<const \w+\*>\({glb_name}\)\[(.+)\];')
+  scalar = re.compile(rf'{shr_name}\[(.+)\] = {glb_name}\[(.+)\];')
+
+  # Note: translates the code into python. Each opened scope starts with `pass`
+  program, depth = [], 0
+  for line in code.splitlines():
+    line = line.strip().replace('threadIdx.x', 'tid')
+    if not line or line.startswith(('//', '#', 'float', 'double')):
+      continue
+    indent = '  ' * depth
+    if line == '}':
+      depth -= 1
+      continue
+    elif line.endswith('{'):
+      header = line[:-1].strip()
+      if header.startswith('for'):
+        bound = re.match(r'for \(int i = 0; i < (\d+); \+\+i\)', header).group(1)
+        program.append(f'{indent}for i in range({bound}):')
+      elif header == 'else':
+        program.append(f'{indent}else:')
+      elif header.startswith('if'):
+        condition = header[len('if ('):-1]
+        condition = 'is_aligned' if 'sizeof' in condition else condition
+        program.append(f'{indent}if {condition}:')
+      else:
+        program.append(f'{indent}if True:')
+      program.append(f'{indent}  pass')
+      depth += 1
+    elif vector.match(line):
+      _, shr_addr, glb_addr = vector.match(line).groups()
+      program.append(f'{indent}copy({shr_addr}, {glb_addr}, width)')
+    else:
+      shr_addr, glb_addr = scalar.match(line).groups()
+      program.append(f'{indent}copy({shr_addr}, {glb_addr}, 1)')
+
+  accesses = {}
+  stats = {'num_vector_accesses': 0}
+
+  def copy(shr_addr, glb_addr, width):
+    if width > 1:
+      stats['num_vector_accesses'] += 1
+    for element in range(width):
+      shr_element = shr_addr * width + element
+      assert shr_element not in accesses, f'element {shr_element} is written twice'
+      accesses[shr_element] = glb_addr * width + element
+
+  width = loader.get_vector_width()
+  for tid in range(loader._num_threads):
+    exec('\n'.join(program), {'tid': tid, 'is_aligned': is_aligned, 'copy': copy, 'width': width})
+  return accesses, stats['num_vector_accesses']
+
+
+class TestVectorLoads(unittest.TestCase):
+
+  def _generate(self, vm, num_rows, lead_dim, trans_a=False):
+    if trans_a:
+      mat_a = DenseMatrix(num_rows=8, num_cols=num_rows, addressing='strided', bbox=[0, 0, 8, num_rows])
+    else:
+      mat_a = DenseMatrix(num_rows=num_rows, num_cols=8, addressing='strided', bbox=[0, 0, num_rows, 8])
+    mat_b = DenseMatrix(num_rows=lead_dim, num_cols=12, addressing='strided', bbox=[0, 0, 8, 12])
+    mat_c = DenseMatrix(num_rows=num_rows, num_cols=12, addressing='strided', bbox=[0, 0, num_rows, 12])
+    gen = generate_gemm(vm, mat_a, mat_b, mat_c, kernel_type=GemmKernelType.SHR_MEM_BASED, trans_a=trans_a)
+
+    _, data, results = run_gemm(gen)
+    self.assertTrue(np.allclose(view(mat_c, results['C']), compute_gemm(gen, data), atol=1e-5))
+    return gen
+
+  def _get_loader(self, gen, matrix):
+    loaders = [instr for instr in gen.get_instructions()
+               if isinstance(instr, AbstractShrMemLoader) and instr.get_src().obj is matrix]
+    self.assertEqual(len(loaders), 1)
+    return loaders[0]
+
+  def _check_accesses(self, loader, expected):
+    """Checks that both the vectorized and the fallback code paths copy exactly `expected`"""
+    vector_accesses, num_vector_accesses = _trace_loader(loader, is_aligned=True)
+    fallback_accesses, num_fallback_vector_accesses = _trace_loader(loader, is_aligned=False)
+    self.assertEqual(vector_accesses, expected)
+    self.assertEqual(fallback_accesses, expected)
+    self.assertEqual(num_fallback_vector_accesses, 0)
+    if loader.get_vector_width() > 1:
+      self.assertGreater(num_vector_accesses, 0)
+
+  def _check_exact_accesses(self, loader):
+    num_rows, num_cols = loader._dest.data_view.rows, loader._dest.data_view.columns
+    lead_dim = loader.get_src().data_view.lead_dim
+    self._check_accesses(loader, {col * num_rows + row: col * lead_dim + row
+                                  for col in range(num_cols) for row in range(num_rows)})
+
+  def test_extended_loader(self):
+    vm = vm_factory(arch='sm_60', backend='cuda', fp_type='float')
+    gen = self._generate(vm, num_rows=16, lead_dim=8)
+    loader = self._get_loader(gen, gen._mat_b)
+    self.assertIsInstance(loader, ExtendedPatchLoader)
+    self.assertEqual(loader.get_vector_width(), 4)
+    self._check_accesses(loader, {index: index for index in range(8 * 12)})
+
+    vm = vm_factory(arch='sm_60', backend='cuda', fp_type='double')
+    gen = self._generate(vm, num_rows=16, lead_dim=8)
+    loader = self._get_loader(gen, gen._mat_b)
+    self.assertEqual(loader.get_vector_width(), 2)
+    self._check_accesses(loader, {index: index for index in range(8 * 12)})
+
+  def test_exact_loader(self):
+    vm = vm_factory(arch='sm_60', backend='cuda', fp_type='float')
+    gen = self._generate(vm, num_rows=16, lead_dim=40)
+    loader = self._get_loader(gen, gen._mat_b)
+    self.assertIsInstance(loader, ExactPatchLoader)
+    self.assertEqual(loader.get_vector_width(), 4)
+    self._check_exact_accesses(loader)
+
+    # Note: a column is not a multiple of 16 bytes
+    gen = self._generate(vm, num_rows=16, lead_dim=42)
+    loader = self._get_loader(gen, gen._mat_b)
+    self.assertEqual(loader.get_vector_width(), 2)
+    self._check_exact_accesses(loader)
+
+    gen = self._generate(vm, num_rows=16, lead_dim=41)
+    loader = self._get_loader(gen, gen._mat_b)
+    self.assertEqual(loader.get_vector_width(), 1)
+    self._check_exact_accesses(loader)
+
+  def test_no_vectorization(self):
+    # transposing loads are never vectorized
+    vm = vm_factory(arch='sm_60', backend='cuda', fp_type='float')
+    gen = self._generate(vm, num_rows=16, lead_dim=40, trans_a=True)
+    self.assertEqual(self._get_loader(gen, gen._mat_a).get_vector_width(), 1)
+
+    # alignment of local memory is not guaranteed in sycl
+    vm = vm_factory(arch='sm_60', backend='hipsycl', fp_type='float')
+    gen = self._generate(vm, num_rows=16, lead_dim=8)
+    self.assertEqual(self._get_loader(gen, gen._mat_b).get_vector_width(), 1)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -77,6 +77,9 @@ for suite in suites:
       if kernel_type == "shr_mem":
         dense_kernel_type = GemmKernelType.SHR_MEM_BASED
         sparse_dense_kernel_type = GemmKernelType.SPARSE_DENSE_SHR_MEM_BASED
+      elif kernel_type == "shr_mem_looped":
+        dense_kernel_type = GemmKernelType.SHR_MEM_BASED
+        sparse_dense_kernel_type = GemmKernelType.SPARSE_DENSE_SHR_MEM_LOOPED
       elif kernel_type == "register_only":
         dense_kernel_type = GemmKernelType.REGISTER_ONLY_BASED
         sparse_dense_kernel_type = GemmKernelType.SPARSE_DENSE_REGISTER_ONLY_BASED